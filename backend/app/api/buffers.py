@@ -8,6 +8,11 @@ from sqlalchemy.orm import Session
 from ..database import get_db
 from ..database.schemas import BufferDB
 from ..models.buffer import Buffer, BufferCreate, BufferUpdate
+from ..services.change_log import ChangeSet
+from ..services.conditional import EntityETag, entity_etag, etag_headers, list_etag
+from ..services.line_version import line_versions
+from ..services.response_cache import cached_list
+from ..services.serialization import json_response
 
 router = APIRouter()
 
@@ -15,40 +20,45 @@ router = APIRouter()
 @router.get("/", response_model=List[Buffer])
 def list_buffers(
     production_line_id: str = None,
+    etag: str = Depends(list_etag),
     db: Session = Depends(get_db)
 ):
-    """获取所有缓冲区，可按产线过滤"""
-    query = db.query(BufferDB)
-    if production_line_id:
-        query = query.filter(BufferDB.production_line_id == production_line_id)
-    buffers = query.all()
+    """获取所有缓冲区，可按产线过滤（按产线过滤时返回缓存的响应，产线变更后失效）"""
+    def build():
+        query = db.query(BufferDB)
+        if production_line_id:
+            query = query.filter(BufferDB.production_line_id == production_line_id)
+        buffers = query.all()
     
-    # 转换JSON字段
-    result = []
-    for buf in buffers:
-        buf_dict = {
-            "id": buf.id,
-            "production_line_id": buf.production_line_id,
-            "name": buf.name,
-            "capacity": buf.capacity,
-            "current_level": buf.current_level,
-            "location": buf.location,
-            "position": json.loads(buf.position) if buf.position else None,
-            "properties": json.loads(buf.properties) if buf.properties else {}
-        }
-        result.append(buf_dict)
+        # 转换JSON字段
+        result = []
+        for buf in buffers:
+            buf_dict = {
+                "id": buf.id,
+                "production_line_id": buf.production_line_id,
+                "name": buf.name,
+                "capacity": buf.capacity,
+                "current_level": buf.current_level,
+                "location": buf.location,
+                "position": json.loads(buf.position) if buf.position else None,
+                "properties": json.loads(buf.properties) if buf.properties else {}
+            }
+            result.append(buf_dict)
     
-    return result
+        return result
+
+    return cached_list("buffers", production_line_id, Buffer, build, etag_headers(etag))
 
 
 @router.get("/{buf_id}", response_model=Buffer)
-def get_buffer(buf_id: str, db: Session = Depends(get_db)):
+def get_buffer(buf_id: str, etag: EntityETag = Depends(entity_etag), db: Session = Depends(get_db)):
     """获取指定缓冲区"""
     buf = db.query(BufferDB).filter(BufferDB.id == buf_id).first()
     if not buf:
         raise HTTPException(status_code=404, detail=f"缓冲区 {buf_id} 不存在")
+    etag.tag(buf.production_line_id)
     
-    return {
+    return json_response(Buffer, {
         "id": buf.id,
         "production_line_id": buf.production_line_id,
         "name": buf.name,
@@ -57,7 +67,7 @@ def get_buffer(buf_id: str, db: Session = Depends(get_db)):
         "location": buf.location,
         "position": json.loads(buf.position) if buf.position else None,
         "properties": json.loads(buf.properties) if buf.properties else {}
-    }
+    }, etag.headers)
 
 
 @router.post("/", response_model=Buffer, status_code=201)
@@ -75,8 +85,11 @@ def create_buffer(buf: BufferCreate, db: Session = Depends(get_db)):
         properties=json.dumps(buf.properties) if buf.properties else None
     )
     db.add(db_buf)
-    db.commit()
+    changes = ChangeSet(db, buf.production_line_id)
+    changes.create(db_buf)
+    changes.commit()
     db.refresh(db_buf)
+    line_versions.bump(db_buf.production_line_id)
     
     return {
         "id": db_buf.id,
@@ -100,6 +113,8 @@ def update_buffer(
     db_buf = db.query(BufferDB).filter(BufferDB.id == buf_id).first()
     if not db_buf:
         raise HTTPException(status_code=404, detail=f"缓冲区 {buf_id} 不存在")
+    changes = ChangeSet(db, db_buf.production_line_id)
+    changes.update(db_buf)
     
     update_data = buf_update.dict(exclude_unset=True)
     for field, value in update_data.items():
@@ -110,8 +125,9 @@ def update_buffer(
         else:
             setattr(db_buf, field, value)
     
-    db.commit()
+    changes.commit()
     db.refresh(db_buf)
+    line_versions.bump(db_buf.production_line_id)
     
     return {
         "id": db_buf.id,
@@ -132,7 +148,11 @@ def delete_buffer(buf_id: str, db: Session = Depends(get_db)):
     if not db_buf:
         raise HTTPException(status_code=404, detail=f"缓冲区 {buf_id} 不存在")
     
+    line_id = db_buf.production_line_id
+    changes = ChangeSet(db, line_id)
+    changes.delete(db_buf)
     db.delete(db_buf)
-    db.commit()
+    changes.commit()
+    line_versions.bump(line_id)
     return None
 
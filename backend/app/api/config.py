@@ -1,7 +1,7 @@
 """全局配置API - 工艺步骤类型、工作站类型、物料类型"""
 import uuid
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Body
 from sqlalchemy.orm import Session
 
 from ..database import get_db
@@ -11,6 +11,8 @@ from ..models.config import (
     WorkstationType, WorkstationTypeCreate,
     MaterialType, MaterialTypeCreate
 )
+from ..services.config_validator import ConfigValidator
+from ..services.type_cache import type_cache
 
 router = APIRouter()
 
@@ -39,6 +41,7 @@ def create_operation_type(data: OperationTypeCreate, db: Session = Depends(get_d
     )
     db.add(db_type)
     db.commit()
+    type_cache.invalidate()
     db.refresh(db_type)
     return OperationType(id=db_type.id, name=db_type.name, description=db_type.description)
 
@@ -61,6 +64,7 @@ def update_operation_type(type_id: str, data: OperationTypeCreate, db: Session =
     db_type.name = data.name
     db_type.description = data.description
     db.commit()
+    type_cache.invalidate()
     db.refresh(db_type)
     return OperationType(id=db_type.id, name=db_type.name, description=db_type.description)
 
@@ -74,6 +78,7 @@ def delete_operation_type(type_id: str, db: Session = Depends(get_db)):
     
     db.delete(db_type)
     db.commit()
+    type_cache.invalidate()
     return {"message": "删除成功"}
 
 
@@ -100,6 +105,7 @@ def create_workstation_type(data: WorkstationTypeCreate, db: Session = Depends(g
     )
     db.add(db_type)
     db.commit()
+    type_cache.invalidate()
     db.refresh(db_type)
     return WorkstationType(id=db_type.id, name=db_type.name, description=db_type.description)
 
@@ -121,6 +127,7 @@ def update_workstation_type(type_id: str, data: WorkstationTypeCreate, db: Sessi
     db_type.name = data.name
     db_type.description = data.description
     db.commit()
+    type_cache.invalidate()
     db.refresh(db_type)
     return WorkstationType(id=db_type.id, name=db_type.name, description=db_type.description)
 
@@ -134,6 +141,7 @@ def delete_workstation_type(type_id: str, db: Session = Depends(get_db)):
     
     db.delete(db_type)
     db.commit()
+    type_cache.invalidate()
     return {"message": "删除成功"}
 
 
@@ -160,6 +168,7 @@ def create_material_type(data: MaterialTypeCreate, db: Session = Depends(get_db)
     )
     db.add(db_type)
     db.commit()
+    type_cache.invalidate()
     db.refresh(db_type)
     return MaterialType(id=db_type.id, name=db_type.name, description=db_type.description)
 
@@ -181,6 +190,7 @@ def update_material_type(type_id: str, data: MaterialTypeCreate, db: Session = D
     db_type.name = data.name
     db_type.description = data.description
     db.commit()
+    type_cache.invalidate()
     db.refresh(db_type)
     return MaterialType(id=db_type.id, name=db_type.name, description=db_type.description)
 
@@ -194,4 +204,13 @@ def delete_material_type(type_id: str, db: Session = Depends(get_db)):
     
     db.delete(db_type)
     db.commit()
+    type_cache.invalidate()
     return {"message": "删除成功"}
+
+
+# ============ 配置文件验证 API ============
+
+@router.post("/validate")
+def validate_config(config_data: Dict[str, Any] = Body(...)):
+    """验证配置JSON，错误以 JSON Pointer + 错误码的形式返回"""
+    return ConfigValidator.validate(config_data)
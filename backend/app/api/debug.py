@@ -0,0 +1,22 @@
+"""调试API路由"""
+from fastapi import APIRouter
+
+from ..services.request_metrics import request_metrics
+
+router = APIRouter()
+
+
+@router.get("/requests")
+def get_request_metrics():
+    """
+    按路由汇总的请求统计：请求数、耗时分位数和直方图、每个请求的平均/最大SQL语句数和SQL耗时，
+    以及最近的慢请求（含重复次数最多的SQL语句，用于定位N+1查询）
+    """
+    return request_metrics.summary()
+
+
+@router.delete("/requests")
+def reset_request_metrics():
+    """清空请求统计"""
+    request_metrics.reset()
+    return {"message": "请求统计已清空"}
@@ -0,0 +1,59 @@
+"""实验设计（参数扫描）API路由"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..database.schemas import ProductionLineDB
+from ..models.experiment import ExperimentCreate, BufferAllocationCreate
+from ..services.config_service import ConfigService
+from ..services.experiment_service import ExperimentService
+from ..services.buffer_allocation_service import BufferAllocationService
+from ..services.job_manager import BUFFER_ALLOCATION, DOE, JobQueueFull, job_manager
+from ..utils.fingerprint import line_fingerprint
+
+router = APIRouter()
+
+
+@router.post("/doe", status_code=202)
+def run_experiment(request: ExperimentCreate, db: Session = Depends(get_db)):
+    """
+    提交参数扫描实验，在后台工作进程中运行，返回任务；
+    响应表通过 /jobs/{job_id}/result 查询，排队已满时返回429
+
+    以相同的 study_id（或相同的请求内容）重新提交时，从断点继续，
+    已有结果的场景不再重复仿真。
+    """
+    line = db.query(ProductionLineDB).filter(ProductionLineDB.id == request.production_line_id).first()
+    if not line:
+        raise HTTPException(status_code=404, detail="产线不存在")
+
+    try:
+        config = ConfigService.build_config(db, request.production_line_id)
+        ExperimentService.check(config, request)
+        return job_manager.submit_task(DOE, request, config, line_fingerprint(config))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/buffer-allocation", status_code=202)
+def optimize_buffer_allocation(request: BufferAllocationCreate, db: Session = Depends(get_db)):
+    """
+    提交缓冲区容量分配优化（总容量预算下使吞吐量最大），在后台工作进程中运行，返回任务；
+    优化结果通过 /jobs/{job_id}/result 查询，排队已满时返回429
+
+    重复次数按OCBA集中分配给有希望的候选方案，各方案并行评估。
+    """
+    line = db.query(ProductionLineDB).filter(ProductionLineDB.id == request.production_line_id).first()
+    if not line:
+        raise HTTPException(status_code=404, detail="产线不存在")
+
+    try:
+        config = ConfigService.build_config(db, request.production_line_id)
+        BufferAllocationService.check(config, request)
+        return job_manager.submit_task(BUFFER_ALLOCATION, request, config, line_fingerprint(config))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
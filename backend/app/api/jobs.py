@@ -0,0 +1,110 @@
+"""仿真任务API路由"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..database.schemas import ProductionLineDB
+from ..models.simulation import SimulationRunCreate
+from ..services.config_service import ConfigService
+from ..services.job_manager import JobQueueFull, job_manager
+from ..utils.fingerprint import line_fingerprint
+
+router = APIRouter()
+
+
+@router.post("", status_code=202)
+def submit_job(request: SimulationRunCreate, db: Session = Depends(get_db)):
+    """提交仿真任务，在后台工作进程中运行；排队已满时返回429"""
+    line = db.query(ProductionLineDB).filter(ProductionLineDB.id == request.production_line_id).first()
+    if not line:
+        raise HTTPException(status_code=404, detail="产线不存在")
+
+    try:
+        config = ConfigService.build_config(db, request.production_line_id)
+        return job_manager.submit(request, config, line_fingerprint(config))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("")
+def list_jobs(status: Optional[str] = None):
+    """任务列表，可按状态过滤：queued / running / paused / completed / failed / cancelled"""
+    return job_manager.list(status)
+
+
+@router.get("/stats")
+def get_job_stats():
+    """工作进程数上限及运行中、已暂停、排队中的任务数"""
+    return job_manager.stats()
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    """任务状态和进度"""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return job
+
+
+@router.get("/{job_id}/result")
+def get_job_result(job_id: str):
+    """已完成任务的统计结果"""
+    try:
+        result = job_manager.result(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return result
+
+
+@router.get("/{job_id}/bottlenecks")
+def get_job_bottlenecks(job_id: str):
+    """任务的瓶颈报告，运行中可随时查询（每段推进后更新）"""
+    try:
+        report = job_manager.bottlenecks(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if report is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return report
+
+
+@router.post("/{job_id}/pause")
+def pause_job(job_id: str):
+    """暂停任务"""
+    try:
+        job = job_manager.pause(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return job
+
+
+@router.post("/{job_id}/resume")
+def resume_job(job_id: str):
+    """继续已暂停的任务"""
+    try:
+        job = job_manager.resume(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return job
+
+
+@router.post("/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """取消任务，运行中的任务立即终止"""
+    try:
+        job = job_manager.cancel(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return job
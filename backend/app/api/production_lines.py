@@ -1,30 +1,50 @@
 """产线API路由"""
 import uuid
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from ..database import get_db
 from ..database.schemas import ProductionLineDB
-from ..models.production_line import ProductionLine, ProductionLineCreate, ProductionLineUpdate
+from ..models.production_line import ProductionLine, ProductionLineCreate, ProductionLineUpdate, ProductionLineClone
+from ..services.change_log import ChangeLogService, change_feed
+from ..services.clone_service import CloneService
+from ..services.diff_service import DiffService
+from ..services.conditional import all_lines_etag, etag_headers, path_line_etag
+from ..services.config_service import ConfigService
+from ..services.line_version import line_versions
+from ..services.routing_service import RoutingService
+from ..services.serialization import json_response
+from ..utils.fingerprint import line_fingerprint
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[ProductionLine])
-def list_production_lines(db: Session = Depends(get_db)):
+def list_production_lines(etag: str = Depends(all_lines_etag), db: Session = Depends(get_db)):
     """获取所有产线"""
     lines = db.query(ProductionLineDB).all()
-    return lines
+    return json_response(List[ProductionLine], lines, etag_headers(etag))
 
 
 @router.get("/{line_id}", response_model=ProductionLine)
-def get_production_line(line_id: str, db: Session = Depends(get_db)):
+def get_production_line(line_id: str, etag: str = Depends(path_line_etag), db: Session = Depends(get_db)):
     """获取指定产线"""
     line = db.query(ProductionLineDB).filter(ProductionLineDB.id == line_id).first()
     if not line:
         raise HTTPException(status_code=404, detail=f"产线 {line_id} 不存在")
-    return line
+    return json_response(ProductionLine, line, etag_headers(etag))
+
+
+@router.get("/{line_id}/fingerprint")
+def get_production_line_fingerprint(line_id: str, etag: str = Depends(path_line_etag), db: Session = Depends(get_db)):
+    """获取产线指纹：规范化配置的哈希，不受画布布局影响"""
+    line = db.query(ProductionLineDB).filter(ProductionLineDB.id == line_id).first()
+    if not line:
+        raise HTTPException(status_code=404, detail=f"产线 {line_id} 不存在")
+    config = ConfigService.build_config(db, line_id)
+    return {"production_line_id": line_id, "fingerprint": line_fingerprint(config)}
 
 
 @router.post("/", response_model=ProductionLine, status_code=201)
@@ -39,6 +59,7 @@ def create_production_line(line: ProductionLineCreate, db: Session = Depends(get
     db.add(db_line)
     db.commit()
     db.refresh(db_line)
+    line_versions.bump(line_id)
     return db_line
 
 
@@ -59,6 +80,7 @@ def update_production_line(
     
     db.commit()
     db.refresh(db_line)
+    line_versions.bump(line_id)
     return db_line
 
 
@@ -71,5 +93,86 @@ def delete_production_line(line_id: str, db: Session = Depends(get_db)):
     
     db.delete(db_line)
     db.commit()
+    RoutingService.invalidate(line_id)
+    change_feed.publish(line_id)
     return None
 
+
+@router.post("/{line_id}/clone", response_model=ProductionLine, status_code=201)
+def clone_production_line(
+    line_id: str,
+    clone: Optional[ProductionLineClone] = None,
+    db: Session = Depends(get_db)
+):
+    """复制产线及其下的全部实体（用于方案对比），实体ID为 "<原ID>@<新产线ID>"，不复制仿真记录"""
+    clone = clone or ProductionLineClone()
+    try:
+        return CloneService.clone_line(db, line_id, clone.name, clone.description)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get("/{line_id}/diff/{other_line_id}")
+def diff_production_lines(line_id: str, other_line_id: str, db: Session = Depends(get_db)):
+    """对比两条产线：other_line_id 相对 line_id 新增、删除、修改的实体及参数变化，附带已保存仿真结果的KPI变化"""
+    try:
+        return DiffService.diff_lines(db, line_id, other_line_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+def _get_line(db: Session, line_id: str) -> ProductionLineDB:
+    line = db.query(ProductionLineDB).filter(ProductionLineDB.id == line_id).first()
+    if not line:
+        raise HTTPException(status_code=404, detail=f"产线 {line_id} 不存在")
+    return line
+
+
+@router.get("/{line_id}/changes")
+def get_production_line_changes(line_id: str, since: int = 0, limit: int = 1000, db: Session = Depends(get_db)):
+    """获取序号大于 since 的变更日志（按序号升序，每次最多 limit 条），head 为当前最新序号"""
+    _get_line(db, line_id)
+    return ChangeLogService.changes_since(db, line_id, since, max(1, min(limit, 1000)))
+
+
+@router.get("/{line_id}/changes/stream")
+def stream_production_line_changes(
+    line_id: str,
+    since: Optional[int] = None,
+    last_event_id: Optional[int] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    以SSE推送产线的变更
+
+    从 since（断线重连时浏览器携带的 Last-Event-ID 优先）之后的变更开始，未指定时只推送之后的新变更。
+    """
+    _get_line(db, line_id)
+    db.close()
+    start = last_event_id if last_event_id is not None else since
+    return StreamingResponse(
+        ChangeLogService.stream(db, line_id, start),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/{line_id}/undo")
+def undo_production_line_change(line_id: str, db: Session = Depends(get_db)):
+    """撤销产线最近一次仍生效的编辑，返回新追加的变更日志条目"""
+    _get_line(db, line_id)
+    entry = ChangeLogService.undo(db, line_id)
+    if entry is None:
+        raise HTTPException(status_code=409, detail="没有可撤销的操作")
+    return entry
+
+
+@router.post("/{line_id}/redo")
+def redo_production_line_change(line_id: str, db: Session = Depends(get_db)):
+    """重做产线最近一次撤销的编辑，返回新追加的变更日志条目"""
+    _get_line(db, line_id)
+    entry = ChangeLogService.redo(db, line_id)
+    if entry is None:
+        raise HTTPException(status_code=409, detail="没有可重做的操作")
+    return entry
+
@@ -1,8 +1,9 @@
 """流转路径API路由"""
 import uuid
 import json
-from typing import List
+from typing import Dict, List
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from ..database import get_db
@@ -11,6 +12,11 @@ from ..models.routine import (
     Routine, RoutineCreate, RoutineUpdate, RoutineStep,
     RoutineStepBase, RoutineStepLink, RoutineStepLinkBase, RoutineStepLinkCreate
 )
+from ..services.change_log import ChangeSet
+from ..services.conditional import EntityETag, entity_etag, etag_headers, list_etag
+from ..services.line_version import line_versions
+from ..services.response_cache import cached_list
+from ..services.serialization import json_response
 
 router = APIRouter()
 
@@ -44,50 +50,66 @@ def link_to_dict(link: RoutineStepLinkDB) -> dict:
     }
 
 
+def _routine_line(db: Session, routine_id: str) -> str:
+    """流转路径所属的产线ID（步骤和连接的变更记入该产线的变更日志）"""
+    return db.query(RoutineDB.production_line_id).filter(RoutineDB.id == routine_id).scalar()
+
+
 @router.get("/", response_model=List[Routine])
 def list_routines(
     production_line_id: str = None,
+    etag: str = Depends(list_etag),
     db: Session = Depends(get_db)
 ):
-    """获取所有流转路径，可按产线过滤"""
-    query = db.query(RoutineDB)
-    if production_line_id:
-        query = query.filter(RoutineDB.production_line_id == production_line_id)
-    routines = query.all()
-    
-    # 转换为响应格式
-    result = []
-    for routine in routines:
-        steps = db.query(RoutineStepDB).filter(
-            RoutineStepDB.routine_id == routine.id
-        ).order_by(RoutineStepDB.step_id).all()
-        
-        links = db.query(RoutineStepLinkDB).filter(
-            RoutineStepLinkDB.routine_id == routine.id
-        ).all()
-        
-        routine_dict = {
-            "id": routine.id,
-            "production_line_id": routine.production_line_id,
-            "name": routine.name,
-            "material_type": routine.material_type,
-            "start_location": routine.start_location,
-            "end_location": routine.end_location,
-            "description": routine.description,
-            "steps": [step_to_dict(step) for step in steps],
-            "step_links": [link_to_dict(link) for link in links]
-        }
-        result.append(routine_dict)
+    """获取所有流转路径，可按产线过滤（按产线过滤时返回缓存的响应，产线变更后失效）"""
+    def build():
+        query = db.query(RoutineDB)
+        if production_line_id:
+            query = query.filter(RoutineDB.production_line_id == production_line_id)
+        routines = query.all()
+
+        # 步骤和连线各用一次查询取出后按流转路径分组，查询次数与流转路径数无关
+        step_query = db.query(RoutineStepDB)
+        link_query = db.query(RoutineStepLinkDB)
+        if production_line_id:
+            routine_ids = select(RoutineDB.id).where(RoutineDB.production_line_id == production_line_id)
+            step_query = step_query.filter(RoutineStepDB.routine_id.in_(routine_ids))
+            link_query = link_query.filter(RoutineStepLinkDB.routine_id.in_(routine_ids))
+        steps: Dict[str, List[dict]] = {}
+        for step in step_query.order_by(RoutineStepDB.step_id):
+            steps.setdefault(step.routine_id, []).append(step_to_dict(step))
+        links: Dict[str, List[dict]] = {}
+        for link in link_query:
+            links.setdefault(link.routine_id, []).append(link_to_dict(link))
+
+        # 转换为响应格式
+        result = []
+        for routine in routines:
+            routine_dict = {
+                "id": routine.id,
+                "production_line_id": routine.production_line_id,
+                "name": routine.name,
+                "material_type": routine.material_type,
+                "start_location": routine.start_location,
+                "end_location": routine.end_location,
+                "description": routine.description,
+                "steps": steps.get(routine.id, []),
+                "step_links": links.get(routine.id, [])
+            }
+            result.append(routine_dict)
     
-    return result
+        return result
+
+    return cached_list("routines", production_line_id, Routine, build, etag_headers(etag))
 
 
 @router.get("/{routine_id}", response_model=Routine)
-def get_routine(routine_id: str, db: Session = Depends(get_db)):
+def get_routine(routine_id: str, etag: EntityETag = Depends(entity_etag), db: Session = Depends(get_db)):
     """获取指定流转路径"""
     routine = db.query(RoutineDB).filter(RoutineDB.id == routine_id).first()
     if not routine:
         raise HTTPException(status_code=404, detail=f"流转路径 {routine_id} 不存在")
+    etag.tag(routine.production_line_id)
     
     steps = db.query(RoutineStepDB).filter(
         RoutineStepDB.routine_id == routine_id
@@ -97,7 +119,7 @@ def get_routine(routine_id: str, db: Session = Depends(get_db)):
         RoutineStepLinkDB.routine_id == routine_id
     ).all()
     
-    return {
+    return json_response(Routine, {
         "id": routine.id,
         "production_line_id": routine.production_line_id,
         "name": routine.name,
@@ -107,7 +129,7 @@ def get_routine(routine_id: str, db: Session = Depends(get_db)):
         "description": routine.description,
         "steps": [step_to_dict(step) for step in steps],
         "step_links": [link_to_dict(link) for link in links]
-    }
+    }, etag.headers)
 
 
 @router.post("/", response_model=Routine, status_code=201)
@@ -124,6 +146,8 @@ def create_routine(routine: RoutineCreate, db: Session = Depends(get_db)):
         description=routine.description
     )
     db.add(db_routine)
+    changes = ChangeSet(db, routine.production_line_id)
+    changes.create(db_routine)
     
     # 创建步骤
     steps_data = []
@@ -146,6 +170,7 @@ def create_routine(routine: RoutineCreate, db: Session = Depends(get_db)):
             position=json.dumps(step.position.dict()) if step.position else None
         )
         db.add(db_step)
+        changes.create(db_step)
         steps_data.append({
             "id": step_id,
             "step_id": step.step_id,
@@ -162,8 +187,9 @@ def create_routine(routine: RoutineCreate, db: Session = Depends(get_db)):
             "position": step.position.dict() if step.position else None
         })
     
-    db.commit()
+    changes.commit()
     db.refresh(db_routine)
+    line_versions.bump(db_routine.production_line_id)
     
     return {
         "id": db_routine.id,
@@ -188,11 +214,14 @@ def update_routine(
     db_routine = db.query(RoutineDB).filter(RoutineDB.id == routine_id).first()
     if not db_routine:
         raise HTTPException(status_code=404, detail=f"流转路径 {routine_id} 不存在")
+    changes = ChangeSet(db, db_routine.production_line_id)
     
     update_data = routine_update.dict(exclude_unset=True)
     
     # 如果更新步骤，先删除旧步骤
     if "steps" in update_data and update_data["steps"] is not None:
+        for old_step in db.query(RoutineStepDB).filter(RoutineStepDB.routine_id == routine_id).all():
+            changes.delete(old_step)
         db.query(RoutineStepDB).filter(RoutineStepDB.routine_id == routine_id).delete()
         
         # 创建新步骤
@@ -214,15 +243,18 @@ def update_routine(
                 next_step=step.get("next_step")
             )
             db.add(db_step)
+            changes.create(db_step)
         
         del update_data["steps"]
     
     # 更新Routine基本信息
+    changes.update(db_routine)
     for field, value in update_data.items():
         setattr(db_routine, field, value)
     
-    db.commit()
+    changes.commit()
     db.refresh(db_routine)
+    line_versions.bump(db_routine.production_line_id)
     
     # 获取最新步骤
     steps = db.query(RoutineStepDB).filter(
@@ -272,8 +304,17 @@ def delete_routine(routine_id: str, db: Session = Depends(get_db)):
     if not db_routine:
         raise HTTPException(status_code=404, detail=f"流转路径 {routine_id} 不存在")
     
+    line_id = db_routine.production_line_id
+    # 步骤和连接随流转路径级联删除，一并记入变更日志
+    changes = ChangeSet(db, line_id)
+    for link in db.query(RoutineStepLinkDB).filter(RoutineStepLinkDB.routine_id == routine_id).all():
+        changes.delete(link)
+    for step in db.query(RoutineStepDB).filter(RoutineStepDB.routine_id == routine_id).all():
+        changes.delete(step)
+    changes.delete(db_routine)
     db.delete(db_routine)
-    db.commit()
+    changes.commit()
+    line_versions.bump(line_id)
     return None
 
 
@@ -304,8 +345,11 @@ def create_step(routine_id: str, step: RoutineStepBase, db: Session = Depends(ge
         position=json.dumps(step.position.dict()) if step.position else None
     )
     db.add(db_step)
-    db.commit()
+    changes = ChangeSet(db, routine.production_line_id)
+    changes.create(db_step)
+    changes.commit()
     db.refresh(db_step)
+    line_versions.bump(routine.production_line_id)
     
     return step_to_dict(db_step)
 
@@ -319,6 +363,9 @@ def update_step(routine_id: str, step_id: str, step: RoutineStepBase, db: Sessio
     ).first()
     if not db_step:
         raise HTTPException(status_code=404, detail=f"步骤 {step_id} 不存在")
+    line_id = _routine_line(db, routine_id)
+    changes = ChangeSet(db, line_id)
+    changes.update(db_step)
     
     db_step.step_id = step.step_id
     db_step.workstation_id = step.workstation_id
@@ -333,8 +380,9 @@ def update_step(routine_id: str, step_id: str, step: RoutineStepBase, db: Sessio
     db_step.next_step = step.next_step
     db_step.position = json.dumps(step.position.dict()) if step.position else None
     
-    db.commit()
+    changes.commit()
     db.refresh(db_step)
+    line_versions.bump(line_id)
     
     return step_to_dict(db_step)
 
@@ -349,14 +397,22 @@ def delete_step(routine_id: str, step_id: str, db: Session = Depends(get_db)):
     if not db_step:
         raise HTTPException(status_code=404, detail=f"步骤 {step_id} 不存在")
     
+    line_id = _routine_line(db, routine_id)
+    changes = ChangeSet(db, line_id)
+    
     # 同时删除相关的连接
-    db.query(RoutineStepLinkDB).filter(
+    links = db.query(RoutineStepLinkDB).filter(
         (RoutineStepLinkDB.from_step_id == step_id) | 
         (RoutineStepLinkDB.to_step_id == step_id)
-    ).delete(synchronize_session=False)
+    )
+    for link in links.all():
+        changes.delete(link)
+    links.delete(synchronize_session=False)
     
+    changes.delete(db_step)
     db.delete(db_step)
-    db.commit()
+    changes.commit()
+    line_versions.bump(line_id)
     return None
 
 
@@ -383,8 +439,11 @@ def create_link(routine_id: str, link: RoutineStepLinkBase, db: Session = Depend
         to_step_id=link.to_step_id
     )
     db.add(db_link)
-    db.commit()
+    changes = ChangeSet(db, routine.production_line_id)
+    changes.create(db_link)
+    changes.commit()
     db.refresh(db_link)
+    line_versions.bump(routine.production_line_id)
     
     return link_to_dict(db_link)
 
@@ -399,7 +458,11 @@ def delete_link(routine_id: str, link_id: str, db: Session = Depends(get_db)):
     if not db_link:
         raise HTTPException(status_code=404, detail=f"连接 {link_id} 不存在")
     
+    line_id = _routine_line(db, routine_id)
+    changes = ChangeSet(db, line_id)
+    changes.delete(db_link)
     db.delete(db_link)
-    db.commit()
+    changes.commit()
+    line_versions.bump(line_id)
     return None
 
@@ -0,0 +1,138 @@
+"""仿真运行API路由"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..database.schemas import ProductionLineDB
+from ..models.simulation import CoSimulationCreate, OeeReportCreate, SimulationRunCreate
+from ..services.config_service import ConfigService
+from ..services.job_manager import COSIM, OEE, JobQueueFull, job_manager
+from ..services.simulation_service import SimulationService
+from ..services.result_cache import result_cache
+from ..services.run_registry import RunRegistryService
+from ..utils.fingerprint import line_fingerprint
+
+router = APIRouter()
+
+
+@router.post("/run")
+def run_simulation(request: SimulationRunCreate, db: Session = Depends(get_db)):
+    """
+    运行一次仿真，相同产线指纹、种子和参数的结果直接从缓存返回；save 为真时保存运行记录
+
+    仿真在请求线程中运行，只接受仿真时长×工作站数不超过 SYNC_RUN_LIMIT（默认200万）的短仿真，
+    更大的仿真通过 /api/jobs 提交。
+    """
+    line = db.query(ProductionLineDB).filter(ProductionLineDB.id == request.production_line_id).first()
+    if not line:
+        raise HTTPException(status_code=404, detail="产线不存在")
+
+    try:
+        return SimulationService.run(db, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/oee", status_code=202)
+def oee_report(request: OeeReportCreate, db: Session = Depends(get_db)):
+    """
+    OEE报告：按不同种子重复仿真，给出每次的OEE（可用率×性能率×质量率）及跨重复的汇总
+
+    在后台工作进程中运行，返回任务；报告通过 /jobs/{job_id}/result 查询，排队已满时返回429
+    """
+    line = db.query(ProductionLineDB).filter(ProductionLineDB.id == request.production_line_id).first()
+    if not line:
+        raise HTTPException(status_code=404, detail="产线不存在")
+
+    try:
+        config = ConfigService.build_config(db, request.production_line_id)
+        SimulationService.check_oee(config, request)
+        return job_manager.submit_task(OEE, request, config, line_fingerprint(config))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/cosim", status_code=202)
+def run_cosimulation(request: CoSimulationCreate, db: Session = Depends(get_db)):
+    """
+    多产线协同仿真：每条产线一个工作进程，产线间以运输连接交换物料
+
+    在后台工作进程中运行，返回任务；结果通过 /jobs/{job_id}/result 查询，排队已满时返回429
+    """
+    line_ids = SimulationService.line_ids(request)
+    if not line_ids:
+        raise HTTPException(status_code=400, detail="没有参与协同仿真的产线")
+    found = {
+        row.id for row in db.query(ProductionLineDB.id).filter(ProductionLineDB.id.in_(line_ids)).all()
+    }
+    missing = [line_id for line_id in line_ids if line_id not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"产线不存在: {', '.join(missing)}")
+
+    try:
+        configs = SimulationService.build_configs(db, request)
+        SimulationService.check_cosimulation(configs, request)
+        return job_manager.submit_task(COSIM, request, configs, None)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/cache")
+def get_cache_stats():
+    """结果缓存的条目数和占用大小"""
+    return result_cache.stats()
+
+
+@router.delete("/cache")
+def clear_cache():
+    """清空结果缓存"""
+    result_cache.clear()
+    return {"message": "缓存已清空"}
+
+
+@router.get("/runs")
+def list_runs(production_line_id: Optional[str] = None, db: Session = Depends(get_db)):
+    """已保存的运行记录列表，可按产线过滤"""
+    return RunRegistryService.list_runs(db, production_line_id)
+
+
+@router.get("/runs/{run_id}")
+def get_run(run_id: str, db: Session = Depends(get_db)):
+    """运行记录详情及可查询的时间序列清单"""
+    run = RunRegistryService.get_run(db, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="运行记录不存在")
+    return run
+
+
+@router.get("/runs/{run_id}/series")
+def get_run_series(
+    run_id: str,
+    entity_type: str = Query(..., description="实体类型：buffer / workstation / line"),
+    entity_id: str = Query(..., description="实体ID，产线级序列为产线ID"),
+    metric: str = Query(..., description="指标：level / busy / blocked / wip"),
+    start: Optional[float] = Query(None, description="时间窗口起点（秒）"),
+    end: Optional[float] = Query(None, description="时间窗口终点（秒）"),
+    max_points: int = Query(1000, ge=3, le=20000, description="返回的最大点数"),
+    db: Session = Depends(get_db)
+):
+    """读取时间窗口内的降采样时间序列"""
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=400, detail="时间窗口起点不能大于终点")
+    series = RunRegistryService.get_series(db, run_id, entity_type, entity_id, metric, start, end, max_points)
+    if series is None:
+        raise HTTPException(status_code=404, detail="时间序列不存在")
+    return series
+
+
+@router.delete("/runs/{run_id}", status_code=204)
+def delete_run(run_id: str, db: Session = Depends(get_db)):
+    """删除运行记录及其时间序列"""
+    if not RunRegistryService.delete_run(db, run_id):
+        raise HTTPException(status_code=404, detail="运行记录不存在")
+    return None
@@ -8,6 +8,11 @@ from sqlalchemy.orm import Session
 from ..database import get_db
 from ..database.schemas import TransportPathDB
 from ..models.transport_path import TransportPath, TransportPathCreate, TransportPathUpdate
+from ..services.change_log import ChangeSet
+from ..services.conditional import EntityETag, entity_etag, etag_headers, list_etag
+from ..services.response_cache import cached_list
+from ..services.serialization import json_response
+from ..services.routing_service import RoutingService
 
 router = APIRouter()
 
@@ -15,39 +20,55 @@ router = APIRouter()
 @router.get("/", response_model=List[TransportPath])
 def list_transport_paths(
     production_line_id: str = None,
+    etag: str = Depends(list_etag),
     db: Session = Depends(get_db)
 ):
-    """获取所有运输路径，可按产线过滤"""
-    query = db.query(TransportPathDB)
-    if production_line_id:
-        query = query.filter(TransportPathDB.production_line_id == production_line_id)
-    paths = query.all()
+    """获取所有运输路径，可按产线过滤（按产线过滤时返回缓存的响应，产线变更后失效）"""
+    def build():
+        query = db.query(TransportPathDB)
+        if production_line_id:
+            query = query.filter(TransportPathDB.production_line_id == production_line_id)
+        paths = query.all()
     
-    # 转换JSON字段
-    result = []
-    for path in paths:
-        path_dict = {
-            "id": path.id,
-            "production_line_id": path.production_line_id,
-            "from_location": path.from_location,
-            "to_location": path.to_location,
-            "transport_time": path.transport_time,
-            "capacity": path.capacity,
-            "properties": json.loads(path.properties) if path.properties else {}
-        }
-        result.append(path_dict)
+        # 转换JSON字段
+        result = []
+        for path in paths:
+            path_dict = {
+                "id": path.id,
+                "production_line_id": path.production_line_id,
+                "from_location": path.from_location,
+                "to_location": path.to_location,
+                "transport_time": path.transport_time,
+                "capacity": path.capacity,
+                "properties": json.loads(path.properties) if path.properties else {}
+            }
+            result.append(path_dict)
     
-    return result
+        return result
+
+    return cached_list("transport_paths", production_line_id, TransportPath, build, etag_headers(etag))
+
+
+@router.get("/routing-table")
+def get_routing_table(production_line_id: str, etag: str = Depends(list_etag), db: Session = Depends(get_db)):
+    """获取产线的最短运输时间表和下一跳表"""
+    try:
+        table = RoutingService.get_routing_table(db, production_line_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"production_line_id": production_line_id, **table.to_dict()}
 
 
 @router.get("/{path_id}", response_model=TransportPath)
-def get_transport_path(path_id: str, db: Session = Depends(get_db)):
+def get_transport_path(path_id: str, etag: EntityETag = Depends(entity_etag), db: Session = Depends(get_db)):
     """获取指定运输路径"""
     path = db.query(TransportPathDB).filter(TransportPathDB.id == path_id).first()
     if not path:
         raise HTTPException(status_code=404, detail=f"运输路径 {path_id} 不存在")
+    etag.tag(path.production_line_id)
     
-    return {
+    return json_response(TransportPath, {
         "id": path.id,
         "production_line_id": path.production_line_id,
         "from_location": path.from_location,
@@ -55,7 +76,7 @@ def get_transport_path(path_id: str, db: Session = Depends(get_db)):
         "transport_time": path.transport_time,
         "capacity": path.capacity,
         "properties": json.loads(path.properties) if path.properties else {}
-    }
+    }, etag.headers)
 
 
 @router.post("/", response_model=TransportPath, status_code=201)
@@ -72,8 +93,11 @@ def create_transport_path(path: TransportPathCreate, db: Session = Depends(get_d
         properties=json.dumps(path.properties) if path.properties else None
     )
     db.add(db_path)
-    db.commit()
+    changes = ChangeSet(db, path.production_line_id)
+    changes.create(db_path)
+    changes.commit()
     db.refresh(db_path)
+    RoutingService.invalidate(db_path.production_line_id)
     
     return {
         "id": db_path.id,
@@ -96,6 +120,8 @@ def update_transport_path(
     db_path = db.query(TransportPathDB).filter(TransportPathDB.id == path_id).first()
     if not db_path:
         raise HTTPException(status_code=404, detail=f"运输路径 {path_id} 不存在")
+    changes = ChangeSet(db, db_path.production_line_id)
+    changes.update(db_path)
     
     update_data = path_update.dict(exclude_unset=True)
     for field, value in update_data.items():
@@ -104,8 +130,9 @@ def update_transport_path(
         else:
             setattr(db_path, field, value)
     
-    db.commit()
+    changes.commit()
     db.refresh(db_path)
+    RoutingService.invalidate(db_path.production_line_id)
     
     return {
         "id": db_path.id,
@@ -125,7 +152,11 @@ def delete_transport_path(path_id: str, db: Session = Depends(get_db)):
     if not db_path:
         raise HTTPException(status_code=404, detail=f"运输路径 {path_id} 不存在")
     
+    line_id = db_path.production_line_id
+    changes = ChangeSet(db, line_id)
+    changes.delete(db_path)
     db.delete(db_path)
-    db.commit()
+    changes.commit()
+    RoutingService.invalidate(line_id)
     return None
 
@@ -8,6 +8,11 @@ from sqlalchemy.orm import Session
 from ..database import get_db
 from ..database.schemas import WorkstationDB
 from ..models.workstation import Workstation, WorkstationCreate, WorkstationUpdate
+from ..services.change_log import ChangeSet
+from ..services.conditional import EntityETag, entity_etag, etag_headers, list_etag
+from ..services.line_version import line_versions
+from ..services.response_cache import cached_list
+from ..services.serialization import json_response
 
 router = APIRouter()
 
@@ -15,43 +20,48 @@ router = APIRouter()
 @router.get("/", response_model=List[Workstation])
 def list_workstations(
     production_line_id: str = None,
+    etag: str = Depends(list_etag),
     db: Session = Depends(get_db)
 ):
-    """获取所有工作站，可按产线过滤"""
-    query = db.query(WorkstationDB)
-    if production_line_id:
-        query = query.filter(WorkstationDB.production_line_id == production_line_id)
-    workstations = query.all()
+    """获取所有工作站，可按产线过滤（按产线过滤时返回缓存的响应，产线变更后失效）"""
+    def build():
+        query = db.query(WorkstationDB)
+        if production_line_id:
+            query = query.filter(WorkstationDB.production_line_id == production_line_id)
+        workstations = query.all()
     
-    # 转换JSON字段
-    result = []
-    for ws in workstations:
-        ws_dict = {
-            "id": ws.id,
-            "production_line_id": ws.production_line_id,
-            "name": ws.name,
-            "type": ws.type,
-            "capacity": ws.capacity,
-            "processing_time": json.loads(ws.processing_time),
-            "status": ws.status,
-            "input_buffer_id": ws.input_buffer_id,
-            "output_buffer_id": ws.output_buffer_id,
-            "position": json.loads(ws.position) if ws.position else None,
-            "properties": json.loads(ws.properties) if ws.properties else {}
-        }
-        result.append(ws_dict)
+        # 转换JSON字段
+        result = []
+        for ws in workstations:
+            ws_dict = {
+                "id": ws.id,
+                "production_line_id": ws.production_line_id,
+                "name": ws.name,
+                "type": ws.type,
+                "capacity": ws.capacity,
+                "processing_time": json.loads(ws.processing_time),
+                "status": ws.status,
+                "input_buffer_id": ws.input_buffer_id,
+                "output_buffer_id": ws.output_buffer_id,
+                "position": json.loads(ws.position) if ws.position else None,
+                "properties": json.loads(ws.properties) if ws.properties else {}
+            }
+            result.append(ws_dict)
     
-    return result
+        return result
+
+    return cached_list("workstations", production_line_id, Workstation, build, etag_headers(etag))
 
 
 @router.get("/{ws_id}", response_model=Workstation)
-def get_workstation(ws_id: str, db: Session = Depends(get_db)):
+def get_workstation(ws_id: str, etag: EntityETag = Depends(entity_etag), db: Session = Depends(get_db)):
     """获取指定工作站"""
     ws = db.query(WorkstationDB).filter(WorkstationDB.id == ws_id).first()
     if not ws:
         raise HTTPException(status_code=404, detail=f"工作站 {ws_id} 不存在")
+    etag.tag(ws.production_line_id)
     
-    return {
+    return json_response(Workstation, {
         "id": ws.id,
         "production_line_id": ws.production_line_id,
         "name": ws.name,
@@ -63,7 +73,7 @@ def get_workstation(ws_id: str, db: Session = Depends(get_db)):
         "output_buffer_id": ws.output_buffer_id,
         "position": json.loads(ws.position) if ws.position else None,
         "properties": json.loads(ws.properties) if ws.properties else {}
-    }
+    }, etag.headers)
 
 
 @router.post("/", response_model=Workstation, status_code=201)
@@ -84,8 +94,11 @@ def create_workstation(ws: WorkstationCreate, db: Session = Depends(get_db)):
         properties=json.dumps(ws.properties) if ws.properties else None
     )
     db.add(db_ws)
-    db.commit()
+    changes = ChangeSet(db, ws.production_line_id)
+    changes.create(db_ws)
+    changes.commit()
     db.refresh(db_ws)
+    line_versions.bump(db_ws.production_line_id)
     
     return {
         "id": db_ws.id,
@@ -112,6 +125,8 @@ def update_workstation(
     db_ws = db.query(WorkstationDB).filter(WorkstationDB.id == ws_id).first()
     if not db_ws:
         raise HTTPException(status_code=404, detail=f"工作站 {ws_id} 不存在")
+    changes = ChangeSet(db, db_ws.production_line_id)
+    changes.update(db_ws)
     
     update_data = ws_update.dict(exclude_unset=True)
     for field, value in update_data.items():
@@ -124,8 +139,9 @@ def update_workstation(
         else:
             setattr(db_ws, field, value)
     
-    db.commit()
+    changes.commit()
     db.refresh(db_ws)
+    line_versions.bump(db_ws.production_line_id)
     
     return {
         "id": db_ws.id,
@@ -149,7 +165,11 @@ def delete_workstation(ws_id: str, db: Session = Depends(get_db)):
     if not db_ws:
         raise HTTPException(status_code=404, detail=f"工作站 {ws_id} 不存在")
     
+    line_id = db_ws.production_line_id
+    changes = ChangeSet(db, line_id)
+    changes.delete(db_ws)
     db.delete(db_ws)
-    db.commit()
+    changes.commit()
+    line_versions.bump(line_id)
     return None
 
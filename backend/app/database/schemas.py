@@ -1,6 +1,7 @@
 """SQLAlchemy数据库模型"""
 import json
-from sqlalchemy import Column, String, Integer, Float, Text, ForeignKey, Boolean
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, Float, Text, ForeignKey, Boolean, DateTime, LargeBinary, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -19,6 +20,9 @@ class ProductionLineDB(Base):
     transport_paths = relationship("TransportPathDB", back_populates="production_line", cascade="all, delete-orphan")
     routines = relationship("RoutineDB", back_populates="production_line", cascade="all, delete-orphan")
     value_stream_configs = relationship("ValueStreamConfigDB", back_populates="production_line", cascade="all, delete-orphan")
+    simulation_runs = relationship("SimulationRunDB", back_populates="production_line", cascade="all, delete-orphan")
+    change_log = relationship("ChangeLogDB", back_populates="production_line", cascade="all, delete-orphan")
+    change_log_head = relationship("ChangeLogHeadDB", cascade="all, delete-orphan", uselist=False)
 
 
 class WorkstationDB(Base):
@@ -168,3 +172,73 @@ class MaterialTypeDB(Base):
     name = Column(String, nullable=False, unique=True)
     description = Column(Text, nullable=True)
 
+
+class SimulationRunDB(Base):
+    """仿真运行记录表"""
+    __tablename__ = "simulation_runs"
+
+    id = Column(String, primary_key=True, index=True)
+    production_line_id = Column(String, ForeignKey("production_lines.id"), nullable=False, index=True)
+    fingerprint = Column(String, nullable=False, index=True)  # 运行时的产线指纹
+    seed = Column(Integer, default=0)
+    params = Column(Text, nullable=False)  # JSON格式存储
+    status = Column(String, default="completed")
+    created_at = Column(DateTime, default=datetime.now)
+    duration = Column(Float, nullable=False)  # 仿真时长（秒）
+    wall_time = Column(Float, nullable=True)  # 运行耗时（秒）
+    kpis = Column(Text, nullable=True)  # JSON格式存储 汇总KPI
+    result = Column(Text, nullable=True)  # JSON格式存储 工作站/缓冲区统计
+
+    # 关系
+    production_line = relationship("ProductionLineDB", back_populates="simulation_runs")
+    series = relationship("SimulationSeriesDB", back_populates="run", cascade="all, delete-orphan")
+
+
+class SimulationSeriesDB(Base):
+    """仿真时间序列表 - 每个实体、指标、分辨率一行，数据为压缩二进制"""
+    __tablename__ = "simulation_series"
+    __table_args__ = (
+        Index("ix_simulation_series_lookup", "run_id", "entity_type", "entity_id", "metric", "level"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(String, ForeignKey("simulation_runs.id"), nullable=False)
+    entity_type = Column(String, nullable=False)  # buffer / workstation / line
+    entity_id = Column(String, nullable=False)
+    metric = Column(String, nullable=False)  # level / busy / blocked / wip
+    level = Column(Integer, nullable=False)  # 分辨率级别，0为原始采样，越大越粗
+    points = Column(Integer, nullable=False)
+    t_start = Column(Float, nullable=False)
+    t_end = Column(Float, nullable=False)
+    data = Column(LargeBinary, nullable=False)  # 压缩二进制，见 utils.timeseries.encode_series
+
+    # 关系
+    run = relationship("SimulationRunDB", back_populates="series")
+
+
+class ChangeLogDB(Base):
+    """变更日志表 - 产线下实体的每次写操作一行，只追加"""
+    __tablename__ = "change_log"
+    __table_args__ = (
+        Index("ix_change_log_line_seq", "production_line_id", "seq", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    production_line_id = Column(String, ForeignKey("production_lines.id"), nullable=False)
+    seq = Column(Integer, nullable=False)  # 产线内单调递增的序号
+    kind = Column(String, nullable=False)  # edit / undo / redo
+    target_seq = Column(Integer, nullable=True)  # undo/redo 针对的编辑序号
+    status = Column(String, nullable=True)  # 仅编辑：applied / undone / discarded（撤销后又有新编辑，不可重做）
+    created_at = Column(DateTime, default=datetime.now)
+    changes = Column(Text, nullable=False)  # JSON格式存储 [{entity_type, entity_id, action, before, after}]
+
+    # 关系
+    production_line = relationship("ProductionLineDB", back_populates="change_log")
+
+
+class ChangeLogHeadDB(Base):
+    """变更日志序号表 - 每条产线一行，记录已分配的最大序号；追加日志时先更新该行，同一产线的写操作在此排队"""
+    __tablename__ = "change_log_heads"
+
+    production_line_id = Column(String, ForeignKey("production_lines.id"), primary_key=True)
+    seq = Column(Integer, nullable=False)
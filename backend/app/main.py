@@ -1,7 +1,12 @@
 """FastAPI应用入口"""
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import init_db
+from fastapi.responses import Response
+from .database import init_db, SessionLocal
+from .services.type_cache import type_cache
+from .services.job_manager import job_manager
+from .services.metrics import CONTENT_TYPE, MetricsService
+from .services.request_metrics import RequestMetricsMiddleware, install_sql_hooks
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -19,6 +24,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 请求耗时和SQL语句统计
+app.add_middleware(RequestMetricsMiddleware)
+install_sql_hooks()
+
 
 @app.on_event("startup")
 async def startup_event():
@@ -26,6 +35,19 @@ async def startup_event():
     init_db()
     print("数据库初始化完成")
 
+    # 预加载全局类型表
+    db = SessionLocal()
+    try:
+        type_cache.load(db)
+    finally:
+        db.close()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """应用退出时终止仿真任务的工作进程"""
+    job_manager.shutdown()
+
 
 @app.get("/")
 async def root():
@@ -43,8 +65,14 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def metrics():
+    """运行指标（Prometheus文本格式）：API进程、仿真任务、结果缓存，以及开启 ENGINE_METRICS 时的引擎统计"""
+    return Response(content=MetricsService.render(), media_type=CONTENT_TYPE)
+
+
 # 导入路由
-from .api import production_lines, workstations, buffers, transport_paths, routines, config
+from .api import production_lines, workstations, buffers, transport_paths, routines, config, experiments, simulations, jobs, debug
 
 app.include_router(production_lines.router, prefix="/api/production-lines", tags=["产线"])
 app.include_router(workstations.router, prefix="/api/workstations", tags=["工作站"])
@@ -52,4 +80,7 @@ app.include_router(buffers.router, prefix="/api/buffers", tags=["缓冲区"])
 app.include_router(transport_paths.router, prefix="/api/transport-paths", tags=["运输路径"])
 app.include_router(routines.router, prefix="/api/routines", tags=["流转路径"])
 app.include_router(config.router, prefix="/api/config", tags=["配置管理"])
-
+app.include_router(experiments.router, prefix="/api/experiments", tags=["实验设计"])
+app.include_router(simulations.router, prefix="/api/simulations", tags=["仿真运行"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["仿真任务"])
+app.include_router(debug.router, prefix="/api/debug", tags=["调试"])
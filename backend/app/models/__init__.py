@@ -1,15 +1,18 @@
 """数据模型包"""
-from .production_line import ProductionLine, ProductionLineCreate, ProductionLineUpdate
+from .production_line import ProductionLine, ProductionLineCreate, ProductionLineUpdate, ProductionLineClone
 from .workstation import Workstation, WorkstationCreate, WorkstationUpdate
 from .buffer import Buffer, BufferCreate, BufferUpdate
 from .transport_path import TransportPath, TransportPathCreate, TransportPathUpdate
 from .routine import Routine, RoutineStep, RoutineCreate, RoutineUpdate
 from .value_stream import ValueStreamConfig, ValuePoint, CostPoint
+from .simulation import SimulationParams, SimulationRunCreate, OeeReportCreate, InterLineLink, CoSimulationCreate
+from .experiment import Factor, ExperimentCreate, BufferAllocationCreate
 
 __all__ = [
     "ProductionLine",
     "ProductionLineCreate",
     "ProductionLineUpdate",
+    "ProductionLineClone",
     "Workstation",
     "WorkstationCreate",
     "WorkstationUpdate",
@@ -26,5 +29,13 @@ __all__ = [
     "ValueStreamConfig",
     "ValuePoint",
     "CostPoint",
+    "SimulationParams",
+    "SimulationRunCreate",
+    "OeeReportCreate",
+    "InterLineLink",
+    "CoSimulationCreate",
+    "Factor",
+    "ExperimentCreate",
+    "BufferAllocationCreate",
 ]
 
@@ -0,0 +1,67 @@
+"""实验设计（DOE）数据模型"""
+from typing import Optional, List, Literal
+from pydantic import BaseModel, Field, model_validator
+from .simulation import SimulationParams
+
+
+class Factor(BaseModel):
+    """实验因子：产线配置中的一个数值字段"""
+    name: Optional[str] = Field(None, description="因子名称，默认为 target.id.field")
+    target: Literal["workstation", "buffer", "transport_path", "step"] = Field(..., description="因子所在的实体类型")
+    id: str = Field(..., description="实体ID；步骤为 流转路径ID/步骤序号")
+    field: str = Field(..., description="字段路径，如 capacity、processing_time.mean")
+    low: Optional[float] = Field(None, description="下限")
+    high: Optional[float] = Field(None, description="上限")
+    levels: Optional[List[float]] = Field(None, description="离散水平，指定后优先于上下限")
+    integer: bool = Field(default=False, description="是否取整（capacity 字段总是取整）")
+
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.levels:
+            return self
+        if self.low is None or self.high is None:
+            raise ValueError("因子需要指定 levels 或 low/high")
+        if self.low > self.high:
+            raise ValueError("因子下限不能大于上限")
+        return self
+
+    @property
+    def key(self) -> str:
+        return self.name or f"{self.target}.{self.id}.{self.field}"
+
+    @property
+    def is_integer(self) -> bool:
+        return self.integer or self.field.split(".")[-1] == "capacity"
+
+
+class ExperimentCreate(BaseModel):
+    """创建参数扫描实验"""
+    production_line_id: str = Field(..., description="基准产线ID")
+    factors: List[Factor] = Field(..., min_length=1, description="实验因子")
+    design: Literal["full_factorial", "latin_hypercube", "fractional_factorial"] = Field(
+        default="full_factorial", description="设计类型"
+    )
+    samples: int = Field(default=10, ge=1, description="拉丁超立方抽样的场景数")
+    runs: Optional[int] = Field(None, ge=2, description="部分因子设计的场景数（2的幂），默认为满足III分辨率的最小值")
+    replications: int = Field(default=3, ge=1, description="每个场景的重复次数")
+    seed: int = Field(default=0, description="基础随机数种子，第r次重复在所有场景中使用同一种子（公共随机数）")
+    params: SimulationParams = Field(default_factory=SimulationParams, description="仿真参数")
+    workers: Optional[int] = Field(None, ge=1, description="并行进程数，占用同样多的任务运行名额，默认为全部名额（JOB_WORKERS）")
+    study_id: Optional[str] = Field(None, pattern=r"^[A-Za-z0-9_\-]+$", description="实验ID，用于断点续跑；默认由请求内容生成")
+
+
+class BufferAllocationCreate(BaseModel):
+    """缓冲区容量分配优化"""
+    production_line_id: str = Field(..., description="产线ID")
+    buffer_ids: Optional[List[str]] = Field(None, description="参与分配的缓冲区，默认为产线全部缓冲区")
+    total_capacity: int = Field(..., ge=0, description="参与分配的缓冲区总容量预算")
+    min_capacity: int = Field(default=1, ge=0, description="单个缓冲区容量下限")
+    max_capacity: Optional[int] = Field(None, ge=0, description="单个缓冲区容量上限")
+    candidates: int = Field(default=20, ge=1, description="初始候选方案数（含均分方案）")
+    max_candidates: int = Field(default=60, ge=1, description="局部搜索后的候选方案数上限")
+    initial_replications: int = Field(default=5, ge=2, description="每个候选方案的初始重复次数")
+    replication_budget: int = Field(default=400, ge=2, description="总重复次数预算")
+    batch_size: int = Field(default=40, ge=1, description="每轮按OCBA追加分配的重复次数")
+    seed: int = Field(default=0, description="基础随机数种子，第r次重复在所有方案中使用同一种子（公共随机数）")
+    params: SimulationParams = Field(default_factory=SimulationParams, description="仿真参数")
+    workers: Optional[int] = Field(None, ge=1, description="并行进程数，占用同样多的任务运行名额，默认为全部名额（JOB_WORKERS）")
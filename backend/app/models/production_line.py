@@ -20,6 +20,12 @@ class ProductionLineUpdate(BaseModel):
     description: Optional[str] = None
 
 
+class ProductionLineClone(BaseModel):
+    """复制产线"""
+    name: Optional[str] = Field(None, description="新产线名称，默认为 \"<源产线名称> (副本)\"")
+    description: Optional[str] = Field(None, description="新产线描述，默认与源产线相同")
+
+
 class ProductionLine(ProductionLineBase):
     """产线完整模型"""
     id: str = Field(..., description="产线ID")
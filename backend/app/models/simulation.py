@@ -0,0 +1,65 @@
+"""仿真运行参数数据模型"""
+from typing import Optional, Dict, Any, List, Literal
+from pydantic import BaseModel, Field
+
+
+class SimulationParams(BaseModel):
+    """单次仿真运行参数"""
+    duration: float = Field(default=28800.0, gt=0, description="仿真时长（秒），默认8小时")
+    warmup: float = Field(default=0.0, ge=0, description="预热时长（秒），预热期内不计入统计")
+    release_time: Optional[Dict[str, Any]] = Field(
+        None,
+        description="投料间隔分布，格式同工作站处理时间（另支持 exponential）；为空时按产线能力连续投料"
+    )
+    record_interval: Optional[float] = Field(
+        None, gt=0, description="时间序列采样间隔（秒），为空时不记录缓冲区库存等时间序列"
+    )
+    value_stream: bool = Field(
+        default=False, description="记录每次加工和每件物料的明细，计算价值流核算（增值、成本、增值时间比）"
+    )
+    calendar: Literal["heap", "calendar_queue"] = Field(
+        default="heap",
+        description="事件日历实现：heap（二叉堆，默认）或 calendar_queue（日历队列，适合待处理事件极多的大型模型）；不影响仿真结果"
+    )
+
+
+class SimulationRunCreate(BaseModel):
+    """运行一次仿真"""
+    production_line_id: str = Field(..., description="产线ID")
+    seed: int = Field(default=0, description="随机数种子")
+    params: SimulationParams = Field(default_factory=SimulationParams, description="仿真参数")
+    use_cache: bool = Field(default=True, description="是否复用相同产线指纹、种子和参数的已有结果")
+    save: bool = Field(default=False, description="是否保存运行记录（含时间序列）")
+
+
+class OeeReportCreate(BaseModel):
+    """多次重复仿真的OEE报告"""
+    production_line_id: str = Field(..., description="产线ID")
+    seed: int = Field(default=0, description="基础随机数种子，第r次重复使用 seed + r")
+    replications: int = Field(default=5, ge=1, le=100, description="重复次数")
+    params: SimulationParams = Field(default_factory=SimulationParams, description="仿真参数")
+    use_cache: bool = Field(default=True, description="是否复用相同产线指纹、种子和参数的已有结果")
+    workers: Optional[int] = Field(None, ge=1, description="并行进程数，占用同样多的任务运行名额，默认为全部名额（JOB_WORKERS）")
+
+
+class InterLineLink(BaseModel):
+    """产线间运输连接：上游产线完工的物料经运输送入下游产线的流转路径"""
+    from_line_id: str = Field(..., description="上游产线ID")
+    from_routine_id: Optional[str] = Field(None, description="上游流转路径ID，为空时上游产线所有流转路径的完工物料都经此连接运出")
+    to_line_id: str = Field(..., description="下游产线ID")
+    to_routine_id: Optional[str] = Field(None, description="下游流转路径ID，为空时取下游产线的第一条流转路径")
+    transport_time: float = Field(..., gt=0, description="产线间运输时间（秒），同时作为同步的前瞻量")
+
+
+class CoSimulationCreate(BaseModel):
+    """多产线协同仿真"""
+    production_line_ids: List[str] = Field(
+        default_factory=list, description="参与仿真的产线ID，连接两端的产线自动加入"
+    )
+    links: List[InterLineLink] = Field(default_factory=list, description="产线间运输连接")
+    seed: int = Field(default=0, description="随机数种子")
+    params: SimulationParams = Field(default_factory=SimulationParams, description="仿真参数，各产线相同")
+    window: Optional[float] = Field(
+        None, gt=0, description="每轮同步最多推进的仿真时长（秒），为空时取仿真时长的1/100"
+    )
+    workers: Optional[int] = Field(None, ge=1, description="工作进程数，占用同样多的任务运行名额，默认为全部名额（JOB_WORKERS），不超过产线数")
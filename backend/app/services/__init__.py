@@ -1,6 +1,22 @@
 """业务逻辑服务包"""
 from .config_service import ConfigService
 from .validation_service import ValidationService
+from .config_validator import ConfigValidator
+from .routing_service import RoutingService, RoutingTable
+from .line_version import line_versions
+from .type_cache import type_cache
+from .experiment_service import ExperimentService
+from .buffer_allocation_service import BufferAllocationService
+from .result_cache import result_cache
+from .response_cache import response_cache
+from .run_registry import RunRegistryService
+from .simulation_service import SimulationService
+from .job_manager import job_manager
+from .metrics import MetricsService
+from .request_metrics import request_metrics
+from .change_log import ChangeLogService, change_feed
+from .clone_service import CloneService
+from .diff_service import DiffService
 
-__all__ = ["ConfigService", "ValidationService"]
+__all__ = ["ConfigService", "ValidationService", "ConfigValidator", "RoutingService", "RoutingTable", "line_versions", "type_cache", "ExperimentService", "BufferAllocationService", "result_cache", "response_cache", "RunRegistryService", "SimulationService", "job_manager", "MetricsService", "request_metrics", "ChangeLogService", "change_feed", "CloneService", "DiffService"]
 
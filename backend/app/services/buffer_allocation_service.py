@@ -0,0 +1,320 @@
+"""缓冲区容量分配优化服务 - 在总容量预算下搜索使吞吐量最大的分配方案"""
+import copy
+import math
+import random
+import statistics
+from typing import Any, Dict, List, Tuple
+
+from ..models.experiment import BufferAllocationCreate
+from .experiment_service import ExperimentService
+
+
+Allocation = Tuple[int, ...]
+
+
+class Candidate:
+    """候选分配方案及其各次重复的吞吐量"""
+
+    __slots__ = ("allocation", "config", "samples")
+
+    def __init__(self, allocation: Allocation, config: Dict[str, Any]):
+        self.allocation = allocation
+        self.config = config
+        # 重复序号 -> 吞吐量；第r次重复在所有方案中使用同一种子
+        self.samples: Dict[int, float] = {}
+
+    @property
+    def n(self) -> int:
+        return len(self.samples)
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.samples.values())
+
+    @property
+    def std(self) -> float:
+        return statistics.stdev(self.samples.values()) if self.n > 1 else 0.0
+
+
+class BufferAllocationService:
+    """
+    缓冲区容量分配优化
+
+    候选方案由均分方案、随机方案以及当前最优方案的邻域（在两个缓冲区之间移动容量）构成。
+    每轮的追加重复次数按OCBA（最优计算量分配）分给各候选方案：
+    均值接近最优、方差大的方案获得更多重复，明显较差的方案不再追加，
+    而不是对每个方案平均重复。
+    """
+
+    @staticmethod
+    def check(base_config: Dict[str, Any], request: BufferAllocationCreate) -> List[str]:
+        """
+        提交前检查参与分配的缓冲区和容量约束，不运行仿真；问题以 ValueError 报告
+
+        Returns:
+            参与分配的缓冲区ID
+        """
+        line_buffers = [buf["id"] for buf in base_config["production_line"]["buffers"]]
+        buffer_ids = request.buffer_ids or line_buffers
+        missing = [buf_id for buf_id in buffer_ids if buf_id not in line_buffers]
+        if missing:
+            raise ValueError(f"缓冲区不存在: {', '.join(missing)}")
+        if not buffer_ids:
+            raise ValueError("产线没有可分配的缓冲区")
+        if len(set(buffer_ids)) != len(buffer_ids):
+            raise ValueError("buffer_ids 中有重复的缓冲区")
+
+        n = len(buffer_ids)
+        total = request.total_capacity
+        low = request.min_capacity
+        high = request.max_capacity if request.max_capacity is not None else total
+        if low * n > total or high * n < total:
+            raise ValueError("总容量预算无法满足单个缓冲区容量的上下限")
+        return buffer_ids
+
+    @staticmethod
+    def optimize(base_config: Dict[str, Any], request: BufferAllocationCreate) -> Dict[str, Any]:
+        """
+        搜索最优缓冲区容量分配
+
+        耗时较长，由任务管理器在后台工作进程中调用。
+
+        Args:
+            base_config: ConfigService.build_config 格式的产线配置
+            request: 优化请求
+
+        Returns:
+            最优方案及全部候选方案的评估结果
+        """
+        buffer_ids = BufferAllocationService.check(base_config, request)
+        n = len(buffer_ids)
+        total = request.total_capacity
+        low = request.min_capacity
+        high = request.max_capacity if request.max_capacity is not None else total
+
+        budget = request.replication_budget
+        n0 = request.initial_replications
+        params = request.params.model_dump()
+        rng = random.Random(request.seed)
+        candidates: Dict[Allocation, Candidate] = {}
+
+        def add(allocation: Allocation) -> bool:
+            if allocation in candidates:
+                return False
+            candidates[allocation] = Candidate(
+                allocation, BufferAllocationService._apply(base_config, buffer_ids, allocation)
+            )
+            return True
+
+        # 初始候选：均分方案 + 随机方案，数量受预算限制
+        initial = max(1, min(request.candidates, request.max_candidates, budget // n0))
+        add(BufferAllocationService._even_allocation(n, total))
+        attempts = 0
+        while len(candidates) < initial and attempts < initial * 20:
+            add(BufferAllocationService._random_allocation(rng, n, total, low, high))
+            attempts += 1
+
+        step = max(1, (total - low * n) // (2 * n))
+        used = 0
+        rounds = 0
+        pool = ExperimentService.process_pool(request.workers)
+        try:
+            used += BufferAllocationService._replicate(
+                {c: n0 for c in candidates.values()}, params, request.seed, pool
+            )
+
+            while used < budget:
+                rounds += 1
+                best = max(candidates.values(), key=lambda c: c.mean)
+
+                # 局部搜索：把当前最优方案的邻域加入候选
+                room = min(request.max_candidates - len(candidates), (budget - used) // n0)
+                if room > 0:
+                    added = []
+                    while not added:
+                        for allocation in BufferAllocationService._neighbours(best.allocation, step, low, high):
+                            if len(added) >= room:
+                                break
+                            if add(allocation):
+                                added.append(candidates[allocation])
+                        if added or step == 1:
+                            break
+                        step //= 2
+                    if added:
+                        used += BufferAllocationService._replicate(
+                            {c: n0 for c in added}, params, request.seed, pool
+                        )
+
+                delta = min(request.batch_size, budget - used)
+                if delta <= 0:
+                    break
+                pool_list = list(candidates.values())
+                extra = BufferAllocationService.ocba(
+                    [c.mean for c in pool_list],
+                    [c.std for c in pool_list],
+                    [c.n for c in pool_list],
+                    delta
+                )
+                used += BufferAllocationService._replicate(
+                    {c: k for c, k in zip(pool_list, extra) if k > 0}, params, request.seed, pool
+                )
+        finally:
+            if pool is not None:
+                # 任务被取消时不再启动排队中的仿真
+                pool.shutdown(cancel_futures=True)
+
+        ranking = sorted(candidates.values(), key=lambda c: c.mean, reverse=True)
+
+        def describe(candidate: Candidate) -> Dict[str, Any]:
+            return {
+                "allocation": dict(zip(buffer_ids, candidate.allocation)),
+                "replications": candidate.n,
+                "throughput_mean": candidate.mean,
+                "throughput_std": candidate.std,
+                "throughput_ci95": 1.96 * candidate.std / math.sqrt(candidate.n)
+            }
+
+        return {
+            "production_line_id": request.production_line_id,
+            "buffer_ids": buffer_ids,
+            "total_capacity": total,
+            "best": describe(ranking[0]),
+            "candidates": [describe(c) for c in ranking],
+            "statistics": {
+                "candidates": len(candidates),
+                "replications": used,
+                "replication_budget": budget,
+                "rounds": rounds
+            }
+        }
+
+    @staticmethod
+    def ocba(means: List[float], stds: List[float], counts: List[int], delta: int) -> List[int]:
+        """
+        OCBA（最优计算量分配）：把 delta 次追加重复分给各候选方案，使选中最优方案的概率最大
+
+        目标比例：非最优方案 N_i ∝ (σ_i / (μ_b - μ_i))²，
+        最优方案 N_b = σ_b · sqrt(Σ N_i² / σ_i²)。
+        已有重复次数超过目标的方案不再追加，其余方案按比例重新分配。
+
+        Args:
+            means: 各方案样本均值（越大越好）
+            stds: 各方案样本标准差
+            counts: 各方案已有重复次数
+            delta: 本轮追加的重复次数
+
+        Returns:
+            各方案本轮追加的重复次数，总和为 delta
+        """
+        k = len(means)
+        if k == 1:
+            return [delta]
+
+        best = max(range(k), key=lambda i: means[i])
+        scale = max(abs(means[best]), 1.0)
+        sigma = [max(s, 1e-9 * scale) for s in stds]
+        ratios = [0.0] * k
+        for i in range(k):
+            if i != best:
+                gap = max(means[best] - means[i], 1e-6 * scale)
+                ratios[i] = (sigma[i] / gap) ** 2
+        ratios[best] = sigma[best] * math.sqrt(
+            sum(ratios[i] ** 2 / sigma[i] ** 2 for i in range(k) if i != best)
+        )
+
+        total = sum(counts) + delta
+        fixed: set = set()
+        while True:
+            free = [i for i in range(k) if i not in fixed]
+            remaining = total - sum(counts[i] for i in fixed)
+            weight = sum(ratios[i] for i in free)
+            target = {i: remaining * ratios[i] / weight for i in free}
+            over = [i for i in free if target[i] < counts[i]]
+            if not over or len(over) == len(free):
+                break
+            fixed.update(over)
+
+        wanted = [max(0.0, target.get(i, 0.0) - counts[i]) for i in range(k)]
+        wanted_sum = sum(wanted)
+        if wanted_sum <= 0:
+            wanted = [1.0 if i == best else 0.0 for i in range(k)]
+            wanted_sum = 1.0
+
+        # 按最大余数法取整，保证总和恰为 delta
+        shares = [delta * w / wanted_sum for w in wanted]
+        extra = [int(s) for s in shares]
+        order = sorted(range(k), key=lambda i: shares[i] - extra[i], reverse=True)
+        for i in order[:delta - sum(extra)]:
+            extra[i] += 1
+        return extra
+
+    @staticmethod
+    def _replicate(
+        plan: Dict[Candidate, int],
+        params: Dict[str, Any],
+        seed: int,
+        pool
+    ) -> int:
+        """为各候选方案追加重复，延续其重复序号以保持公共随机数"""
+        tasks = {}
+        for candidate, count in plan.items():
+            start = candidate.n
+            for r in range(start, start + count):
+                tasks[(candidate.allocation, r)] = (candidate.config, seed + r)
+        by_allocation = {c.allocation: c for c in plan}
+        for (allocation, r), result in ExperimentService.simulate(tasks, params, pool):
+            by_allocation[allocation].samples[r] = result["kpis"]["throughput"]
+        return len(tasks)
+
+    @staticmethod
+    def _apply(base_config: Dict[str, Any], buffer_ids: List[str], allocation: Allocation) -> Dict[str, Any]:
+        config = copy.deepcopy(base_config)
+        capacity = dict(zip(buffer_ids, allocation))
+        for buf in config["production_line"]["buffers"]:
+            if buf["id"] in capacity:
+                buf["capacity"] = capacity[buf["id"]]
+        return config
+
+    @staticmethod
+    def _even_allocation(n: int, total: int) -> Allocation:
+        base, extra = divmod(total, n)
+        return tuple(base + (1 if i < extra else 0) for i in range(n))
+
+    @staticmethod
+    def _random_allocation(rng: random.Random, n: int, total: int, low: int, high: int) -> Allocation:
+        """在上下限内均匀随机地把总容量分给 n 个缓冲区"""
+        spare = total - low * n
+        # 隔板法：在 spare + n - 1 个位置中选 n - 1 个隔板
+        cuts = sorted(rng.sample(range(spare + n - 1), n - 1))
+        parts = [b - a - 1 for a, b in zip([-1] + cuts, cuts + [spare + n - 1])]
+        allocation = [low + p for p in parts]
+
+        # 超出上限的部分移给仍有余量的缓冲区
+        overflow = 0
+        for i, value in enumerate(allocation):
+            if value > high:
+                overflow += value - high
+                allocation[i] = high
+        while overflow:
+            i = rng.randrange(n)
+            if allocation[i] < high:
+                allocation[i] += 1
+                overflow -= 1
+        return tuple(allocation)
+
+    @staticmethod
+    def _neighbours(allocation: Allocation, step: int, low: int, high: int) -> List[Allocation]:
+        """在任意两个缓冲区之间移动 step 个容量得到的邻域方案"""
+        result = []
+        n = len(allocation)
+        for i in range(n):
+            if allocation[i] - step < low:
+                continue
+            for j in range(n):
+                if i == j or allocation[j] + step > high:
+                    continue
+                moved = list(allocation)
+                moved[i] -= step
+                moved[j] += step
+                result.append(tuple(moved))
+        return result
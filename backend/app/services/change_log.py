@@ -0,0 +1,413 @@
+"""变更日志服务 - 记录产线下实体的增删改，按产线递增的序号供客户端增量同步，并据此撤销/重做"""
+import asyncio
+import json
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import Text, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..database.schemas import (
+    BufferDB, ChangeLogDB, ChangeLogHeadDB, ProductionLineDB, RoutineDB, RoutineStepDB, RoutineStepLinkDB,
+    TransportPathDB, WorkstationDB
+)
+from .line_version import line_versions
+from .routing_service import RoutingService
+
+
+# 实体类型 -> 数据库表
+ENTITY_TABLES = {
+    "workstation": WorkstationDB,
+    "buffer": BufferDB,
+    "transport_path": TransportPathDB,
+    "routine": RoutineDB,
+    "routine_step": RoutineStepDB,
+    "routine_step_link": RoutineStepLinkDB,
+}
+_ENTITY_TYPES = {table: entity_type for entity_type, table in ENTITY_TABLES.items()}
+
+# 以JSON文本存储的列，日志中保存解析后的值（步骤的 processing_time 为数值列，不在其中）
+JSON_COLUMNS = {
+    table: frozenset(
+        column.key for column in table.__table__.columns
+        if isinstance(column.type, Text) and column.key in ("processing_time", "position", "properties", "conditions", "branches")
+    )
+    for table in ENTITY_TABLES.values()
+}
+
+# 一次读取的最大变更条数
+PAGE_SIZE = 1000
+# SSE连接空闲时发送保活注释的间隔（秒）
+HEARTBEAT_SECONDS = 15.0
+
+
+def snapshot(row: Any) -> Dict[str, Any]:
+    """实体行的全部列，JSON列为解析后的值"""
+    json_columns = JSON_COLUMNS[type(row)]
+    data = {}
+    for column in row.__table__.columns:
+        value = getattr(row, column.key)
+        if column.key in json_columns and value is not None:
+            value = json.loads(value)
+        data[column.key] = value
+    return data
+
+
+def _columns(table: Any, data: Dict[str, Any]) -> Dict[str, Any]:
+    """快照 -> 列值，JSON列重新编码"""
+    json_columns = JSON_COLUMNS[table]
+    return {
+        key: json.dumps(value) if key in json_columns and value is not None else value
+        for key, value in data.items()
+    }
+
+
+class ChangeFeed:
+    """
+    变更通知
+
+    SSE连接在事件循环中等待所属产线的通知；写操作在线程池中提交后调用 publish，
+    经 call_soon_threadsafe 唤醒各连接，由连接自己按序号读取新的变更。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listeners: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+
+    def listen(self, line_id: str) -> asyncio.Event:
+        """在事件循环中登记等待产线变更，返回收到通知时被置位的事件"""
+        event = asyncio.Event()
+        with self._lock:
+            self._listeners.setdefault(line_id, set()).add((asyncio.get_running_loop(), event))
+        return event
+
+    def unlisten(self, line_id: str, event: asyncio.Event) -> None:
+        with self._lock:
+            listeners = self._listeners.get(line_id, set())
+            listeners.difference_update({item for item in listeners if item[1] is event})
+            if not listeners:
+                self._listeners.pop(line_id, None)
+
+    def publish(self, line_id: str) -> None:
+        with self._lock:
+            listeners = list(self._listeners.get(line_id, ()))
+        for loop, event in listeners:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # 事件循环已关闭，连接随之结束
+                pass
+
+    def connections(self) -> int:
+        with self._lock:
+            return sum(len(listeners) for listeners in self._listeners.values())
+
+
+# 进程级单例
+change_feed = ChangeFeed()
+
+
+class ChangeSet:
+    """
+    一次写操作中的实体变更
+
+    路由在修改实体之前登记（update/delete 登记时保存修改前的快照），最后调用 commit：
+    变更日志与实体修改在同一事务中提交，提交后通知SSE连接。缓存失效仍由路由负责。
+    删除父实体时先登记子实体（连接、步骤），新建时先登记父实体，撤销时按相反顺序执行。
+    """
+
+    def __init__(self, db: Session, production_line_id: str):
+        self.db = db
+        self.production_line_id = production_line_id
+        self._rows: List[Tuple[str, Any, Optional[Dict[str, Any]]]] = []
+
+    def create(self, row: Any) -> None:
+        self._rows.append(("create", row, None))
+
+    def update(self, row: Any) -> None:
+        self._rows.append(("update", row, snapshot(row)))
+
+    def delete(self, row: Any) -> None:
+        self._rows.append(("delete", row, snapshot(row)))
+
+    def commit(self) -> Optional[ChangeLogDB]:
+        """写入变更日志并提交事务，返回日志条目（没有实际变更时不记录）"""
+        self.db.flush()
+        changes = []
+        for action, row, before in self._rows:
+            after = None if action == "delete" else snapshot(row)
+            if action == "update" and after == before:
+                continue
+            changes.append({
+                "entity_type": _ENTITY_TYPES[type(row)],
+                "entity_id": row.id,
+                "action": action,
+                "before": before,
+                "after": after,
+            })
+        entry = None
+        if changes:
+            # 新的编辑使已撤销的编辑不可再重做
+            self.db.query(ChangeLogDB).filter(
+                ChangeLogDB.production_line_id == self.production_line_id,
+                ChangeLogDB.status == "undone"
+            ).update({"status": "discarded"}, synchronize_session=False)
+            entry = ChangeLogService.append(self.db, self.production_line_id, "edit", changes)
+        self.db.commit()
+        if entry is not None:
+            change_feed.publish(self.production_line_id)
+        return entry
+
+
+class ChangeLogService:
+    """
+    变更日志
+
+    每条产线的日志序号从1开始单调递增，客户端记住最后处理的序号，之后只读取更大序号的条目，
+    同步开销与变更条数成正比，与产线规模无关。条目分三类：
+        edit  通过API的一次写操作（一个请求可能涉及多个实体，如删除流转路径连带其步骤和连接）
+        undo  撤销最近一次仍生效的编辑，changes 为实际执行的反向变更
+        redo  重做最近一次撤销的编辑
+    撤销/重做只针对编辑，按栈的顺序进行：撤销后有新的编辑时，已撤销的编辑不能再重做。
+    """
+
+    @staticmethod
+    def append(
+        db: Session,
+        production_line_id: str,
+        kind: str,
+        changes: List[Dict[str, Any]],
+        target_seq: Optional[int] = None
+    ) -> ChangeLogDB:
+        """追加一条日志（不提交），序号由 _next_seq 分配"""
+        seq = ChangeLogService._next_seq(db, production_line_id)
+        entry = ChangeLogDB(
+            production_line_id=production_line_id,
+            seq=seq,
+            kind=kind,
+            target_seq=target_seq,
+            status="applied" if kind == "edit" else None,
+            changes=json.dumps(changes, ensure_ascii=False)
+        )
+        db.add(entry)
+        db.flush()
+        return entry
+
+    @staticmethod
+    def _next_seq(db: Session, production_line_id: str) -> int:
+        """
+        分配产线的下一个序号
+
+        先递增产线的序号行：该行的写锁持有到事务结束，同一产线并发的写操作在此排队，
+        读到的都是前一个事务提交后的值，不会分配重复的序号。
+        产线还没有序号行（首次写入，或在增加序号表之前已有日志）时按当前最大序号新建；
+        并发新建冲突时改为递增对方新建的行。
+        """
+        head = ChangeLogHeadDB.__table__
+        for _ in range(2):
+            updated = db.execute(
+                head.update().where(head.c.production_line_id == production_line_id).values(seq=head.c.seq + 1)
+            ).rowcount
+            if updated:
+                return db.query(ChangeLogHeadDB.seq).filter(
+                    ChangeLogHeadDB.production_line_id == production_line_id
+                ).scalar()
+            seq = ChangeLogService.head(db, production_line_id) + 1
+            try:
+                with db.begin_nested():
+                    db.execute(head.insert().values(production_line_id=production_line_id, seq=seq))
+                return seq
+            except IntegrityError:
+                continue
+        raise RuntimeError(f"产线 {production_line_id} 的变更日志序号分配失败")
+
+    @staticmethod
+    def head(db: Session, production_line_id: str) -> int:
+        """产线的最新序号，没有变更时为0"""
+        return db.query(func.max(ChangeLogDB.seq)).filter(
+            ChangeLogDB.production_line_id == production_line_id
+        ).scalar() or 0
+
+    @staticmethod
+    def describe(entry: ChangeLogDB) -> Dict[str, Any]:
+        return {
+            "seq": entry.seq,
+            "kind": entry.kind,
+            "target_seq": entry.target_seq,
+            "status": entry.status,
+            "created_at": entry.created_at.isoformat() if entry.created_at else None,
+            "changes": json.loads(entry.changes),
+        }
+
+    @staticmethod
+    def changes_since(
+        db: Session,
+        production_line_id: str,
+        since: int = 0,
+        limit: int = PAGE_SIZE
+    ) -> Dict[str, Any]:
+        """
+        序号大于 since 的变更，按序号升序
+
+        Returns:
+            {production_line_id, head, changes, has_more}；since 大于 head 时（如数据库被重建）
+            客户端持有的状态已不可用，应重新读取全部数据
+        """
+        entries = db.query(ChangeLogDB).filter(
+            ChangeLogDB.production_line_id == production_line_id,
+            ChangeLogDB.seq > since
+        ).order_by(ChangeLogDB.seq).limit(limit + 1).all()
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        head = entries[-1].seq if entries and not has_more else ChangeLogService.head(db, production_line_id)
+        return {
+            "production_line_id": production_line_id,
+            "head": head,
+            "changes": [ChangeLogService.describe(entry) for entry in entries],
+            "has_more": has_more,
+        }
+
+    @staticmethod
+    def _latest_applied(db: Session, production_line_id: str) -> Optional[ChangeLogDB]:
+        return db.query(ChangeLogDB).filter(
+            ChangeLogDB.production_line_id == production_line_id,
+            ChangeLogDB.kind == "edit",
+            ChangeLogDB.status == "applied"
+        ).order_by(ChangeLogDB.seq.desc()).first()
+
+    @staticmethod
+    def undo(db: Session, production_line_id: str) -> Optional[Dict[str, Any]]:
+        """
+        撤销最近一次仍生效的编辑
+
+        Returns:
+            新追加的 undo 条目，没有可撤销的编辑时返回None
+        """
+        target = ChangeLogService._latest_applied(db, production_line_id)
+        if target is None:
+            return None
+        changes = ChangeLogService._inverse(json.loads(target.changes))
+        ChangeLogService._apply(db, changes)
+        target.status = "undone"
+        entry = ChangeLogService.append(db, production_line_id, "undo", changes, target.seq)
+        db.commit()
+        ChangeLogService._changed(production_line_id, changes)
+        return ChangeLogService.describe(entry)
+
+    @staticmethod
+    def redo(db: Session, production_line_id: str) -> Optional[Dict[str, Any]]:
+        """
+        重做最近一次撤销的编辑
+
+        已撤销的编辑都在最近一次仍生效的编辑之后，其中序号最小的是最后撤销的。
+
+        Returns:
+            新追加的 redo 条目，没有可重做的编辑时返回None
+        """
+        latest = ChangeLogService._latest_applied(db, production_line_id)
+        target = db.query(ChangeLogDB).filter(
+            ChangeLogDB.production_line_id == production_line_id,
+            ChangeLogDB.seq > (latest.seq if latest else 0),
+            ChangeLogDB.status == "undone"
+        ).order_by(ChangeLogDB.seq).first()
+        if target is None:
+            return None
+        changes = json.loads(target.changes)
+        ChangeLogService._apply(db, changes)
+        target.status = "applied"
+        entry = ChangeLogService.append(db, production_line_id, "redo", changes, target.seq)
+        db.commit()
+        ChangeLogService._changed(production_line_id, changes)
+        return ChangeLogService.describe(entry)
+
+    @staticmethod
+    def _inverse(changes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """反向变更：顺序颠倒，新建与删除互换，前后快照互换"""
+        inverse_actions = {"create": "delete", "delete": "create", "update": "update"}
+        return [
+            {
+                "entity_type": change["entity_type"],
+                "entity_id": change["entity_id"],
+                "action": inverse_actions[change["action"]],
+                "before": change["after"],
+                "after": change["before"],
+            }
+            for change in reversed(changes)
+        ]
+
+    @staticmethod
+    def _apply(db: Session, changes: List[Dict[str, Any]]) -> None:
+        """按快照把实体恢复为 after 的状态（after 为空时删除）"""
+        for change in changes:
+            table = ENTITY_TABLES[change["entity_type"]]
+            row = db.query(table).filter(table.id == change["entity_id"]).first()
+            after = change["after"]
+            if after is None:
+                if row is not None:
+                    db.delete(row)
+            elif row is None:
+                db.add(table(**_columns(table, after)))
+            else:
+                for key, value in _columns(table, after).items():
+                    setattr(row, key, value)
+            # 逐条写入，保证父实体先于子实体插入、子实体先于父实体删除
+            db.flush()
+
+    @staticmethod
+    def _changed(production_line_id: str, changes: List[Dict[str, Any]]) -> None:
+        """撤销/重做提交后使缓存失效并通知SSE连接"""
+        if any(change["entity_type"] == "transport_path" for change in changes):
+            RoutingService.invalidate(production_line_id)
+        else:
+            line_versions.bump(production_line_id)
+        change_feed.publish(production_line_id)
+
+    @staticmethod
+    def _read(db: Session, production_line_id: str, since: Optional[int]) -> Optional[Dict[str, Any]]:
+        """SSE连接读取新的变更（since 为空时只取最新序号），读完立即释放数据库连接；产线已删除时返回None"""
+        try:
+            if db.query(ProductionLineDB.id).filter(ProductionLineDB.id == production_line_id).first() is None:
+                return None
+            if since is None:
+                return {"head": ChangeLogService.head(db, production_line_id), "changes": [], "has_more": False}
+            return ChangeLogService.changes_since(db, production_line_id, since)
+        finally:
+            db.close()
+
+    @staticmethod
+    async def stream(db: Session, production_line_id: str, since: Optional[int]) -> AsyncIterator[str]:
+        """
+        SSE事件流
+
+        先发送 since 之后已有的变更，之后每次收到产线的变更通知时发送新的条目。
+        每个条目一个 change 事件，id 为序号，浏览器断线重连时以 Last-Event-ID 续传。
+        since 为空时从当前最新序号开始；since 超过最新序号时发送 reset 事件，客户端应重新读取全部数据。
+        产线被删除时发送 deleted 事件后结束。
+        """
+        event = change_feed.listen(production_line_id)
+        try:
+            last = since
+            while True:
+                page = await run_in_threadpool(ChangeLogService._read, db, production_line_id, last)
+                if page is None:
+                    yield f"event: deleted\ndata: {json.dumps({'production_line_id': production_line_id})}\n\n"
+                    return
+                if last is not None and last > page["head"]:
+                    yield f"event: reset\ndata: {json.dumps({'head': page['head']})}\n\n"
+                if last is None or last > page["head"]:
+                    last = page["head"]
+                else:
+                    for entry in page["changes"]:
+                        yield f"id: {entry['seq']}\nevent: change\ndata: {json.dumps(entry, ensure_ascii=False)}\n\n"
+                        last = entry["seq"]
+                    if page["has_more"]:
+                        continue
+                try:
+                    await asyncio.wait_for(event.wait(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                event.clear()
+        finally:
+            change_feed.unlisten(production_line_id, event)
@@ -0,0 +1,244 @@
+"""产线复制服务 - 用 INSERT ... SELECT 在数据库内整体复制产线及其下的全部实体，用于方案对比"""
+import json
+import uuid
+from typing import Any, Callable, List, Optional
+
+from sqlalchemy import String, case, func, insert, literal, select, union, update
+from sqlalchemy.orm import Session
+
+from ..database.schemas import (
+    ProductionLineDB, WorkstationDB, BufferDB, TransportPathDB, RoutineDB,
+    RoutineStepDB, RoutineStepLinkDB, ValueStreamConfigDB
+)
+from .line_version import line_versions
+
+
+class CloneService:
+    """产线复制服务"""
+
+    @staticmethod
+    def clone_id(entity_id: str, source_line_id: str, line_id: str) -> str:
+        """
+        复制后的实体ID
+
+        原ID加后缀 "@<新产线ID>"；原ID已带源产线的后缀（源产线本身是复制出来的）时先去掉，
+        多次复制ID长度不会增长。同一源产线复制到同一新产线时结果总是相同，引用可以逐列换算而不需要对照表。
+        """
+        suffix = f"@{source_line_id}"
+        if entity_id.endswith(suffix):
+            entity_id = entity_id[:-len(suffix)]
+        return f"{entity_id}@{line_id}"
+
+    @staticmethod
+    def clone_line(
+        db: Session,
+        source_line_id: str,
+        name: Optional[str] = None,
+        description: Optional[str] = None
+    ) -> ProductionLineDB:
+        """
+        复制产线
+
+        工作站、缓冲区、运输路径、流转路径（含步骤和连线）、价值流配置各用一条 INSERT ... SELECT 复制，
+        数据不经过Python对象；实体ID按 clone_id 换算，指向本产线实体的引用列同样换算，
+        指向产线外的引用（悬空引用）保持原值。JSON列中的引用（并行分支的工作站、质检的跳转步骤、
+        价值流的工作站）只对含这些内容的少数行在Python中换算。全部语句在同一事务中执行。
+        仿真记录和变更日志不复制。
+
+        Args:
+            db: 数据库会话
+            source_line_id: 源产线ID
+            name: 新产线名称，默认为 "<源产线名称> (副本)"
+            description: 新产线描述，默认与源产线相同
+
+        Returns:
+            新产线
+        """
+        source = db.query(ProductionLineDB).filter(ProductionLineDB.id == source_line_id).first()
+        if not source:
+            raise ValueError(f"产线 {source_line_id} 不存在")
+
+        line_id = f"line_{uuid.uuid4().hex[:8]}"
+        suffix = f"@{source_line_id}"
+
+        def clone_id(column):
+            base = case(
+                (column.endswith(suffix, autoescape=True),
+                 func.substr(column, 1, func.length(column) - len(suffix), type_=String)),
+                else_=column
+            )
+            return base.concat(f"@{line_id}")
+
+        def clone_ref(column, ids):
+            # 只换算指向本产线实体的引用
+            return case((column.in_(ids), clone_id(column)), else_=column)
+
+        routine_ids = select(RoutineDB.id).where(RoutineDB.production_line_id == source_line_id)
+        step_ids = select(RoutineStepDB.id).where(RoutineStepDB.routine_id.in_(routine_ids))
+        workstation_ids = select(WorkstationDB.id).where(WorkstationDB.production_line_id == source_line_id)
+        buffer_ids = select(BufferDB.id).where(BufferDB.production_line_id == source_line_id)
+        location_ids = union(workstation_ids, buffer_ids)
+
+        # 各表需要换算的列，其余列原样复制
+        tables = [
+            (WorkstationDB, WorkstationDB.production_line_id == source_line_id, {
+                "input_buffer_id": lambda c: clone_ref(c, buffer_ids),
+                "output_buffer_id": lambda c: clone_ref(c, buffer_ids),
+            }),
+            (BufferDB, BufferDB.production_line_id == source_line_id, {}),
+            (TransportPathDB, TransportPathDB.production_line_id == source_line_id, {
+                "from_location": lambda c: clone_ref(c, location_ids),
+                "to_location": lambda c: clone_ref(c, location_ids),
+            }),
+            (RoutineDB, RoutineDB.production_line_id == source_line_id, {
+                "start_location": lambda c: clone_ref(c, location_ids),
+                "end_location": lambda c: clone_ref(c, location_ids),
+            }),
+            (RoutineStepDB, RoutineStepDB.routine_id.in_(routine_ids), {
+                "routine_id": clone_id,
+                "workstation_id": lambda c: clone_ref(c, workstation_ids),
+                "next_step": lambda c: clone_ref(c, step_ids),
+            }),
+            (RoutineStepLinkDB, RoutineStepLinkDB.routine_id.in_(routine_ids), {
+                "routine_id": clone_id,
+                "from_step_id": lambda c: clone_ref(c, step_ids),
+                "to_step_id": lambda c: clone_ref(c, step_ids),
+            }),
+            (ValueStreamConfigDB, ValueStreamConfigDB.production_line_id == source_line_id, {}),
+        ]
+
+        try:
+            db.add(ProductionLineDB(
+                id=line_id,
+                name=name if name is not None else f"{source.name} (副本)",
+                description=description if description is not None else source.description
+            ))
+            db.flush()
+
+            for model, where, remap in tables:
+                table = model.__table__
+                columns = []
+                for column in table.columns:
+                    if column.key == "id":
+                        columns.append(clone_id(column))
+                    elif column.key == "production_line_id":
+                        columns.append(literal(line_id))
+                    elif column.key in remap:
+                        columns.append(remap[column.key](column))
+                    else:
+                        columns.append(column)
+                db.execute(insert(table).from_select(list(table.columns), select(*columns).where(where)))
+
+            CloneService._clone_json_references(db, source_line_id, line_id)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        line_versions.bump(line_id)
+        return db.query(ProductionLineDB).filter(ProductionLineDB.id == line_id).first()
+
+    @staticmethod
+    def _clone_json_references(db: Session, source_line_id: str, line_id: str) -> None:
+        """
+        换算新产线中JSON列里的实体引用
+
+        只读取含这些内容的行的ID和JSON列，只更新有变化的行。
+        跳转步骤可能写成步骤ID，也可能写成步骤序号（如 "step_1"），只换算确实是源产线实体ID的值。
+        """
+        routine_ids = select(RoutineDB.id).where(RoutineDB.production_line_id == line_id)
+        steps = db.query(RoutineStepDB.id, RoutineStepDB.conditions, RoutineStepDB.branches).filter(
+            RoutineStepDB.routine_id.in_(routine_ids),
+            (RoutineStepDB.conditions.isnot(None)) | (RoutineStepDB.branches.isnot(None))
+        ).all()
+        value_streams = db.query(
+            ValueStreamConfigDB.id, ValueStreamConfigDB.value_points, ValueStreamConfigDB.cost_points
+        ).filter(ValueStreamConfigDB.production_line_id == line_id).all()
+        if not steps and not value_streams:
+            return
+
+        steps = [(step_id, _loads(conditions), _loads(branches)) for step_id, conditions, branches in steps]
+        value_streams = [(vs_id, json.loads(value_points), json.loads(cost_points)) for vs_id, value_points, cost_points in value_streams]
+
+        step_refs = set()
+        workstation_refs = set()
+        for _, conditions, branches in steps:
+            if isinstance(conditions, dict):
+                step_refs.update(conditions.get(key) for key in ("pass_route", "fail_route"))
+            workstation_refs.update(_workstation_refs(branches))
+        for _, value_points, cost_points in value_streams:
+            workstation_refs.update(_workstation_refs(value_points))
+            workstation_refs.update(_workstation_refs(cost_points))
+        step_refs = {ref for ref in step_refs if isinstance(ref, str)}
+        workstation_refs = {ref for ref in workstation_refs if isinstance(ref, str)}
+
+        source_routines = select(RoutineDB.id).where(RoutineDB.production_line_id == source_line_id)
+        source_steps = {
+            step_id for (step_id,) in db.query(RoutineStepDB.id).filter(
+                RoutineStepDB.routine_id.in_(source_routines), RoutineStepDB.id.in_(step_refs)
+            )
+        } if step_refs else set()
+        source_workstations = {
+            ws_id for (ws_id,) in db.query(WorkstationDB.id).filter(
+                WorkstationDB.production_line_id == source_line_id, WorkstationDB.id.in_(workstation_refs)
+            )
+        } if workstation_refs else set()
+
+        def step_ref(value):
+            return CloneService.clone_id(value, source_line_id, line_id) if value in source_steps else value
+
+        def workstation_ref(value):
+            return CloneService.clone_id(value, source_line_id, line_id) if value in source_workstations else value
+
+        step_updates = []
+        for step_id, conditions, branches in steps:
+            changed = {}
+            if isinstance(conditions, dict):
+                remapped = {
+                    key: step_ref(value) if key in ("pass_route", "fail_route") else value
+                    for key, value in conditions.items()
+                }
+                if remapped != conditions:
+                    changed["conditions"] = json.dumps(remapped)
+            remapped = _remap_workstations(branches, workstation_ref)
+            if remapped != branches:
+                changed["branches"] = json.dumps(remapped)
+            if changed:
+                step_updates.append({"id": step_id, **changed})
+
+        value_stream_updates = []
+        for vs_id, value_points, cost_points in value_streams:
+            changed = {}
+            for column, points in (("value_points", value_points), ("cost_points", cost_points)):
+                remapped = _remap_workstations(points, workstation_ref)
+                if remapped != points:
+                    changed[column] = json.dumps(remapped)
+            if changed:
+                value_stream_updates.append({"id": vs_id, **changed})
+
+        # 按主键批量更新（executemany）
+        for model, updates in ((RoutineStepDB, step_updates), (ValueStreamConfigDB, value_stream_updates)):
+            for columns in {tuple(sorted(row)) for row in updates}:
+                rows = [row for row in updates if tuple(sorted(row)) == columns]
+                db.execute(update(model), rows)
+
+
+def _loads(value: Optional[str]) -> Any:
+    return json.loads(value) if value else None
+
+
+def _workstation_refs(items: Any) -> List[Any]:
+    """并行分支、价值流点位列表中的工作站引用"""
+    if not isinstance(items, list):
+        return []
+    return [item.get("workstation_id") for item in items if isinstance(item, dict)]
+
+
+def _remap_workstations(items: Any, remap: Callable[[Any], Any]) -> Any:
+    if not isinstance(items, list):
+        return items
+    return [
+        {**item, "workstation_id": remap(item["workstation_id"])}
+        if isinstance(item, dict) and "workstation_id" in item else item
+        for item in items
+    ]
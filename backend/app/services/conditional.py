@@ -0,0 +1,97 @@
+"""条件请求 - 产线资源的强ETag与 If-None-Match，未变化时在查询数据库之前返回304"""
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request, Response
+
+from .line_version import line_versions
+
+
+def line_etag(line_id: Optional[str]) -> str:
+    """
+    产线资源的ETag
+
+    格式为 "<epoch>-<版本号>-<产线ID>"；不按产线区分的资源（如产线列表、未过滤的列表）
+    使用全部产线的变更次数，产线ID记为 *。进程重启后 epoch 变化，旧的ETag全部失效。
+    """
+    if line_id is None:
+        return f'"{line_versions.epoch}-{line_versions.total}-*"'
+    return f'"{line_versions.epoch}-{line_versions.get(line_id)}-{line_id}"'
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    """响应头：ETag，且要求客户端每次使用缓存前都重新验证"""
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def _if_none_match(request: Request):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return []
+    # If-None-Match 使用弱比较，忽略 W/ 前缀
+    return [tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip() for tag in header.split(",")]
+
+
+def _not_modified(etag: str) -> HTTPException:
+    return HTTPException(status_code=304, headers=etag_headers(etag))
+
+
+def check_line_etag(request: Request, response: Response, line_id: Optional[str]) -> str:
+    """
+    ETag 与请求的 If-None-Match 一致时直接返回304，否则把ETag写入响应头并返回
+
+    必须在查询数据库之前调用：ETag取查询前的版本号，查询期间的写操作只会使其提前失效。
+    """
+    etag = line_etag(line_id)
+    tags = _if_none_match(request)
+    if etag in tags:
+        raise _not_modified(etag)
+    response.headers.update(etag_headers(etag))
+    return etag
+
+
+def all_lines_etag(request: Request, response: Response) -> str:
+    """不按产线区分的接口（产线列表）的条件请求依赖"""
+    return check_line_etag(request, response, None)
+
+
+def list_etag(request: Request, response: Response, production_line_id: Optional[str] = None) -> str:
+    """列表接口的条件请求依赖，按 production_line_id 查询参数取产线版本"""
+    return check_line_etag(request, response, production_line_id or None)
+
+
+def path_line_etag(request: Request, response: Response, line_id: str) -> str:
+    """路径中带产线ID的接口的条件请求依赖"""
+    return check_line_etag(request, response, line_id)
+
+
+class EntityETag:
+    """
+    按ID读取单个实体的条件请求
+
+    查询前不知道实体所属的产线：If-None-Match 中的ETag本身记录了产线ID和版本号，
+    该产线版本号未变化（实体没有被修改或删除）时直接返回304。
+    查询后调用 tag 写入ETag；查询期间有任何产线发生变更时不写入，避免把新版本号用于旧数据。
+    写入的响应头同时保存在 headers 中，供直接返回 Response 的路由使用。
+    """
+
+    def __init__(self, response: Response):
+        self.response = response
+        self.total = line_versions.total
+        self.headers: Dict[str, str] = {}
+
+    def tag(self, line_id: str) -> None:
+        if line_versions.total == self.total:
+            self.headers = etag_headers(line_etag(line_id))
+            self.response.headers.update(self.headers)
+
+
+def entity_etag(request: Request, response: Response) -> EntityETag:
+    """按ID读取单个实体的条件请求依赖"""
+    prefix = f'"{line_versions.epoch}-'
+    for tag in _if_none_match(request):
+        if not tag.startswith(prefix) or not tag.endswith('"'):
+            continue
+        version, _, line_id = tag[len(prefix):-1].partition("-")
+        if line_id and line_id != "*" and version.isdigit() and int(version) == line_versions.get(line_id):
+            raise _not_modified(tag)
+    return EntityETag(response)
@@ -6,8 +6,9 @@ from typing import Dict, Any, List
 from sqlalchemy.orm import Session
 from ..database.schemas import (
     ProductionLineDB, WorkstationDB, BufferDB, TransportPathDB,
-    RoutineDB, RoutineStepDB, ValueStreamConfigDB
+    RoutineDB, RoutineStepDB, RoutineStepLinkDB, ValueStreamConfigDB
 )
+from .routing_service import RoutingService
 
 
 class ConfigService:
@@ -110,8 +111,8 @@ class ConfigService:
                     production_line_id=line_id,
                     name=routine_data["name"],
                     material_type=routine_data["material_type"],
-                    start_location=routine_data["start_location"],
-                    end_location=routine_data["end_location"],
+                    start_location=routine_data.get("start_location"),
+                    end_location=routine_data.get("end_location"),
                     description=routine_data.get("description")
                 )
                 db.add(routine)
@@ -135,6 +136,15 @@ class ConfigService:
                         next_step=step_data.get("next_step")
                     )
                     db.add(step)
+
+                # 导入步骤连线（图形化编辑器中的流转顺序）
+                for link_data in routine_data.get("step_links", []):
+                    db.add(RoutineStepLinkDB(
+                        id=link_data.get("id", f"link_{uuid.uuid4().hex[:8]}"),
+                        routine_id=routine_id,
+                        from_step_id=link_data["from_step_id"],
+                        to_step_id=link_data["to_step_id"]
+                    ))
                 
                 routines_imported += 1
             
@@ -155,6 +165,7 @@ class ConfigService:
             
             # 提交所有更改
             db.commit()
+            RoutingService.invalidate(line_id)
             
             return {
                 "success": True,
@@ -190,6 +201,26 @@ class ConfigService:
         Returns:
             配置文件内容（字符串）
         """
+        config = ConfigService.build_config(db, production_line_id)
+
+        # 转换为指定格式
+        if format.lower() == "yaml":
+            return yaml.dump(config, allow_unicode=True, default_flow_style=False)
+        else:
+            return json.dumps(config, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def build_config(db: Session, production_line_id: str) -> Dict[str, Any]:
+        """
+        从数据库读取产线完整配置，格式与配置文件一致
+
+        Args:
+            db: 数据库会话
+            production_line_id: 产线ID
+
+        Returns:
+            配置字典
+        """
         # 查询产线
         production_line = db.query(ProductionLineDB).filter(
             ProductionLineDB.id == production_line_id
@@ -283,7 +314,8 @@ class ConfigService:
                 "start_location": routine.start_location,
                 "end_location": routine.end_location,
                 "description": routine.description,
-                "steps": []
+                "steps": [],
+                "step_links": []
             }
             
             # 导出流转步骤
@@ -293,6 +325,7 @@ class ConfigService:
             
             for step in steps:
                 step_dict = {
+                    "id": step.id,
                     "step_id": step.step_id,
                     "workstation_id": step.workstation_id,
                     "operation": step.operation,
@@ -308,6 +341,15 @@ class ConfigService:
                 if step.branches:
                     step_dict["branches"] = json.loads(step.branches)
                 routine_dict["steps"].append(step_dict)
+
+            # 导出步骤连线，跳转引用（next_step、pass_route、fail_route）中的步骤ID据 steps[].id 解析
+            links = db.query(RoutineStepLinkDB).filter(
+                RoutineStepLinkDB.routine_id == routine.id
+            ).order_by(RoutineStepLinkDB.id).all()
+            routine_dict["step_links"] = [
+                {"id": link.id, "from_step_id": link.from_step_id, "to_step_id": link.to_step_id}
+                for link in links
+            ]
             
             config["routines"].append(routine_dict)
         
@@ -323,12 +365,8 @@ class ConfigService:
                 "value_points": json.loads(value_stream.value_points),
                 "cost_points": json.loads(value_stream.cost_points)
             }
-        
-        # 转换为指定格式
-        if format.lower() == "yaml":
-            return yaml.dump(config, allow_unicode=True, default_flow_style=False)
-        else:
-            return json.dumps(config, ensure_ascii=False, indent=2)
+
+        return config
 
     @staticmethod
     def parse_uploaded_file(file_content: bytes, filename: str) -> Dict[str, Any]:
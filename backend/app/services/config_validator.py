@@ -0,0 +1,386 @@
+"""配置结构验证器 - 由数据模型生成、预编译的配置文件验证器"""
+import typing
+from typing import Dict, Any, List, Optional, Set, Type, Union
+from annotated_types import Gt, Ge, Le
+from pydantic import BaseModel, TypeAdapter, ValidationError, ValidationInfo
+from pydantic.functional_validators import AfterValidator, WrapValidator
+from pydantic_core import InitErrorDetails, PydanticCustomError
+from typing_extensions import Annotated, NotRequired, TypedDict
+
+from ..models.workstation import WorkstationBase
+from ..models.buffer import BufferBase
+from ..models.transport_path import TransportPathBase
+from ..models.routine import RoutineBase, RoutineStepBase, RoutineStepLinkBase, ConditionConfig
+from ..models.production_line import ProductionLineBase
+from ..models.value_stream import ValueStreamConfig, ValuePoint, CostPoint
+from .type_cache import TypeSnapshot, type_cache
+
+
+# ============ 由数据模型生成TypedDict结构 ============
+# 配置文件按TypedDict验证，不实例化模型对象，整个文件在pydantic-core中一次遍历完成。
+
+_generated: Dict[type, Any] = {}
+
+
+def _convert(annotation: Any) -> Any:
+    """将注解中嵌套的pydantic模型替换为生成的TypedDict"""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        if annotation not in _generated:
+            _generated[annotation] = _spec(annotation)
+        return _generated[annotation]
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin is Union:
+        return Union[tuple(_convert(arg) for arg in args)]
+    if origin in (list, List):
+        return List[_convert(args[0])]
+    if origin in (dict, Dict):
+        return Dict[_convert(args[0]), _convert(args[1])]
+    return annotation
+
+
+def _spec(
+    model: Type[BaseModel],
+    overrides: Optional[Dict[str, Any]] = None,
+    extra: Optional[Dict[str, Any]] = None,
+    required: Set[str] = frozenset(),
+    optional: Set[str] = frozenset(),
+    check: Optional[Any] = None
+) -> Any:
+    """
+    由pydantic模型生成配置文件中对应元素的TypedDict结构
+
+    Args:
+        model: 数据模型
+        overrides: 覆盖字段注解（附加取值约束和引用检查）
+        extra: 模型之外、仅在配置文件中出现的字段
+        required: 模型中有默认值但配置文件中必填的字段
+        optional: 模型中必填但配置文件中可省略的字段
+        check: 元素级检查函数 (element, info) -> element
+    """
+    overrides = overrides or {}
+    fields = {}
+    for name, field in model.model_fields.items():
+        annotation = overrides.get(name)
+        if annotation is None:
+            annotation = _convert(field.annotation)
+            if field.metadata:
+                annotation = Annotated[(annotation, *field.metadata)]
+        is_required = name in required or (field.is_required() and name not in optional)
+        fields[name] = annotation if is_required else NotRequired[annotation]
+    fields.update(extra or {})
+
+    spec = TypedDict(f"{model.__name__}Spec", fields)
+    return Annotated[spec, AfterValidator(check)] if check else spec
+
+
+# ============ 取值与引用检查 ============
+# 每个元素只调用一次检查函数，元素内的全部问题一并以多条错误报告。
+
+def _issue(loc: tuple, code: str, message: str, value: Any, **ctx: Any) -> InitErrorDetails:
+    """构造一条结构化错误，loc 为元素内出错字段的相对路径"""
+    return InitErrorDetails(type=PydanticCustomError(code, message, ctx or None), loc=loc, input=value)
+
+
+def _raise_issues(issues: List[InitErrorDetails]) -> None:
+    if issues:
+        raise ValidationError.from_exception_data("ConfigFile", issues)
+
+
+def _check_reference(
+    issues: List[InitErrorDetails],
+    ctx: Dict[str, Any],
+    loc: tuple,
+    ref: Optional[str],
+    locations: bool = False
+) -> None:
+    """引用检查：locations=False 仅允许工作站，locations=True 允许工作站或缓冲区"""
+    if ref is None or ref in ctx["workstation_ids"] or (locations and ref in ctx["buffer_ids"]):
+        return
+    target = "位置" if locations else "工作站"
+    issues.append(_issue(loc, "dangling_reference", "'{ref}' 引用的{target}不存在", ref, ref=ref, target=target))
+
+
+def _check_allowed(
+    issues: List[InitErrorDetails],
+    allowed: Set[str],
+    field: str,
+    code: str,
+    value: str
+) -> None:
+    if value not in allowed:
+        issues.append(_issue(
+            (field,), code, "{field} 值无效，必须是: {allowed}", value,
+            field=field, allowed=", ".join(sorted(allowed))
+        ))
+
+
+def _registered(check: Any, key: str, label: str) -> WrapValidator:
+    """包装元素验证：先登记实体ID（即使元素本身有错也登记，避免引用处连带报错），再执行元素检查"""
+    def wrap(value: Any, handler: Any, info: ValidationInfo) -> Any:
+        if isinstance(value, dict) and isinstance(value.get("id"), str):
+            ids: Set[str] = info.context[key]
+            if value["id"] in ids:
+                _raise_issues([_issue(("id",), "duplicate_id", "{label}ID '{id}' 重复", value["id"], label=label, id=value["id"])])
+            ids.add(value["id"])
+        value = handler(value)
+        return check(value, info)
+    return WrapValidator(wrap)
+
+
+def _check_processing_time(issues: List[InitErrorDetails], pt: Dict[str, Any]) -> None:
+    pt_type = pt["type"]
+    if pt_type == "fixed":
+        value = pt.get("value")
+        if value is None or value <= 0:
+            issues.append(_issue(("processing_time", "value"), "invalid_distribution", "fixed 类型的 processing_time 需要正数 value", value))
+    elif pt_type == "uniform":
+        low, high = pt.get("min"), pt.get("max")
+        if low is None or high is None:
+            issues.append(_issue(("processing_time",), "invalid_distribution", "uniform 类型需要 min 和 max", pt))
+        elif low >= high:
+            issues.append(_issue(("processing_time", "min"), "invalid_distribution", "uniform 类型的 min 必须小于 max", low))
+    elif pt_type == "normal":
+        mean, std = pt.get("mean"), pt.get("std")
+        if mean is None or std is None:
+            issues.append(_issue(("processing_time",), "invalid_distribution", "normal 类型需要 mean 和 std", pt))
+        elif std <= 0:
+            issues.append(_issue(("processing_time", "std"), "invalid_distribution", "normal 类型的 std 必须为正数", std))
+    else:
+        issues.append(_issue(
+            ("processing_time", "type"), "unknown_distribution",
+            "processing_time 类型 '{type}' 无效，必须是: fixed, uniform, normal", pt_type, type=pt_type
+        ))
+
+
+def _check_workstation(ws: Dict[str, Any], info: ValidationInfo) -> Dict[str, Any]:
+    issues = []
+    _check_allowed(issues, info.context["workstation_types"], "type", "unknown_workstation_type", ws["type"])
+    _check_processing_time(issues, ws["processing_time"])
+    _raise_issues(issues)
+    return ws
+
+
+def _check_buffer(buf: Dict[str, Any], info: ValidationInfo) -> Dict[str, Any]:
+    if buf.get("current_level", 0) > buf["capacity"]:
+        _raise_issues([_issue(("current_level",), "exceeds_capacity", "current_level 不能超过 capacity", buf["current_level"])])
+    return buf
+
+
+def _check_transport_path(path: Dict[str, Any], info: ValidationInfo) -> Dict[str, Any]:
+    issues = []
+    _check_reference(issues, info.context, ("from_location",), path["from_location"], locations=True)
+    _check_reference(issues, info.context, ("to_location",), path["to_location"], locations=True)
+    _raise_issues(issues)
+    return path
+
+
+def _check_step(step: Dict[str, Any], info: ValidationInfo) -> Dict[str, Any]:
+    ctx = info.context
+    issues = []
+
+    step_ids: Set[int] = ctx["step_ids"]
+    if step["step_id"] in step_ids:
+        issues.append(_issue(("step_id",), "duplicate_step_id", "step_id {step_id} 重复", step["step_id"], step_id=step["step_id"]))
+    step_ids.add(step["step_id"])
+
+    _check_allowed(issues, ctx["operation_types"], "operation", "unknown_operation_type", step["operation"])
+
+    if step.get("parallel", False):
+        branches = step.get("branches")
+        if not branches:
+            issues.append(_issue(("branches",), "branches_required", "并行步骤需要 branches 字段", branches))
+        else:
+            for j, branch in enumerate(branches):
+                _check_reference(issues, ctx, ("branches", j, "workstation_id"), branch["workstation_id"])
+    elif step.get("workstation_id") is None:
+        issues.append(_issue(("workstation_id",), "workstation_required", "非并行步骤需要 workstation_id", None))
+    else:
+        _check_reference(issues, ctx, ("workstation_id",), step["workstation_id"])
+
+    if step.get("value_added", False) and step.get("value_amount") is None:
+        issues.append(_issue(("value_amount",), "value_amount_required", "value_added 为 true 时需要 value_amount", None))
+
+    _raise_issues(issues)
+    return step
+
+
+def _check_routine(value: Any, handler: Any, info: ValidationInfo) -> Any:
+    # step_id 只需在同一流转路径内唯一
+    info.context["step_ids"] = set()
+    routine = handler(value)
+    issues = []
+    # 未配置任何物料类型时不限制
+    material_types = info.context["material_types"]
+    if material_types:
+        _check_allowed(issues, material_types, "material_type", "unknown_material_type", routine["material_type"])
+    _check_reference(issues, info.context, ("start_location",), routine.get("start_location"), locations=True)
+    _check_reference(issues, info.context, ("end_location",), routine.get("end_location"), locations=True)
+    _raise_issues(issues)
+    return routine
+
+
+def _check_point(point: Dict[str, Any], info: ValidationInfo) -> Dict[str, Any]:
+    issues = []
+    _check_reference(issues, info.context, ("workstation_id",), point["workstation_id"])
+    _raise_issues(issues)
+    return point
+
+
+PositiveInt = Annotated[int, Gt(0)]
+
+WorkstationSpec = Annotated[
+    _spec(
+        WorkstationBase,
+        overrides={"capacity": PositiveInt},
+        extra={"id": NotRequired[str], "status": NotRequired[Optional[str]]}
+    ),
+    _registered(_check_workstation, "workstation_ids", "工作站")
+]
+
+BufferSpec = Annotated[
+    _spec(
+        BufferBase,
+        overrides={"capacity": PositiveInt},
+        extra={"id": NotRequired[str], "current_level": NotRequired[Annotated[int, Ge(0)]]}
+    ),
+    _registered(_check_buffer, "buffer_ids", "缓冲区")
+]
+
+TransportPathSpec = _spec(
+    TransportPathBase,
+    overrides={
+        "transport_time": Annotated[float, Gt(0)],
+        "capacity": Optional[PositiveInt],
+    },
+    extra={"id": NotRequired[str]},
+    check=_check_transport_path
+)
+
+RoutineStepSpec = _spec(
+    RoutineStepBase,
+    overrides={
+        "conditions": Optional[_spec(ConditionConfig, overrides={"pass_rate": Optional[Annotated[float, Ge(0), Le(1)]]})],
+    },
+    required={"step_id"},
+    extra={"id": NotRequired[str]},
+    check=_check_step
+)
+
+RoutineSpec = Annotated[
+    _spec(
+        RoutineBase,
+        extra={
+            "id": NotRequired[str],
+            "steps": NotRequired[List[RoutineStepSpec]],
+            "step_links": NotRequired[List[_spec(RoutineStepLinkBase, extra={"id": NotRequired[str]})]],
+        }
+    ),
+    WrapValidator(_check_routine)
+]
+
+ValueStreamSpec = _spec(
+    ValueStreamConfig,
+    overrides={
+        "value_points": List[_spec(ValuePoint, check=_check_point)],
+        "cost_points": List[_spec(CostPoint, check=_check_point)],
+    },
+    optional={"id", "name", "production_line_id"}
+)
+
+# 字段顺序即验证顺序：被引用的工作站、缓冲区先于引用它们的元素
+ProductionLineSpec = _spec(
+    ProductionLineBase,
+    extra={
+        "id": NotRequired[str],
+        "workstations": NotRequired[List[WorkstationSpec]],
+        "buffers": NotRequired[List[BufferSpec]],
+        "transport_paths": NotRequired[List[TransportPathSpec]],
+    }
+)
+
+ConfigFileSpec = TypedDict("ConfigFileSpec", {
+    "production_line": ProductionLineSpec,
+    "routines": NotRequired[List[RoutineSpec]],
+    "value_stream": NotRequired[Optional[ValueStreamSpec]],
+})
+
+# 模块加载时编译一次，之后每次验证直接复用pydantic-core中的验证器
+_config_adapter = TypeAdapter(ConfigFileSpec)
+
+
+class ConfigValidator:
+    """预编译的配置文件结构验证器"""
+
+    @staticmethod
+    def validate(
+        config_data: Any,
+        types: Optional[TypeSnapshot] = None
+    ) -> Dict[str, Any]:
+        """
+        单次遍历验证配置文件的结构、取值范围和引用关系
+
+        Args:
+            config_data: 配置数据字典
+            types: 允许的类型，默认取全局类型表缓存
+
+        Returns:
+            验证结果 {valid: bool, errors: List[dict], warnings: List[dict]}，
+            每条错误包含 pointer (JSON Pointer)、code 和 message
+        """
+        types = types or type_cache.snapshot()
+        context = {
+            "workstation_ids": set(),
+            "buffer_ids": set(),
+            "workstation_types": types.workstation_types,
+            "operation_types": types.operation_types,
+            "material_types": types.material_types
+        }
+
+        errors = []
+        try:
+            _config_adapter.validate_python(config_data, context=context)
+        except ValidationError as e:
+            errors = [ConfigValidator._format_error(err) for err in e.errors(include_url=False)]
+
+        warnings = []
+        if isinstance(config_data, dict) and isinstance(config_data.get("production_line"), dict):
+            warnings = ConfigValidator._check_connectivity(
+                config_data["production_line"].get("transport_paths") or [],
+                context["workstation_ids"] | context["buffer_ids"]
+            )
+
+        return {
+            "valid": len(errors) == 0,
+            "errors": errors,
+            "warnings": warnings
+        }
+
+    @staticmethod
+    def _format_error(err: Dict[str, Any]) -> Dict[str, Any]:
+        """将pydantic错误转换为 {pointer, code, message}"""
+        pointer = "".join(
+            "/" + str(part).replace("~", "~0").replace("/", "~1") for part in err["loc"]
+        )
+        return {"pointer": pointer, "code": err["type"], "message": err["msg"]}
+
+    @staticmethod
+    def _check_connectivity(
+        transport_paths: List[Any],
+        all_locations: Set[str]
+    ) -> List[Dict[str, Any]]:
+        """检查没有任何运输路径连接的位置"""
+        connected = set()
+        for path in transport_paths:
+            if isinstance(path, dict):
+                connected.add(path.get("from_location"))
+                connected.add(path.get("to_location"))
+
+        return [
+            {
+                "pointer": "/production_line/transport_paths",
+                "code": "isolated_location",
+                "message": f"位置 '{loc}' 没有任何运输路径连接"
+            }
+            for loc in sorted(all_locations - connected)
+        ]
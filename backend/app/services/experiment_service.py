@@ -0,0 +1,442 @@
+"""参数扫描 / 实验设计（DOE）服务"""
+import copy
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from ..models.experiment import ExperimentCreate, Factor
+from ..simulation import run_simulation
+from ..utils.fingerprint import canonical_json, line_fingerprint
+from .result_cache import result_cache
+
+
+# 断点文件目录，每个实验一个JSONL文件
+EXPERIMENT_DIR = os.environ.get("EXPERIMENT_DIR", "./experiments")
+
+# 响应表中汇总的KPI
+RESPONSE_KPIS = ("throughput", "avg_cycle_time", "avg_wip", "completed", "scrapped")
+
+
+def config_hash(data: Any) -> str:
+    """JSON可序列化对象的稳定哈希"""
+    return hashlib.sha1(canonical_json(data).encode("utf-8")).hexdigest()
+
+
+class ExperimentService:
+    """参数扫描 / 实验设计服务"""
+
+    # ------------------------------------------------------------------
+    # 设计生成
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def generate_design(
+        factors: List[Factor],
+        design: str = "full_factorial",
+        samples: int = 10,
+        runs: Optional[int] = None,
+        seed: int = 0
+    ) -> List[Dict[str, float]]:
+        """
+        生成实验设计矩阵
+
+        Args:
+            factors: 实验因子
+            design: full_factorial / latin_hypercube / fractional_factorial
+            samples: 拉丁超立方抽样的场景数
+            runs: 部分因子设计的场景数
+            seed: 拉丁超立方抽样的随机数种子
+
+        Returns:
+            场景列表，每个场景为 {因子名: 水平}
+        """
+        if design == "full_factorial":
+            axes = [ExperimentService._levels(f) for f in factors]
+            rows = [list(values) for values in itertools.product(*axes)]
+        elif design == "latin_hypercube":
+            rows = ExperimentService._latin_hypercube(factors, samples, seed)
+        elif design == "fractional_factorial":
+            rows = ExperimentService._fractional_factorial(factors, runs)
+        else:
+            raise ValueError(f"不支持的设计类型: {design}")
+
+        return [
+            {f.key: ExperimentService._round(f, value) for f, value in zip(factors, row)}
+            for row in rows
+        ]
+
+    @staticmethod
+    def _levels(factor: Factor) -> List[float]:
+        if factor.levels:
+            return list(factor.levels)
+        if factor.low == factor.high:
+            return [factor.low]
+        return [factor.low, factor.high]
+
+    @staticmethod
+    def _round(factor: Factor, value: float) -> float:
+        return int(round(value)) if factor.is_integer else value
+
+    @staticmethod
+    def _latin_hypercube(factors: List[Factor], samples: int, seed: int) -> List[List[float]]:
+        """每个因子的取值范围等分为 samples 层，每层恰好抽取一次"""
+        rng = random.Random(seed)
+        columns = []
+        for factor in factors:
+            strata = list(range(samples))
+            rng.shuffle(strata)
+            column = []
+            for stratum in strata:
+                u = (stratum + rng.random()) / samples
+                if factor.levels:
+                    levels = factor.levels
+                    column.append(levels[min(int(u * len(levels)), len(levels) - 1)])
+                else:
+                    column.append(factor.low + u * (factor.high - factor.low))
+            columns.append(column)
+        return [list(row) for row in zip(*columns)]
+
+    @staticmethod
+    def _fractional_factorial(factors: List[Factor], runs: Optional[int]) -> List[List[float]]:
+        """
+        两水平部分因子设计 2^(k-p)
+
+        前 m 个因子取全因子设计，其余因子依次由基本因子的交互作用列生成，
+        先使用阶数最高的交互作用以获得尽可能高的分辨率。
+        """
+        k = len(factors)
+        if runs is None:
+            m = max(1, math.ceil(math.log2(k + 1)))
+        else:
+            m = int(math.log2(runs))
+            if 2 ** m != runs:
+                raise ValueError("部分因子设计的场景数必须是2的幂")
+            if m > k:
+                raise ValueError(f"{k} 个因子的全因子设计只有 {2 ** k} 个场景，runs 不能超过该数")
+        m = min(m, k)
+        generators = [
+            combo
+            for size in range(m, 1, -1)
+            for combo in itertools.combinations(range(m), size)
+        ]
+        if k - m > len(generators):
+            raise ValueError(f"{2 ** m} 个场景不足以安排 {k} 个因子，请增大 runs")
+
+        rows = []
+        for signs in itertools.product((-1, 1), repeat=m):
+            coded = list(signs)
+            for combo in generators[:k - m]:
+                coded.append(math.prod(signs[i] for i in combo))
+            row = []
+            for factor, sign in zip(factors, coded):
+                levels = ExperimentService._levels(factor)
+                row.append(levels[0] if sign < 0 else levels[-1])
+            rows.append(row)
+        return rows
+
+    # ------------------------------------------------------------------
+    # 场景构建
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def apply_factors(base_config: Dict[str, Any], factors: List[Factor], values: Dict[str, float]) -> Dict[str, Any]:
+        """
+        在基准配置的副本上设置因子水平
+
+        Args:
+            base_config: ConfigService.build_config 格式的基准配置
+            factors: 实验因子
+            values: {因子名: 水平}
+
+        Returns:
+            场景配置
+        """
+        config = copy.deepcopy(base_config)
+        for factor in factors:
+            entity = ExperimentService._find_entity(config, factor)
+            *parents, leaf = factor.field.split(".")
+            node = entity
+            for name in parents:
+                node = node.get(name)
+                if not isinstance(node, dict):
+                    raise ValueError(f"因子 {factor.key} 的字段路径无效: {factor.field}")
+            node[leaf] = values[factor.key]
+        return config
+
+    @staticmethod
+    def _find_entity(config: Dict[str, Any], factor: Factor) -> Dict[str, Any]:
+        line = config["production_line"]
+        if factor.target == "step":
+            routine_id, _, step_id = factor.id.rpartition("/")
+            for routine in config.get("routines", []):
+                if routine["id"] == routine_id:
+                    for step in routine.get("steps", []):
+                        if str(step.get("step_id")) == step_id:
+                            return step
+        else:
+            collection = {
+                "workstation": "workstations",
+                "buffer": "buffers",
+                "transport_path": "transport_paths"
+            }[factor.target]
+            for entity in line.get(collection, []):
+                if entity["id"] == factor.id:
+                    return entity
+        raise ValueError(f"因子 {factor.key} 引用的实体不存在: {factor.id}")
+
+    # ------------------------------------------------------------------
+    # 执行
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def check(base_config: Dict[str, Any], request: ExperimentCreate) -> None:
+        """提交前检查实验设计和因子引用，不运行仿真；问题以 ValueError 报告"""
+        design = ExperimentService.generate_design(
+            request.factors, request.design, request.samples, request.runs, request.seed
+        )
+        ExperimentService.apply_factors(base_config, request.factors, design[0])
+
+    @staticmethod
+    def run_experiment(base_config: Dict[str, Any], request: ExperimentCreate) -> Dict[str, Any]:
+        """
+        执行参数扫描实验
+
+        所有场景的第 r 次重复使用同一随机数种子（公共随机数），
+        各 (场景, 重复) 在进程池中并行运行，结果完成即追加到断点文件。
+        重新提交同一实验时跳过断点文件中已有结果的运行。
+        耗时较长，由任务管理器在后台工作进程中调用。
+
+        Args:
+            base_config: ConfigService.build_config 格式的基准配置
+            request: 实验请求
+
+        Returns:
+            响应表
+        """
+        base_hash = line_fingerprint(base_config)
+        params = request.params.model_dump()
+
+        design = ExperimentService.generate_design(
+            request.factors, request.design, request.samples, request.runs, request.seed
+        )
+        seeds = [request.seed + r for r in range(request.replications)]
+
+        study_id = request.study_id or config_hash({
+            "base": base_hash,
+            "request": request.model_dump(exclude={"workers", "study_id"})
+        })[:16]
+        known = ExperimentService._load_checkpoint(study_id)
+
+        # 运行清单；设计中重复的场景（如取整后重合）只运行一次
+        runs = []
+        pending: Dict[str, Dict[str, Any]] = {}
+        for index, values in enumerate(design):
+            scenario_config = None
+            for replication, seed in enumerate(seeds):
+                key = config_hash({"base": base_hash, "values": values, "params": params, "seed": seed})
+                runs.append({"scenario": index, "replication": replication, "seed": seed, "key": key})
+                if key in known or key in pending:
+                    continue
+                if scenario_config is None:
+                    scenario_config = ExperimentService.apply_factors(base_config, request.factors, values)
+                pending[key] = {"config": scenario_config, "seed": seed, "values": values}
+
+        ExperimentService._execute(study_id, pending, params, request.workers, known)
+
+        return ExperimentService._response_table(
+            study_id, request, design, runs, known, simulated=len(pending)
+        )
+
+    @staticmethod
+    def _execute(
+        study_id: str,
+        pending: Dict[str, Dict[str, Any]],
+        params: Dict[str, Any],
+        workers: Optional[int],
+        known: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """并行运行尚无结果的仿真，完成一个即写入断点文件"""
+        if not pending:
+            return
+        path = ExperimentService._checkpoint_path(study_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # 上次中断时末行可能只写了一半，先补齐换行再追加
+        truncated = False
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as existing:
+                existing.seek(-1, os.SEEK_END)
+                truncated = existing.read(1) != b"\n"
+
+        with open(path, "a", encoding="utf-8") as checkpoint:
+            if truncated:
+                checkpoint.write("\n")
+
+            tasks = {key: (task["config"], task["seed"]) for key, task in pending.items()}
+            pool = ExperimentService.process_pool(workers, len(tasks))
+            try:
+                for key, result in ExperimentService.simulate(tasks, params, pool):
+                    row = {"key": key, "values": pending[key]["values"], "seed": pending[key]["seed"], "result": result}
+                    checkpoint.write(json.dumps(row, ensure_ascii=False) + "\n")
+                    checkpoint.flush()
+                    known[key] = result
+            finally:
+                if pool is not None:
+                    # 任务被取消时不再启动排队中的仿真
+                    pool.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def process_pool(workers: Optional[int], tasks: Optional[int] = None) -> Optional[ProcessPoolExecutor]:
+        """
+        创建仿真进程池
+
+        Args:
+            workers: 进程数，默认为CPU核数
+            tasks: 任务数，进程数不超过任务数
+
+        Returns:
+            进程池；只需一个进程时返回None，在当前进程内运行
+        """
+        workers = workers or os.cpu_count() or 1
+        if tasks is not None:
+            workers = min(workers, tasks)
+        if workers <= 1:
+            return None
+        # 使用spawn启动子进程，避免在多线程的服务进程中fork
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+    @staticmethod
+    def simulate(
+        tasks: Dict[Hashable, Tuple[Dict[str, Any], int]],
+        params: Dict[str, Any],
+        pool: Optional[ProcessPoolExecutor] = None,
+        use_cache: bool = True
+    ) -> Iterator[Tuple[Hashable, Dict[str, Any]]]:
+        """
+        运行一批仿真，按完成顺序逐个产出结果
+
+        先查询结果缓存，命中的任务直接返回；新结果写入缓存。
+
+        Args:
+            tasks: {任务键: (配置, 种子)}
+            params: 仿真参数
+            pool: 进程池，为空时在当前进程内依次运行
+            use_cache: 是否使用结果缓存
+
+        Yields:
+            (任务键, 统计结果)
+        """
+        pending: Dict[Hashable, Tuple[Dict[str, Any], int, Optional[str]]] = {}
+        fingerprints: Dict[int, str] = {}
+        for key, (config, seed) in tasks.items():
+            cache_key = None
+            if use_cache:
+                # 同一批任务中的场景配置大多是同一对象，只计算一次指纹
+                fingerprint = fingerprints.get(id(config))
+                if fingerprint is None:
+                    fingerprint = fingerprints[id(config)] = line_fingerprint(config)
+                cache_key = result_cache.key(fingerprint, seed, params)
+                cached = result_cache.get(cache_key)
+                if cached is not None:
+                    yield key, cached
+                    continue
+            pending[key] = (config, seed, cache_key)
+
+        def done(key: Hashable, result: Dict[str, Any]) -> Tuple[Hashable, Dict[str, Any]]:
+            cache_key = pending[key][2]
+            if cache_key is not None:
+                result_cache.put(cache_key, result)
+            return key, result
+
+        if pool is None:
+            for key, (config, seed, _) in pending.items():
+                yield done(key, run_simulation(config, params, seed))
+            return
+
+        futures = {
+            pool.submit(run_simulation, config, params, seed): key
+            for key, (config, seed, _) in pending.items()
+        }
+        for future in as_completed(futures):
+            yield done(futures[future], future.result())
+
+    @staticmethod
+    def _checkpoint_path(study_id: str) -> str:
+        return os.path.join(EXPERIMENT_DIR, f"{study_id}.jsonl")
+
+    @staticmethod
+    def _load_checkpoint(study_id: str) -> Dict[str, Dict[str, Any]]:
+        """读取断点文件中已完成的运行结果，忽略中断时写了一半的末行"""
+        known: Dict[str, Dict[str, Any]] = {}
+        path = ExperimentService._checkpoint_path(study_id)
+        if not os.path.exists(path):
+            return known
+        with open(path, encoding="utf-8") as checkpoint:
+            for line in checkpoint:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                known[row["key"]] = row["result"]
+        return known
+
+    @staticmethod
+    def _response_table(
+        study_id: str,
+        request: ExperimentCreate,
+        design: List[Dict[str, float]],
+        runs: List[Dict[str, Any]],
+        results: Dict[str, Dict[str, Any]],
+        simulated: int
+    ) -> Dict[str, Any]:
+        """组装响应表：每次运行一行，另按场景汇总均值和标准差"""
+        rows = []
+        by_scenario: Dict[int, List[Dict[str, Any]]] = {}
+        for run in runs:
+            kpis = results[run["key"]]["kpis"]
+            row = {
+                "scenario": run["scenario"],
+                "replication": run["replication"],
+                "seed": run["seed"],
+                **design[run["scenario"]],
+                **{name: kpis.get(name) for name in RESPONSE_KPIS}
+            }
+            rows.append(row)
+            by_scenario.setdefault(run["scenario"], []).append(row)
+
+        summary = []
+        for index, values in enumerate(design):
+            entry = {"scenario": index, **values}
+            for name in RESPONSE_KPIS:
+                samples = [r[name] for r in by_scenario[index] if r[name] is not None]
+                mean = sum(samples) / len(samples) if samples else None
+                std = (
+                    math.sqrt(sum((x - mean) ** 2 for x in samples) / (len(samples) - 1))
+                    if len(samples) > 1 else None
+                )
+                entry[f"{name}_mean"] = mean
+                entry[f"{name}_std"] = std
+            summary.append(entry)
+
+        return {
+            "study_id": study_id,
+            "production_line_id": request.production_line_id,
+            "design": request.design,
+            "factors": [f.key for f in request.factors],
+            "responses": list(RESPONSE_KPIS),
+            "runs": rows,
+            "summary": summary,
+            "statistics": {
+                "scenarios": len(design),
+                "replications": request.replications,
+                "runs": len(runs),
+                "simulated": simulated,
+                "skipped": len(runs) - simulated
+            }
+        }
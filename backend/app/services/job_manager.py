@@ -0,0 +1,578 @@
+"""仿真任务管理 - 在工作进程中运行仿真及参数扫描等研究任务，支持排队、进度查询、暂停/继续和取消"""
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from multiprocessing.connection import wait
+from typing import Any, Deque, Dict, List, Optional
+
+from ..database import SessionLocal
+from ..models.experiment import BufferAllocationCreate, ExperimentCreate
+from ..models.simulation import CoSimulationCreate, OeeReportCreate, SimulationParams, SimulationRunCreate
+from ..simulation import LineModel, Simulation
+from ..simulation.instrumentation import ENGINE_METRICS, EngineProfiler, engine_metrics
+from .buffer_allocation_service import BufferAllocationService
+from .experiment_service import ExperimentService
+from .result_cache import result_cache
+from .run_registry import RunRegistryService
+from .simulation_service import SimulationService
+
+
+# 运行名额数（同时运行的仿真进程数），默认为CPU核数
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 0)) or os.cpu_count() or 1
+# 排队任务数上限
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", 256))
+# 保留的已结束任务数
+JOB_HISTORY = int(os.environ.get("JOB_HISTORY", 500))
+
+# 每个任务分段推进的段数，每段之间更新进度并响应暂停
+PROGRESS_STEPS = 200
+# 运行中每段之后发回的瓶颈报告中保留的最近瓶颈区间数
+LIVE_INTERVALS = 50
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+PAUSED = "paused"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+# 工作进程发回的运行中快照、引擎统计
+LIVE = "live"
+METRICS = "metrics"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+# 任务类型
+SIMULATION = "simulation"
+DOE = "doe"
+BUFFER_ALLOCATION = "buffer_allocation"
+OEE = "oee"
+COSIM = "cosim"
+
+# 研究任务：任务类型 -> (请求模型, 以产线配置和请求运行的服务函数)
+TASKS = {
+    DOE: (ExperimentCreate, ExperimentService.run_experiment),
+    BUFFER_ALLOCATION: (BufferAllocationCreate, BufferAllocationService.optimize),
+    OEE: (OeeReportCreate, SimulationService.oee_report),
+    # 协同仿真的配置为 {产线ID: 配置}
+    COSIM: (CoSimulationCreate, SimulationService.cosimulate),
+}
+
+
+class JobQueueFull(Exception):
+    """排队任务数已达上限"""
+
+
+def _run_job(config: Dict[str, Any], params: Dict[str, Any], seed: int, running, progress, conn) -> None:
+    """
+    工作进程入口：分段推进仿真，每段之后写入当前仿真时刻、发回瓶颈报告，暂停时在段间等待
+
+    结果或异常信息通过管道发回；进程被终止时管道关闭，由管理器识别。
+    """
+    try:
+        params = SimulationParams(**params)
+        profiler = EngineProfiler() if ENGINE_METRICS else None
+        simulation = Simulation(LineModel(config), params, seed, profiler=profiler)
+        step = params.duration / PROGRESS_STEPS
+        until = 0.0
+        while not simulation.finished:
+            running.wait()
+            until += step
+            simulation.run(until)
+            progress.value = simulation.now
+            if not simulation.finished:
+                conn.send((LIVE, simulation.bottlenecks.report(simulation.now, LIVE_INTERVALS)))
+        result = simulation.output()
+        if profiler is not None:
+            conn.send((METRICS, profiler.snapshot()))
+        conn.send((COMPLETED, result))
+    except Exception as e:
+        conn.send((FAILED, f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def _run_task(kind: str, config: Dict[str, Any], request: Dict[str, Any], conn) -> None:
+    """
+    工作进程入口：运行参数扫描、缓冲区分配优化、OEE报告、协同仿真等研究任务，结果或异常信息通过管道发回
+
+    研究任务自己再启动仿真进程池，因此工作进程不是守护进程；
+    取消时收到的 SIGTERM 转为 SystemExit，关闭进程池、不再启动排队中的仿真。
+    """
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
+    try:
+        model, run = TASKS[kind]
+        conn.send((COMPLETED, run(config, model(**request))))
+    except Exception as e:
+        conn.send((FAILED, f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+class Job:
+    """一个仿真任务或研究任务"""
+
+    def __init__(
+        self,
+        request: Any,
+        config: Dict[str, Any],
+        fingerprint: Optional[str],
+        cache_key: Optional[str],
+        kind: str = SIMULATION
+    ):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.request = request
+        # 协同仿真涉及多条产线，没有单一的产线ID和指纹
+        self.production_line_id: Optional[str] = getattr(request, "production_line_id", None)
+        self.config: Optional[Dict[str, Any]] = config
+        self.fingerprint = fingerprint
+        self.cache_key = cache_key
+        # 占用的运行名额：仿真任务一个，研究任务为其仿真进程池的进程数（由管理器提交时确定）
+        self.slots = 1
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cached = False
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.run_id: Optional[str] = None
+        # 运行期间的进程、结果管道、暂停开关（置位为运行）和进度（当前仿真时刻）
+        self.process = None
+        self.conn = None
+        self.running = None
+        self.progress = None
+        self.sim_time = 0.0
+        # 运行中最近一段之后的瓶颈报告
+        self.live: Optional[Dict[str, Any]] = None
+
+    def describe(self) -> Dict[str, Any]:
+        duration = self.request.params.duration
+        if self.progress is not None:
+            self.sim_time = self.progress.value
+        if self.kind == SIMULATION:
+            progress = min(1.0, self.sim_time / duration)
+        else:
+            # 研究任务不分段推进，只有完成与否
+            progress = 1.0 if self.status == COMPLETED else None
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "production_line_id": self.production_line_id,
+            "fingerprint": self.fingerprint,
+            "seed": self.request.seed,
+            "status": self.status,
+            "cached": self.cached,
+            "sim_time": self.sim_time,
+            "progress": progress,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "slots": self.slots,
+            "wall_time": (
+                (self.finished_at or time.time()) - self.started_at
+                if self.started_at is not None else None
+            ),
+            "error": self.error,
+            "run_id": self.run_id
+        }
+
+
+class JobManager:
+    """
+    本地仿真任务管理器
+
+    除单次仿真外，参数扫描、缓冲区分配优化、OEE报告、协同仿真等研究任务（submit_task）也作为任务在工作进程中运行，
+    接口立即返回任务，结果通过 result 查询。
+
+    仿真是CPU密集型计算，在接口进程中运行会占住GIL，拖慢所有编辑请求；
+    这里每个任务在独立的工作进程中运行（spawn方式启动），接口进程只做调度。
+    共有 workers 个运行名额：仿真任务占一个，研究任务按其进程池的进程数占用多个（不超过 workers），
+    因此所有任务同时运行的仿真进程数不超过 workers。任务按提交顺序启动，队首任务的名额不够时后面的任务也等待，
+    排队数超过 max_queue 时拒绝提交。暂停的任务保留其工作进程和运行名额，继续后从暂停处接着推进。
+
+    后台监视线程等待各任务的结果管道：收到结果后写入结果缓存（需要时保存运行记录），
+    然后启动排队中的任务；没有运行中的任务时线程退出，下次启动任务时重新创建。
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_queue: int = JOB_QUEUE_SIZE, history: int = JOB_HISTORY):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.history = history
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Deque[str] = deque()
+        self._active: Dict[str, Job] = {}  # 运行中和已暂停的任务
+        self._monitor: Optional[threading.Thread] = None
+        self._context = multiprocessing.get_context("spawn")
+
+    def submit(
+        self,
+        request: SimulationRunCreate,
+        config: Dict[str, Any],
+        fingerprint: str
+    ) -> Dict[str, Any]:
+        """
+        提交仿真任务
+
+        结果缓存命中时任务直接完成，不占用排队名额。
+
+        Raises:
+            JobQueueFull: 排队任务数已达上限
+        """
+        cache_key = result_cache.key(fingerprint, request.seed, request.params)
+        job = Job(request, config, fingerprint, cache_key)
+        cached = result_cache.get(cache_key) if request.use_cache else None
+
+        with self._lock:
+            if cached is None and len(self._queue) >= self.max_queue:
+                raise JobQueueFull(f"排队任务数已达上限（{self.max_queue}），请稍后再提交")
+            self._jobs[job.id] = job
+            if cached is None:
+                self._queue.append(job.id)
+                self._dispatch()
+                return job.describe()
+            job.cached = True
+            job.started_at = job.created_at
+            self._complete(job, cached)
+
+        if request.save:
+            self._save_run(job, cached, None)
+        return self.get(job.id) or job.describe()
+
+    def submit_task(
+        self,
+        kind: str,
+        request: Any,
+        config: Dict[str, Any],
+        fingerprint: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        提交研究任务（DOE、BUFFER_ALLOCATION、OEE、COSIM），任务本身不使用结果缓存，不支持暂停
+
+        Raises:
+            JobQueueFull: 排队任务数已达上限
+        """
+        job = Job(request, config, fingerprint, None, kind)
+        job.slots = self._task_slots(kind, request, config)
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                raise JobQueueFull(f"排队任务数已达上限（{self.max_queue}），请稍后再提交")
+            self._jobs[job.id] = job
+            self._queue.append(job.id)
+            self._dispatch()
+            return job.describe()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """任务状态和进度，不存在时返回None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.describe() if job else None
+
+    def list(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """任务列表，按提交时间倒序"""
+        with self._lock:
+            return [
+                job.describe()
+                for job in reversed(self._jobs.values())
+                if status is None or job.status == status
+            ]
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        已完成任务的统计结果（不含时间序列，时间序列随运行记录保存），研究任务为其响应结果
+
+        Returns:
+            结果，任务不存在时返回None
+
+        Raises:
+            ValueError: 任务尚未完成
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status != COMPLETED:
+                raise ValueError(f"任务未完成，当前状态为 {job.status}")
+            return {
+                "kind": job.kind,
+                "production_line_id": job.production_line_id,
+                "fingerprint": job.fingerprint,
+                "seed": job.request.seed,
+                "cached": job.cached,
+                "run_id": job.run_id,
+                "result": job.result
+            }
+
+    def bottlenecks(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        任务的瓶颈报告：运行中或已暂停时为最近一段推进后的在线报告，已完成时为最终报告
+
+        Returns:
+            任务状态、仿真时刻和瓶颈报告（尚未推进完第一段时报告为空），任务不存在时返回None
+
+        Raises:
+            ValueError: 任务失败或已取消
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.kind != SIMULATION:
+                raise ValueError("只有仿真任务有瓶颈报告")
+            if job.status in (FAILED, CANCELLED):
+                raise ValueError(f"任务没有瓶颈报告，当前状态为 {job.status}")
+            report = job.result.get("bottlenecks") if job.status == COMPLETED else job.live
+            return {
+                "id": job.id,
+                "status": job.status,
+                "sim_time": job.describe()["sim_time"],
+                "bottlenecks": report
+            }
+
+    def pause(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """暂停任务：运行中的任务在当前分段结束后停下，排队中的任务暂不启动"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.kind != SIMULATION:
+                raise ValueError("只有仿真任务可以暂停")
+            if job.status in FINISHED_STATES:
+                raise ValueError("任务已结束，无法暂停")
+            if job.running is not None:
+                job.running.clear()
+            job.status = PAUSED
+            return job.describe()
+
+    def resume(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """继续已暂停的任务"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status != PAUSED:
+                raise ValueError("任务未暂停")
+            if job.running is not None:
+                job.status = RUNNING
+                job.running.set()
+            else:
+                job.status = QUEUED
+                self._dispatch()
+            return job.describe()
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """取消任务：运行中的任务终止其工作进程，由监视线程回收后释放运行名额"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status in FINISHED_STATES:
+                raise ValueError("任务已结束，无法取消")
+            if job.process is not None:
+                job.process.terminate()
+            else:
+                self._queue.remove(job.id)
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            job.config = None
+            self._prune()
+            return job.describe()
+
+    def stats(self) -> Dict[str, int]:
+        """运行名额数、已占用的名额数、运行中/已暂停/排队中的任务数"""
+        with self._lock:
+            counts = {RUNNING: 0, PAUSED: 0}
+            for job in self._active.values():
+                if job.status in counts:
+                    counts[job.status] += 1
+            return {
+                "workers": self.workers,
+                "busy_slots": self._busy_slots(),
+                "max_queue": self.max_queue,
+                "running": counts[RUNNING],
+                "paused": counts[PAUSED],
+                "queued": len(self._queue)
+            }
+
+    def shutdown(self) -> None:
+        """终止所有工作进程（应用退出时调用）"""
+        with self._lock:
+            self._queue.clear()
+            for job in self._active.values():
+                job.process.terminate()
+                job.status = CANCELLED
+                job.finished_at = time.time()
+            for job in self._jobs.values():
+                if job.status not in FINISHED_STATES:
+                    job.status = CANCELLED
+                    job.finished_at = time.time()
+
+    # ------------------------------------------------------------------
+    # 调度（调用方持有锁）
+    # ------------------------------------------------------------------
+
+    def _task_slots(self, kind: str, request: Any, config: Dict[str, Any]) -> int:
+        """研究任务占用的运行名额：请求的进程数（默认全部名额），不超过名额数及可并行的仿真数"""
+        slots = min(request.workers or self.workers, self.workers)
+        if kind == OEE:
+            slots = min(slots, request.replications)
+        elif kind == COSIM:
+            slots = min(slots, len(config))
+        return max(1, slots)
+
+    def _busy_slots(self) -> int:
+        return sum(job.slots for job in self._active.values())
+
+    def _dispatch(self) -> None:
+        """在运行名额内按提交顺序启动排队中的任务（跳过已暂停的排队任务）"""
+        skipped = []
+        busy = self._busy_slots()
+        while self._queue:
+            job = self._jobs[self._queue[0]]
+            if job.status == PAUSED:
+                skipped.append(self._queue.popleft())
+                continue
+            # 名额不够时不越过队首任务，避免占用名额多的研究任务一直等待
+            if busy + job.slots > self.workers:
+                break
+            self._queue.popleft()
+            self._start(job)
+            busy += job.slots
+        self._queue.extendleft(reversed(skipped))
+
+        if self._active and (self._monitor is None or not self._monitor.is_alive()):
+            self._monitor = threading.Thread(target=self._watch, name="job-monitor", daemon=True)
+            self._monitor.start()
+
+    def _start(self, job: Job) -> None:
+        context = self._context
+        receiver, sender = context.Pipe(duplex=False)
+        job.conn = receiver
+        job.running = context.Event()
+        job.running.set()
+        job.progress = context.RawValue("d", 0.0)
+        if job.kind == SIMULATION:
+            job.process = context.Process(
+                target=_run_job,
+                args=(job.config, job.request.params.model_dump(), job.request.seed, job.running, job.progress, sender),
+                name=f"simulation-job-{job.id[:8]}",
+                daemon=True
+            )
+        else:
+            # 研究任务的进程池只使用分配给它的名额
+            request = dict(job.request.model_dump(), workers=job.slots)
+            job.process = context.Process(
+                target=_run_task,
+                args=(job.kind, job.config, request, sender),
+                name=f"{job.kind}-job-{job.id[:8]}"
+            )
+        job.process.start()
+        # 关闭本进程持有的发送端，工作进程退出后接收端才能读到EOF
+        sender.close()
+        job.status = RUNNING
+        job.started_at = time.time()
+        self._active[job.id] = job
+
+    def _release(self, job: Job) -> None:
+        """回收任务的工作进程和管道，释放运行名额（只在监视线程中调用）"""
+        job.sim_time = job.progress.value
+        job.conn.close()
+        job.process.join()
+        job.process = job.conn = job.running = job.progress = None
+        self._active.pop(job.id, None)
+
+    def _complete(self, job: Job, result: Dict[str, Any]) -> None:
+        if job.kind == SIMULATION:
+            job.result = {k: v for k, v in result.items() if k != "series"}
+            job.sim_time = result["time"]
+        else:
+            job.result = result
+        job.live = None
+        job.status = COMPLETED
+        job.finished_at = time.time()
+        job.config = None
+        self._prune()
+
+    def _prune(self) -> None:
+        """已结束的任务超过保留数时，删除最早提交的"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    # ------------------------------------------------------------------
+    # 监视线程
+    # ------------------------------------------------------------------
+
+    def _watch(self) -> None:
+        while True:
+            with self._lock:
+                conns = {job.conn: job for job in self._active.values()}
+                if not conns:
+                    self._monitor = None
+                    return
+            # 超时后重新收集管道，纳入期间新启动的任务
+            for conn in wait(list(conns), timeout=0.5):
+                job = conns[conn]
+                try:
+                    status, payload = conn.recv()
+                except (EOFError, OSError):
+                    status, payload = FAILED, None
+                if status == LIVE:
+                    with self._lock:
+                        job.live = payload
+                    continue
+                if status == METRICS:
+                    engine_metrics.merge(payload)
+                    continue
+                save = False
+                with self._lock:
+                    self._release(job)
+                    if job.status == CANCELLED:
+                        pass
+                    elif status == COMPLETED:
+                        wall_time = time.time() - job.started_at
+                        if job.cache_key is not None:
+                            result_cache.put(job.cache_key, payload)
+                        self._complete(job, payload)
+                        save = job.kind == SIMULATION and job.request.save
+                    else:
+                        job.status = FAILED
+                        job.error = payload or "工作进程异常退出"
+                        job.finished_at = time.time()
+                        job.config = None
+                        self._prune()
+                    self._dispatch()
+                if save:
+                    self._save_run(job, payload, wall_time)
+
+    def _save_run(self, job: Job, result: Dict[str, Any], wall_time: float) -> None:
+        """保存运行记录（在锁外访问数据库）"""
+        db = SessionLocal()
+        try:
+            run = RunRegistryService.save_run(
+                db,
+                job.request.production_line_id,
+                job.fingerprint,
+                job.request.seed,
+                job.request.params.model_dump(),
+                result,
+                wall_time
+            )
+        except Exception as e:
+            with self._lock:
+                job.error = f"运行记录保存失败: {e}"
+            return
+        finally:
+            db.close()
+        with self._lock:
+            job.run_id = run.id
+
+
+# 进程级单例
+job_manager = JobManager()
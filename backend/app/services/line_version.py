@@ -0,0 +1,37 @@
+"""产线版本登记 - 记录每条产线配置的变更版本号"""
+import threading
+import uuid
+from typing import Dict
+
+
+class LineVersionRegistry:
+    """
+    产线版本登记表
+
+    每条产线维护一个进程内单调递增的版本号，产线下的实体发生写操作后递增。
+    各类派生数据的缓存以 (产线ID, 版本号) 判断是否仍然有效。
+    total 为全部产线的变更次数，用于不按产线区分的数据（如产线列表）；
+    epoch 在每次进程启动时随机生成，版本号只在同一 epoch 内可比较。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self.epoch = uuid.uuid4().hex[:12]
+        self.total = 0
+
+    def get(self, line_id: str) -> int:
+        """获取产线当前版本号，未登记的产线版本为0"""
+        return self._versions.get(line_id, 0)
+
+    def bump(self, line_id: str) -> int:
+        """递增产线版本号并返回新版本"""
+        with self._lock:
+            version = self._versions.get(line_id, 0) + 1
+            self._versions[line_id] = version
+            self.total += 1
+            return version
+
+
+# 进程级单例
+line_versions = LineVersionRegistry()
@@ -0,0 +1,185 @@
+"""运行指标导出 - API进程指标、仿真任务和结果缓存状态、引擎统计，Prometheus文本格式"""
+import gc
+import os
+import platform
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..simulation.instrumentation import ENGINE_METRICS, engine_metrics
+from .change_log import change_feed
+from .job_manager import job_manager
+from .request_metrics import LATENCY_BUCKETS, request_metrics
+from .response_cache import response_cache
+from .result_cache import result_cache
+
+
+# Prometheus文本格式的Content-Type（响应会补上 charset=utf-8）
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+_STARTED = time.time()
+
+Sample = Tuple[Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class _Writer:
+    """按指标逐个写出 HELP/TYPE 行和样本行"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def metric(self, name: str, kind: str, help_text: str, samples: Iterable[Sample]) -> None:
+        samples = [(labels, value) for labels, value in samples if value is not None]
+        if not samples:
+            return
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        self.samples(name, samples)
+
+    def samples(self, name: str, samples: Iterable[Sample]) -> None:
+        """只写样本行（如summary的 _sum/_count）"""
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+            self.lines.append(f"{name}{{{label_text}}} {_format_value(value)}" if label_text else f"{name} {_format_value(value)}")
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def _resident_memory() -> Optional[int]:
+    """当前常驻内存（字节），只在有 /proc 的系统上可用"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _open_fds() -> Optional[int]:
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+class MetricsService:
+    """/metrics 指标导出"""
+
+    @staticmethod
+    def render() -> str:
+        """
+        生成Prometheus文本格式的指标
+
+        引擎统计只在设置 ENGINE_METRICS=1 时记录，来自本进程内的仿真运行和后台任务的工作进程。
+        """
+        out = _Writer()
+        MetricsService._process(out)
+        MetricsService._application(out)
+        MetricsService._requests(out)
+        MetricsService._engine(out)
+        return out.text()
+
+    @staticmethod
+    def _process(out: _Writer) -> None:
+        cpu = os.times()
+        out.metric("process_cpu_seconds_total", "counter", "API进程的CPU时间（秒）", [({}, cpu.user + cpu.system)])
+        out.metric("process_resident_memory_bytes", "gauge", "API进程的常驻内存（字节）", [({}, _resident_memory())])
+        out.metric("process_open_fds", "gauge", "API进程打开的文件描述符数", [({}, _open_fds())])
+        out.metric("process_start_time_seconds", "gauge", "API进程启动时刻（Unix时间）", [({}, _STARTED)])
+        out.metric("process_threads", "gauge", "API进程的线程数", [({}, threading.active_count())])
+        out.metric(
+            "python_gc_collections_total", "counter", "各代垃圾回收次数",
+            [({"generation": str(i)}, stats["collections"]) for i, stats in enumerate(gc.get_stats())]
+        )
+        out.metric(
+            "python_info", "gauge", "Python版本",
+            [({"implementation": platform.python_implementation(), "version": platform.python_version()}, 1)]
+        )
+
+    @staticmethod
+    def _application(out: _Writer) -> None:
+        jobs = job_manager.stats()
+        out.metric("simulation_job_workers", "gauge", "任务运行名额数（同时运行的仿真进程数上限）", [({}, jobs["workers"])])
+        out.metric("simulation_job_busy_slots", "gauge", "运行中和已暂停的任务占用的运行名额数", [({}, jobs["busy_slots"])])
+        out.metric(
+            "simulation_jobs", "gauge", "各状态的仿真任务数",
+            [({"status": status}, jobs[status]) for status in ("running", "paused", "queued")]
+        )
+        cache = result_cache.stats()
+        out.metric("result_cache_entries", "gauge", "结果缓存条目数", [({}, cache["entries"])])
+        out.metric("result_cache_bytes", "gauge", "结果缓存占用大小（字节）", [({}, cache["bytes"])])
+        responses = response_cache.stats()
+        out.metric("response_cache_entries", "gauge", "列表接口响应缓存条目数", [({}, responses["entries"])])
+        out.metric("response_cache_bytes", "gauge", "列表接口响应缓存占用大小（字节）", [({}, responses["bytes"])])
+        out.metric("response_cache_requests_total", "counter", "列表接口响应缓存的命中和未命中次数", [
+            ({"result": "hit"}, responses["hits"]), ({"result": "miss"}, responses["misses"])
+        ])
+        out.metric("change_stream_connections", "gauge", "变更推送（SSE）连接数", [({}, change_feed.connections())])
+
+    @staticmethod
+    def _requests(out: _Writer) -> None:
+        routes = request_metrics.histograms()
+        if not routes:
+            return
+        out.lines.append("# HELP http_request_duration_seconds 按路由的请求耗时（秒）")
+        out.lines.append("# TYPE http_request_duration_seconds histogram")
+        for route, entry in routes.items():
+            cumulative = 0
+            buckets = []
+            for upper, count in zip(LATENCY_BUCKETS + ("+Inf",), entry["buckets"]):
+                cumulative += count
+                buckets.append(({"route": route, "le": str(upper)}, cumulative))
+            out.samples("http_request_duration_seconds_bucket", buckets)
+            out.samples("http_request_duration_seconds_sum", [({"route": route}, entry["seconds"])])
+            out.samples("http_request_duration_seconds_count", [({"route": route}, entry["count"])])
+        out.metric("http_request_sql_queries_total", "counter", "按路由的SQL语句数", [
+            ({"route": route}, entry["queries"]) for route, entry in routes.items()
+        ])
+        out.metric("http_request_sql_seconds_total", "counter", "按路由的SQL累计耗时（秒）", [
+            ({"route": route}, entry["sql_time"]) for route, entry in routes.items()
+        ])
+
+    @staticmethod
+    def _engine(out: _Writer) -> None:
+        out.metric("engine_metrics_enabled", "gauge", "是否记录引擎统计（ENGINE_METRICS）", [({}, ENGINE_METRICS)])
+        summary = engine_metrics.summary()
+        out.metric("engine_runs_total", "counter", "记录了引擎统计的仿真运行次数", [({}, summary["runs"])])
+        handlers = summary["handlers"]
+        out.metric("engine_events_total", "counter", "处理的事件数", [
+            ({"handler": name}, handler["count"]) for name, handler in handlers.items()
+        ])
+        out.metric("engine_handler_seconds_total", "counter", "事件处理累计耗时（秒）", [
+            ({"handler": name}, handler["seconds"]) for name, handler in handlers.items()
+        ])
+        # 分位数来自抽样的延迟，_sum/_count 为全部事件的累计
+        out.metric("engine_handler_latency_seconds", "summary", "事件处理延迟（秒），分位数按抽样计算", [
+            ({"handler": name, "quantile": str(q)}, value)
+            for name, handler in handlers.items()
+            for q, value in handler["latency"].items()
+        ])
+        if handlers:
+            out.samples("engine_handler_latency_seconds_sum", [
+                ({"handler": name}, handler["seconds"]) for name, handler in handlers.items()
+            ])
+            out.samples("engine_handler_latency_seconds_count", [
+                ({"handler": name}, handler["count"]) for name, handler in handlers.items()
+            ])
+        out.metric("engine_calendar_size_max", "gauge", "事件日历的最大抽样大小", [({}, summary["calendar_max"])])
+        last = summary["last_run"]
+        if last:
+            out.metric("engine_calendar_size", "gauge", "最近一次运行结束前抽样的事件日历大小", [({}, last["calendar_size"])])
+            out.metric("engine_events_per_second", "gauge", "最近一次运行的事件处理速率（事件/秒）", [
+                ({}, last["events_per_second"])
+            ])
@@ -0,0 +1,256 @@
+"""请求统计 - 按路由的请求耗时分布、每个请求的SQL语句数和SQL耗时，慢请求告警"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger(__name__)
+
+# 请求耗时超过该值（毫秒）时记录告警日志并记入慢请求列表
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", 500))
+# 单个请求的SQL语句数超过该值时同样视为慢请求（多为逐行查询关联数据的N+1查询）
+SLOW_REQUEST_QUERIES = int(os.environ.get("SLOW_REQUEST_QUERIES", 50))
+# 保留的最近慢请求数
+SLOW_REQUEST_HISTORY = 100
+
+# 请求耗时分布的桶上界（秒），与Prometheus直方图一致，最后一个桶为 +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _RequestStats:
+    """单个请求的SQL统计，由SQLAlchemy事件钩子在请求所在的上下文中累加"""
+
+    __slots__ = ("queries", "sql_time", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.statements: Dict[str, int] = {}
+
+
+# 当前请求的SQL统计；同步路由和依赖在线程池中执行时会复制上下文，共享同一个对象
+_current: ContextVar[Optional[_RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    started = conn.info["query_start"].pop()
+    stats.queries += 1
+    stats.sql_time += time.perf_counter() - started
+    stats.statements[statement] = stats.statements.get(statement, 0) + 1
+
+
+def install_sql_hooks() -> None:
+    """注册SQL语句计数和计时的事件钩子（对所有数据库引擎生效，请求之外执行的语句不统计）"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class _RouteStats:
+    """一个路由的累计统计"""
+
+    __slots__ = ("count", "errors", "slow", "seconds", "max_seconds", "buckets", "queries", "max_queries", "sql_time")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.slow = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.queries = 0
+        self.max_queries = 0
+        self.sql_time = 0.0
+
+
+def _bucket_quantile(buckets: List[int], count: int, q: float, maximum: float) -> float:
+    """按直方图估计分位数（桶内线性插值），不超过实际最大值"""
+    rank = q * count
+    cumulative = 0
+    lower = 0.0
+    for i, upper in enumerate(LATENCY_BUCKETS):
+        if buckets[i] and cumulative + buckets[i] >= rank:
+            return min(maximum, lower + (upper - lower) * (rank - cumulative) / buckets[i])
+        cumulative += buckets[i]
+        lower = upper
+    return maximum
+
+
+class RequestMetrics:
+    """
+    进程内按路由汇总的请求统计
+
+    路由按路径模板区分（如 GET /api/routines/{routine_id}），未匹配到路由的请求计入 "unmatched"。
+    每个路由记录请求数、错误数（状态码 >= 500）、耗时直方图、SQL语句数和SQL耗时；
+    耗时超过 SLOW_REQUEST_MS 或SQL语句数超过 SLOW_REQUEST_QUERIES 的请求记录告警日志，
+    并连同重复次数最多的SQL语句记入最近慢请求列表，便于定位N+1查询。
+    """
+
+    def __init__(self, history: int = SLOW_REQUEST_HISTORY):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.routes: Dict[str, _RouteStats] = {}
+        self.slow_requests: Deque[Dict[str, Any]] = deque(maxlen=history)
+
+    def record(
+        self,
+        route: str,
+        path: str,
+        status: int,
+        elapsed: float,
+        stats: _RequestStats,
+        streaming: bool = False
+    ) -> None:
+        # SSE等长连接的耗时为连接时长，不视为慢请求
+        slow = not streaming and (elapsed * 1000 > SLOW_REQUEST_MS or stats.queries > SLOW_REQUEST_QUERIES)
+        with self._lock:
+            entry = self.routes.get(route)
+            if entry is None:
+                entry = self.routes[route] = _RouteStats()
+            entry.count += 1
+            entry.errors += status >= 500
+            entry.slow += slow
+            entry.seconds += elapsed
+            if elapsed > entry.max_seconds:
+                entry.max_seconds = elapsed
+            index = 0
+            while index < len(LATENCY_BUCKETS) and elapsed > LATENCY_BUCKETS[index]:
+                index += 1
+            entry.buckets[index] += 1
+            entry.queries += stats.queries
+            if stats.queries > entry.max_queries:
+                entry.max_queries = stats.queries
+            entry.sql_time += stats.sql_time
+        if not slow:
+            return
+
+        statement, repeated = max(stats.statements.items(), key=lambda item: item[1], default=(None, 0))
+        self.slow_requests.append({
+            "time": time.time(),
+            "route": route,
+            "path": path,
+            "status": status,
+            "duration_ms": elapsed * 1000,
+            "queries": stats.queries,
+            "sql_ms": stats.sql_time * 1000,
+            "most_repeated_statement": " ".join(statement.split()) if statement else None,
+            "most_repeated_count": repeated,
+        })
+        logger.warning(
+            "慢请求 %s (%s) 状态码 %s 耗时 %.1fms，SQL %d 条 %.1fms%s",
+            route, path, status, elapsed * 1000, stats.queries, stats.sql_time * 1000,
+            f"，同一语句重复 {repeated} 次" if repeated > 1 else ""
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """各路由的请求数、耗时分位数（按直方图估计）、平均SQL语句数和SQL耗时，以及最近的慢请求"""
+        with self._lock:
+            routes = {
+                route: {
+                    "count": entry.count,
+                    "errors": entry.errors,
+                    "slow": entry.slow,
+                    "mean_ms": entry.seconds / entry.count * 1000,
+                    "p50_ms": _bucket_quantile(entry.buckets, entry.count, 0.5, entry.max_seconds) * 1000,
+                    "p90_ms": _bucket_quantile(entry.buckets, entry.count, 0.9, entry.max_seconds) * 1000,
+                    "p99_ms": _bucket_quantile(entry.buckets, entry.count, 0.99, entry.max_seconds) * 1000,
+                    "max_ms": entry.max_seconds * 1000,
+                    "buckets": {
+                        **{str(upper): n for upper, n in zip(LATENCY_BUCKETS, entry.buckets)},
+                        "+Inf": entry.buckets[-1],
+                    },
+                    "queries_per_request": entry.queries / entry.count,
+                    "max_queries": entry.max_queries,
+                    "sql_ms_per_request": entry.sql_time / entry.count * 1000,
+                }
+                for route, entry in self.routes.items()
+            }
+            slow_requests = list(self.slow_requests)
+        return {
+            "since": self.started,
+            "slow_request_ms": SLOW_REQUEST_MS,
+            "slow_request_queries": SLOW_REQUEST_QUERIES,
+            "routes": dict(sorted(routes.items(), key=lambda item: item[1]["mean_ms"] * item[1]["count"], reverse=True)),
+            "slow_requests": slow_requests[::-1],
+        }
+
+    def histograms(self) -> Dict[str, Dict[str, Any]]:
+        """各路由的累计直方图（供 /metrics 导出）"""
+        with self._lock:
+            return {
+                route: {
+                    "count": entry.count,
+                    "seconds": entry.seconds,
+                    "buckets": list(entry.buckets),
+                    "queries": entry.queries,
+                    "sql_time": entry.sql_time,
+                }
+                for route, entry in self.routes.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started = time.time()
+            self.routes.clear()
+            self.slow_requests.clear()
+
+
+# 进程级单例
+request_metrics = RequestMetrics()
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI中间件：统计每个HTTP请求的耗时和SQL语句
+
+    路由匹配后FastAPI把路由对象写入 scope["route"]，响应结束后按其路径模板汇总。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = _RequestStats()
+        token = _current.set(stats)
+        status = 500
+        streaming = False
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                streaming = any(
+                    key == b"content-type" and value.startswith(b"text/event-stream")
+                    for key, value in message.get("headers", ())
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            route = scope.get("route")
+            template = getattr(route, "path", None)
+            name = f"{scope['method']} {template}" if template else "unmatched"
+            request_metrics.record(name, scope["path"], status, elapsed, stats, streaming)
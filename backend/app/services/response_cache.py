@@ -0,0 +1,109 @@
+"""列表接口响应缓存 - 以 (路由, 产线ID) 为键缓存序列化后的响应体，按产线版本号失效，按容量做LRU淘汰"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi.responses import Response
+
+from .line_version import line_versions
+from .serialization import encode_json, json_response
+
+
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+
+class ResponseCache:
+    """
+    进程内的列表响应缓存
+
+    缓存项记录生成时的产线版本号，产线下的实体发生写操作（版本号递增）后自动失效，
+    不需要逐个路由清理。总大小超过上限时淘汰最久未访问的缓存项。
+    """
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[int, bytes]]" = OrderedDict()
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, route: str, line_id: str, version: int) -> Optional[bytes]:
+        """取出与给定版本号一致的响应体，过期或不存在时返回None"""
+        key = (route, line_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, route: str, line_id: str, version: int, body: bytes) -> None:
+        """保存响应体，version 为开始查询前读取的产线版本号"""
+        key = (route, line_id)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total -= len(old[1])
+            if len(body) > self.max_bytes:
+                return
+            self._entries[key] = (version, body)
+            self._total += len(body)
+            while self._total > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._total -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# 进程级单例
+response_cache = ResponseCache()
+
+
+def cached_list(
+    route: str,
+    production_line_id: Optional[str],
+    model: Any,
+    build: Callable[[], List[dict]],
+    headers: Optional[Dict[str, str]] = None
+) -> Any:
+    """
+    按产线过滤的列表接口返回缓存的响应体
+
+    先读取产线版本号再查询，查询期间发生的写操作会使本次结果在下次读取时失效。
+    未按产线过滤时不缓存。两种情况都由预编译的编码器直接序列化，不经FastAPI按 response_model 校验。
+
+    Args:
+        route: 路由名，与产线ID一起作为缓存键
+        production_line_id: 产线ID
+        model: 列表元素的响应模型
+        build: 查询数据库并返回列表的函数
+        headers: 响应头（如ETag）
+
+    Returns:
+        JSON响应
+    """
+    if not production_line_id:
+        return json_response(List[model], build(), headers)
+    version = line_versions.get(production_line_id)
+    body = response_cache.get(route, production_line_id, version)
+    if body is None:
+        body = encode_json(List[model], build())
+        response_cache.put(route, production_line_id, version, body)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,131 @@
+"""仿真结果缓存 - 以 (产线指纹, 种子, 仿真参数) 为键的磁盘存储，按容量做LRU淘汰"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional, Union
+
+from ..models.simulation import SimulationParams
+from ..simulation import ENGINE_VERSION
+from ..utils.fingerprint import canonical_json
+
+
+RESULT_CACHE_DIR = os.environ.get("RESULT_CACHE_DIR", "./cache")
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+
+class ResultCache:
+    """
+    内容寻址的仿真结果缓存
+
+    结果压缩后存放在独立的SQLite文件中，记录最近访问时间；
+    总大小超过上限时删除最久未访问的结果。
+    键中包含引擎版本号，引擎行为变化后旧结果自动失效。
+    """
+
+    def __init__(self, directory: str = RESULT_CACHE_DIR, max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.directory, "results.db"), check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_results_accessed ON results (accessed)")
+            conn.commit()
+            self._total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def key(
+        fingerprint: str,
+        seed: int,
+        params: Union[Dict[str, Any], SimulationParams, None]
+    ) -> str:
+        """
+        计算缓存键
+
+        Args:
+            fingerprint: 产线指纹
+            seed: 随机数种子
+            params: 仿真参数（补全默认值后参与哈希，不影响结果的事件日历实现除外）
+        """
+        if not isinstance(params, SimulationParams):
+            params = SimulationParams(**(params or {}))
+        text = canonical_json({
+            "engine": ENGINE_VERSION,
+            "fingerprint": fingerprint,
+            "seed": seed,
+            "params": params.model_dump(exclude={"calendar"})
+        })
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取结果并刷新访问时间，未命中返回None"""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """写入结果，超出容量上限时淘汰最久未访问的结果"""
+        value = zlib.compress(json.dumps(result, ensure_ascii=False).encode("utf-8"))
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            conn = self._connect()
+            old = conn.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time())
+            )
+            self._total += size - (old[0] if old else 0)
+            if self._total > self.max_bytes:
+                excess = self._total - self.max_bytes
+                victims = []
+                freed = 0
+                cursor = conn.execute("SELECT key, size FROM results WHERE key != ? ORDER BY accessed", (key,))
+                for victim_key, victim_size in cursor:
+                    victims.append((victim_key,))
+                    freed += victim_size
+                    if freed >= excess:
+                        break
+                cursor.close()
+                conn.executemany("DELETE FROM results WHERE key = ?", victims)
+                self._total -= freed
+            conn.commit()
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM results")
+            conn.commit()
+            self._total = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存条目数和占用大小"""
+        with self._lock:
+            conn = self._connect()
+            count = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            return {"entries": count, "bytes": self._total, "max_bytes": self.max_bytes}
+
+
+# 进程级单例
+result_cache = ResultCache()
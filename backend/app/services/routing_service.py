@@ -0,0 +1,51 @@
+"""运输路由服务 - 预计算产线内任意两点间的最短运输时间和下一跳"""
+import threading
+from typing import Dict
+from sqlalchemy.orm import Session
+from ..database.schemas import TransportPathDB
+from ..utils.routing_table import RoutingTable
+from .line_version import line_versions
+
+
+# 产线ID -> 路由表
+_cache: Dict[str, RoutingTable] = {}
+_cache_lock = threading.Lock()
+
+
+class RoutingService:
+    """运输路由服务"""
+
+    @staticmethod
+    def get_routing_table(db: Session, production_line_id: str) -> RoutingTable:
+        """
+        获取产线的路由表，缓存按产线版本号失效
+
+        Args:
+            db: 数据库会话
+            production_line_id: 产线ID
+
+        Returns:
+            路由表
+        """
+        version = line_versions.get(production_line_id)
+        cached = _cache.get(production_line_id)
+        if cached is not None and cached.version == version:
+            return cached
+
+        edges = db.query(
+            TransportPathDB.from_location,
+            TransportPathDB.to_location,
+            TransportPathDB.transport_time
+        ).filter(TransportPathDB.production_line_id == production_line_id).all()
+
+        table = RoutingTable.build(edges, version)
+        with _cache_lock:
+            _cache[production_line_id] = table
+        return table
+
+    @staticmethod
+    def invalidate(production_line_id: str) -> None:
+        """运输路径变更后使产线路由表失效"""
+        line_versions.bump(production_line_id)
+        with _cache_lock:
+            _cache.pop(production_line_id, None)
@@ -0,0 +1,233 @@
+"""仿真运行登记服务 - 保存运行记录、汇总KPI及多分辨率时间序列"""
+import json
+import uuid
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+
+from ..database.schemas import SimulationRunDB, SimulationSeriesDB
+from ..utils.timeseries import build_levels, decode_series, encode_series, lttb, slice_window
+
+
+# 时间序列分组 -> 实体类型
+_SERIES_GROUPS = {"buffers": "buffer", "workstations": "workstation"}
+
+
+class RunRegistryService:
+    """
+    仿真运行登记
+
+    时间序列在写入时用LTTB生成多级分辨率，按实体、指标、级别分行存为压缩二进制；
+    查询时按时间窗口和目标点数选取最合适的级别，长周期运行在任意缩放下只读取少量点。
+    """
+
+    @staticmethod
+    def save_run(
+        db: Session,
+        production_line_id: str,
+        fingerprint: str,
+        seed: int,
+        params: Dict[str, Any],
+        result: Dict[str, Any],
+        wall_time: Optional[float] = None
+    ) -> SimulationRunDB:
+        """
+        保存一次仿真运行
+
+        Args:
+            db: 数据库会话
+            production_line_id: 产线ID
+            fingerprint: 产线指纹
+            seed: 随机数种子
+            params: 仿真参数
+            result: run_simulation 的结果，含 series 时一并保存时间序列
+            wall_time: 运行耗时（秒），命中缓存时为空
+
+        Returns:
+            运行记录
+        """
+        run = SimulationRunDB(
+            id=str(uuid.uuid4()),
+            production_line_id=production_line_id,
+            fingerprint=fingerprint,
+            seed=seed,
+            params=json.dumps(params, ensure_ascii=False),
+            status="completed",
+            duration=result["time"],
+            wall_time=wall_time,
+            kpis=json.dumps(result["kpis"], ensure_ascii=False),
+            result=json.dumps(
+                {k: result[k] for k in ("workstations", "buffers", "value_stream") if k in result},
+                ensure_ascii=False
+            )
+        )
+        db.add(run)
+        db.flush()
+
+        series = result.get("series")
+        if series:
+            times = series["times"]
+            rows = []
+            for group, entity_type in _SERIES_GROUPS.items():
+                for entity_id, metrics in series[group].items():
+                    for metric, values in metrics.items():
+                        rows.extend(RunRegistryService._series_rows(
+                            run.id, entity_type, entity_id, metric, times, values
+                        ))
+            for metric, values in series["line"].items():
+                rows.extend(RunRegistryService._series_rows(
+                    run.id, "line", production_line_id, metric, times, values
+                ))
+            db.add_all(rows)
+
+        db.commit()
+        db.refresh(run)
+        return run
+
+    @staticmethod
+    def _series_rows(run_id, entity_type, entity_id, metric, times, values) -> List[SimulationSeriesDB]:
+        return [
+            SimulationSeriesDB(
+                run_id=run_id,
+                entity_type=entity_type,
+                entity_id=entity_id,
+                metric=metric,
+                level=level,
+                points=len(xs),
+                t_start=xs[0],
+                t_end=xs[-1],
+                data=encode_series(xs, ys)
+            )
+            for level, xs, ys in build_levels(times, values)
+            if xs
+        ]
+
+    @staticmethod
+    def list_runs(db: Session, production_line_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """运行记录列表（不含时间序列），按创建时间倒序"""
+        query = db.query(SimulationRunDB)
+        if production_line_id:
+            query = query.filter(SimulationRunDB.production_line_id == production_line_id)
+        runs = query.order_by(SimulationRunDB.created_at.desc()).all()
+        return [RunRegistryService._describe(run) for run in runs]
+
+    @staticmethod
+    def get_run(db: Session, run_id: str) -> Optional[Dict[str, Any]]:
+        """
+        运行记录详情，附带可查询的时间序列清单
+
+        Returns:
+            运行记录，不存在时返回None
+        """
+        run = db.query(SimulationRunDB).filter(SimulationRunDB.id == run_id).first()
+        if not run:
+            return None
+        data = RunRegistryService._describe(run)
+        data.update(json.loads(run.result) if run.result else {})
+
+        # 只取原始级别的元数据，不读取二进制数据
+        rows = db.query(
+            SimulationSeriesDB.entity_type,
+            SimulationSeriesDB.entity_id,
+            SimulationSeriesDB.metric,
+            SimulationSeriesDB.points,
+            SimulationSeriesDB.t_start,
+            SimulationSeriesDB.t_end
+        ).filter(
+            SimulationSeriesDB.run_id == run_id,
+            SimulationSeriesDB.level == 0
+        ).all()
+        data["series"] = [
+            {
+                "entity_type": row.entity_type,
+                "entity_id": row.entity_id,
+                "metric": row.metric,
+                "points": row.points,
+                "t_start": row.t_start,
+                "t_end": row.t_end
+            }
+            for row in rows
+        ]
+        return data
+
+    @staticmethod
+    def get_series(
+        db: Session,
+        run_id: str,
+        entity_type: str,
+        entity_id: str,
+        metric: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        max_points: int = 1000
+    ) -> Optional[Dict[str, Any]]:
+        """
+        读取时间窗口内的时间序列
+
+        从粗到细查找窗口内点数不少于 max_points 的最粗级别（都不足时用原始级别），
+        截取窗口后点数仍超过 max_points 时再做一次LTTB。
+
+        Returns:
+            {"level", "times", "values"}，序列不存在时返回None
+        """
+        levels = db.query(
+            SimulationSeriesDB.id,
+            SimulationSeriesDB.level,
+            SimulationSeriesDB.points,
+            SimulationSeriesDB.t_start,
+            SimulationSeriesDB.t_end
+        ).filter(
+            SimulationSeriesDB.run_id == run_id,
+            SimulationSeriesDB.entity_type == entity_type,
+            SimulationSeriesDB.entity_id == entity_id,
+            SimulationSeriesDB.metric == metric
+        ).order_by(SimulationSeriesDB.level.desc()).all()
+        if not levels:
+            return None
+
+        chosen = levels[-1]
+        for row in levels:
+            span = row.t_end - row.t_start
+            lo = row.t_start if start is None else max(start, row.t_start)
+            hi = row.t_end if end is None else min(end, row.t_end)
+            fraction = 1.0 if span <= 0 else max(0.0, hi - lo) / span
+            if row.points * fraction >= max_points:
+                chosen = row
+                break
+
+        data = db.query(SimulationSeriesDB.data).filter(SimulationSeriesDB.id == chosen.id).scalar()
+        times, values = decode_series(data)
+        xs, ys = slice_window(times, values, start, end)
+        xs, ys = lttb(xs, ys, max_points)
+        return {
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "metric": metric,
+            "level": chosen.level,
+            "times": list(xs),
+            "values": list(ys)
+        }
+
+    @staticmethod
+    def delete_run(db: Session, run_id: str) -> bool:
+        """删除运行记录及其时间序列，不存在时返回False"""
+        run = db.query(SimulationRunDB).filter(SimulationRunDB.id == run_id).first()
+        if not run:
+            return False
+        db.delete(run)
+        db.commit()
+        return True
+
+    @staticmethod
+    def _describe(run: SimulationRunDB) -> Dict[str, Any]:
+        return {
+            "id": run.id,
+            "production_line_id": run.production_line_id,
+            "fingerprint": run.fingerprint,
+            "seed": run.seed,
+            "params": json.loads(run.params),
+            "status": run.status,
+            "created_at": run.created_at,
+            "duration": run.duration,
+            "wall_time": run.wall_time,
+            "kpis": json.loads(run.kpis) if run.kpis else None
+        }
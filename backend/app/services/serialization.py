@@ -0,0 +1,147 @@
+"""响应序列化快速路径 - 按响应模型预编译的编码器，把查询结果直接编码为JSON字节，跳过pydantic的重复校验"""
+import json
+from typing import Any, Callable, Dict, List, Optional, Union, get_args, get_origin
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时使用标准库json，输出相同，速度较慢
+    orjson = None
+
+
+Encoder = Callable[[Any], Any]
+
+
+def dumps(value: Any) -> bytes:
+    """编码为紧凑的UTF-8 JSON字节（与FastAPI默认的JSON响应格式一致）"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _to_float(value: Any) -> Any:
+    # 与pydantic一致：float 字段中的整数输出为浮点数（如 10 -> 10.0）
+    return float(value) if type(value) is int else value
+
+
+def _field_encoder(annotation: Any) -> Optional[Encoder]:
+    """字段类型对应的转换函数（输入为None时原样返回），值原样输出时返回None"""
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if origin is Union:
+        inner = [arg for arg in args if arg is not type(None)]
+        return _field_encoder(inner[0]) if len(inner) == 1 else None
+    if annotation is float:
+        return _to_float
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _model_encoder(annotation)
+    if origin in (list, List) and args:
+        item = _field_encoder(args[0])
+        if item is None:
+            return None
+        return lambda value: None if value is None else [item(element) for element in value]
+    if origin in (dict, Dict) and len(args) == 2:
+        item = _field_encoder(args[1])
+        if item is None:
+            return None
+        return lambda value: None if value is None else {key: item(element) for key, element in value.items()}
+    return None
+
+
+_models: Dict[type, Encoder] = {}
+
+
+def _model_encoder(model: type) -> Encoder:
+    """
+    按模型字段预编译的编码器
+
+    输入为字典或ORM对象（按属性读取），None 原样返回；输出按模型字段顺序排列的字典：缺少的字段取默认值，
+    多余的键丢弃，float 字段中的整数转为浮点数，嵌套模型递归处理。
+    与 model_validate + model_dump(mode="json") 的结果相同，但不做类型校验——
+    只用于数据库中经模型校验后写入的数据。
+    编码器按字段生成为一个字典表达式的函数，避免逐字段循环的解释开销。
+    """
+    encoder = _models.get(model)
+    if encoder is not None:
+        return encoder
+
+    # 模型自引用时先登记一个转发函数，编译完成后替换
+    _models[model] = lambda value: _models[model](value)
+    namespace: Dict[str, Any] = {}
+    complete = []
+    partial = []
+    from_attributes = []
+    for index, (name, field) in enumerate(model.model_fields.items()):
+        key = repr(name)
+        item = f"value[{key}]"
+        if field.is_required():
+            default = item
+        elif field.default_factory is not None:
+            namespace[f"_default{index}"] = field.default_factory
+            default = f"(value[{key}] if {key} in value else _default{index}())"
+        else:
+            namespace[f"_default{index}"] = field.default
+            default = f"value.get({key}, _default{index})"
+        attribute = f"value.{name}"
+        convert = _field_encoder(field.annotation)
+        if convert is not None:
+            namespace[f"_convert{index}"] = convert
+            item, default, attribute = (f"_convert{index}({expr})" for expr in (item, default, attribute))
+        complete.append(f"{key}: {item}")
+        partial.append(f"{key}: {default}")
+        from_attributes.append(f"{key}: {attribute}")
+
+    # 路由构造的字典通常包含全部字段，先按下标直接取值，缺少字段时再逐个取默认值
+    source = (
+        "def encode(value):\n"
+        "    if value is None:\n"
+        "        return None\n"
+        "    if isinstance(value, dict):\n"
+        "        try:\n"
+        f"            return {{{', '.join(complete)}}}\n"
+        "        except KeyError:\n"
+        f"            return {{{', '.join(partial)}}}\n"
+        f"    return {{{', '.join(from_attributes)}}}\n"
+    )
+    exec(compile(source, f"<encoder {model.__name__}>", "exec"), namespace)
+    encoder = _models[model] = namespace["encode"]
+    return encoder
+
+
+_encoders: Dict[Any, Encoder] = {}
+
+
+def encoder_for(annotation: Any) -> Encoder:
+    """响应模型（如 Routine、List[Routine]）对应的编码器"""
+    encoder = _encoders.get(annotation)
+    if encoder is None:
+        encoder = _field_encoder(annotation) or (lambda value: value)
+        _encoders[annotation] = encoder
+    return encoder
+
+
+def encode_json(annotation: Any, content: Any) -> bytes:
+    """按响应模型把查询结果编码为JSON字节，结果与FastAPI按 response_model 序列化相同"""
+    return dumps(encoder_for(annotation)(content))
+
+
+def json_response(
+    annotation: Any,
+    content: Any,
+    headers: Optional[Dict[str, str]] = None,
+    status_code: int = 200
+) -> Response:
+    """
+    直接返回编码后的JSON响应
+
+    路由仍声明 response_model，OpenAPI文档不变；返回 Response 时FastAPI不再按模型校验和序列化。
+    依赖中写入的响应头不会合并到直接返回的响应中，需要由 headers 传入（如ETag）。
+    """
+    return Response(
+        content=encode_json(annotation, content),
+        media_type="application/json",
+        headers=headers,
+        status_code=status_code
+    )
@@ -0,0 +1,169 @@
+"""仿真运行服务"""
+import os
+import time
+from typing import Any, Dict, List
+from sqlalchemy.orm import Session
+
+from ..models.simulation import CoSimulationCreate, OeeReportCreate, SimulationRunCreate
+from ..simulation import LineModel, aggregate_oee, check_links, run_cosimulation, run_simulation
+from ..utils.fingerprint import line_fingerprint
+from .config_service import ConfigService
+from .experiment_service import ExperimentService
+from .result_cache import result_cache
+from .run_registry import RunRegistryService
+
+
+# 在请求线程中同步运行的仿真规模上限：仿真时长（秒）× 工作站数。
+# 超过时 /simulations/run 拒绝运行（缓存命中除外），应通过 /jobs 在工作进程中运行
+SYNC_RUN_LIMIT = float(os.environ.get("SYNC_RUN_LIMIT", 2_000_000))
+
+
+class SimulationService:
+    """仿真运行服务"""
+
+    @staticmethod
+    def run(db: Session, request: SimulationRunCreate) -> Dict[str, Any]:
+        """
+        运行一次仿真
+
+        以 (产线指纹, 种子, 仿真参数) 查询结果缓存，命中时直接返回；
+        只调整了画布布局的产线指纹不变，仍可命中。
+        save 为真时保存运行记录；时间序列只保存在运行记录中，不随响应返回。
+        仿真在请求线程中运行，只接受不超过 SYNC_RUN_LIMIT 的短仿真。
+
+        Args:
+            db: 数据库会话
+            request: 运行请求
+
+        Returns:
+            产线指纹、是否命中缓存、运行记录ID及统计结果
+        """
+        config = ConfigService.build_config(db, request.production_line_id)
+        fingerprint = line_fingerprint(config)
+        cache_key = result_cache.key(fingerprint, request.seed, request.params)
+
+        result = result_cache.get(cache_key) if request.use_cache else None
+        cached = result is not None
+        wall_time = None
+        if result is None:
+            size = request.params.duration * len(config["production_line"]["workstations"])
+            if size > SYNC_RUN_LIMIT:
+                raise ValueError(
+                    f"仿真规模（仿真时长×工作站数 = {size:.0f}）超过同步运行上限 {SYNC_RUN_LIMIT:.0f}，"
+                    "请通过 /api/jobs 提交"
+                )
+            started = time.perf_counter()
+            result = run_simulation(config, request.params, request.seed)
+            wall_time = time.perf_counter() - started
+            result_cache.put(cache_key, result)
+
+        run_id = None
+        if request.save:
+            run = RunRegistryService.save_run(
+                db,
+                request.production_line_id,
+                fingerprint,
+                request.seed,
+                request.params.model_dump(),
+                result,
+                wall_time
+            )
+            run_id = run.id
+
+        return {
+            "production_line_id": request.production_line_id,
+            "fingerprint": fingerprint,
+            "seed": request.seed,
+            "cached": cached,
+            "run_id": run_id,
+            "result": {k: v for k, v in result.items() if k != "series"}
+        }
+
+    @staticmethod
+    def oee_report(config: Dict[str, Any], request: OeeReportCreate) -> Dict[str, Any]:
+        """
+        多次重复仿真的OEE报告
+
+        第 r 次重复使用种子 seed + r，各次在进程池中并行运行并使用结果缓存；
+        每次仿真的OEE由引擎运行中维护的状态时间累加器得出，不回放事件明细。
+        由任务管理器在后台工作进程中调用。
+
+        Args:
+            config: ConfigService.build_config 格式的产线配置
+            request: OEE报告请求
+
+        Returns:
+            每次重复的OEE，以及各指标跨重复的均值、标准差、最小值、最大值
+        """
+        seeds = [request.seed + r for r in range(request.replications)]
+        tasks = {seed: (config, seed) for seed in seeds}
+        results: Dict[int, Dict[str, Any]] = {}
+        pool = ExperimentService.process_pool(request.workers, len(tasks))
+        try:
+            for seed, result in ExperimentService.simulate(
+                tasks, request.params.model_dump(), pool, request.use_cache
+            ):
+                results[seed] = result
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        reports = [results[seed]["oee"] for seed in seeds]
+        return {
+            "production_line_id": request.production_line_id,
+            "fingerprint": line_fingerprint(config),
+            "replications": [
+                {"seed": seed, "line": report["line"], "workstations": report["workstations"]}
+                for seed, report in zip(seeds, reports)
+            ],
+            "summary": aggregate_oee(reports),
+        }
+
+    @staticmethod
+    def check_oee(config: Dict[str, Any], request: OeeReportCreate) -> None:
+        """提交前检查产线配置能否构建仿真模型，问题以 ValueError 报告"""
+        LineModel(config)
+
+    @staticmethod
+    def line_ids(request: CoSimulationCreate) -> List[str]:
+        """协同仿真涉及的产线ID（保持首次出现的顺序）"""
+        ids = list(request.production_line_ids)
+        for link in request.links:
+            ids.extend((link.from_line_id, link.to_line_id))
+        return list(dict.fromkeys(ids))
+
+    @staticmethod
+    def build_configs(db: Session, request: CoSimulationCreate) -> Dict[str, Dict[str, Any]]:
+        """协同仿真涉及的各产线配置"""
+        return {
+            line_id: ConfigService.build_config(db, line_id)
+            for line_id in SimulationService.line_ids(request)
+        }
+
+    @staticmethod
+    def check_cosimulation(configs: Dict[str, Dict[str, Any]], request: CoSimulationCreate) -> None:
+        """提交前检查各产线配置和产线间连接（引用、供料），问题以 ValueError 报告"""
+        check_links(configs, request.links)
+
+    @staticmethod
+    def cosimulate(configs: Dict[str, Dict[str, Any]], request: CoSimulationCreate) -> Dict[str, Any]:
+        """
+        多产线协同仿真
+
+        每条产线在独立的工作进程中运行，产线之间只通过运输连接交换物料，
+        以连接的运输时间为前瞻量保守同步，结果与进程数无关。
+        由任务管理器在后台工作进程中调用。
+
+        Args:
+            configs: {产线ID: ConfigService.build_config 格式的配置}
+            request: 协同仿真请求
+
+        Returns:
+            各产线的统计结果、各连接的转运件数和全厂汇总
+        """
+        started = time.perf_counter()
+        result = run_cosimulation(
+            configs, request.links, request.params, request.seed, request.window, request.workers
+        )
+        result["wall_time"] = time.perf_counter() - started
+        return result
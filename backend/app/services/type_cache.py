@@ -0,0 +1,70 @@
+"""全局类型表缓存 - 工艺步骤类型、工作站类型、物料类型"""
+import threading
+from typing import FrozenSet, NamedTuple, Optional
+from sqlalchemy.orm import Session
+from ..database.database import SessionLocal
+from ..database.schemas import OperationTypeDB, WorkstationTypeDB, MaterialTypeDB
+
+
+# 内置的工作站类型和操作类型，始终允许使用
+DEFAULT_WORKSTATION_TYPES = ("processing", "assembly", "inspection", "packaging", "storage")
+DEFAULT_OPERATION_TYPES = ("processing", "assembly", "inspection", "packaging", "storage")
+
+
+class TypeSnapshot(NamedTuple):
+    """某一时刻的类型表快照"""
+    version: int
+    operation_types: FrozenSet[str]
+    workstation_types: FrozenSet[str]
+    material_types: FrozenSet[str]
+
+
+class TypeCache:
+    """
+    全局类型表的进程内缓存
+
+    启动时加载一次，类型的增删改路由调用 invalidate() 使其失效，
+    下次读取时重新加载。验证大型配置时只读取内存中的快照，不再查询类型表。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[TypeSnapshot] = None
+        self._version = 0
+
+    def load(self, db: Session) -> TypeSnapshot:
+        """从数据库加载类型表"""
+        with self._lock:
+            self._version += 1
+            snapshot = TypeSnapshot(
+                version=self._version,
+                operation_types=frozenset(DEFAULT_OPERATION_TYPES) | self._names(db, OperationTypeDB),
+                workstation_types=frozenset(DEFAULT_WORKSTATION_TYPES) | self._names(db, WorkstationTypeDB),
+                material_types=self._names(db, MaterialTypeDB)
+            )
+            self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self) -> None:
+        """类型表变更后使缓存失效"""
+        with self._lock:
+            self._snapshot = None
+
+    def snapshot(self) -> TypeSnapshot:
+        """获取当前快照，缓存失效时重新加载"""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        db = SessionLocal()
+        try:
+            return self.load(db)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _names(db: Session, table) -> FrozenSet[str]:
+        return frozenset(name for (name,) in db.query(table.name).all())
+
+
+# 进程级单例
+type_cache = TypeCache()
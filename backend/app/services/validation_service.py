@@ -1,7 +1,9 @@
 """配置验证服务 - 验证配置的有效性"""
 from typing import Dict, Any, List, Set
-from sqlalchemy.orm import Session
-from ..database.schemas import WorkstationDB, BufferDB, TransportPathDB, RoutineDB
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, aliased
+from ..database.schemas import WorkstationDB, BufferDB, TransportPathDB, RoutineDB, RoutineStepDB
+from .type_cache import TypeSnapshot, type_cache
 
 
 class ValidationService:
@@ -20,6 +22,7 @@ class ValidationService:
         """
         errors = []
         warnings = []
+        types = type_cache.snapshot()
         
         # 验证必需字段
         if "production_line" not in config_data:
@@ -38,7 +41,7 @@ class ValidationService:
         
         # 验证工作站
         for i, ws in enumerate(line_data.get("workstations", [])):
-            ws_errors = ValidationService._validate_workstation(ws, i)
+            ws_errors = ValidationService._validate_workstation(ws, i, types)
             errors.extend(ws_errors)
             if "id" in ws:
                 workstation_ids.add(ws["id"])
@@ -63,7 +66,7 @@ class ValidationService:
         # 验证流转路径
         for i, routine in enumerate(config_data.get("routines", [])):
             routine_errors = ValidationService._validate_routine(
-                routine, i, workstation_ids, all_location_ids
+                routine, i, workstation_ids, all_location_ids, types
             )
             errors.extend(routine_errors)
         
@@ -87,7 +90,7 @@ class ValidationService:
         }
 
     @staticmethod
-    def _validate_workstation(ws: Dict[str, Any], index: int) -> List[str]:
+    def _validate_workstation(ws: Dict[str, Any], index: int, types: TypeSnapshot) -> List[str]:
         """验证工作站配置"""
         errors = []
         prefix = f"工作站[{index}]"
@@ -97,8 +100,8 @@ class ValidationService:
             errors.append(f"{prefix}: 缺少 name 字段")
         if "type" not in ws:
             errors.append(f"{prefix}: 缺少 type 字段")
-        elif ws["type"] not in ["processing", "assembly", "inspection", "packaging", "storage"]:
-            errors.append(f"{prefix}: type 值无效，必须是: processing, assembly, inspection, packaging, storage")
+        elif ws["type"] not in types.workstation_types:
+            errors.append(f"{prefix}: type 值无效，必须是: {', '.join(sorted(types.workstation_types))}")
         
         # 验证处理时间配置
         if "processing_time" not in ws:
@@ -180,7 +183,8 @@ class ValidationService:
         routine: Dict[str, Any], 
         index: int,
         valid_workstations: Set[str],
-        valid_locations: Set[str]
+        valid_locations: Set[str],
+        types: TypeSnapshot
     ) -> List[str]:
         """验证流转路径配置"""
         errors = []
@@ -190,6 +194,9 @@ class ValidationService:
             errors.append(f"{prefix}: 缺少 name 字段")
         if "material_type" not in routine:
             errors.append(f"{prefix}: 缺少 material_type 字段")
+        elif types.material_types and routine["material_type"] not in types.material_types:
+            # 未配置任何物料类型时不限制
+            errors.append(f"{prefix}: material_type '{routine['material_type']}' 未在物料类型中定义")
         if "start_location" not in routine:
             errors.append(f"{prefix}: 缺少 start_location 字段")
         elif routine["start_location"] not in valid_locations:
@@ -206,7 +213,7 @@ class ValidationService:
         
         for i, step in enumerate(steps):
             step_errors = ValidationService._validate_routine_step(
-                step, i, valid_workstations, prefix
+                step, i, valid_workstations, prefix, types
             )
             errors.extend(step_errors)
             
@@ -222,7 +229,8 @@ class ValidationService:
         step: Dict[str, Any],
         index: int,
         valid_workstations: Set[str],
-        routine_prefix: str
+        routine_prefix: str,
+        types: TypeSnapshot
     ) -> List[str]:
         """验证流转步骤配置"""
         errors = []
@@ -233,7 +241,7 @@ class ValidationService:
         
         if "operation" not in step:
             errors.append(f"{prefix}: 缺少 operation 字段")
-        elif step["operation"] not in ["processing", "assembly", "inspection", "packaging", "storage"]:
+        elif step["operation"] not in types.operation_types:
             errors.append(f"{prefix}: operation 值无效")
         
         # 如果不是并行步骤，需要工作站ID
@@ -329,7 +337,10 @@ class ValidationService:
     def validate_production_line(db: Session, line_id: str) -> Dict[str, Any]:
         """
         验证数据库中已存在的产线配置
-        
+
+        所有引用检查都以反连接（LEFT JOIN ... IS NULL）在数据库中完成，
+        查询次数固定，与产线规模无关。
+
         Args:
             db: 数据库会话
             line_id: 产线ID
@@ -337,56 +348,90 @@ class ValidationService:
         Returns:
             验证结果
         """
-        # 查询产线及相关数据
-        workstations = db.query(WorkstationDB).filter(
-            WorkstationDB.production_line_id == line_id
-        ).all()
-        
-        buffers = db.query(BufferDB).filter(
-            BufferDB.production_line_id == line_id
-        ).all()
-        
-        transport_paths = db.query(TransportPathDB).filter(
-            TransportPathDB.production_line_id == line_id
-        ).all()
-        
-        routines = db.query(RoutineDB).filter(
-            RoutineDB.production_line_id == line_id
-        ).all()
-        
         errors = []
         warnings = []
-        
-        # 收集ID
-        ws_ids = {ws.id for ws in workstations}
-        buf_ids = {buf.id for buf in buffers}
-        all_ids = ws_ids | buf_ids
-        
+
+        # 本产线的工作站和缓冲区，用作引用目标
+        line_ws = aliased(WorkstationDB)
+        line_buf = aliased(BufferDB)
+        in_buf = aliased(BufferDB)
+        out_buf = aliased(BufferDB)
+
+        def same_line(entity, ref_column):
+            return and_(entity.id == ref_column, entity.production_line_id == line_id)
+
         # 检查工作站的缓冲区引用
-        for ws in workstations:
-            if ws.input_buffer_id and ws.input_buffer_id not in buf_ids:
-                errors.append(f"工作站 '{ws.name}' 的 input_buffer_id 引用不存在")
-            if ws.output_buffer_id and ws.output_buffer_id not in buf_ids:
-                errors.append(f"工作站 '{ws.name}' 的 output_buffer_id 引用不存在")
-        
+        dangling_buffers = db.query(
+            WorkstationDB.name,
+            WorkstationDB.input_buffer_id,
+            in_buf.id,
+            WorkstationDB.output_buffer_id,
+            out_buf.id
+        ).outerjoin(
+            in_buf, same_line(in_buf, WorkstationDB.input_buffer_id)
+        ).outerjoin(
+            out_buf, same_line(out_buf, WorkstationDB.output_buffer_id)
+        ).filter(
+            WorkstationDB.production_line_id == line_id,
+            or_(
+                and_(WorkstationDB.input_buffer_id.isnot(None), in_buf.id.is_(None)),
+                and_(WorkstationDB.output_buffer_id.isnot(None), out_buf.id.is_(None))
+            )
+        ).all()
+
+        for ws_name, input_id, input_found, output_id, output_found in dangling_buffers:
+            if input_id and input_found is None:
+                errors.append(f"工作站 '{ws_name}' 的 input_buffer_id 引用不存在")
+            if output_id and output_found is None:
+                errors.append(f"工作站 '{ws_name}' 的 output_buffer_id 引用不存在")
+
+        # 位置引用可以指向本产线的工作站或缓冲区
+        def dangling_locations(query, location_column):
+            return query.outerjoin(
+                line_ws, same_line(line_ws, location_column)
+            ).outerjoin(
+                line_buf, same_line(line_buf, location_column)
+            ).filter(
+                location_column.isnot(None),
+                line_ws.id.is_(None),
+                line_buf.id.is_(None)
+            )
+
         # 检查运输路径引用
-        for path in transport_paths:
-            if path.from_location not in all_ids:
-                errors.append(f"运输路径 from_location '{path.from_location}' 引用不存在")
-            if path.to_location not in all_ids:
-                errors.append(f"运输路径 to_location '{path.to_location}' 引用不存在")
-        
-        # 检查Routine引用
-        for routine in routines:
-            if routine.start_location not in all_ids:
-                errors.append(f"Routine '{routine.name}' 的 start_location 引用不存在")
-            if routine.end_location not in all_ids:
-                errors.append(f"Routine '{routine.name}' 的 end_location 引用不存在")
-            
-            for step in routine.steps:
-                if step.workstation_id and step.workstation_id not in ws_ids:
-                    errors.append(f"Routine '{routine.name}' 步骤 {step.step_id} 的 workstation_id 引用不存在")
-        
+        for column in (TransportPathDB.from_location, TransportPathDB.to_location):
+            rows = dangling_locations(
+                db.query(column).filter(TransportPathDB.production_line_id == line_id),
+                column
+            ).all()
+            for (location,) in rows:
+                errors.append(f"运输路径 {column.key} '{location}' 引用不存在")
+
+        # 检查Routine引用（起止位置可选，未设置时由图形化连线决定）
+        for column in (RoutineDB.start_location, RoutineDB.end_location):
+            rows = dangling_locations(
+                db.query(RoutineDB.name).filter(RoutineDB.production_line_id == line_id),
+                column
+            ).all()
+            for (routine_name,) in rows:
+                errors.append(f"Routine '{routine_name}' 的 {column.key} 引用不存在")
+
+        # 检查步骤的工作站引用
+        dangling_steps = db.query(
+            RoutineDB.name,
+            RoutineStepDB.step_id
+        ).join(
+            RoutineDB, RoutineDB.id == RoutineStepDB.routine_id
+        ).outerjoin(
+            line_ws, same_line(line_ws, RoutineStepDB.workstation_id)
+        ).filter(
+            RoutineDB.production_line_id == line_id,
+            RoutineStepDB.workstation_id.isnot(None),
+            line_ws.id.is_(None)
+        ).order_by(RoutineDB.name, RoutineStepDB.step_id).all()
+
+        for routine_name, step_id in dangling_steps:
+            errors.append(f"Routine '{routine_name}' 步骤 {step_id} 的 workstation_id 引用不存在")
+
         return {
             "valid": len(errors) == 0,
             "errors": errors,
@@ -0,0 +1,32 @@
+"""离散事件仿真引擎包"""
+from .model import LineModel, make_sampler, stream_seed
+from .calendar import CALENDARS, EventCalendar, HeapCalendar, CalendarQueue, make_calendar
+from .materials import MaterialStore
+from .oee import StateTimes, aggregate_oee
+from .bottleneck import BottleneckDetector
+from .instrumentation import EngineProfiler, engine_metrics
+from .engine import ENGINE_VERSION, Simulation, run_simulation
+from .cosim import LinePartition, check_links, run_cosimulation
+
+__all__ = [
+    "LineModel",
+    "make_sampler",
+    "stream_seed",
+    "CALENDARS",
+    "EventCalendar",
+    "HeapCalendar",
+    "CalendarQueue",
+    "make_calendar",
+    "MaterialStore",
+    "StateTimes",
+    "aggregate_oee",
+    "BottleneckDetector",
+    "EngineProfiler",
+    "engine_metrics",
+    "ENGINE_VERSION",
+    "Simulation",
+    "run_simulation",
+    "LinePartition",
+    "check_links",
+    "run_cosimulation",
+]
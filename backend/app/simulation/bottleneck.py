@@ -0,0 +1,172 @@
+"""瓶颈识别 - 活动期法（active period method）的在线实现"""
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+# 保留的瓶颈区间数（更早的区间只计入累计比例）
+BOTTLENECK_HISTORY = 1000
+
+
+class BottleneckDetector:
+    """
+    在线瓶颈识别（活动期法）
+
+    工作站有加工位在加工或处于故障时为活动状态，全部加工位缺料、阻塞或等待运达时为非活动状态；
+    连续的活动状态为一个活动期，同一时刻结束又开始的活动期视为连续。
+    任一时刻，当前活动期持续最久（开始最早）的工作站为瞬时瓶颈。
+    瓶颈的活动期结束时瓶颈转移给下一个开始最早的活动工作站，
+    两者活动期重叠的时段为转移瓶颈（shifting），其余为独占瓶颈（sole）；
+    各工作站作为独占瓶颈和转移瓶颈的时间比例之和最大者为平均瓶颈。
+
+    活动工作站按活动期开始时刻的顺序保存在字典中（新活动期总是插入在最后），
+    瞬时瓶颈是第一个元素，状态变化时的更新和瓶颈转移都是O(1)。
+    在线识别只用到已发生的状态，与需要完整轨迹的事后活动期法相比，
+    瓶颈按当前已持续的活动时长而不是整个活动期的长度判定。
+    """
+
+    def __init__(self, station_ids: List[str], history: int = BOTTLENECK_HISTORY):
+        self.start_time = 0.0
+        self._active: Dict[str, float] = {}  # 工作站 -> 活动期开始时刻（按开始时刻的顺序插入）
+        # 在 _pending_time 时刻结束活动期、尚未确认（同一时刻可能重新开始）的工作站
+        self._pending: List[str] = []
+        self._pending_time = 0.0
+        self.current: Optional[str] = None  # 瞬时瓶颈
+        self.since = 0.0                    # 成为瓶颈的时刻（此前的转移时段之后）
+        self.sole = {ws_id: 0.0 for ws_id in station_ids}
+        self.shifting = {ws_id: 0.0 for ws_id in station_ids}
+        # 已结束的活动期：[个数, 总时长, 最长时长]
+        self.periods = {ws_id: [0, 0.0, 0.0] for ws_id in station_ids}
+        # 瓶颈区间 (开始, 结束, 工作站...)，一个工作站为独占瓶颈，两个为转移瓶颈
+        self.intervals: Deque[Tuple] = deque(maxlen=history)
+
+    def activate(self, ws_id: str, now: float) -> None:
+        """工作站进入活动状态"""
+        pending = self._pending
+        if pending:
+            if now > self._pending_time:
+                self._settle()
+            elif ws_id in pending:
+                # 同一时刻结束又开始，活动期延续
+                pending.remove(ws_id)
+                return
+        self._active[ws_id] = now
+        if self.current is None:
+            self.current = ws_id
+            self.since = now
+
+    def deactivate(self, ws_id: str, now: float) -> None:
+        """工作站进入非活动状态，活动期在时刻推进后确认结束"""
+        if self._pending and now > self._pending_time:
+            self._settle()
+        self._pending.append(ws_id)
+        self._pending_time = now
+
+    def _settle(self) -> None:
+        """确认 _pending_time 时刻结束的活动期，按开始顺序依次处理；瞬时瓶颈结束时转移瓶颈"""
+        end = self._pending_time
+        pending = self._pending
+        self._pending = []
+        active = self._active
+        if len(pending) > 1:
+            pending.sort(key=active.__getitem__)
+        counted = end > self.start_time
+        for ws_id in pending:
+            duration = end - active.pop(ws_id)
+            if counted:
+                stats = self.periods[ws_id]
+                stats[0] += 1
+                stats[1] += duration
+                if duration > stats[2]:
+                    stats[2] = duration
+            if ws_id != self.current:
+                continue
+
+            # 转移给开始最早的活动工作站，两者活动期的重叠部分为转移瓶颈
+            since = self.since if self.since > self.start_time else self.start_time
+            successor = None
+            overlap = end
+            for successor in active:
+                overlap = active[successor]
+                if overlap < since:
+                    overlap = since
+                break
+            if overlap > since:
+                self.sole[ws_id] += overlap - since
+                self.intervals.append((since, overlap, ws_id))
+            if end > overlap:
+                self.shifting[ws_id] += end - overlap
+                self.shifting[successor] += end - overlap
+                self.intervals.append((overlap, end, ws_id, successor))
+            self.current = successor
+            self.since = end
+
+    def reset(self, now: float) -> None:
+        """从当前时刻重新开始统计（预热结束时调用），进行中的活动期保留"""
+        if self._pending and now > self._pending_time:
+            self._settle()
+        self.start_time = now
+        for ws_id in self.sole:
+            self.sole[ws_id] = 0.0
+            self.shifting[ws_id] = 0.0
+            self.periods[ws_id] = [0, 0.0, 0.0]
+        self.intervals.clear()
+
+    def report(self, now: float, intervals: Optional[int] = None) -> Dict[str, Any]:
+        """
+        当前时刻的瓶颈报告
+
+        瞬时瓶颈成为瓶颈以来的时长暂计为独占瓶颈时间（其活动期结束时才能确定重叠部分）。
+
+        Args:
+            now: 当前仿真时刻
+            intervals: 返回最近的瓶颈区间数，为空时返回保留的全部区间
+
+        Returns:
+            瞬时瓶颈、平均瓶颈、各工作站的瓶颈时间比例和活动期统计、最近的瓶颈区间
+        """
+        if self._pending and now > self._pending_time:
+            self._settle()
+        span = now - self.start_time
+        sole = dict(self.sole)
+        if self.current is not None:
+            sole[self.current] += now - max(self.since, self.start_time)
+
+        workstations = {}
+        for ws_id, count_total_max in self.periods.items():
+            count, total, longest = count_total_max
+            share = (sole[ws_id] + self.shifting[ws_id]) / span if span > 0 else None
+            workstations[ws_id] = {
+                "sole": sole[ws_id] / span if span > 0 else None,
+                "shifting": self.shifting[ws_id] / span if span > 0 else None,
+                "bottleneck": share,
+                "active_periods": count,
+                "mean_active_duration": total / count if count else None,
+                "max_active_duration": longest,
+                "active_for": now - self._active[ws_id] if ws_id in self._active else None,
+            }
+        ranking = sorted(
+            (ws_id for ws_id in workstations if workstations[ws_id]["bottleneck"]),
+            key=lambda ws_id: workstations[ws_id]["bottleneck"],
+            reverse=True
+        )
+
+        recent = list(self.intervals)
+        if intervals is not None:
+            recent = recent[len(recent) - intervals:] if intervals else []
+        return {
+            "time": now,
+            "momentary": self.current,
+            "momentary_since": self.since if self.current is not None else None,
+            "average": ranking[0] if ranking else None,
+            "ranking": ranking,
+            "workstations": workstations,
+            "intervals": [
+                {
+                    "start": interval[0],
+                    "end": interval[1],
+                    "workstation_ids": list(interval[2:]),
+                    "shifting": len(interval) > 3,
+                }
+                for interval in recent
+            ],
+        }
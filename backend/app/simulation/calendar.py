@@ -0,0 +1,200 @@
+"""事件日历 - 仿真引擎的未来事件表，可替换实现"""
+import heapq
+import math
+from bisect import insort
+from functools import partial
+from typing import Callable, Dict, List, Optional, Type
+
+
+# 事件为 (时刻, 优先级, 序号, 处理函数, 参数) 元组，序号唯一，按元组大小出队
+Event = tuple
+
+
+class EventCalendar:
+    """
+    事件日历接口
+
+    实现需保证按事件元组从小到大出队；相同元组顺序下不同实现的仿真结果完全一致，
+    因此可以按模型规模自由选择实现。
+    """
+
+    def push(self, event: Event) -> None:
+        """加入事件"""
+        raise NotImplementedError
+
+    def pop_until(self, end: float) -> Optional[Event]:
+        """取出最早的事件；日历为空或最早事件晚于 end 时返回None且不取出"""
+        raise NotImplementedError
+
+    def peek_time(self) -> float:
+        """最早事件的时刻，不取出；日历为空时为inf"""
+        raise NotImplementedError
+
+    def rebuild(self, keep: Callable[[Event], bool]) -> None:
+        """只保留 keep 返回真的事件（压缩已取消的事件）"""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class HeapCalendar(EventCalendar):
+    """
+    二叉堆日历（heapq）
+
+    入队/出队 O(log n)，heapq 为C实现，常数很小；中小规模模型的默认选择。
+    """
+
+    def __init__(self):
+        self._heap: List[Event] = []
+        # 直接绑定C实现，省去一层Python调用
+        self.push = partial(heapq.heappush, self._heap)
+
+    def pop_until(self, end: float) -> Optional[Event]:
+        heap = self._heap
+        if heap and heap[0][0] <= end:
+            return heapq.heappop(heap)
+        return None
+
+    def peek_time(self) -> float:
+        return self._heap[0][0] if self._heap else math.inf
+
+    def rebuild(self, keep: Callable[[Event], bool]) -> None:
+        heap = self._heap
+        heap[:] = [event for event in heap if keep(event)]
+        heapq.heapify(heap)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class CalendarQueue(EventCalendar):
+    """
+    日历队列（Brown, 1988）
+
+    把时间轴划分为宽度为 width 的"天"，按天号对桶数取模放入桶中，桶内有序；
+    出队时从当前天开始逐桶查找本"年"内的事件。桶数随事件数加倍/减半，
+    调整时按最早若干事件的平均间隔重新估计桶宽，使每个桶只有少量事件，
+    入队/出队均摊 O(1)，与待处理事件数量无关。
+    """
+
+    MIN_BUCKETS = 16
+    # 估计桶宽时采样的最早事件数
+    SAMPLE_SIZE = 32
+
+    def __init__(self, width: float = 1.0):
+        self._size = 0
+        self._floor = 0.0  # 最近出队事件的时刻，之后加入的事件都不早于它
+        self._setup(self.MIN_BUCKETS, width, 0)
+
+    def _setup(self, nbuckets: int, width: float, day: int) -> None:
+        self._buckets: List[List[Event]] = [[] for _ in range(nbuckets)]
+        self._mask = nbuckets - 1
+        self._width = width
+        self._inv_width = 1.0 / width
+        self._day = day  # 当前"天"号，即最近出队事件所在的天
+        self._grow_at = 2 * nbuckets
+        self._shrink_at = nbuckets // 2 if nbuckets > self.MIN_BUCKETS else -1
+
+    def push(self, event: Event) -> None:
+        bucket = self._buckets[int(event[0] * self._inv_width) & self._mask]
+        if not bucket or event > bucket[-1]:
+            bucket.append(event)
+        else:
+            insort(bucket, event)
+        self._size += 1
+        if self._size > self._grow_at:
+            self._resize(2 * len(self._buckets))
+
+    def pop_until(self, end: float) -> Optional[Event]:
+        if not self._size:
+            return None
+        # 快速路径：当前天的桶中就有当天的事件
+        day = self._day
+        bucket = self._buckets[day & self._mask]
+        if not bucket or int(bucket[0][0] * self._inv_width) > day:
+            day = self._locate()
+            bucket = self._buckets[day & self._mask]
+        if bucket[0][0] > end:
+            # 不推进当前天：之后仍可能加入早于该事件的事件
+            return None
+        self._day = day
+        event = bucket.pop(0)
+        self._floor = event[0]
+        self._size -= 1
+        if self._size < self._shrink_at:
+            self._resize(len(self._buckets) // 2)
+        return event
+
+    def peek_time(self) -> float:
+        if not self._size:
+            return math.inf
+        return self._buckets[self._locate() & self._mask][0][0]
+
+    def _locate(self) -> int:
+        """最早事件所在的天号（日历非空）"""
+        buckets = self._buckets
+        mask = self._mask
+        inv_width = self._inv_width
+        day = self._day
+        # 本"年"内逐天查找：桶首事件的天号不晚于当前天即为最早事件
+        for _ in range(len(buckets)):
+            bucket = buckets[day & mask]
+            if bucket and int(bucket[0][0] * inv_width) <= day:
+                return day
+            day += 1
+        # 一整年内都没有事件（事件稀疏），直接比较各桶首事件
+        first = min(bucket[0] for bucket in buckets if bucket)
+        return int(first[0] * inv_width)
+
+    def _resize(self, nbuckets: int) -> None:
+        events = [event for bucket in self._buckets for event in bucket]
+        width = self._estimate_width(events)
+        self._setup(nbuckets, width, 0)
+        buckets = self._buckets
+        mask = self._mask
+        inv_width = self._inv_width
+        for event in events:
+            buckets[int(event[0] * inv_width) & mask].append(event)
+        for bucket in buckets:
+            if len(bucket) > 1:
+                bucket.sort()
+        self._day = int(self._floor * inv_width)
+
+    def _estimate_width(self, events: List[Event]) -> float:
+        """桶宽取最早若干事件平均间隔的3倍，忽略超过平均间隔2倍的离群间隔"""
+        sample = [event[0] for event in heapq.nsmallest(self.SAMPLE_SIZE, events)]
+        gaps = [b - a for a, b in zip(sample, sample[1:]) if b > a]
+        if not gaps:
+            return self._width
+        mean = sum(gaps) / len(gaps)
+        kept = [gap for gap in gaps if gap <= 2 * mean]
+        if kept:
+            mean = sum(kept) / len(kept)
+        return 3.0 * mean
+
+    def rebuild(self, keep: Callable[[Event], bool]) -> None:
+        events = [event for bucket in self._buckets for event in bucket if keep(event)]
+        self._size = len(events)
+        nbuckets = self.MIN_BUCKETS
+        while nbuckets * 2 < self._size:
+            nbuckets *= 2
+        self._buckets = [events]
+        self._resize(nbuckets)
+
+    def __len__(self) -> int:
+        return self._size
+
+
+CALENDARS: Dict[str, Type[EventCalendar]] = {
+    "heap": HeapCalendar,
+    "calendar_queue": CalendarQueue,
+}
+
+
+def make_calendar(name: str = "heap") -> EventCalendar:
+    """按名称创建事件日历"""
+    try:
+        return CALENDARS[name]()
+    except KeyError:
+        raise ValueError(f"不支持的事件日历: {name}") from None
@@ -0,0 +1,397 @@
+"""多产线协同仿真 - 每条产线一个分区，分区间按运输时间前瞻做保守同步"""
+import heapq
+import math
+import multiprocessing
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from ..models.simulation import InterLineLink, SimulationParams
+from .engine import Simulation
+from .model import LineModel
+
+
+# 送往下游的物料: (连接序号, 到达时刻)
+Message = Tuple[int, float]
+
+
+def _resolve_links(
+    models: Dict[str, LineModel],
+    links: Iterable[Union[Dict[str, Any], InterLineLink]]
+) -> List[Dict[str, Any]]:
+    """补全连接的默认流转路径并检查引用和供料"""
+    resolved = []
+    for index, link in enumerate(links):
+        if not isinstance(link, InterLineLink):
+            link = InterLineLink(**link)
+        data = link.model_dump()
+        for end in ("from", "to"):
+            model = models.get(data[f"{end}_line_id"])
+            if model is None:
+                raise ValueError(f"连接[{index}]: 产线 {data[f'{end}_line_id']} 未参与协同仿真")
+            routine_id = data[f"{end}_routine_id"]
+            if routine_id is None:
+                if end == "to":
+                    data["to_routine_id"] = model.routines[0].id
+            elif routine_id not in {r.id for r in model.routines}:
+                raise ValueError(f"连接[{index}]: 产线 {model.id} 没有流转路径 {routine_id}")
+        resolved.append(data)
+    _check_supply(models, resolved)
+    return resolved
+
+
+def _check_supply(models: Dict[str, LineModel], links: List[Dict[str, Any]]) -> None:
+    """
+    检查由连接供料的流转路径都能沿连接追溯到自行投料的流转路径
+
+    由连接供料的流转路径不再自行投料；连接成环且环内全部由连接供料时，
+    环内永远没有物料，结果全为零，这里直接拒绝。
+    """
+    fed = {(link["to_line_id"], link["to_routine_id"]) for link in links}
+    # (产线, 流转路径) -> 其完工物料经连接送往的 (产线, 流转路径)
+    targets: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+    for link in links:
+        from_line = link["from_line_id"]
+        routine_ids = [link["from_routine_id"]] if link["from_routine_id"] else [r.id for r in models[from_line].routines]
+        for routine_id in routine_ids:
+            targets.setdefault((from_line, routine_id), []).append((link["to_line_id"], link["to_routine_id"]))
+
+    reached = {
+        (line_id, routine.id)
+        for line_id, model in models.items()
+        for routine in model.routines
+        if (line_id, routine.id) not in fed
+    }
+    stack = list(reached)
+    while stack:
+        for target in targets.get(stack.pop(), []):
+            if target not in reached:
+                reached.add(target)
+                stack.append(target)
+
+    starved = sorted(fed - reached)
+    if starved:
+        names = ", ".join(f"{line_id}/{routine_id}" for line_id, routine_id in starved)
+        raise ValueError(f"连接构成的环路中没有自行投料的流转路径，以下流转路径永远不会有物料: {names}")
+
+
+def check_links(
+    configs: Dict[str, Dict[str, Any]],
+    links: Iterable[Union[Dict[str, Any], InterLineLink]]
+) -> None:
+    """检查各产线配置能否构建仿真模型、连接的引用和供料是否有效（不运行仿真），问题以 ValueError 报告"""
+    if not configs:
+        raise ValueError("没有参与协同仿真的产线")
+    _resolve_links({line_id: LineModel(config) for line_id, config in configs.items()}, links)
+
+
+def _earliest_times(
+    next_times: Dict[str, float],
+    downstream: Dict[str, List[Tuple[str, float]]]
+) -> Dict[str, float]:
+    """
+    各产线今后可能处理的最早事件时刻
+
+    产线自身最早的待处理事件之外，上游产线今后送来的物料也可能更早到达，
+    因此沿连接做一次最短路松弛（Dijkstra，运输时间为正）：
+        earliest[l] = min(next[l], min(earliest[u] + 运输时间, u 为 l 的上游))
+    """
+    earliest = dict(next_times)
+    heap = [(time, line_id) for line_id, time in earliest.items() if time < math.inf]
+    heapq.heapify(heap)
+    while heap:
+        time, line_id = heapq.heappop(heap)
+        if time > earliest[line_id]:
+            continue
+        for target, transport_time in downstream[line_id]:
+            arrival = time + transport_time
+            if arrival < earliest[target]:
+                earliest[target] = arrival
+                heapq.heappush(heap, (arrival, target))
+    return earliest
+
+
+class LinePartition:
+    """
+    一条产线的仿真分区
+
+    完工物料按出线连接转为带到达时刻的消息；同一流转路径有多条出线连接时轮流分配。
+    """
+
+    def __init__(self, config: Dict[str, Any], params: Dict[str, Any], seed: int, links: List[Dict[str, Any]]):
+        model = LineModel(config)
+        line_id = model.id
+        external = {link["to_routine_id"] for link in links if link["to_line_id"] == line_id}
+        self.simulation = Simulation(model, SimulationParams(**params), seed, external=external)
+
+        # 流转路径序号 -> [(连接序号, 运输时间)]
+        self._routes: Dict[int, List[Tuple[int, float]]] = {}
+        self._turn: Dict[int, int] = {}
+        for index, link in enumerate(links):
+            if link["from_line_id"] != line_id:
+                continue
+            for r, routine in enumerate(model.routines):
+                if link["from_routine_id"] in (None, routine.id):
+                    self._routes.setdefault(r, []).append((index, link["transport_time"]))
+        self._links = links
+        # 预热结束后经连接运出的件数，计入本产线完工但不是全厂产出
+        self.shipped = 0
+        if self._routes:
+            self.simulation.outbox = []
+
+    def advance(self, until: float, inclusive: bool, inbox: List[Message]) -> Tuple[List[Message], float]:
+        """
+        接收上游消息并推进仿真
+
+        Args:
+            until: 推进到的时刻
+            inclusive: 是否处理恰好在 until 时刻的事件；否则只处理早于 until 的事件，
+                该时刻可能还有上游物料到达
+            inbox: 上游送达的消息
+
+        Returns:
+            (本轮送出的消息, 推进后最早待处理事件的时刻)
+        """
+        simulation = self.simulation
+        for index, time in inbox:
+            simulation.receive(self._links[index]["to_routine_id"], time)
+        simulation.run(until if inclusive else math.nextafter(until, -math.inf))
+
+        outbox: List[Message] = []
+        if simulation.outbox:
+            for routine, time in simulation.outbox:
+                routes = self._routes.get(routine)
+                if not routes:
+                    continue
+                turn = self._turn.get(routine, 0)
+                self._turn[routine] = turn + 1
+                index, transport_time = routes[turn % len(routes)]
+                outbox.append((index, time + transport_time))
+                if time >= simulation.params.warmup:
+                    self.shipped += 1
+            simulation.outbox.clear()
+        return outbox, simulation.next_event_time()
+
+    def result(self) -> Dict[str, Any]:
+        result = self.simulation.result()
+        result["shipped"] = self.shipped
+        return result
+
+
+class PartitionHost:
+    """一个进程中的若干产线分区"""
+
+    def __init__(self, specs: Dict[str, Dict[str, Any]], params: Dict[str, Any], seed: int, links: List[Dict[str, Any]]):
+        self.partitions = {
+            line_id: LinePartition(config, params, seed, links) for line_id, config in specs.items()
+        }
+
+    def next_times(self) -> Dict[str, float]:
+        return {line_id: p.simulation.next_event_time() for line_id, p in self.partitions.items()}
+
+    def handle(self, command: str, payload: Any) -> Any:
+        if command == "advance":
+            return {
+                line_id: self.partitions[line_id].advance(*args)
+                for line_id, args in payload.items()
+            }
+        if command == "result":
+            return {line_id: p.result() for line_id, p in self.partitions.items()}
+        raise ValueError(f"未知命令: {command}")
+
+
+def _host_worker(specs, params, seed, links, conn) -> None:
+    """工作进程入口：按命令推进所承载的分区，异常信息发回协调进程"""
+    try:
+        host = PartitionHost(specs, params, seed, links)
+        conn.send(("ok", host.next_times()))
+        while True:
+            command, payload = conn.recv()
+            if command == "close":
+                break
+            conn.send(("ok", host.handle(command, payload)))
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+class _LocalChannel:
+    """在当前进程内承载分区，接口与工作进程的管道相同"""
+
+    def __init__(self, *args):
+        self.host = PartitionHost(*args)
+        self._reply = ("ok", self.host.next_times())
+
+    def send(self, message) -> None:
+        command, payload = message
+        if command != "close":
+            self._reply = ("ok", self.host.handle(command, payload))
+
+    def recv(self):
+        return self._reply
+
+    def close(self) -> None:
+        pass
+
+
+def run_cosimulation(
+    configs: Dict[str, Dict[str, Any]],
+    links: Iterable[Union[Dict[str, Any], InterLineLink]],
+    params: Union[Dict[str, Any], SimulationParams, None] = None,
+    seed: int = 0,
+    window: Optional[float] = None,
+    workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    多产线协同仿真
+
+    每条产线是一个分区，分区之间只通过产线间运输连接交换物料。各分区分到若干工作进程中，
+    按轮同步推进（保守同步，不回滚）：每轮开始时，下游产线可以安全推进到
+        min(上游产线今后最早可能处理的事件时刻 + 连接运输时间)
+    因为上游此后送出的物料不会早于这个时刻到达；没有上游的产线只受 window 限制。
+    各产线在同一轮内并行推进，本轮送出的消息在下一轮开始时交给下游产线。
+    前瞻量取各连接的运输时间，运输时间越短同步轮数越多。
+    连接不对上游施加背压（下游入口视为不限容量的接收区）。
+
+    Args:
+        configs: {产线ID: ConfigService.build_config 格式的配置}
+        links: 产线间运输连接
+        params: 仿真参数，各产线相同
+        seed: 随机数种子
+        window: 每轮最多推进的仿真时长，为空时取仿真时长的1/100
+        workers: 工作进程数，默认为CPU核数，不超过产线数；为1时在当前进程内运行
+
+    Returns:
+        各产线的统计结果、各连接的转运件数和全厂汇总
+    """
+    if not isinstance(params, SimulationParams):
+        params = SimulationParams(**(params or {}))
+    if not configs:
+        raise ValueError("没有参与协同仿真的产线")
+    models = {line_id: LineModel(config) for line_id, config in configs.items()}
+    links = _resolve_links(models, links)
+    duration = params.duration
+    window = window or duration / 100
+
+    # 产线 -> [(上游产线, 运输时间)] / [(下游产线, 运输时间)]
+    upstream: Dict[str, List[Tuple[str, float]]] = {line_id: [] for line_id in configs}
+    downstream: Dict[str, List[Tuple[str, float]]] = {line_id: [] for line_id in configs}
+    for link in links:
+        upstream[link["to_line_id"]].append((link["from_line_id"], link["transport_time"]))
+        downstream[link["from_line_id"]].append((link["to_line_id"], link["transport_time"]))
+
+    line_ids = list(configs)
+    workers = min(workers or os.cpu_count() or 1, len(line_ids))
+    groups = [line_ids[i::workers] for i in range(workers)]
+    param_data = params.model_dump()
+    channels = []
+    processes = []
+    if workers == 1:
+        channels.append(_LocalChannel({line_id: configs[line_id] for line_id in line_ids}, param_data, seed, links))
+    else:
+        context = multiprocessing.get_context("spawn")
+        for group in groups:
+            receiver, sender = context.Pipe()
+            process = context.Process(
+                target=_host_worker,
+                args=({line_id: configs[line_id] for line_id in group}, param_data, seed, links, sender),
+                daemon=True
+            )
+            process.start()
+            sender.close()
+            channels.append(receiver)
+            processes.append(process)
+
+    def collect() -> Dict[str, Any]:
+        merged: Dict[str, Any] = {}
+        for channel in channels:
+            try:
+                status, payload = channel.recv()
+            except (EOFError, OSError):
+                raise RuntimeError("协同仿真工作进程异常退出")
+            if status != "ok":
+                raise RuntimeError(f"协同仿真分区运行失败: {payload}")
+            merged.update(payload)
+        return merged
+
+    try:
+        next_times = collect()
+        now = {line_id: 0.0 for line_id in line_ids}
+        inbox: Dict[str, List[Message]] = {line_id: [] for line_id in line_ids}
+        transferred = [0] * len(links)
+        in_transit = 0
+        rounds = 0
+
+        while any(t < duration for t in now.values()):
+            rounds += 1
+            # 各产线本轮可安全推进到的时刻（基于本轮开始时的状态）
+            earliest = _earliest_times(next_times, downstream)
+            commands: Dict[str, Tuple[float, bool, List[Message]]] = {}
+            for line_id in line_ids:
+                if now[line_id] >= duration:
+                    continue
+                bound = min(
+                    [earliest[up] + transport_time for up, transport_time in upstream[line_id]],
+                    default=math.inf
+                )
+                end = min(bound, now[line_id] + window)
+                inclusive = end >= duration or end < bound
+                end = min(end, duration)
+                commands[line_id] = (end, inclusive, inbox[line_id])
+                inbox[line_id] = []
+
+            for channel, group in zip(channels, groups):
+                payload = {line_id: commands[line_id] for line_id in group if line_id in commands}
+                channel.send(("advance", payload))
+            replies = collect()
+
+            for line_id, (outbox, next_time) in replies.items():
+                end, inclusive, _ = commands[line_id]
+                now[line_id] = end if inclusive else math.nextafter(end, -math.inf)
+                if end >= duration:
+                    now[line_id] = duration
+                next_times[line_id] = next_time if now[line_id] < duration else math.inf
+                for index, time in outbox:
+                    transferred[index] += 1
+                    if time > duration:
+                        in_transit += 1
+                    else:
+                        inbox[links[index]["to_line_id"]].append((index, time))
+            # 待送达的消息也是下游产线的待处理事件
+            for line_id, messages in inbox.items():
+                if messages and now[line_id] < duration:
+                    next_times[line_id] = min(next_times[line_id], min(time for _, time in messages))
+        # 仿真结束时仍未送达的物料
+        in_transit += sum(len(messages) for messages in inbox.values())
+
+        for channel in channels:
+            channel.send(("result", None))
+        lines = collect()
+        for channel in channels:
+            channel.send(("close", None))
+    finally:
+        for channel in channels:
+            channel.close()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    # 全厂产出：各产线完工后没有运往下游的件数
+    span = duration - min(params.warmup, duration)
+    completed = sum(line["kpis"]["completed"] - line["shipped"] for line in lines.values())
+    return {
+        "time": duration,
+        "lookahead": min((link["transport_time"] for link in links), default=None),
+        "rounds": rounds,
+        "workers": workers,
+        "kpis": {
+            "throughput": completed * 3600.0 / span if span > 0 else 0.0,
+            "completed": completed,
+            "avg_wip": sum(lines[line_id]["kpis"]["avg_wip"] for line_id in line_ids),
+            "transferred": sum(transferred),
+            "in_transit": in_transit,
+        },
+        "lines": lines,
+        "links": [{**link, "transferred": count} for link, count in zip(links, transferred)],
+    }
@@ -0,0 +1,999 @@
+"""离散事件仿真引擎 - 下一事件时间推进，事件日历可替换（二叉堆/日历队列）"""
+import random
+from array import array
+from collections import deque
+from time import perf_counter
+from typing import Any, Callable, Collection, Deque, Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from ..models.simulation import SimulationParams
+from .calendar import EventCalendar, make_calendar
+from .materials import FINISHED, JOINING, PROCESSING, TRANSPORT, WAITING, MaterialStore
+from .bottleneck import BottleneckDetector
+from .instrumentation import ENGINE_METRICS, EngineProfiler, engine_metrics
+from .oee import StateTimes, oee_report
+from .model import SCRAP, LineModel, RoutineSpec, StationSpec, BufferSpec, make_sampler, stream_seed
+from .value_stream import EXIT_COLUMNS, OPERATION_COLUMNS, value_stream_accounting
+
+
+# 引擎版本号，仿真行为变化时递增，使缓存的旧结果失效
+ENGINE_VERSION = 6
+
+# 已取消事件超过此数量且超过日历一半时压缩日历
+COMPACT_THRESHOLD = 64
+
+# 预留结果
+SERVER = 0  # 预留了工作站的加工位
+BUFFER = 1  # 预留了输入缓冲区的空位
+
+
+class TimeWeighted:
+    """时间加权统计量（缓冲区库存、在制品数量、忙碌加工位数等）"""
+
+    __slots__ = ("value", "last_time", "start_time", "integral", "max_value")
+
+    def __init__(self, value: float = 0):
+        self.value = value
+        self.last_time = 0.0
+        self.start_time = 0.0
+        self.integral = 0.0
+        self.max_value = value
+
+    def update(self, now: float, value: float) -> None:
+        self.integral += self.value * (now - self.last_time)
+        self.last_time = now
+        self.value = value
+        if value > self.max_value:
+            self.max_value = value
+
+    def reset(self, now: float) -> None:
+        """从当前时刻重新开始统计（预热结束时调用）"""
+        self.last_time = now
+        self.start_time = now
+        self.integral = 0.0
+        self.max_value = self.value
+
+    def mean(self, now: float) -> float:
+        span = now - self.start_time
+        if span <= 0:
+            return float(self.value)
+        return (self.integral + self.value * (now - self.last_time)) / span
+
+
+class Buffer:
+    """缓冲区运行状态"""
+
+    __slots__ = ("spec", "id", "code", "capacity", "level", "reserved", "waiters", "feeds", "stats", "wake_pending")
+
+    def __init__(self, spec: BufferSpec, code: int = 0):
+        self.spec = spec
+        self.id = spec.id
+        self.code = code  # 物料存储中的位置编码
+        self.capacity = spec.capacity
+        self.level = 0
+        self.reserved = 0
+        # 等待向本缓冲区放入成品的 (物料ID, 工作站)
+        self.waiters: Deque[Tuple[int, "Station"]] = deque()
+        # 以本缓冲区为输入缓冲区的工作站
+        self.feeds: List["Station"] = []
+        self.stats = TimeWeighted()
+        self.wake_pending = False
+
+    def free(self) -> int:
+        return self.capacity - self.level - self.reserved
+
+
+class Station:
+    """工作站运行状态"""
+
+    __slots__ = (
+        "spec", "id", "code", "capacity", "input", "output", "queue", "waiters", "rng",
+        "busy", "blocked", "reserved", "processed", "busy_stats", "blocked_stats", "wake_pending",
+        "fail_rng", "down", "held", "jobs", "suspended", "failures", "down_stats",
+        "states", "ideal_time", "rejected", "active"
+    )
+
+    def __init__(
+        self,
+        spec: StationSpec,
+        buffers: Dict[str, Buffer],
+        rng: random.Random,
+        fail_rng: Optional[random.Random] = None,
+        code: int = 0
+    ):
+        self.spec = spec
+        self.id = spec.id
+        self.code = code  # 物料存储中的位置编码
+        self.capacity = spec.capacity
+        self.input = buffers.get(spec.input_buffer_id)
+        self.output = buffers.get(spec.output_buffer_id)
+        # 已在输入缓冲区中、等待本站加工的物料ID
+        self.queue: Deque[int] = deque()
+        # 尚未获得预留、等待进入本站的 (物料ID, 来源)
+        self.waiters: Deque[Tuple[int, Any]] = deque()
+        self.rng = rng
+        self.busy = 0       # 正在加工
+        self.blocked = 0    # 加工完成但无法移出（阻塞）
+        self.reserved = 0   # 已预留给在途物料
+        self.processed = 0
+        self.busy_stats = TimeWeighted()
+        self.blocked_stats = TimeWeighted()
+        self.wake_pending = False
+
+        # 故障状态；未配置故障模型时 fail_rng 为空，不记录加工事件句柄
+        self.fail_rng = fail_rng
+        self.down = False
+        self.held = 0       # 故障期间占用加工位、等待修复的物料
+        self.jobs: Dict[int, tuple] = {}  # 加工中物料ID -> 加工结束事件
+        self.suspended: List[Tuple[int, Optional[float]]] = []  # (物料ID, 剩余加工时间)
+        self.failures = 0
+        self.down_stats = TimeWeighted()
+
+        # OEE：各状态的加工位时间、已完成加工的理论加工时间、质检不合格件数
+        self.states = StateTimes(self.capacity)
+        self.ideal_time = 0.0
+        self.rejected = 0
+        # 瓶颈识别：有加工位在加工或故障中为活动状态
+        self.active = False
+
+    def reserve(self, server_only: bool = False) -> Optional[int]:
+        """为一个待进入的物料预留加工位或输入缓冲区空位"""
+        if not self.queue and not self.down and self.busy + self.blocked + self.reserved + self.held < self.capacity:
+            self.reserved += 1
+            return SERVER
+        buf = self.input
+        if not server_only and buf is not None and buf.level + buf.reserved < buf.capacity:
+            buf.reserved += 1
+            return BUFFER
+        return None
+
+    def free(self) -> int:
+        return self.capacity - self.busy - self.blocked - self.reserved - self.held
+
+
+class Source:
+    """投料点，每条流转路径一个"""
+
+    __slots__ = ("routine", "index", "location", "material_type", "sampler", "rng", "saturated")
+
+    def __init__(
+        self,
+        routine: RoutineSpec,
+        index: int,
+        location: int,
+        material_type: int,
+        sampler,
+        rng: random.Random
+    ):
+        self.routine = routine
+        self.index = index  # 流转路径序号
+        self.location = location  # 投放位置编码
+        self.material_type = material_type  # 物料类型编码
+        self.sampler = sampler
+        self.rng = rng
+        # 未配置投料间隔时连续投料：首道工序有空闲加工位即投下一件，
+        # 投料不占用输入缓冲区，以免原料挤占返工物料的位置
+        self.saturated = sampler is None
+
+
+class Hold:
+    """
+    并行步骤中代为保持的原位置占用
+
+    拆分时为各分支子任务共同的来源：全部分支都预留到加工位或输入缓冲区空位后，才释放物料原来的位置；
+    合并时为合并后物料的来源：物料预留到下一工作站（或离开产线）时，才释放已完成分支占用的加工位。
+    这样下游阻塞经并行步骤传回上游，分支等待区和合并区的物料数受上游和各分支的容量约束。
+    """
+
+    __slots__ = ("origins", "pending", "saturated")
+
+    def __init__(self, origins: List[Any], pending: int = 1):
+        self.origins = origins
+        self.pending = pending  # 释放前还需离开的次数
+        # 保持连续投料的投料点时，各分支只预留加工位
+        self.saturated = any(type(origin) is Source and origin.saturated for origin in origins)
+
+
+Origin = Union[Station, Buffer, Source, Hold, None]
+
+
+def _server_only(origin: Origin) -> bool:
+    """来源为连续投料的投料点（或保持它的并行拆分）时只预留加工位，见 Source.saturated"""
+    kind = type(origin)
+    return (kind is Source or kind is Hold) and origin.saturated
+
+
+class Simulation:
+    """
+    单次仿真运行
+
+    物料按流转步骤依次请求进入工作站：先预留加工位或输入缓冲区空位，
+    再离开原位置并经运输时间到达。无法预留时在目标工作站排队等待，
+    原位置（加工位/缓冲区）在此期间保持占用，即阻塞。
+    在制物料保存在结构体数组形式的物料存储中，引擎内部以物料ID传递。
+    配置了 mtbf/mttr 的工作站按日历时间随机故障，故障时中断加工中的物料，
+    修复后继续剩余的加工时间。
+    工作站进入/退出活动状态时更新在线瓶颈识别（bottlenecks），运行中可随时查询。
+    每个工作站、质检步骤、投料点使用独立的随机数流，保证公共随机数。
+
+    协同仿真时，external 中的流转路径不自行投料，由上游产线经 receive 送入物料；
+    outbox 不为空时，完工离开产线的物料记入其中，供协同仿真转运到下游产线。
+    """
+
+    def __init__(
+        self,
+        model: LineModel,
+        params: Optional[SimulationParams] = None,
+        seed: int = 0,
+        calendar: Optional[EventCalendar] = None,
+        external: Collection[str] = (),
+        profiler: Optional[EngineProfiler] = None
+    ):
+        self.model = model
+        # 引擎统计，为空时不插桩
+        self.profiler = profiler
+        self.params = params or SimulationParams()
+        self.seed = seed
+        self.now = 0.0
+        # 未指定日历实例时按 params.calendar 创建
+        self._calendar: EventCalendar = calendar if calendar is not None else make_calendar(self.params.calendar)
+        self._push = self._calendar.push
+        self._seq = 0
+        # 已取消但仍在日历中的事件序号
+        self._cancelled: Set[int] = set()
+
+        self.materials = MaterialStore(
+            locations=list(model.stations) + list(model.buffers) + [r.start_location for r in model.routines]
+        )
+        codes = self.materials.location_codes
+        self._routines = model.routines
+        # (出发位置编码, 到达位置编码) -> 运输时间
+        self._travel: Dict[Tuple[int, int], float] = {}
+        # 并行分支合并记录
+        self._joins: Dict[int, list] = {}
+        self._next_join = 0
+
+        self.buffers: Dict[str, Buffer] = {
+            buf_id: Buffer(spec, codes[buf_id]) for buf_id, spec in model.buffers.items()
+        }
+        self.stations: Dict[str, Station] = {
+            ws_id: Station(
+                spec,
+                self.buffers,
+                random.Random(stream_seed(seed, "station", ws_id)),
+                random.Random(stream_seed(seed, "failure", ws_id)) if spec.mtbf is not None else None,
+                codes[ws_id]
+            )
+            for ws_id, spec in model.stations.items()
+        }
+        for station in self.stations.values():
+            if station.input is not None:
+                station.input.feeds.append(station)
+            if station.fail_rng is not None:
+                self._schedule(station.spec.mtbf(station.fail_rng), self._fail, station)
+
+        self._quality_rng: Dict[Tuple[str, int], random.Random] = {
+            (routine.id, step.index): random.Random(stream_seed(seed, "quality", routine.id, step.step_id))
+            for routine in model.routines
+            for step in routine.steps
+            if step.pass_rate is not None
+        }
+
+        self.bottlenecks = BottleneckDetector(list(self.stations))
+        self.wip = TimeWeighted()
+        self.completed = 0
+        self.scrapped = 0
+        self.cycle_time_sum = 0.0
+        # 协同仿真：完工物料 (流转路径序号, 时刻)
+        self.outbox: Optional[List[Tuple[int, float]]] = None
+
+        release = self.params.release_time
+        self._sources: Dict[str, Source] = {}
+        for index, routine in enumerate(model.routines):
+            source = self._sources[routine.id] = Source(
+                routine,
+                index,
+                codes[routine.start_location],
+                self.materials.type_code(routine.material_type),
+                make_sampler(release) if release else None,
+                random.Random(stream_seed(seed, "source", routine.id))
+            )
+            if routine.id not in external:
+                self._schedule(0.0, self._release, source)
+
+        if self.params.warmup > 0:
+            self._schedule(self.params.warmup, self._reset_stats, None, priority=-1)
+
+        # 时间序列采样：同一时刻的其他事件处理完后再采样
+        self._series: Optional[Dict[str, Any]] = None
+        if self.params.record_interval:
+            self._series = {
+                "times": array("d"),
+                "buffers": {buf_id: {"level": array("d")} for buf_id in self.buffers},
+                "workstations": {
+                    ws_id: {"busy": array("d"), "blocked": array("d"), "down": array("d")}
+                    for ws_id in self.stations
+                },
+                "line": {"wip": array("d")},
+            }
+            self._schedule(0.0, self._sample, None, priority=1)
+
+        # 价值流核算明细：每次加工一行、每件物料离开产线一行，列为 array，核算时零拷贝转为NumPy数组
+        self._operations: Optional[Dict[str, array]] = None
+        self._exits: Optional[Dict[str, array]] = None
+        if self.params.value_stream:
+            self._operations = {name: array(code) for name, code in OPERATION_COLUMNS.items()}
+            self._exits = {name: array(code) for name, code in EXIT_COLUMNS.items()}
+
+    # ------------------------------------------------------------------
+    # 事件日历
+    # ------------------------------------------------------------------
+
+    def _schedule(self, delay: float, handler: Callable[[Any], None], arg: Any, priority: int = 0) -> tuple:
+        """
+        在 now + delay 时刻安排事件，同一时刻按优先级、再按安排顺序执行
+
+        Returns:
+            事件 (时刻, 优先级, 序号, 处理函数, 参数)，可作为句柄传给 _cancel
+        """
+        self._seq += 1
+        event = (self.now + delay, priority, self._seq, handler, arg)
+        self._push(event)
+        return event
+
+    def _cancel(self, event: tuple) -> None:
+        """
+        取消事件（惰性删除）
+
+        只登记事件序号，出堆时跳过，O(1)；改期即取消后重新安排，O(log n)。
+        事件保持元组而不是可变句柄，堆比较走元组的快速路径。
+        已取消事件超过日历的一半时整体压缩一次，均摊O(1)，日历中不会堆积失效事件。
+        """
+        cancelled = self._cancelled
+        cancelled.add(event[2])
+        if len(cancelled) > COMPACT_THRESHOLD and len(cancelled) * 2 > len(self._calendar):
+            self._calendar.rebuild(lambda e: e[2] not in cancelled)
+            cancelled.clear()
+
+    def run(self, until: Optional[float] = None) -> None:
+        """
+        推进仿真时钟
+
+        Args:
+            until: 推进到的时刻，为空时运行到仿真结束；可多次调用分段推进
+        """
+        end = self.params.duration if until is None else min(until, self.params.duration)
+        if self.profiler is not None:
+            self._run_profiled(end)
+        else:
+            pop_until = self._calendar.pop_until
+            cancelled = self._cancelled
+            while True:
+                event = pop_until(end)
+                if event is None:
+                    break
+                time, _, seq, handler, arg = event
+                if cancelled and seq in cancelled:
+                    cancelled.discard(seq)
+                    continue
+                self.now = time
+                handler(arg)
+        if end > self.now:
+            self.now = end
+
+    def _run_profiled(self, end: float) -> None:
+        """带计时的事件循环：逐事件计数、累加处理耗时，按间隔抽样处理延迟和日历大小"""
+        profiler = self.profiler
+        counts, seconds = profiler.counts, profiler.seconds
+        sample_every = profiler.sample_every
+        clock = perf_counter
+        calendar = self._calendar
+        pop_until = calendar.pop_until
+        cancelled = self._cancelled
+        events = profiler.events
+        started = clock()
+        while True:
+            event = pop_until(end)
+            if event is None:
+                break
+            time, _, seq, handler, arg = event
+            if cancelled and seq in cancelled:
+                cancelled.discard(seq)
+                continue
+            self.now = time
+            name = handler.__name__
+            begin = clock()
+            handler(arg)
+            elapsed = clock() - begin
+            counts[name] = counts.get(name, 0) + 1
+            seconds[name] = seconds.get(name, 0.0) + elapsed
+            events += 1
+            if events % sample_every == 0:
+                profiler.sample(name, elapsed, len(calendar))
+        profiler.events = events
+        profiler.wall_time += clock() - started
+
+    @property
+    def finished(self) -> bool:
+        return self.now >= self.params.duration
+
+    def next_event_time(self) -> float:
+        """日历中最早事件的时刻（可能是已取消的事件，只会偏早），日历为空时为inf"""
+        return self._calendar.peek_time()
+
+    def receive(self, routine_id: str, time: float) -> None:
+        """
+        安排一件外部物料在 time 时刻到达流转路径的起点（协同仿真中由上游产线送达）
+
+        Raises:
+            ValueError: 到达时刻早于当前仿真时刻
+        """
+        if time < self.now:
+            raise ValueError(f"外部物料到达时刻 {time} 早于当前仿真时刻 {self.now}")
+        self._schedule(time - self.now, self._receive, self._sources[routine_id])
+
+    # ------------------------------------------------------------------
+    # 物料流转
+    # ------------------------------------------------------------------
+
+    def _release(self, source: Source) -> None:
+        """投料点投放一件新物料"""
+        mid = self.materials.allocate(source.index, self.now, source.location, source.material_type)
+        self.wip.update(self.now, self.wip.value + 1)
+        if source.sampler is not None:
+            self._schedule(source.sampler(source.rng), self._release, source)
+        self._advance(mid, source)
+
+    def _receive(self, source: Source) -> None:
+        """外部物料到达流转路径起点，不占用投料点"""
+        mid = self.materials.allocate(source.index, self.now, source.location, source.material_type)
+        self.wip.update(self.now, self.wip.value + 1)
+        self._advance(mid, None)
+
+    def _advance(self, mid: int, origin: Origin) -> None:
+        """物料前往当前步骤序号指向的步骤"""
+        m = self.materials
+        index = m.step[mid]
+        if index < 0:
+            self._leave(origin)
+            self._exit(mid)
+            return
+
+        step = self._routines[m.routine[mid]].steps[index]
+        if step.parallel:
+            # 同串行步骤：先放入工作站的输出缓冲区（不是某个分支的输入缓冲区时），再从缓冲区拆分
+            if type(origin) is Station and origin.output is not None and all(
+                self.stations[station_id].input is not origin.output for station_id, _ in step.branches
+            ):
+                self._to_output(mid, origin)
+            else:
+                self._fork(mid, step, origin)
+            return
+
+        target = self.stations[step.station_id]
+        if type(origin) is Station and origin.output is not None and origin.output is not target.input:
+            self._to_output(mid, origin)
+        else:
+            self._request(mid, origin, target)
+
+    def _request(self, mid: int, origin: Origin, station: Station) -> None:
+        """请求进入工作站，无法预留时排队等待"""
+        slot = station.reserve(_server_only(origin))
+        if slot is None:
+            station.waiters.append((mid, origin))
+        else:
+            self._dispatch(mid, origin, station, slot)
+
+    def _dispatch(self, mid: int, origin: Origin, station: Station, slot: int) -> None:
+        """离开原位置，运输到预留的加工位或输入缓冲区"""
+        self._leave(origin)
+        if slot == SERVER:
+            station.states.update(self.now, station)
+            dest = station.code
+            handler = self._arrive_server
+        else:
+            dest = station.input.code
+            handler = self._arrive_buffer
+        m = self.materials
+        delay = self._transport(m.location[mid], dest)
+        m.target[mid] = dest
+        m.state[mid] = TRANSPORT
+        self._schedule(delay, handler, (mid, station))
+
+    def _transport(self, from_code: int, to_code: int) -> float:
+        """按位置编码查询运输时间（逐对缓存）"""
+        key = (from_code, to_code)
+        delay = self._travel.get(key)
+        if delay is None:
+            names = self.materials.location_names
+            delay = self._travel[key] = self.model.transport_time(names[from_code], names[to_code])
+        return delay
+
+    def _arrive_server(self, arg: Tuple[int, Station]) -> None:
+        mid, station = arg
+        station.reserved -= 1
+        self.materials.location[mid] = station.code
+        self._start(mid, station)
+
+    def _arrive_buffer(self, arg: Tuple[int, Station]) -> None:
+        mid, station = arg
+        buf = station.input
+        m = self.materials
+        m.location[mid] = buf.code
+        m.state[mid] = WAITING
+        buf.reserved -= 1
+        buf.level += 1
+        buf.stats.update(self.now, buf.level)
+        station.queue.append(mid)
+        self._pull(station)
+
+    def _pull(self, station: Station) -> None:
+        """空闲加工位从输入缓冲区取料"""
+        buf = station.input
+        m = self.materials
+        while station.queue and not station.down and station.free() > 0:
+            mid = station.queue.popleft()
+            buf.level -= 1
+            buf.stats.update(self.now, buf.level)
+            self._notify_buffer(buf)
+            delay = self._transport(buf.code, station.code)
+            if delay > 0:
+                m.target[mid] = station.code
+                m.state[mid] = TRANSPORT
+                station.reserved += 1
+                station.states.update(self.now, station)
+                self._schedule(delay, self._arrive_server, (mid, station))
+            else:
+                m.location[mid] = station.code
+                self._start(mid, station)
+
+    def _start(self, mid: int, station: Station) -> None:
+        """开始加工；工作站故障中时占用加工位等待修复"""
+        m = self.materials
+        if station.down:
+            m.state[mid] = WAITING
+            station.held += 1
+            station.suspended.append((mid, None))
+            return
+        step = self._routines[m.routine[mid]].steps[m.step[mid]]
+        branch = m.branch[mid]
+        if branch >= 0:
+            sampler = step.branches[branch][1]
+        else:
+            sampler = step.sampler or station.spec.sampler
+        duration = sampler(station.rng)
+        if self._operations is not None:
+            self._log_operation(mid, station, step.index, branch, duration)
+        self._process(mid, station, duration)
+
+    def _process(self, mid: int, station: Station, duration: float) -> None:
+        """占用加工位并安排加工结束事件"""
+        self.materials.state[mid] = PROCESSING
+        station.busy += 1
+        station.busy_stats.update(self.now, station.busy)
+        station.states.update(self.now, station)
+        if not station.active:
+            station.active = True
+            self.bottlenecks.activate(station.id, self.now)
+        event = self._schedule(duration, self._finish, (mid, station))
+        if station.fail_rng is not None:
+            station.jobs[mid] = event
+
+    def _finish(self, arg: Tuple[int, Station]) -> None:
+        """加工结束：加工位转为占用状态，直到物料移出"""
+        mid, station = arg
+        now = self.now
+        if station.fail_rng is not None:
+            del station.jobs[mid]
+        station.busy -= 1
+        station.busy_stats.update(now, station.busy)
+        station.blocked += 1
+        station.blocked_stats.update(now, station.blocked)
+        station.states.update(now, station)
+        if not station.busy and not station.down:
+            station.active = False
+            self.bottlenecks.deactivate(station.id, now)
+        station.processed += 1
+
+        m = self.materials
+        m.state[mid] = FINISHED
+        routine = self._routines[m.routine[mid]]
+        step = routine.steps[m.step[mid]]
+        branch = m.branch[mid]
+        station.ideal_time += step.branch_ideal[branch] if branch >= 0 else step.ideal_time
+        if m.join[mid] >= 0:
+            self._branch_done(mid, station)
+            return
+
+        next_index = step.pass_next
+        if step.pass_rate is not None:
+            if self._quality_rng[(routine.id, step.index)].random() >= step.pass_rate:
+                next_index = step.fail_next
+                station.rejected += 1
+        m.step[mid] = next_index
+        self._advance(mid, station)
+
+    def _to_output(self, mid: int, station: Station) -> None:
+        """放入工作站的输出缓冲区，缓冲区满时阻塞"""
+        buf = station.output
+        if buf.free() > 0:
+            self._put_output(mid, station)
+        else:
+            buf.waiters.append((mid, station))
+
+    def _put_output(self, mid: int, station: Station) -> None:
+        buf = station.output
+        buf.reserved += 1
+        self._leave(station)
+        m = self.materials
+        delay = self._transport(m.location[mid], buf.code)
+        m.target[mid] = buf.code
+        m.state[mid] = TRANSPORT
+        self._schedule(delay, self._arrive_output, (mid, buf))
+
+    def _arrive_output(self, arg: Tuple[int, Buffer]) -> None:
+        mid, buf = arg
+        m = self.materials
+        m.location[mid] = buf.code
+        m.state[mid] = WAITING
+        buf.reserved -= 1
+        buf.level += 1
+        buf.stats.update(self.now, buf.level)
+        self._advance(mid, buf)
+
+    def _leave(self, origin: Origin) -> None:
+        """物料离开原位置，释放其占用的加工位或缓冲区空位"""
+        kind = type(origin)
+        if kind is Station:
+            origin.blocked -= 1
+            origin.blocked_stats.update(self.now, origin.blocked)
+            origin.states.update(self.now, origin)
+            self._notify_station(origin)
+        elif kind is Buffer:
+            origin.level -= 1
+            origin.stats.update(self.now, origin.level)
+            self._notify_buffer(origin)
+        elif kind is Source and origin.saturated:
+            self._schedule(0.0, self._release, origin)
+        elif kind is Hold:
+            origin.pending -= 1
+            if not origin.pending:
+                for held in origin.origins:
+                    self._leave(held)
+
+    def _exit(self, mid: int) -> None:
+        """物料完成或报废，离开产线并释放槽位"""
+        m = self.materials
+        self.wip.update(self.now, self.wip.value - 1)
+        if self._exits is not None:
+            log = self._exits
+            log["part"].append(mid)
+            log["created"].append(m.created[mid])
+            log["time"].append(self.now)
+            log["routine"].append(m.routine[mid])
+            log["scrapped"].append(m.step[mid] == SCRAP)
+        if m.step[mid] == SCRAP:
+            self.scrapped += 1
+        else:
+            self.completed += 1
+            self.cycle_time_sum += self.now - m.created[mid]
+            if self.outbox is not None:
+                self.outbox.append((m.routine[mid], self.now))
+        m.release(mid)
+
+    def _log_operation(self, mid: int, station: Station, step: int, branch: int, duration: float) -> None:
+        """记录一次加工；分支子任务记在所属物料名下（以槽位号和投料时刻标识一件物料）"""
+        m = self.materials
+        log = self._operations
+        log["part"].append(self._joins[m.join[mid]][0] if branch >= 0 else mid)
+        log["created"].append(m.created[mid])
+        log["start"].append(self.now)
+        log["duration"].append(duration)
+        log["routine"].append(m.routine[mid])
+        log["step"].append(step)
+        log["station"].append(station.code)
+        log["branch"].append(branch >= 0)
+
+    # ------------------------------------------------------------------
+    # 设备故障
+    # ------------------------------------------------------------------
+
+    def _fail(self, station: Station) -> None:
+        """
+        工作站故障：取消加工中物料的加工结束事件，记录剩余加工时间
+
+        加工完成等待移出的物料不受影响；故障期间不再接收新物料进入加工位，
+        上游物料可以继续进入输入缓冲区。
+        """
+        now = self.now
+        station.down = True
+        station.failures += 1
+        station.down_stats.update(now, 1)
+        if not station.active:
+            station.active = True
+            self.bottlenecks.activate(station.id, now)
+        jobs = station.jobs
+        if jobs:
+            state = self.materials.state
+            for mid, event in jobs.items():
+                station.suspended.append((mid, event[0] - now))
+                state[mid] = WAITING
+                self._cancel(event)
+            station.busy -= len(jobs)
+            station.busy_stats.update(now, station.busy)
+            station.held += len(jobs)
+            jobs.clear()
+        station.states.update(now, station)
+        self._schedule(station.spec.mttr(station.fail_rng), self._repair, station)
+
+    def _repair(self, station: Station) -> None:
+        """工作站修复：中断的物料继续剩余加工时间，并安排下一次故障"""
+        station.down = False
+        station.down_stats.update(self.now, 0)
+        suspended = station.suspended
+        station.suspended = []
+        station.held -= len(suspended)
+        station.states.update(self.now, station)
+        for mid, remaining in suspended:
+            if remaining is None:
+                self._start(mid, station)
+            else:
+                self._process(mid, station, remaining)
+        if not station.busy:
+            station.active = False
+            self.bottlenecks.deactivate(station.id, self.now)
+        self._schedule(station.spec.mtbf(station.fail_rng), self._fail, station)
+        self._notify_station(station)
+
+    # ------------------------------------------------------------------
+    # 并行分支
+    # ------------------------------------------------------------------
+
+    def _fork(self, mid: int, step, origin: Origin = None) -> None:
+        """
+        拆分为各分支的子任务
+
+        all_complete 等待全部分支完成，any_complete 在首个分支完成时继续。
+        物料的原位置由各分支子任务共同保持（Hold），全部分支预留成功后才释放；
+        已完成的分支子任务占着加工位（阻塞），直到合并后的物料预留到下一工作站。
+        合并记录为 [物料, 合并前还需完成的分支数, 尚未结束的分支数, 已完成并占着加工位的工作站]，
+        any_complete 合并后剩余的子任务仍会加工完（完成即释放加工位），物料本身可能已先离开产线。
+        """
+        m = self.materials
+        if not step.branches:
+            m.step[mid] = step.pass_next
+            self._advance(mid, origin)
+            return
+        self._next_join += 1
+        join_id = self._next_join
+        count = len(step.branches)
+        self._joins[join_id] = [mid, count, count, []]
+        m.state[mid] = JOINING
+        hold = Hold([origin], count) if origin is not None else None
+        for index, (station_id, _) in enumerate(step.branches):
+            token = m.allocate(m.routine[mid], m.created[mid], m.location[mid], m.type[mid], m.batch[mid])
+            m.step[token] = m.step[mid]
+            m.join[token] = join_id
+            m.branch[token] = index
+            self._request(token, hold, self.stations[station_id])
+
+    def _branch_done(self, token: int, station: Station) -> None:
+        m = self.materials
+        join_id = m.join[token]
+        location = m.location[token]
+        m.release(token)
+        join = self._joins[join_id]
+        join[2] -= 1
+        if join[2] == 0:
+            del self._joins[join_id]
+        if join[1] <= 0:
+            self._leave(station)
+            return
+        join[1] -= 1
+        join[3].append(station)
+        mid = join[0]
+        step = self._routines[m.routine[mid]].steps[m.step[mid]]
+        if step.merge_any or join[1] == 0:
+            join[1] = 0
+            m.location[mid] = location
+            m.state[mid] = WAITING
+            m.step[mid] = step.pass_next
+            self._advance(mid, Hold(join[3]))
+
+    # ------------------------------------------------------------------
+    # 唤醒等待者（延迟为零时刻事件，避免长产线上的级联递归）
+    # ------------------------------------------------------------------
+
+    def _notify_station(self, station: Station) -> None:
+        if not station.wake_pending:
+            station.wake_pending = True
+            self._schedule(0.0, self._wake_station, station)
+
+    def _notify_buffer(self, buf: Buffer) -> None:
+        if not buf.wake_pending:
+            buf.wake_pending = True
+            self._schedule(0.0, self._wake_buffer, buf)
+
+    def _wake_station(self, station: Station) -> None:
+        station.wake_pending = False
+        if station.input is not None:
+            self._pull(station)
+        waiters = station.waiters
+        while waiters:
+            part, origin = waiters[0]
+            slot = station.reserve(_server_only(origin))
+            if slot is None:
+                break
+            waiters.popleft()
+            self._dispatch(part, origin, station, slot)
+
+    def _wake_buffer(self, buf: Buffer) -> None:
+        buf.wake_pending = False
+        waiters = buf.waiters
+        while waiters and buf.free() > 0:
+            part, station = waiters.popleft()
+            self._put_output(part, station)
+        for station in buf.feeds:
+            if station.waiters:
+                self._wake_station(station)
+
+    # ------------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------------
+
+    def _reset_stats(self, _=None) -> None:
+        """预热结束，清空统计量"""
+        now = self.now
+        self.wip.reset(now)
+        self.completed = 0
+        self.scrapped = 0
+        self.cycle_time_sum = 0.0
+        for station in self.stations.values():
+            station.processed = 0
+            station.failures = 0
+            station.busy_stats.reset(now)
+            station.blocked_stats.reset(now)
+            station.down_stats.reset(now)
+            station.states.reset(now)
+            station.ideal_time = 0.0
+            station.rejected = 0
+        self.bottlenecks.reset(now)
+        for buf in self.buffers.values():
+            buf.stats.reset(now)
+
+    def _sample(self, _=None) -> None:
+        """记录一次时间序列采样"""
+        series = self._series
+        series["times"].append(self.now)
+        for buf_id, metrics in series["buffers"].items():
+            metrics["level"].append(self.buffers[buf_id].level)
+        for ws_id, metrics in series["workstations"].items():
+            station = self.stations[ws_id]
+            metrics["busy"].append(station.busy)
+            metrics["blocked"].append(station.blocked)
+            metrics["down"].append(1 if station.down else 0)
+        series["line"]["wip"].append(self.wip.value)
+        self._schedule(self.params.record_interval, self._sample, None, priority=1)
+
+    def series(self) -> Optional[Dict[str, Any]]:
+        """
+        采样得到的时间序列，未开启采样时返回None
+
+        格式: {"times": [...], "buffers": {id: {"level": [...]}},
+               "workstations": {id: {"busy": [...], "blocked": [...], "down": [...]}},
+               "line": {"wip": [...]}}
+        """
+        if self._series is None:
+            return None
+        series = self._series
+        return {
+            "times": series["times"].tolist(),
+            "buffers": {
+                buf_id: {metric: values.tolist() for metric, values in metrics.items()}
+                for buf_id, metrics in series["buffers"].items()
+            },
+            "workstations": {
+                ws_id: {metric: values.tolist() for metric, values in metrics.items()}
+                for ws_id, metrics in series["workstations"].items()
+            },
+            "line": {metric: values.tolist() for metric, values in series["line"].items()}
+        }
+
+    def value_stream(self) -> Optional[Dict[str, Any]]:
+        """价值流核算结果（见 value_stream.value_stream_accounting），未开启记录时返回None"""
+        if self._operations is None:
+            return None
+        return value_stream_accounting(
+            self.model,
+            self.materials.location_names,
+            {name: np.frombuffer(values, OPERATION_COLUMNS[name]) for name, values in self._operations.items()},
+            {name: np.frombuffer(values, EXIT_COLUMNS[name]) for name, values in self._exits.items()},
+            self.params.warmup
+        )
+
+    def oee(self) -> Dict[str, Any]:
+        """各工作站和产线的OEE（见 oee.oee_report），由运行中维护的状态时间累加器直接计算"""
+        return oee_report(list(self.stations.values()), self.now)
+
+    def result(self) -> Dict[str, Any]:
+        """
+        当前时刻的统计结果
+
+        throughput 单位为 件/小时，时间类指标单位为秒。
+        """
+        now = self.now
+        span = now - min(self.params.warmup, now)
+        finished = self.completed + self.scrapped
+        return {
+            "time": now,
+            "kpis": {
+                "throughput": self.completed * 3600.0 / span if span > 0 else 0.0,
+                "completed": self.completed,
+                "scrapped": self.scrapped,
+                "yield": self.completed / finished if finished else None,
+                "avg_cycle_time": self.cycle_time_sum / self.completed if self.completed else None,
+                "avg_wip": self.wip.mean(now),
+            },
+            "oee": self.oee(),
+            "bottlenecks": self.bottlenecks.report(now),
+            "workstations": {
+                station.id: {
+                    "utilization": station.busy_stats.mean(now) / station.capacity,
+                    "blocked": station.blocked_stats.mean(now) / station.capacity,
+                    "availability": 1.0 - station.down_stats.mean(now),
+                    "failures": station.failures,
+                    "processed": station.processed,
+                }
+                for station in self.stations.values()
+            },
+            "buffers": {
+                buf.id: {
+                    "avg_level": buf.stats.mean(now),
+                    "max_level": buf.stats.max_value,
+                }
+                for buf in self.buffers.values()
+            },
+        }
+
+    def output(self) -> Dict[str, Any]:
+        """
+        完整输出：统计结果，开启采样时另含 series，开启价值流记录时另含 value_stream
+
+        run_simulation 和任务管理器的工作进程都由此组装结果，同一缓存键下的结果内容相同。
+        """
+        result = self.result()
+        if self.params.record_interval:
+            result["series"] = self.series()
+        if self.params.value_stream:
+            result["value_stream"] = self.value_stream()
+        return result
+
+
+def run_simulation(
+    config: Union[Dict[str, Any], LineModel],
+    params: Union[Dict[str, Any], SimulationParams, None] = None,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    运行一次完整仿真并返回统计结果
+
+    模块级函数，可直接提交给进程池。
+
+    Args:
+        config: ConfigService.build_config 格式的配置字典，或已构建的产线模型
+        params: 仿真参数
+        seed: 随机数种子，相同种子下各实体的随机数流相同
+
+    Returns:
+        完整输出（见 Simulation.output）
+    """
+    model = config if isinstance(config, LineModel) else LineModel(config)
+    if not isinstance(params, SimulationParams):
+        params = SimulationParams(**(params or {}))
+    profiler = EngineProfiler() if ENGINE_METRICS else None
+    simulation = Simulation(model, params, seed, profiler=profiler)
+    simulation.run()
+    if profiler is not None:
+        engine_metrics.merge(profiler.snapshot())
+    return simulation.output()
@@ -0,0 +1,129 @@
+"""引擎运行统计 - 按事件类型的计数和处理耗时、事件日历大小、事件吞吐率、抽样的处理延迟"""
+import os
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+
+# 设置环境变量 ENGINE_METRICS=1 时，本进程内的仿真运行都记录引擎统计
+ENGINE_METRICS = os.environ.get("ENGINE_METRICS", "") not in ("", "0", "false")
+
+# 每隔多少个事件抽样一次处理延迟和事件日历大小
+SAMPLE_EVERY = 64
+# 每种事件保留的延迟样本数
+SAMPLE_SIZE = 1024
+
+
+class EngineProfiler:
+    """
+    单次仿真运行的引擎统计
+
+    传给 Simulation 后，run 改用带计时的事件循环；不传时事件循环与未插桩时完全相同，没有额外开销。
+    每个事件计数并累加处理耗时（按处理函数名区分事件类型），
+    每 SAMPLE_EVERY 个事件记录一次处理延迟样本和事件日历大小。
+    """
+
+    def __init__(self, sample_every: int = SAMPLE_EVERY, sample_size: int = SAMPLE_SIZE):
+        self.sample_every = sample_every
+        self.sample_size = sample_size
+        self.counts: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+        self.samples: Dict[str, Deque[float]] = {}
+        self.events = 0
+        self.wall_time = 0.0
+        self.calendar_size = 0
+        self.calendar_max = 0
+
+    def sample(self, name: str, elapsed: float, calendar_size: int) -> None:
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.sample_size)
+        samples.append(elapsed)
+        self.calendar_size = calendar_size
+        if calendar_size > self.calendar_max:
+            self.calendar_max = calendar_size
+
+    def snapshot(self) -> Dict[str, Any]:
+        """可序列化的统计（可跨进程发送后由 EngineMetrics.merge 汇总）"""
+        return {
+            "events": self.events,
+            "wall_time": self.wall_time,
+            "events_per_second": self.events / self.wall_time if self.wall_time > 0 else None,
+            "calendar_size": self.calendar_size,
+            "calendar_max": self.calendar_max,
+            "handlers": {
+                name: {
+                    "count": count,
+                    "seconds": self.seconds[name],
+                    "samples": list(self.samples.get(name, ())),
+                }
+                for name, count in self.counts.items()
+            },
+        }
+
+
+def _quantiles(samples: List[float], points=(0.5, 0.9, 0.99)) -> Dict[float, float]:
+    ordered = sorted(samples)
+    return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in points}
+
+
+class EngineMetrics:
+    """
+    进程内各次仿真运行的引擎统计汇总（供 /metrics 导出）
+
+    计数和累计耗时逐次累加；事件吞吐率、日历大小取最近一次运行；
+    延迟样本每种事件保留最近的 SAMPLE_SIZE 个。
+    """
+
+    def __init__(self, sample_size: int = SAMPLE_SIZE):
+        self._lock = threading.Lock()
+        self.sample_size = sample_size
+        self.runs = 0
+        self.events = 0
+        self.wall_time = 0.0
+        self.counts: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+        self.samples: Dict[str, Deque[float]] = {}
+        self.last: Optional[Dict[str, Any]] = None
+        self.calendar_max = 0
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        """计入一次运行的统计（EngineProfiler.snapshot 的结果）"""
+        with self._lock:
+            self.runs += 1
+            self.events += snapshot["events"]
+            self.wall_time += snapshot["wall_time"]
+            self.calendar_max = max(self.calendar_max, snapshot["calendar_max"])
+            for name, handler in snapshot["handlers"].items():
+                self.counts[name] = self.counts.get(name, 0) + handler["count"]
+                self.seconds[name] = self.seconds.get(name, 0.0) + handler["seconds"]
+                samples = self.samples.get(name)
+                if samples is None:
+                    samples = self.samples[name] = deque(maxlen=self.sample_size)
+                samples.extend(handler["samples"])
+            self.last = {
+                key: snapshot[key] for key in ("events", "wall_time", "events_per_second", "calendar_size", "calendar_max")
+            }
+
+    def summary(self) -> Dict[str, Any]:
+        """汇总结果，含各事件类型的延迟分位数"""
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "events": self.events,
+                "wall_time": self.wall_time,
+                "calendar_max": self.calendar_max,
+                "last_run": dict(self.last) if self.last else None,
+                "handlers": {
+                    name: {
+                        "count": count,
+                        "seconds": self.seconds[name],
+                        "latency": _quantiles(list(self.samples[name])) if self.samples.get(name) else {},
+                    }
+                    for name, count in self.counts.items()
+                },
+            }
+
+
+# 进程级单例
+engine_metrics = EngineMetrics()
@@ -0,0 +1,187 @@
+"""物料存储 - 以预分配NumPy列保存在制物料（结构体数组），按ID复用空闲槽位"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+# 物料状态
+FREE = 0        # 空闲槽位
+WAITING = 1     # 等待（排队等待进入工作站，或在缓冲区中）
+TRANSPORT = 2   # 运输中
+PROCESSING = 3  # 加工中
+FINISHED = 4    # 加工完成，等待移出工作站
+JOINING = 5     # 并行分支加工中，等待合并
+
+STATE_NAMES = {
+    WAITING: "waiting",
+    TRANSPORT: "transport",
+    PROCESSING: "processing",
+    FINISHED: "finished",
+    JOINING: "joining",
+}
+
+NO_REF = -1
+
+# 列名 -> 类型
+COLUMNS = {
+    "type": np.int32,       # 物料类型编码，见 type_names
+    "batch": np.int32,      # 批次号
+    "location": np.int32,   # 当前位置编码，见 location_names
+    "target": np.int32,     # 目标位置编码
+    "state": np.int8,
+    "created": np.float64,  # 投料时刻
+    "routine": np.int32,    # 流转路径序号
+    "step": np.int32,       # 当前步骤序号
+    "join": np.int32,       # 分支子任务所属的合并记录；空闲槽位中为下一个空闲槽位
+    "branch": np.int32,     # 分支序号
+}
+
+
+class MaterialStore:
+    """
+    结构体数组形式的物料存储
+
+    每个物料是各列中的一个槽位（整数ID），而不是一个Python对象：
+    每件物料只占各列元素的字节数，不产生对象头、属性字典和GC跟踪开销。
+    离开产线的物料槽位挂回空闲链表（借用 join 列保存链接，不另占内存），
+    新物料优先复用最近释放的槽位，容量不足时各列按倍数扩容。
+
+    标量读写通过各列的 memoryview 进行（返回Python原生数值，比NumPy标量索引快）；
+    按状态、位置的统计使用NumPy向量运算。
+    扩容会替换列对象，调用方不要长期持有某一列的引用。
+
+    质量、规格等逐件属性很少使用，只为设置过属性的物料在旁表中保存字典。
+    """
+
+    def __init__(self, capacity: int = 1024, locations: Optional[List[Optional[str]]] = None):
+        self.capacity = 0
+        self.size = 0
+        self._arrays: Dict[str, np.ndarray] = {name: np.empty(0, dtype) for name, dtype in COLUMNS.items()}
+        self._head = NO_REF  # 空闲链表头
+        self.properties: Dict[int, Dict[str, Any]] = {}
+
+        # 位置编码，0 表示无位置
+        self.location_names: List[Optional[str]] = [None]
+        self.location_codes: Dict[Optional[str], int] = {None: 0}
+        for name in locations or []:
+            self.location_code(name)
+        self.type_names: List[Optional[str]] = [None]
+        self.type_codes: Dict[Optional[str], int] = {None: 0}
+
+        self._grow(max(1, capacity))
+
+    def _grow(self, capacity: int) -> None:
+        """扩容到 capacity，新槽位按ID从小到大依次分配"""
+        old = self.capacity
+        for name, array in self._arrays.items():
+            grown = np.zeros(capacity, array.dtype)
+            grown[:old] = array
+            self._arrays[name] = grown
+            setattr(self, name, memoryview(grown))
+
+        # 只在空闲链表为空时扩容，新槽位依次链接
+        links = self._arrays["join"]
+        links[old:capacity] = np.arange(old + 1, capacity + 1, dtype=np.int32)
+        links[capacity - 1] = NO_REF
+        self._head = old
+        self.capacity = capacity
+
+    def location_code(self, name: Optional[str]) -> int:
+        code = self.location_codes.get(name)
+        if code is None:
+            code = len(self.location_names)
+            self.location_codes[name] = code
+            self.location_names.append(name)
+        return code
+
+    def type_code(self, name: Optional[str]) -> int:
+        code = self.type_codes.get(name)
+        if code is None:
+            code = len(self.type_names)
+            self.type_codes[name] = code
+            self.type_names.append(name)
+        return code
+
+    def allocate(
+        self,
+        routine: int,
+        created: float,
+        location: int = 0,
+        material_type: int = 0,
+        batch: int = NO_REF,
+        state: int = WAITING
+    ) -> int:
+        """
+        分配一个物料槽位并初始化
+
+        Returns:
+            物料ID（槽位号）
+        """
+        if self._head < 0:
+            self._grow(self.capacity * 2)
+        mid = self._head
+        self._head = self.join[mid]
+        self.size += 1
+        self.routine[mid] = routine
+        self.created[mid] = created
+        self.location[mid] = location
+        self.target[mid] = 0
+        self.type[mid] = material_type
+        self.batch[mid] = batch
+        self.state[mid] = state
+        self.step[mid] = 0
+        self.join[mid] = NO_REF
+        self.branch[mid] = NO_REF
+        return mid
+
+    def release(self, mid: int) -> None:
+        """释放物料槽位，挂回空闲链表"""
+        self.state[mid] = FREE
+        if self.properties:
+            self.properties.pop(mid, None)
+        self.join[mid] = self._head
+        self._head = mid
+        self.size -= 1
+
+    # ------------------------------------------------------------------
+    # 逐件属性（旁表）
+    # ------------------------------------------------------------------
+
+    def set_property(self, mid: int, key: str, value: Any) -> None:
+        self.properties.setdefault(mid, {})[key] = value
+
+    def get_properties(self, mid: int) -> Dict[str, Any]:
+        return self.properties.get(mid, {})
+
+    # ------------------------------------------------------------------
+    # 向量统计
+    # ------------------------------------------------------------------
+
+    def column(self, name: str) -> np.ndarray:
+        """某一列的NumPy数组（只读视图，含空闲槽位）"""
+        view = self._arrays[name].view()
+        view.flags.writeable = False
+        return view
+
+    def active(self) -> np.ndarray:
+        """在用槽位的ID"""
+        return np.flatnonzero(self._arrays["state"] != FREE)
+
+    def count_by_state(self) -> Dict[str, int]:
+        """各状态的物料数"""
+        counts = np.bincount(self._arrays["state"], minlength=len(STATE_NAMES) + 1)
+        return {name: int(counts[code]) for code, name in STATE_NAMES.items()}
+
+    def count_by_location(self) -> Dict[str, int]:
+        """各位置的物料数（运输中的物料计入出发位置）"""
+        mask = self._arrays["state"] != FREE
+        counts = np.bincount(self._arrays["location"][mask], minlength=len(self.location_names))
+        return {
+            name: int(counts[code])
+            for code, name in enumerate(self.location_names)
+            if name is not None and counts[code]
+        }
+
+    def nbytes(self) -> int:
+        """各列占用的字节数"""
+        return sum(array.nbytes for array in self._arrays.values())
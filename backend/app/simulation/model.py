@@ -0,0 +1,342 @@
+"""仿真产线模型 - 将导出格式的配置字典编译为引擎使用的结构"""
+import hashlib
+import random
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..utils.routing_table import RoutingTable
+
+
+# 特殊的下一步骤索引
+END = -1    # 完成全部工序，离开产线
+SCRAP = -2  # 判定报废，离开产线
+
+Sampler = Callable[[random.Random], float]
+
+
+def make_sampler(config: Any) -> Sampler:
+    """
+    根据处理时间配置生成采样函数
+
+    Args:
+        config: 数值（固定时间）或 {type: fixed|uniform|normal|exponential, ...} 字典
+
+    Returns:
+        接收随机数发生器、返回时间的函数
+    """
+    if isinstance(config, (int, float)):
+        value = float(config)
+        return lambda rng: value
+    if not isinstance(config, dict):
+        raise ValueError(f"无效的时间配置: {config}")
+
+    dist = config.get("type")
+    if dist == "fixed":
+        value = float(config["value"])
+        return lambda rng: value
+    if dist == "uniform":
+        low, high = float(config["min"]), float(config["max"])
+        return lambda rng: rng.uniform(low, high)
+    if dist == "normal":
+        mean, std = float(config["mean"]), float(config["std"])
+        # 截断在0，避免负的处理时间
+        return lambda rng: max(0.0, rng.gauss(mean, std))
+    if dist == "exponential":
+        rate = 1.0 / float(config["mean"])
+        return lambda rng: rng.expovariate(rate)
+    raise ValueError(f"不支持的分布类型: {dist}")
+
+
+def mean_time(config: Any) -> float:
+    """处理时间配置的名义均值（正态分布不计截断），用作理论加工时间"""
+    if isinstance(config, (int, float)):
+        return float(config)
+    dist = config.get("type")
+    if dist == "fixed":
+        return float(config["value"])
+    if dist == "uniform":
+        return (float(config["min"]) + float(config["max"])) / 2
+    if dist in ("normal", "exponential"):
+        return float(config["mean"])
+    raise ValueError(f"不支持的分布类型: {dist}")
+
+
+def make_failure_sampler(config: Any) -> Sampler:
+    """
+    故障间隔/修复时间的采样函数
+
+    数值表示指数分布的均值（MTBF/MTTR的常用假设），字典格式同 make_sampler。
+    """
+    if isinstance(config, (int, float)) and not isinstance(config, bool):
+        if config <= 0:
+            raise ValueError(f"无效的故障时间配置: {config}")
+        return make_sampler({"type": "exponential", "mean": config})
+    return make_sampler(config)
+
+
+def stream_seed(seed: int, *key: Any) -> int:
+    """
+    由基础种子和实体标识派生随机数流种子
+
+    同一实体在不同场景中使用同一条随机数流（公共随机数），
+    不依赖Python进程级的hash随机化。
+    """
+    text = "/".join(str(part) for part in (seed,) + key)
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class StationSpec:
+    """工作站"""
+
+    __slots__ = (
+        "id", "name", "capacity", "sampler", "input_buffer_id", "output_buffer_id", "properties",
+        "mtbf", "mttr", "ideal_cycle_time", "ideal_time"
+    )
+
+    def __init__(self, data: Dict[str, Any]):
+        self.id = data["id"]
+        self.name = data.get("name", self.id)
+        self.capacity = max(1, int(data.get("capacity") or 1))
+        self.sampler = make_sampler(data["processing_time"])
+        self.input_buffer_id = data.get("input_buffer_id")
+        self.output_buffer_id = data.get("output_buffer_id")
+        self.properties = data.get("properties") or {}
+
+        # 故障模型：properties 中的 mtbf（平均故障间隔）和 mttr（平均修复时间）
+        mtbf = self.properties.get("mtbf")
+        mttr = self.properties.get("mttr")
+        if (mtbf is None) != (mttr is None):
+            raise ValueError(f"工作站 {self.id} 的 mtbf 和 mttr 需要同时配置")
+        self.mtbf: Optional[Sampler] = make_failure_sampler(mtbf) if mtbf is not None else None
+        self.mttr: Optional[Sampler] = make_failure_sampler(mttr) if mttr is not None else None
+
+        # 理论加工时间（OEE性能率）：properties 中的 ideal_cycle_time，未配置时取处理时间分布的均值
+        ideal = self.properties.get("ideal_cycle_time")
+        self.ideal_cycle_time: Optional[float] = float(ideal) if ideal is not None else None
+        self.ideal_time = self.ideal_cycle_time if ideal is not None else mean_time(data["processing_time"])
+
+
+class BufferSpec:
+    """缓冲区"""
+
+    __slots__ = ("id", "name", "capacity", "properties")
+
+    def __init__(self, data: Dict[str, Any]):
+        self.id = data["id"]
+        self.name = data.get("name", self.id)
+        self.capacity = max(0, int(data["capacity"]))
+        self.properties = data.get("properties") or {}
+
+
+class StepSpec:
+    """流转步骤（已解析跳转关系）"""
+
+    __slots__ = (
+        "index", "step_id", "station_id", "sampler", "operation",
+        "value_added", "value_amount", "pass_rate", "pass_next", "fail_next",
+        "parallel", "branches", "merge_any", "ideal_time", "branch_ideal"
+    )
+
+    def __init__(self, index: int, data: Dict[str, Any]):
+        self.index = index
+        self.step_id = data.get("step_id", 0)
+        self.station_id = data.get("workstation_id")
+        # 步骤上的处理时间覆盖工作站的处理时间分布
+        time = data.get("processing_time")
+        self.sampler = make_sampler(time) if time is not None else None
+        self.ideal_time: Optional[float] = mean_time(time) if time is not None else None
+        self.operation = data.get("operation")
+        self.value_added = bool(data.get("value_added"))
+        self.value_amount = data.get("value_amount") or 0.0
+        self.pass_rate: Optional[float] = None
+        self.pass_next = END
+        self.fail_next = SCRAP
+        self.parallel = bool(data.get("parallel"))
+        self.branches = [
+            (branch["workstation_id"], make_sampler(branch["processing_time"]))
+            for branch in (data.get("branches") or [])
+        ] if self.parallel else []
+        self.branch_ideal = [
+            mean_time(branch["processing_time"]) for branch in (data.get("branches") or [])
+        ] if self.parallel else []
+        self.merge_any = data.get("merge_condition") == "any_complete"
+
+
+class RoutineSpec:
+    """流转路径"""
+
+    __slots__ = ("id", "name", "material_type", "start_location", "end_location", "steps")
+
+    def __init__(self, data: Dict[str, Any], stations: Dict[str, StationSpec]):
+        self.id = data["id"]
+        self.name = data.get("name", self.id)
+        self.material_type = data.get("material_type")
+        self.start_location = data.get("start_location")
+        self.end_location = data.get("end_location")
+
+        raw_steps = sorted(data.get("steps") or [], key=lambda s: s.get("step_id", 0))
+        # 图形化编辑器中的连线决定步骤顺序和默认去向，没有连线时按 step_id 顺序流转
+        links = data.get("step_links") or []
+        outgoing: Dict[str, List[str]] = {}
+        if links:
+            raw_steps, outgoing = _follow_links(self.id, raw_steps, links)
+        self.steps = [StepSpec(i, s) for i, s in enumerate(raw_steps)]
+        if not self.steps:
+            raise ValueError(f"流转路径 {self.id} 没有步骤")
+
+        # 步骤引用可以是步骤ID、"step_<序号>" 或序号本身
+        refs: Dict[str, int] = {}
+        for step, raw in zip(self.steps, raw_steps):
+            if raw.get("id"):
+                refs[str(raw["id"])] = step.index
+            refs.setdefault(f"step_{step.step_id}", step.index)
+            refs.setdefault(str(step.step_id), step.index)
+
+        def resolve(step: StepSpec, field: str, ref: Any) -> int:
+            if str(ref) not in refs:
+                raise ValueError(f"流转路径 {self.id} 步骤 {step.step_id} 的 {field} 引用了不存在的步骤: {ref}")
+            return refs[str(ref)]
+
+        for step, raw in zip(self.steps, raw_steps):
+            targets = [station_id for station_id, _ in step.branches] if step.parallel else [step.station_id]
+            for station_id in targets:
+                if station_id not in stations:
+                    raise ValueError(f"流转路径 {self.id} 步骤 {step.step_id} 引用了不存在的工作站: {station_id}")
+
+            # 理论加工时间：工作站配置了 ideal_cycle_time 时取之，否则取本次加工所用处理时间分布的均值
+            if step.parallel:
+                step.branch_ideal = [
+                    ideal if stations[station_id].ideal_cycle_time is None else stations[station_id].ideal_cycle_time
+                    for (station_id, _), ideal in zip(step.branches, step.branch_ideal)
+                ]
+            else:
+                station = stations[step.station_id]
+                if station.ideal_cycle_time is not None or step.ideal_time is None:
+                    step.ideal_time = station.ideal_time
+
+            # 默认去向：有连线时取唯一一条连出的连线（没有则完成），否则取下一个步骤；多条连线时需显式指定
+            if links:
+                following = outgoing.get(str(raw.get("id")), [])
+                default: Optional[int] = END
+                if following:
+                    default = refs[following[0]] if len(following) == 1 else None
+            else:
+                default = step.index + 1 if step.index + 1 < len(self.steps) else END
+            if raw.get("next_step") is not None:
+                default = resolve(step, "next_step", raw["next_step"])
+            step.pass_next = default
+
+            conditions = raw.get("conditions") or {}
+            if conditions.get("type") == "quality_check" and conditions.get("pass_rate") is not None:
+                step.pass_rate = float(conditions["pass_rate"])
+                if conditions.get("pass_route") is not None:
+                    step.pass_next = resolve(step, "pass_route", conditions["pass_route"])
+                if conditions.get("fail_route") is not None:
+                    step.fail_next = resolve(step, "fail_route", conditions["fail_route"])
+
+            if step.pass_next is None:
+                raise ValueError(f"流转路径 {self.id} 步骤 {step.step_id} 有多条连出的连线，需要用 next_step 或 pass_route 指定去向")
+
+
+def _follow_links(
+    routine_id: str,
+    raw_steps: List[Dict[str, Any]],
+    links: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], Dict[str, List[str]]]:
+    """
+    按步骤连线排列步骤
+
+    从没有连入连线的步骤出发（有连出连线的优先，其次按 step_id）沿连线深度优先排列，
+    首个步骤即物料投入的步骤；连线之外的步骤按 step_id 排在最后。
+
+    Returns:
+        (排列后的步骤, {步骤ID: 连出连线指向的步骤ID列表})
+    """
+    by_id = {str(raw["id"]): raw for raw in raw_steps if raw.get("id")}
+    outgoing: Dict[str, List[str]] = {}
+    incoming = set()
+    for link in links:
+        from_id, to_id = str(link["from_step_id"]), str(link["to_step_id"])
+        for ref in (from_id, to_id):
+            if ref not in by_id:
+                raise ValueError(f"流转路径 {routine_id} 的步骤连线引用了不存在的步骤: {ref}")
+        outgoing.setdefault(from_id, []).append(to_id)
+        incoming.add(to_id)
+
+    starts = sorted(
+        (raw for raw in raw_steps if str(raw.get("id")) not in incoming),
+        key=lambda raw: (str(raw.get("id")) not in outgoing, raw.get("step_id", 0))
+    )
+    ordered: List[Dict[str, Any]] = []
+    seen = set()
+    for start in starts + raw_steps:
+        stack = [start]
+        while stack:
+            raw = stack.pop()
+            if id(raw) in seen:
+                continue
+            seen.add(id(raw))
+            ordered.append(raw)
+            stack.extend(by_id[to_id] for to_id in reversed(outgoing.get(str(raw.get("id")), [])))
+    return ordered, outgoing
+
+
+class LineModel:
+    """
+    仿真用的产线模型
+
+    由 ConfigService.build_config 导出的配置字典构建，只读，
+    可在多次仿真运行（及多个进程）之间共享。
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        line = config["production_line"]
+        self.id = line.get("id")
+        self.name = line.get("name")
+        self.stations: Dict[str, StationSpec] = {
+            ws["id"]: StationSpec(ws) for ws in line.get("workstations", [])
+        }
+        self.buffers: Dict[str, BufferSpec] = {
+            buf["id"]: BufferSpec(buf) for buf in line.get("buffers", [])
+        }
+        paths = line.get("transport_paths", [])
+        self.routing = RoutingTable.build(
+            (p["from_location"], p["to_location"], p["transport_time"]) for p in paths
+        )
+        self._infer_buffers(paths)
+        self.routines: List[RoutineSpec] = [
+            RoutineSpec(r, self.stations) for r in config.get("routines", [])
+        ]
+        if not self.routines:
+            raise ValueError("产线没有可仿真的流转路径")
+        # 价值流配置（价值增加点、成本发生点），只用于价值流核算
+        self.value_stream: Dict[str, Any] = config.get("value_stream") or {}
+
+    def _infer_buffers(self, paths: List[Dict[str, Any]]) -> None:
+        """
+        未显式配置输入/输出缓冲区的工作站，按运输路径推断
+
+        唯一一条 缓冲区 -> 工作站 的路径视为输入缓冲区，
+        唯一一条 工作站 -> 缓冲区 的路径视为输出缓冲区。
+        """
+        inputs: Dict[str, List[str]] = {}
+        outputs: Dict[str, List[str]] = {}
+        for p in paths:
+            from_loc, to_loc = p["from_location"], p["to_location"]
+            if from_loc in self.buffers and to_loc in self.stations:
+                inputs.setdefault(to_loc, []).append(from_loc)
+            elif from_loc in self.stations and to_loc in self.buffers:
+                outputs.setdefault(from_loc, []).append(to_loc)
+
+        for station in self.stations.values():
+            if station.input_buffer_id not in self.buffers:
+                candidates = inputs.get(station.id, [])
+                station.input_buffer_id = candidates[0] if len(candidates) == 1 else None
+            if station.output_buffer_id not in self.buffers:
+                candidates = outputs.get(station.id, [])
+                station.output_buffer_id = candidates[0] if len(candidates) == 1 else None
+
+    def transport_time(self, from_loc: Optional[str], to_loc: str) -> float:
+        """两点间运输时间，未配置运输路径时视为直接交接"""
+        if from_loc is None:
+            return 0.0
+        return self.routing.transport_time(from_loc, to_loc) or 0.0
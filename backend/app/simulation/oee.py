@@ -0,0 +1,189 @@
+"""设备综合效率（OEE）- 工作站状态时间累加器，由状态时间、理论加工时间和质检结果计算OEE"""
+import math
+from typing import Any, Dict, List, Optional
+
+
+# 加工位状态
+PROCESSING = 0  # 加工中
+BLOCKED = 1     # 加工完成但无法移出（阻塞）
+STARVED = 2     # 空闲且没有预留的物料（缺料）
+IDLE = 3        # 已预留给在途物料，等待物料运达
+BREAKDOWN = 4   # 工作站故障（故障期间全部加工位计为故障）
+
+STATE_NAMES = ("processing", "blocked", "starved", "idle", "breakdown")
+
+# OEE报告中的指标
+OEE_METRICS = ("availability", "performance", "quality", "oee")
+
+
+class StateTimes:
+    """
+    工作站各状态的加工位时间累加器（单位：加工位·秒）
+
+    任一时刻每个加工位处于且只处于一种状态，各状态的加工位数由工作站的
+    busy/blocked/reserved/down 计数直接得出。工作站计数变化后调用 update：
+    按上次变化以来的计数累加时长，再记下新的计数，每次O(1)，
+    不需要事后由事件明细重建状态。同一时刻多次调用只累加一次。
+    缺料时间不单独累加，取计划时间减去其余各状态的时间。
+    """
+
+    __slots__ = ("capacity", "last_time", "start_time", "times", "busy", "blocked", "reserved", "down")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.last_time = 0.0
+        self.start_time = 0.0
+        # 加工中、阻塞、等待运达的加工位时间，故障的工作站时间
+        self.times = [0.0, 0.0, 0.0, 0.0]
+        self.busy = 0
+        self.blocked = 0
+        self.reserved = 0
+        self.down = False
+
+    def update(self, now: float, station) -> None:
+        elapsed = now - self.last_time
+        if elapsed > 0:
+            self.last_time = now
+            times = self.times
+            if self.down:
+                times[3] += elapsed
+            else:
+                times[0] += self.busy * elapsed
+                times[1] += self.blocked * elapsed
+                times[2] += self.reserved * elapsed
+        self.busy = station.busy
+        self.blocked = station.blocked
+        self.reserved = station.reserved
+        self.down = station.down
+
+    def reset(self, now: float) -> None:
+        """从当前时刻重新开始统计（预热结束时调用）"""
+        self.last_time = now
+        self.start_time = now
+        self.times = [0.0, 0.0, 0.0, 0.0]
+
+    def totals(self, now: float) -> List[float]:
+        """截至 now 的各状态累计时长，顺序同 STATE_NAMES"""
+        elapsed = now - self.last_time
+        processing, blocked, idle, down = self.times
+        if self.down:
+            down += elapsed
+        else:
+            processing += self.busy * elapsed
+            blocked += self.blocked * elapsed
+            idle += self.reserved * elapsed
+        breakdown = self.capacity * down
+        planned = self.capacity * (now - self.start_time)
+        starved = max(0.0, planned - processing - blocked - idle - breakdown)
+        return [processing, blocked, starved, idle, breakdown]
+
+
+def _ratio(numerator: float, denominator: float) -> Optional[float]:
+    return numerator / denominator if denominator > 0 else None
+
+
+def _oee(planned: float, breakdown: float, ideal_time: float, processed: int, rejected: int) -> Dict[str, Any]:
+    """
+    可用率 = (计划时间 - 故障时间) / 计划时间
+    性能率 = 理论加工时间 / 开动时间（计划时间 - 故障时间），缺料、阻塞、等待运输和慢于理论节拍都计为性能损失
+    质量率 = 一次通过质检的件数 / 加工件数
+    """
+    availability = _ratio(planned - breakdown, planned)
+    performance = _ratio(ideal_time, planned - breakdown)
+    quality = _ratio(processed - rejected, processed)
+    oee = (
+        availability * performance * quality
+        if availability is not None and performance is not None and quality is not None else None
+    )
+    return {
+        "availability": availability,
+        "performance": performance,
+        "quality": quality,
+        "oee": oee,
+    }
+
+
+def oee_report(stations: List[Any], now: float) -> Dict[str, Any]:
+    """
+    由各工作站的状态时间累加器、理论加工时间和质检结果计算OEE
+
+    计划时间为加工位数 × 统计时长（预热结束到当前时刻）；
+    产线级OEE对各工作站的时间和件数求和后计算。
+
+    Args:
+        stations: 仿真中的工作站（含 states、ideal_time、processed、rejected）
+        now: 当前仿真时刻
+
+    Returns:
+        {"workstations": {id: {...}}, "line": {...}}，各状态占计划时间的比例在 states 中
+    """
+    workstations = {}
+    line_times = [0.0] * len(STATE_NAMES)
+    line_planned = line_ideal = 0.0
+    line_processed = line_rejected = 0
+    for station in stations:
+        times = station.states.totals(now)
+        planned = station.capacity * (now - station.states.start_time)
+        workstations[station.id] = {
+            **_oee(planned, times[BREAKDOWN], station.ideal_time, station.processed, station.rejected),
+            "processed": station.processed,
+            "rejected": station.rejected,
+            "ideal_time": station.ideal_time,
+            "states": {name: _ratio(times[i], planned) for i, name in enumerate(STATE_NAMES)},
+        }
+        line_times = [a + b for a, b in zip(line_times, times)]
+        line_planned += planned
+        line_ideal += station.ideal_time
+        line_processed += station.processed
+        line_rejected += station.rejected
+    return {
+        "workstations": workstations,
+        "line": {
+            **_oee(line_planned, line_times[BREAKDOWN], line_ideal, line_processed, line_rejected),
+            "states": {name: _ratio(line_times[i], line_planned) for i, name in enumerate(STATE_NAMES)},
+        },
+    }
+
+
+def _describe(samples: List[float]) -> Dict[str, Optional[float]]:
+    """均值、样本标准差、最小值、最大值"""
+    if not samples:
+        return {"mean": None, "std": None, "min": None, "max": None}
+    mean = sum(samples) / len(samples)
+    std = (
+        math.sqrt(sum((x - mean) ** 2 for x in samples) / (len(samples) - 1))
+        if len(samples) > 1 else None
+    )
+    return {"mean": mean, "std": std, "min": min(samples), "max": max(samples)}
+
+
+def aggregate_oee(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    汇总多次重复仿真的OEE报告
+
+    Args:
+        reports: 各次仿真结果中的 oee 部分
+
+    Returns:
+        工作站和产线各指标的均值、标准差、最小值、最大值，以及各状态比例的均值
+    """
+    def summarize(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        summary = {
+            metric: _describe([e[metric] for e in entries if e[metric] is not None])
+            for metric in OEE_METRICS
+        }
+        summary["states"] = {
+            name: _describe([e["states"][name] for e in entries if e["states"][name] is not None])["mean"]
+            for name in STATE_NAMES
+        }
+        return summary
+
+    station_ids = list(reports[0]["workstations"]) if reports else []
+    return {
+        "replications": len(reports),
+        "workstations": {
+            ws_id: summarize([report["workstations"][ws_id] for report in reports])
+            for ws_id in station_ids
+        },
+        "line": summarize([report["line"] for report in reports]) if reports else None,
+    }
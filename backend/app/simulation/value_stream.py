@@ -0,0 +1,255 @@
+"""价值流核算 - 对仿真的加工明细和完工明细做NumPy分组聚合，统计增值、成本和增值时间比"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .model import LineModel
+
+
+# 加工明细：每次开始加工一行。列名 -> 类型码（array 与 NumPy 通用）
+OPERATION_COLUMNS = {
+    "part": "i",       # 物料槽位号，与投料时刻一起标识一件物料（槽位会复用）
+    "created": "d",    # 物料投料时刻
+    "start": "d",      # 开始加工时刻
+    "duration": "d",   # 加工时间（不含故障中断）
+    "routine": "i",    # 流转路径序号
+    "step": "i",       # 步骤序号
+    "station": "i",    # 工作站位置编码
+    "branch": "b",     # 是否为并行分支上的加工
+}
+
+# 完工明细：每件物料离开产线（完工或报废）一行
+EXIT_COLUMNS = {
+    "part": "i",
+    "created": "d",
+    "time": "d",       # 离开产线时刻
+    "routine": "i",
+    "scrapped": "b",
+}
+
+
+def _ratio(numerator: float, denominator: float) -> Optional[float]:
+    return float(numerator / denominator) if denominator > 0 else None
+
+
+def value_stream_accounting(
+    model: LineModel,
+    location_names: List[Optional[str]],
+    operations: Dict[str, np.ndarray],
+    exits: Dict[str, np.ndarray],
+    warmup: float = 0.0
+) -> Dict[str, Any]:
+    """
+    价值流核算
+
+    每次加工的增值：普通步骤标记了 value_added 且配置了 value_amount 时取步骤的增值额，
+    否则（以及并行分支上的加工）取该工作站价值增加点的增值之和；
+    同一物料再次执行同一步骤（返工）不增值。有增值的加工时间计为增值时间。
+    每次加工按工作站成本发生点的单位成本计成本。
+
+    成本按预热结束后开始的加工计入（已发生成本，含报废物料的加工）；
+    增值只计预热结束后完工的物料（已实现的增值），报废物料上的加工不产生增值。
+    增值时间比 = 完工物料的增值加工时间 / 完工物料的生产周期（投料到完工）。
+
+    所有统计都是对明细列的向量化分组求和（bincount）；加工行归属到物料时，
+    以 (槽位号, 投料时刻) 对加工行和完工行一起排序分组，不逐行循环。
+
+    Args:
+        model: 产线模型（含价值流配置和流转路径步骤）
+        location_names: 位置编码 -> 位置ID
+        operations: 加工明细各列，见 OPERATION_COLUMNS
+        exits: 完工明细各列，见 EXIT_COLUMNS
+        warmup: 预热时长
+
+    Returns:
+        汇总、按成本类型、按工作站、按流转路径、按物料类型的核算结果
+    """
+    value_stream = model.value_stream
+    codes = {name: code for code, name in enumerate(location_names) if name is not None}
+    n_codes = len(location_names)
+
+    # 工作站（按位置编码）的单件增值和各类型单位成本
+    station_value = np.zeros(n_codes)
+    for point in value_stream.get("value_points") or []:
+        code = codes.get(point.get("workstation_id"))
+        if code is not None:
+            station_value[code] += float(point.get("value_added") or 0.0)
+    cost_points = value_stream.get("cost_points") or []
+    cost_types = sorted({point.get("cost_type") or "other" for point in cost_points})
+    type_index = {name: i for i, name in enumerate(cost_types)}
+    station_cost = np.zeros((n_codes, len(cost_types)))
+    for point in cost_points:
+        code = codes.get(point.get("workstation_id"))
+        if code is not None:
+            station_cost[code, type_index[point.get("cost_type") or "other"]] += float(point.get("cost_per_unit") or 0.0)
+    unit_cost = station_cost.sum(axis=1)
+
+    # 步骤（按流转路径展平）的增值额和增值标记
+    routines = model.routines
+    offsets = np.cumsum([0] + [len(routine.steps) for routine in routines])
+    step_amount = np.array(
+        [step.value_amount if step.value_added else 0.0 for routine in routines for step in routine.steps],
+        dtype=np.float64
+    )
+    step_flag = np.array([step.value_added for routine in routines for step in routine.steps], dtype=bool)
+
+    # 加工行与完工行按 (槽位号, 投料时刻) 分组，得到每行所属的物料
+    n_ops = len(operations["part"])
+    part = np.concatenate([operations["part"], exits["part"]])
+    created = np.concatenate([operations["created"], exits["created"]])
+    n_parts = 0
+    group = np.empty(len(part), dtype=np.intp)
+    if len(part):
+        order = np.lexsort((created, part))
+        sorted_part, sorted_created = part[order], created[order]
+        first = np.empty(len(part), dtype=bool)
+        first[0] = True
+        np.not_equal(sorted_part[1:], sorted_part[:-1], out=first[1:])
+        first[1:] |= sorted_created[1:] != sorted_created[:-1]
+        group[order] = np.cumsum(first) - 1
+        n_parts = int(first.sum())
+    op_part, exit_part = group[:n_ops], group[n_ops:]
+
+    # 同一物料重复执行的步骤（质检不合格后的返工）不再增值，其加工时间计为非增值时间
+    op_station = operations["station"].astype(np.intp)
+    op_step = offsets[operations["routine"]] + operations["step"]
+    op_branch = operations["branch"].astype(bool)
+    rework = np.zeros(n_ops, dtype=bool)
+    if n_ops:
+        order = np.lexsort((op_station, op_step, op_part))  # 稳定排序，同组内保持时间顺序
+        key_part, key_step, key_station = op_part[order], op_step[order], op_station[order]
+        repeated = np.zeros(n_ops, dtype=bool)
+        repeated[1:] = (
+            (key_part[1:] == key_part[:-1]) & (key_step[1:] == key_step[:-1]) & (key_station[1:] == key_station[:-1])
+        )
+        rework[order] = repeated
+
+    # 逐次加工的增值、是否增值、成本
+    op_duration = operations["duration"]
+    own = ~op_branch & (step_amount[op_step] > 0)
+    op_value = np.where(own, step_amount[op_step], station_value[op_station])
+    op_value[rework] = 0.0
+    op_added = ((station_value[op_station] > 0) | (~op_branch & step_flag[op_step])) & ~rework
+    op_cost = unit_cost[op_station]
+    counted = operations["start"] >= warmup
+
+    exit_time = exits["time"]
+    exit_routine = exits["routine"].astype(np.intp)
+    scrapped = exits["scrapped"].astype(bool)
+    completed = ~scrapped & (exit_time >= warmup)
+
+    # 每件物料的增值、增值时间、成本
+    part_value = np.bincount(op_part, weights=op_value, minlength=n_parts)
+    part_added_time = np.bincount(op_part, weights=op_duration * op_added, minlength=n_parts)
+    part_cost = np.bincount(op_part, weights=op_cost, minlength=n_parts)
+    part_done = np.zeros(n_parts, dtype=bool)
+    part_done[exit_part[completed]] = True
+    part_scrapped = np.zeros(n_parts, dtype=bool)
+    part_scrapped[exit_part[scrapped]] = True
+
+    # 完工物料（每行一件）
+    done = exit_part[completed]
+    done_routine = exit_routine[completed]
+    done_value = part_value[done]
+    done_added_time = part_added_time[done]
+    done_cost = part_cost[done]
+    done_lead = exit_time[completed] - exits["created"][completed]
+
+    # 按流转路径
+    n_routines = len(routines)
+
+    def by_routine(weights: Optional[np.ndarray] = None) -> np.ndarray:
+        return np.bincount(done_routine, weights=weights, minlength=n_routines)
+
+    routine_count = by_routine()
+    routine_value = by_routine(done_value)
+    routine_unit_cost = by_routine(done_cost)
+    routine_added_time = by_routine(done_added_time)
+    routine_lead = by_routine(done_lead)
+    routine_incurred = np.bincount(
+        operations["routine"][counted].astype(np.intp), weights=op_cost[counted], minlength=n_routines
+    )
+
+    # 按物料类型（流转路径的 material_type）
+    types = list(dict.fromkeys(routine.material_type for routine in routines))
+    routine_type = np.array([types.index(routine.material_type) for routine in routines], dtype=np.intp)
+
+    def by_type(values: np.ndarray) -> np.ndarray:
+        return np.bincount(routine_type, weights=values, minlength=len(types))
+
+    def summary(count, value, unit_cost_sum, added_time, lead, incurred) -> Dict[str, Any]:
+        return {
+            "completed": int(count),
+            "value_added": float(value),
+            "cost": float(incurred),
+            "value_per_unit": _ratio(value, count),
+            "cost_per_unit": _ratio(unit_cost_sum, count),
+            "va_time": float(added_time),
+            "lead_time": float(lead),
+            "va_ratio": _ratio(added_time, lead),
+        }
+
+    # 按工作站
+    station_ops = np.bincount(op_station[counted], minlength=n_codes)
+    station_time = np.bincount(op_station[counted], weights=op_duration[counted], minlength=n_codes)
+    station_added_time = np.bincount(
+        op_station[counted], weights=(op_duration * op_added)[counted], minlength=n_codes
+    )
+    station_realized = np.bincount(op_station, weights=op_value * part_done[op_part], minlength=n_codes)
+    station_costs = station_ops[:, None] * station_cost
+
+    # 完工物料的增值时间比分布
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = done_added_time / done_lead
+    ratios = ratios[np.isfinite(ratios)]
+    percentiles = np.percentile(ratios, [50, 90]) if len(ratios) else [None, None]
+
+    total_lead = float(done_lead.sum())
+    total_added_time = float(done_added_time.sum())
+    return {
+        "totals": {
+            "completed": int(completed.sum()),
+            "scrapped": int((scrapped & (exit_time >= warmup)).sum()),
+            "value_added": float(done_value.sum()),
+            "cost": float(op_cost[counted].sum()),
+            "scrap_cost": float(op_cost[counted & part_scrapped[op_part]].sum()),
+            "rework_operations": int((counted & rework).sum()),
+            "rework_cost": float(op_cost[counted & rework].sum()),
+            "va_time": total_added_time,
+            "nva_time": total_lead - total_added_time,
+            "lead_time": total_lead,
+            "va_ratio": _ratio(total_added_time, total_lead),
+            "va_ratio_p50": None if percentiles[0] is None else float(percentiles[0]),
+            "va_ratio_p90": None if percentiles[1] is None else float(percentiles[1]),
+        },
+        "cost_by_type": {name: float(station_costs[:, i].sum()) for i, name in enumerate(cost_types)},
+        "workstations": {
+            ws_id: {
+                "operations": int(station_ops[codes[ws_id]]),
+                "processing_time": float(station_time[codes[ws_id]]),
+                "va_time": float(station_added_time[codes[ws_id]]),
+                "value_added": float(station_realized[codes[ws_id]]),
+                "cost": float(station_costs[codes[ws_id]].sum()),
+                "cost_by_type": {
+                    name: float(station_costs[codes[ws_id], i]) for i, name in enumerate(cost_types)
+                },
+            }
+            for ws_id in model.stations
+        },
+        "routines": {
+            routine.id: {
+                "material_type": routine.material_type,
+                **summary(
+                    routine_count[r], routine_value[r], routine_unit_cost[r],
+                    routine_added_time[r], routine_lead[r], routine_incurred[r]
+                ),
+            }
+            for r, routine in enumerate(routines)
+        },
+        "materials": {
+            str(material_type): summary(*(by_type(values)[t] for values in (
+                routine_count, routine_value, routine_unit_cost, routine_added_time, routine_lead, routine_incurred
+            )))
+            for t, material_type in enumerate(types)
+        },
+    }
@@ -0,0 +1,65 @@
+"""产线指纹 - 规范化配置的稳定哈希"""
+import hashlib
+import json
+from typing import Any, Dict
+
+
+# 不影响仿真结果的字段：画布坐标及产线本身的名称/描述
+_IGNORED_KEYS = frozenset({"position"})
+_IGNORED_LINE_KEYS = frozenset({"id", "name", "description"})
+
+# 按ID排序的实体列表，数据库返回顺序不同不影响指纹
+_SORTED_LISTS = frozenset({"workstations", "buffers", "transport_paths", "routines"})
+
+
+def _normalize(value: Any, key: str = "") -> Any:
+    if isinstance(value, dict):
+        return {
+            k: _normalize(v, k)
+            for k, v in value.items()
+            if k not in _IGNORED_KEYS
+        }
+    if isinstance(value, list):
+        items = [_normalize(v) for v in value]
+        if key in _SORTED_LISTS:
+            items.sort(key=lambda item: str(item.get("id")) if isinstance(item, dict) else str(item))
+        return items
+    # 10 与 10.0 视为相同
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def canonical_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    规范化配置：去掉画布坐标等布局字段、实体按ID排序、整数值浮点数转为整数
+
+    Args:
+        config: ConfigService.build_config 格式的配置字典
+
+    Returns:
+        规范化后的配置
+    """
+    normalized = _normalize(config)
+    line = normalized.get("production_line")
+    if isinstance(line, dict):
+        normalized["production_line"] = {k: v for k, v in line.items() if k not in _IGNORED_LINE_KEYS}
+    value_stream = normalized.get("value_stream")
+    if isinstance(value_stream, dict):
+        normalized["value_stream"] = {k: v for k, v in value_stream.items() if k != "id"}
+    return normalized
+
+
+def canonical_json(data: Any) -> str:
+    """键排序、无多余空白的JSON文本"""
+    return json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def line_fingerprint(config: Dict[str, Any]) -> str:
+    """
+    产线指纹
+
+    仅布局（画布坐标）或产线名称不同的两份配置指纹相同，
+    仿真相关的任何字段变化都会改变指纹。
+    """
+    return hashlib.sha256(canonical_json(canonical_config(config)).encode("utf-8")).hexdigest()
@@ -0,0 +1,118 @@
+"""运输路由表 - 产线内任意两点间的最短运输时间和下一跳"""
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class RoutingTable:
+    """
+    产线运输路由表
+
+    对每个起点运行一次Dijkstra，得到全源最短运输时间表和下一跳表。
+    查询均为字典直接索引，复杂度O(1)。
+    """
+
+    __slots__ = ("version", "locations", "_dist", "_next")
+
+    def __init__(
+        self,
+        locations: List[str],
+        dist: Dict[str, Dict[str, float]],
+        next_hop: Dict[str, Dict[str, str]],
+        version: int = 0
+    ):
+        self.version = version
+        self.locations = locations
+        self._dist = dist
+        self._next = next_hop
+
+    @classmethod
+    def build(
+        cls,
+        edges: Iterable[Tuple[str, str, float]],
+        version: int = 0
+    ) -> "RoutingTable":
+        """
+        根据有向运输路径构建路由表
+
+        Args:
+            edges: (from_location, to_location, transport_time) 序列
+            version: 构建时的产线版本号
+
+        Returns:
+            路由表
+        """
+        # 构建邻接表，重复路径取最短运输时间
+        graph: Dict[str, Dict[str, float]] = {}
+        for from_loc, to_loc, transport_time in edges:
+            if transport_time is None or transport_time < 0:
+                raise ValueError(f"运输路径 {from_loc} -> {to_loc} 的 transport_time 无效: {transport_time}")
+            graph.setdefault(to_loc, {})
+            neighbors = graph.setdefault(from_loc, {})
+            if to_loc not in neighbors or transport_time < neighbors[to_loc]:
+                neighbors[to_loc] = transport_time
+
+        dist: Dict[str, Dict[str, float]] = {}
+        next_hop: Dict[str, Dict[str, str]] = {}
+        for source in graph:
+            dist[source], next_hop[source] = cls._dijkstra(graph, source)
+
+        return cls(sorted(graph), dist, next_hop, version)
+
+    @staticmethod
+    def _dijkstra(
+        graph: Dict[str, Dict[str, float]],
+        source: str
+    ) -> Tuple[Dict[str, float], Dict[str, str]]:
+        """单源最短路径，同时记录从起点出发的第一跳"""
+        dist = {source: 0.0}
+        first_hop: Dict[str, str] = {}
+        heap = [(0.0, source, None)]
+        done = set()
+
+        while heap:
+            d, node, hop = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            if hop is not None:
+                first_hop[node] = hop
+            for neighbor, weight in graph[node].items():
+                if neighbor in done:
+                    continue
+                nd = d + weight
+                if neighbor not in dist or nd < dist[neighbor]:
+                    dist[neighbor] = nd
+                    # 从起点直接出发的边，第一跳就是邻居本身
+                    heapq.heappush(heap, (nd, neighbor, neighbor if hop is None else hop))
+
+        return dist, first_hop
+
+    def transport_time(self, from_loc: str, to_loc: str) -> Optional[float]:
+        """最短运输时间，不可达时返回None"""
+        if from_loc == to_loc:
+            return 0.0
+        row = self._dist.get(from_loc)
+        return row.get(to_loc) if row else None
+
+    def next_hop(self, from_loc: str, to_loc: str) -> Optional[str]:
+        """从起点前往终点的下一个位置，不可达时返回None"""
+        row = self._next.get(from_loc)
+        return row.get(to_loc) if row else None
+
+    def path(self, from_loc: str, to_loc: str) -> List[str]:
+        """完整的最短路径（含起点和终点），不可达时返回空列表"""
+        if self.transport_time(from_loc, to_loc) is None:
+            return []
+        path = [from_loc]
+        while path[-1] != to_loc:
+            path.append(self._next[path[-1]][to_loc])
+        return path
+
+    def to_dict(self) -> Dict:
+        """转换为可序列化的字典"""
+        return {
+            "version": self.version,
+            "locations": self.locations,
+            "transport_time": self._dist,
+            "next_hop": self._next
+        }
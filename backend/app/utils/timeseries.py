@@ -0,0 +1,129 @@
+"""时间序列工具 - LTTB降采样与紧凑二进制编码"""
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Sequence, Tuple
+
+
+# 写入时生成的降采样分辨率（点数），从细到粗；第0级为原始采样
+SERIES_LEVELS = (20000, 4000, 800)
+
+_HEADER = struct.Struct("<I")
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> Tuple[List[float], List[float]]:
+    """
+    LTTB（Largest-Triangle-Three-Buckets）降采样
+
+    保留首尾两点，其余点等分为 threshold - 2 个桶，每个桶中选出与
+    上一个选中点、下一个桶平均点构成的三角形面积最大的点，
+    能在少量点内保留库存曲线的峰谷形状。
+
+    Args:
+        xs: 横坐标（单调不减）
+        ys: 纵坐标
+        threshold: 目标点数
+
+    Returns:
+        降采样后的 (xs, ys)
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(xs), list(ys)
+
+    out_x = [xs[0]]
+    out_y = [ys[0]]
+    bucket = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket) + 1
+        end = int((i + 1) * bucket) + 1
+
+        # 下一个桶的平均点
+        next_start = end
+        next_end = min(int((i + 2) * bucket) + 1, n)
+        count = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / count
+        avg_y = sum(ys[next_start:next_end]) / count
+
+        ax = xs[a]
+        ay = ys[a]
+        best = start
+        best_area = -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+        out_x.append(xs[best])
+        out_y.append(ys[best])
+        a = best
+
+    out_x.append(xs[-1])
+    out_y.append(ys[-1])
+    return out_x, out_y
+
+
+def encode_series(xs: Sequence[float], ys: Sequence[float]) -> bytes:
+    """
+    编码为压缩二进制：点数 + 时间（float64）+ 数值（float32），小端序后zlib压缩
+
+    数值为库存、利用率等，float32精度足够；时间保留float64，长周期仿真中仍精确到秒以下。
+    """
+    times = array("d", xs)
+    values = array("f", ys)
+    if sys.byteorder != "little":
+        times.byteswap()
+        values.byteswap()
+    return zlib.compress(_HEADER.pack(len(times)) + times.tobytes() + values.tobytes())
+
+
+def decode_series(data: bytes) -> Tuple[array, array]:
+    """解码 encode_series 的结果，返回 (时间, 数值) 数组"""
+    raw = zlib.decompress(data)
+    (n,) = _HEADER.unpack_from(raw)
+    offset = _HEADER.size
+    times = array("d")
+    times.frombytes(raw[offset:offset + 8 * n])
+    values = array("f")
+    values.frombytes(raw[offset + 8 * n:offset + 12 * n])
+    if sys.byteorder != "little":
+        times.byteswap()
+        values.byteswap()
+    return times, values
+
+
+def build_levels(
+    xs: Sequence[float],
+    ys: Sequence[float],
+    levels: Sequence[int] = SERIES_LEVELS
+) -> List[Tuple[int, List[float], List[float]]]:
+    """
+    生成多分辨率序列
+
+    Returns:
+        [(分辨率级别, xs, ys), ...]；第0级为原始序列，只生成比上一级更少点的级别
+    """
+    result = [(0, list(xs), list(ys))]
+    for size in levels:
+        prev_x, prev_y = result[-1][1], result[-1][2]
+        if size >= len(prev_x):
+            continue
+        # 从上一级继续降采样，避免每级都扫描原始序列
+        down_x, down_y = lttb(prev_x, prev_y, size)
+        result.append((len(result), down_x, down_y))
+    return result
+
+
+def slice_window(
+    xs: Sequence[float],
+    ys: Sequence[float],
+    start: Optional[float] = None,
+    end: Optional[float] = None
+) -> Tuple[Sequence[float], Sequence[float]]:
+    """截取 [start, end] 时间窗口内的点"""
+    lo = bisect_left(xs, start) if start is not None else 0
+    hi = bisect_right(xs, end) if end is not None else len(xs)
+    return xs[lo:hi], ys[lo:hi]
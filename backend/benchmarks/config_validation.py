@@ -0,0 +1,136 @@
+"""
+配置验证基准测试
+
+在 backend 目录下运行:
+    python -m benchmarks.config_validation
+    python -m benchmarks.config_validation --workstations 25000 --sinks 2000 --json result.json
+
+按 benchmarks.plant_generator 生成合成产线配置，对比上传配置的两种验证方式:
+    compiled     ConfigValidator.validate（/api/config/validate）：预编译的pydantic-core验证器，单次遍历
+    legacy       ValidationService.validate_config：逐个元素检查少数几个键，不检查类型
+测试两种配置（取 --repeat 次中最短耗时）:
+    outgoing     每个单元的成品缓冲区另有一条回到投料缓冲区的运输路径，每个位置都有运出的路径
+    sinks        在 outgoing 的基础上增加 --sinks 个只有运入路径的缓冲区（legacy 的连通性检查对这类位置逐个扫描全部位置）
+最后把一个工作站的 capacity 改为非数值，给出两者对错误配置的处理结果。
+"""
+import argparse
+import copy
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.services import ConfigValidator, ValidationService, type_cache
+from benchmarks.plant_generator import generate_plant, plant_size
+
+
+VALIDATORS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "compiled": ConfigValidator.validate,
+    "legacy": ValidationService.validate_config,
+}
+
+
+def best_of(func: Callable[[], Any], repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def outgoing_config(workstations: int) -> Dict[str, Any]:
+    """合成产线，成品缓冲区增加回到投料缓冲区的路径"""
+    config = generate_plant(workstations)
+    line = config["production_line"]
+    paths = line["transport_paths"]
+    for routine in config["routines"]:
+        paths.append({
+            "id": f"{routine['id']}_return",
+            "from_location": routine["end_location"],
+            "to_location": routine["start_location"],
+            "transport_time": 1.0,
+        })
+    return config
+
+
+def with_sinks(config: Dict[str, Any], sinks: int) -> Dict[str, Any]:
+    """增加只有运入路径的缓冲区"""
+    config = copy.deepcopy(config)
+    line = config["production_line"]
+    source = line["workstations"][0]["id"]
+    for i in range(sinks):
+        buf_id = f"sink_{i:06d}"
+        line["buffers"].append({"id": buf_id, "name": buf_id, "capacity": 10, "location": "sink"})
+        line["transport_paths"].append({
+            "id": f"sink_path_{i:06d}", "from_location": source, "to_location": buf_id, "transport_time": 1.0,
+        })
+    return config
+
+
+def elements(config: Dict[str, Any]) -> int:
+    size = plant_size(config)
+    return size["workstations"] + size["buffers"] + size["transport_paths"] + size["routines"] + size["steps"]
+
+
+def bad_capacity(config: Dict[str, Any]) -> Dict[str, str]:
+    """一个工作站的 capacity 为非数值时两种验证方式的结果"""
+    config = copy.deepcopy(config)
+    config["production_line"]["workstations"][5]["capacity"] = "abc"
+    outcome = {}
+    for name, validate in VALIDATORS.items():
+        try:
+            report = validate(config)
+        except Exception as e:  # noqa: BLE001 - 记录未捕获的异常
+            outcome[name] = f"{type(e).__name__}: {e}"
+            continue
+        error = report["errors"][0] if report["errors"] else None
+        if isinstance(error, dict):
+            error = f"{error['code']} {error['pointer']}"
+        outcome[name] = f"valid={report['valid']}，{error}"
+    return outcome
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="配置验证基准测试")
+    parser.add_argument("--workstations", type=int, default=25000, help="工作站数")
+    parser.add_argument("--sinks", type=int, default=2000, help="sinks 配置中增加的只有运入路径的缓冲区数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短耗时")
+    parser.add_argument("--json", help="结果另存为JSON文件")
+    args = parser.parse_args(argv)
+
+    # 类型表取自空的内存数据库（只有内置类型），不读取 plant_simulator.db
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        type_cache.load(db)
+
+    base = outgoing_config(args.workstations)
+    configs = {"outgoing": base, "sinks": with_sinks(base, args.sinks)}
+    results: Dict[str, Any] = {"workstations": args.workstations, "sinks": args.sinks, "configs": {}}
+    print(f"  {'配置':<10}{'元素数':>10}{'compiled':>12}{'legacy':>12}  (ms)")
+    for name, config in configs.items():
+        for validator, validate in VALIDATORS.items():
+            report = validate(config)
+            assert report["valid"], (validator, report["errors"][:5])
+        entry = {"elements": elements(config)}
+        entry.update({validator: best_of(lambda: validate(config), args.repeat) for validator, validate in VALIDATORS.items()})
+        results["configs"][name] = entry
+        print(f"  {name:<10}{entry['elements']:>10}{entry['compiled'] * 1000:>12.0f}{entry['legacy'] * 1000:>12.0f}")
+
+    results["bad_capacity"] = bad_capacity(base)
+    for validator, outcome in results["bad_capacity"].items():
+        print(f"  capacity 为非数值时 {validator}: {outcome}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
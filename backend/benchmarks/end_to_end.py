@@ -0,0 +1,211 @@
+"""
+端到端基准测试
+
+在 backend 目录下运行:
+    python -m benchmarks.end_to_end
+    python -m benchmarks.end_to_end --sizes 10 1000 --json results/HEAD.json
+    python -m benchmarks.end_to_end --sizes 10 1000 --json new.json --compare old.json
+
+按 benchmarks.plant_generator 生成各规模（工作站数）的合成产线，依次计时:
+    validate_config   ConfigValidator.validate（/api/config/validate）验证配置字典
+    import            ConfigService.import_config 导入数据库
+    validate_line     ValidationService.validate_production_line 验证数据库中的产线
+    export_json       ConfigService.export_config 导出JSON
+    export_yaml       ConfigService.export_config 导出YAML
+    list_*            通过HTTP调用各列表接口（按产线过滤），取 --repeat 次中的最短耗时，并记录SQL语句数
+    model             由导出的配置构建仿真用的产线模型（含运输路由表）
+    simulate          完整运行一次仿真
+
+每个规模使用临时目录下独立的SQLite数据库，不影响 plant_simulator.db。
+结果以JSON保存（含提交号和运行环境），--compare 与之前保存的结果逐项对比耗时。
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, get_db
+from app.main import app
+from app.models.simulation import SimulationParams
+from app.services import ConfigService, ConfigValidator, ValidationService, request_metrics, type_cache
+from app.simulation import LineModel, Simulation
+from benchmarks.plant_generator import generate_plant, plant_size
+
+
+# 列表接口（按产线过滤），产线列表不过滤
+LIST_ENDPOINTS = {
+    "list_production_lines": ("/api/production-lines/", False),
+    "list_workstations": ("/api/workstations/", True),
+    "list_buffers": ("/api/buffers/", True),
+    "list_transport_paths": ("/api/transport-paths/", True),
+    "list_routines": ("/api/routines/", True),
+}
+
+
+def timed(func: Callable[[], Any]) -> Tuple[float, Any]:
+    start = time.perf_counter()
+    value = func()
+    return time.perf_counter() - start, value
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_size(
+    workstations: int,
+    cell_size: int,
+    duration: float,
+    repeat: int,
+    directory: str
+) -> Dict[str, Any]:
+    """一个规模的全部测试，返回 {规模, 实体数, stages: {测试名: {seconds, ...}}}"""
+    engine = create_engine(
+        f"sqlite:///{os.path.join(directory, f'bench_{workstations}.db')}",
+        connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_db
+    client = TestClient(app)
+    stages: Dict[str, Dict[str, Any]] = {}
+
+    seconds, config = timed(lambda: generate_plant(workstations, cell_size))
+    stages["generate"] = {"seconds": seconds}
+    db = Session()
+    try:
+        type_cache.load(db)
+
+        seconds, report = timed(lambda: ConfigValidator.validate(config))
+        assert report["valid"], report["errors"][:5]
+        stages["validate_config"] = {"seconds": seconds}
+
+        seconds, imported = timed(lambda: ConfigService.import_config(db, config))
+        assert imported["success"], imported.get("error")
+        line_id = imported["production_line_id"]
+        stages["import"] = {"seconds": seconds}
+
+        seconds, report = timed(lambda: ValidationService.validate_production_line(db, line_id))
+        assert report["valid"], report["errors"][:5]
+        stages["validate_line"] = {"seconds": seconds}
+
+        for fmt in ("json", "yaml"):
+            seconds, text = timed(lambda: ConfigService.export_config(db, line_id, fmt))
+            stages[f"export_{fmt}"] = {"seconds": seconds, "bytes": len(text.encode("utf-8"))}
+        exported = ConfigService.build_config(db, line_id)
+    finally:
+        db.close()
+
+    client.get("/health")
+    for name, (path, by_line) in LIST_ENDPOINTS.items():
+        params = {"production_line_id": line_id} if by_line else None
+        best = None
+        request_metrics.reset()
+        for _ in range(repeat):
+            seconds, response = timed(lambda: client.get(path, params=params))
+            assert response.status_code == 200, response.text[:200]
+            best = seconds if best is None else min(best, seconds)
+        route = next(iter(request_metrics.summary()["routes"].values()), None)
+        stages[name] = {
+            "seconds": best,
+            "bytes": len(response.content),
+            "queries": route["max_queries"] if route else None,
+        }
+
+    seconds, model = timed(lambda: LineModel(exported))
+    stages["model"] = {"seconds": seconds}
+    simulation = Simulation(model, SimulationParams(duration=duration), 0)
+    seconds, _ = timed(simulation.run)
+    stages["simulate"] = {
+        "seconds": seconds,
+        "duration": duration,
+        "events": simulation._seq,
+        "events_per_second": simulation._seq / seconds if seconds > 0 else None,
+        "completed": simulation.completed,
+    }
+
+    app.dependency_overrides.pop(get_db, None)
+    engine.dispose()
+    return {"workstations": workstations, "size": plant_size(config), "stages": stages}
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str) -> None:
+    """逐项打印与之前结果的耗时比值（>1 为变慢）"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    old = {entry["workstations"]: entry["stages"] for entry in baseline["results"]}
+    print(f"\n与 {baseline_path}（提交 {baseline['meta'].get('commit')}）对比，新/旧耗时:")
+    for entry in results:
+        previous = old.get(entry["workstations"])
+        if previous is None:
+            continue
+        print(f"  {entry['workstations']} 个工作站")
+        for name, stage in entry["stages"].items():
+            if name in previous and previous[name]["seconds"]:
+                ratio = stage["seconds"] / previous[name]["seconds"]
+                print(f"    {name:<24}{previous[name]['seconds']:>10.3f}s ->{stage['seconds']:>10.3f}s{ratio:>8.2f}x")
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="端到端基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000], help="工作站数")
+    parser.add_argument("--cell-size", type=int, default=10, help="每条流转路径的工作站数")
+    parser.add_argument("--duration", type=float, default=600, help="仿真时长（秒）")
+    parser.add_argument("--repeat", type=int, default=3, help="列表接口的重复调用次数")
+    parser.add_argument("--json", help="结果另存为JSON文件")
+    parser.add_argument("--compare", help="与之前保存的JSON结果对比")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for workstations in args.sizes:
+            entry = run_size(workstations, args.cell_size, args.duration, args.repeat, directory)
+            results.append(entry)
+            print(f"\n{workstations} 个工作站: " + ", ".join(f"{k} {v}" for k, v in entry["size"].items()))
+            for name, stage in entry["stages"].items():
+                extra = ", ".join(f"{k} {v:.0f}" if isinstance(v, float) else f"{k} {v}"
+                                  for k, v in stage.items() if k != "seconds" and v is not None)
+                print(f"  {name:<24}{stage['seconds']:>10.3f}s  {extra}")
+
+    output = {
+        "meta": {
+            "commit": git_commit(),
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
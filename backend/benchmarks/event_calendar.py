@@ -0,0 +1,187 @@
+"""
+事件日历基准测试
+
+在 backend 目录下运行:
+    python -m benchmarks.event_calendar
+    python -m benchmarks.event_calendar --sizes 1000 100000 --ops 200000 --json result.json
+
+包含三组测试:
+    hold     经典hold模型：日历中保持 N 个事件，反复取出最早事件并按给定分布加入新事件
+    trace    回放真实产线仿真记录的入队/出队序列，只计日历本身的开销
+    line     在放大的示例产线上完整运行仿真，对比各实现的总耗时
+"""
+import argparse
+import copy
+import json
+import math
+import random
+import time
+from array import array
+from typing import Any, Callable, Dict, List
+
+from app.models.simulation import SimulationParams
+from app.simulation import CALENDARS, LineModel, Simulation
+from app.simulation.calendar import HeapCalendar
+
+
+DEFAULT_CONFIG = "config/default_config.json"
+
+# hold模型的时间增量分布（Rönngren & Ayani 的常用组合）
+DISTRIBUTIONS: Dict[str, Callable[[random.Random], float]] = {
+    "exponential": lambda rng: rng.expovariate(1.0),
+    "uniform": lambda rng: rng.uniform(0.0, 2.0),
+    "bimodal": lambda rng: rng.uniform(0.0, 0.1) if rng.random() < 0.9 else rng.uniform(9.0, 10.0),
+    "triangular": lambda rng: rng.triangular(0.0, 1.5, 1.5),
+}
+
+
+def hold(calendar_cls, size: int, ops: int, dist: Callable[[random.Random], float], seed: int = 0) -> float:
+    """hold模型，返回每次hold（一次出队+一次入队）的平均耗时（纳秒）"""
+    rng = random.Random(seed)
+    calendar = calendar_cls()
+    push = calendar.push
+    pop = calendar.pop_until
+    seq = 0
+    for _ in range(size):
+        seq += 1
+        push((dist(rng), 0, seq, None, None))
+    # 预先生成增量，计时只包含日历操作
+    deltas = array("d", (dist(rng) for _ in range(ops)))
+    inf = math.inf
+
+    start = time.perf_counter()
+    for delta in deltas:
+        event = pop(inf)
+        seq += 1
+        push((event[0] + delta, 0, seq, None, None))
+    return (time.perf_counter() - start) / ops * 1e9
+
+
+class RecordingCalendar(HeapCalendar):
+    """记录入队时刻与出队操作的日历，用于生成回放序列"""
+
+    def __init__(self):
+        super().__init__()
+        self.trace = array("d")  # 入队为事件时刻（>=0），出队为 -1
+        heap_push = self.push
+
+        def push(event):
+            self.trace.append(event[0])
+            heap_push(event)
+
+        self.push = push
+
+    def pop_until(self, end):
+        event = super().pop_until(end)
+        if event is not None:
+            self.trace.append(-1.0)
+        return event
+
+
+def scaled_config(path: str, scale: int) -> Dict[str, Any]:
+    """把示例产线的工作站和缓冲区容量放大 scale 倍，使同时在途的事件数随之增加"""
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    config = copy.deepcopy(config)
+    line = config["production_line"]
+    for ws in line["workstations"]:
+        ws["capacity"] = int(ws.get("capacity") or 1) * scale
+    for buf in line["buffers"]:
+        buf["capacity"] = int(buf["capacity"]) * scale
+    return config
+
+
+def record_trace(config: Dict[str, Any], duration: float) -> array:
+    """运行一次仿真并记录事件日历操作序列"""
+    recorder = RecordingCalendar()
+    simulation = Simulation(LineModel(config), SimulationParams(duration=duration), 0, calendar=recorder)
+    simulation.run()
+    return recorder.trace
+
+
+def replay(calendar_cls, trace: array) -> float:
+    """回放操作序列，返回每次操作的平均耗时（纳秒）"""
+    calendar = calendar_cls()
+    push = calendar.push
+    pop = calendar.pop_until
+    inf = math.inf
+    seq = 0
+    start = time.perf_counter()
+    for value in trace:
+        if value < 0:
+            pop(inf)
+        else:
+            seq += 1
+            push((value, 0, seq, None, None))
+    return (time.perf_counter() - start) / len(trace) * 1e9
+
+
+def run_line(config: Dict[str, Any], duration: float, calendar: str) -> Dict[str, float]:
+    """完整运行一次仿真，返回耗时和峰值待处理事件数"""
+    model = LineModel(config)
+    simulation = Simulation(model, SimulationParams(duration=duration, calendar=calendar), 0)
+    peak = 0
+    step = duration / 20
+    start = time.perf_counter()
+    t = 0.0
+    while t < duration:
+        t = min(duration, t + step)
+        simulation.run(t)
+        peak = max(peak, len(simulation._calendar))
+    elapsed = time.perf_counter() - start
+    return {"seconds": elapsed, "pending": peak, "throughput": simulation.result()["kpis"]["throughput"]}
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="事件日历基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000, 300000],
+                        help="hold模型的日历规模（待处理事件数）")
+    parser.add_argument("--ops", type=int, default=200000, help="每组hold测试的操作次数")
+    parser.add_argument("--dists", nargs="+", default=list(DISTRIBUTIONS), choices=list(DISTRIBUTIONS))
+    parser.add_argument("--config", default=DEFAULT_CONFIG, help="产线配置文件")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 100, 1000, 10000],
+                        help="产线容量放大倍数")
+    parser.add_argument("--duration", type=float, default=3600, help="产线测试的仿真时长（秒）")
+    parser.add_argument("--skip", nargs="*", default=[], choices=["hold", "trace", "line"])
+    parser.add_argument("--json", help="结果另存为JSON文件")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, list] = {"hold": [], "trace": [], "line": []}
+    names = list(CALENDARS)
+
+    if "hold" not in args.skip:
+        print(f"\n[hold] 每次hold耗时（ns），{args.ops} 次操作")
+        print(f"{'分布':<12}{'规模':>10}" + "".join(f"{name:>16}" for name in names))
+        for dist in args.dists:
+            for size in args.sizes:
+                row = {name: hold(cls, size, args.ops, DISTRIBUTIONS[dist]) for name, cls in CALENDARS.items()}
+                results["hold"].append({"distribution": dist, "size": size, **row})
+                print(f"{dist:<12}{size:>10}" + "".join(f"{row[name]:>16.0f}" for name in names))
+
+    configs = {scale: scaled_config(args.config, scale) for scale in args.scales}
+
+    if "trace" not in args.skip:
+        print(f"\n[trace] 回放产线事件序列，每次操作耗时（ns）")
+        print(f"{'放大倍数':<10}{'操作数':>12}" + "".join(f"{name:>16}" for name in names))
+        for scale, config in configs.items():
+            trace = record_trace(config, args.duration)
+            row = {name: replay(cls, trace) for name, cls in CALENDARS.items()}
+            results["trace"].append({"scale": scale, "ops": len(trace), **row})
+            print(f"{scale:<10}{len(trace):>12}" + "".join(f"{row[name]:>16.0f}" for name in names))
+
+    if "line" not in args.skip:
+        print(f"\n[line] 完整仿真耗时（s），仿真时长 {args.duration:.0f}s")
+        print(f"{'放大倍数':<10}{'峰值事件数':>12}" + "".join(f"{name:>16}" for name in names))
+        for scale, config in configs.items():
+            row = {name: run_line(config, args.duration, name) for name in names}
+            pending = max(r["pending"] for r in row.values())
+            results["line"].append({"scale": scale, "pending": pending, **{k: v["seconds"] for k, v in row.items()}})
+            print(f"{scale:<10}{pending:>12}" + "".join(f"{row[name]['seconds']:>16.3f}" for name in names))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
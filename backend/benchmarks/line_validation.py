@@ -0,0 +1,181 @@
+"""
+产线验证基准测试
+
+在 backend 目录下运行:
+    python -m benchmarks.line_validation
+    python -m benchmarks.line_validation --entities 500 --shapes 20x1000 200x100 2000x25 --json result.json
+
+在临时的SQLite文件数据库中构造一条产线：工作站、缓冲区、运输路径各 --entities 个，
+流转路径数 x 每条的步骤数由 --shapes 给出，对比 ValidationService.validate_production_line 的两种实现:
+    load_rows    原实现：读出全部工作站、缓冲区、运输路径和流转路径，逐条流转路径延迟加载步骤后在Python中检查引用
+    anti_join    现实现：每项引用检查一条 LEFT JOIN ... IS NULL 查询，查询次数与产线规模无关
+记录各自的耗时（--repeat 次中最短）和SQL语句数，两者的验证结果必须相同。
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import Base
+from app.database.schemas import (
+    BufferDB, ProductionLineDB, RoutineDB, RoutineStepDB, TransportPathDB, WorkstationDB
+)
+from app.services import ValidationService
+
+
+LINE_ID = "line_bench"
+
+
+def load_rows(db: Session, line_id: str) -> Dict[str, Any]:
+    """原先的 validate_production_line：按实体读出全部行，逐条流转路径加载步骤"""
+    workstations = db.query(WorkstationDB).filter(WorkstationDB.production_line_id == line_id).all()
+    buffers = db.query(BufferDB).filter(BufferDB.production_line_id == line_id).all()
+    transport_paths = db.query(TransportPathDB).filter(TransportPathDB.production_line_id == line_id).all()
+    routines = db.query(RoutineDB).filter(RoutineDB.production_line_id == line_id).all()
+
+    errors = []
+    ws_ids = {ws.id for ws in workstations}
+    buf_ids = {buf.id for buf in buffers}
+    all_ids = ws_ids | buf_ids
+    for ws in workstations:
+        if ws.input_buffer_id and ws.input_buffer_id not in buf_ids:
+            errors.append(f"工作站 '{ws.name}' 的 input_buffer_id 引用不存在")
+        if ws.output_buffer_id and ws.output_buffer_id not in buf_ids:
+            errors.append(f"工作站 '{ws.name}' 的 output_buffer_id 引用不存在")
+    for path in transport_paths:
+        if path.from_location not in all_ids:
+            errors.append(f"运输路径 from_location '{path.from_location}' 引用不存在")
+        if path.to_location not in all_ids:
+            errors.append(f"运输路径 to_location '{path.to_location}' 引用不存在")
+    for routine in routines:
+        # 现实现不再把空的起止位置视为悬空引用，这里同样跳过，两者结果可比
+        if routine.start_location and routine.start_location not in all_ids:
+            errors.append(f"Routine '{routine.name}' 的 start_location 引用不存在")
+        if routine.end_location and routine.end_location not in all_ids:
+            errors.append(f"Routine '{routine.name}' 的 end_location 引用不存在")
+        for step in routine.steps:
+            if step.workstation_id and step.workstation_id not in ws_ids:
+                errors.append(f"Routine '{routine.name}' 步骤 {step.step_id} 的 workstation_id 引用不存在")
+    return {"valid": not errors, "errors": errors, "warnings": []}
+
+
+IMPLEMENTATIONS: Dict[str, Callable[[Session, str], Dict[str, Any]]] = {
+    "load_rows": load_rows,
+    "anti_join": ValidationService.validate_production_line,
+}
+
+
+def build_line(db: Session, entities: int, routines: int, steps: int) -> None:
+    """批量写入一条引用全部有效的产线"""
+    ws_ids = [f"ws_{i:06d}" for i in range(entities)]
+    buf_ids = [f"buf_{i:06d}" for i in range(entities)]
+    db.add(ProductionLineDB(id=LINE_ID, name="验证基准"))
+    db.flush()
+    db.execute(insert(BufferDB), [
+        {"id": buf_id, "production_line_id": LINE_ID, "name": buf_id, "capacity": 10} for buf_id in buf_ids
+    ])
+    db.execute(insert(WorkstationDB), [
+        {
+            "id": ws_id, "production_line_id": LINE_ID, "name": ws_id, "type": "processing",
+            "processing_time": '{"type": "fixed", "value": 10}',
+            "input_buffer_id": buf_ids[i], "output_buffer_id": buf_ids[(i + 1) % entities],
+        }
+        for i, ws_id in enumerate(ws_ids)
+    ])
+    db.execute(insert(TransportPathDB), [
+        {
+            "id": f"path_{i:06d}", "production_line_id": LINE_ID,
+            "from_location": ws_ids[i], "to_location": buf_ids[(i + 1) % entities], "transport_time": 1.0,
+        }
+        for i in range(entities)
+    ])
+    db.execute(insert(RoutineDB), [
+        {
+            "id": f"routine_{r:06d}", "production_line_id": LINE_ID, "name": f"routine_{r:06d}",
+            "material_type": "raw", "start_location": buf_ids[r % entities], "end_location": buf_ids[(r + 1) % entities],
+        }
+        for r in range(routines)
+    ])
+    db.execute(insert(RoutineStepDB), [
+        {
+            "id": f"step_{r:06d}_{s:06d}", "routine_id": f"routine_{r:06d}", "step_id": s + 1,
+            "workstation_id": ws_ids[(r + s) % entities], "operation": "processing",
+        }
+        for r in range(routines) for s in range(steps)
+    ])
+    db.commit()
+
+
+def run_shape(entities: int, routines: int, steps: int, repeat: int, directory: str) -> Dict[str, Any]:
+    engine = create_engine(f"sqlite:///{os.path.join(directory, f'validation_{routines}x{steps}.db')}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    queries = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(*args):
+        queries[0] += 1
+
+    with Session() as db:
+        build_line(db, entities, routines, steps)
+
+    result: Dict[str, Any] = {"entities": entities, "routines": routines, "steps": steps}
+    reports = {}
+    for name, validate in IMPLEMENTATIONS.items():
+        best = None
+        for _ in range(repeat):
+            # 每次使用新会话，不复用上一次加载的ORM对象
+            with Session() as db:
+                queries[0] = 0
+                start = time.perf_counter()
+                reports[name] = validate(db, LINE_ID)
+                elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        assert reports[name]["valid"], reports[name]["errors"][:5]
+        result[name] = {"seconds": best, "queries": queries[0]}
+    assert reports["load_rows"] == reports["anti_join"]
+    engine.dispose()
+    return result
+
+
+def _shape(text: str) -> Tuple[int, int]:
+    routines, _, steps = text.partition("x")
+    return int(routines), int(steps)
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="产线验证基准测试")
+    parser.add_argument("--entities", type=int, default=500, help="工作站、缓冲区、运输路径各自的数量")
+    parser.add_argument(
+        "--shapes", type=_shape, nargs="+", default=[(20, 1000), (200, 100), (2000, 25)],
+        help="流转路径数x每条的步骤数"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短耗时")
+    parser.add_argument("--json", help="结果另存为JSON文件")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"工作站/缓冲区/运输路径各 {args.entities} 个")
+    print(f"  {'流转路径x步骤':<16}{'load_rows':>22}{'anti_join':>22}")
+    with tempfile.TemporaryDirectory() as directory:
+        for routines, steps in args.shapes:
+            entry = run_shape(args.entities, routines, steps, args.repeat, directory)
+            results.append(entry)
+            cells = [
+                f"{entry[name]['seconds'] * 1000:.0f} ms, {entry[name]['queries']} 条SQL"
+                for name in IMPLEMENTATIONS
+            ]
+            print(f"  {f'{routines}x{steps}':<16}{cells[0]:>22}{cells[1]:>22}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
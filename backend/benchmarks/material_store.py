@@ -0,0 +1,144 @@
+"""
+物料存储内存基准测试
+
+在 backend 目录下运行:
+    python -m benchmarks.material_store
+    python -m benchmarks.material_store --counts 100000 1000000 --json result.json
+
+对比三种在制物料表示方式的每件内存、分配耗时，以及这些物料存活时一次完整GC的耗时:
+    object       按设计文档 4.4 节的字段，每件物料一个普通Python对象（含属性字典）
+    slots        每件物料一个 __slots__ 对象（属性字典按需创建）
+    store        MaterialStore 结构体数组，逐件属性只存在于旁表中
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from app.simulation.materials import MaterialStore
+
+
+class MaterialObject:
+    """设计文档中的物料实体，一件一个对象"""
+
+    def __init__(self, mid, material_type, batch_id, location, created_time):
+        self.id = mid
+        self.type = material_type
+        self.batch_id = batch_id
+        self.current_location = location
+        self.target_location = None
+        self.state = "waiting"
+        self.created_time = created_time
+        self.properties = {}
+
+
+class MaterialSlots:
+    """__slots__ 对象，属性字典按需创建"""
+
+    __slots__ = ("id", "type", "batch_id", "current_location", "target_location", "state", "created_time", "properties")
+
+    def __init__(self, mid, material_type, batch_id, location, created_time):
+        self.id = mid
+        self.type = material_type
+        self.batch_id = batch_id
+        self.current_location = location
+        self.target_location = None
+        self.state = 1
+        self.created_time = created_time
+        self.properties = None
+
+
+def fill_objects(cls) -> Callable[[int, float], Any]:
+    def fill(count: int, with_properties: float):
+        step = int(1 / with_properties) if with_properties else 0
+        items = []
+        for i in range(count):
+            item = cls(i, "raw_material", i // 100, "buf_001", i * 0.5)
+            if step and i % step == 0:
+                if item.properties is None:
+                    item.properties = {}
+                item.properties["quality"] = 0.98
+            items.append(item)
+        return items
+    return fill
+
+
+def fill_store(count: int, with_properties: float):
+    store = MaterialStore(capacity=1024, locations=["buf_001"])
+    location = store.location_code("buf_001")
+    material_type = store.type_code("raw_material")
+    step = int(1 / with_properties) if with_properties else 0
+    for i in range(count):
+        mid = store.allocate(0, i * 0.5, location, material_type, i // 100)
+        if step and i % step == 0:
+            store.set_property(mid, "quality", 0.98)
+    return store
+
+
+def churn_store(count: int) -> float:
+    """容量为 count 的存储上反复释放/分配（空闲槽位复用），返回每次的耗时（纳秒）"""
+    store = fill_store(count, 0)
+    ops = min(count, 200000)
+    start = time.perf_counter()
+    for mid in range(ops):
+        store.release(mid)
+        store.allocate(0, 0.0)
+    return (time.perf_counter() - start) / ops * 1e9
+
+
+def measure(fill: Callable[[int, float], Any], count: int, with_properties: float) -> Dict[str, float]:
+    """构建 count 件物料的耗时、内存增量（tracemalloc）和存活时一次完整GC的耗时"""
+    gc.collect()
+    start = time.perf_counter()
+    data = fill(count, with_properties)
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    gc.collect()
+    gc_time = time.perf_counter() - start
+    del data
+    gc.collect()
+
+    tracemalloc.start()
+    data = fill(count, with_properties)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    gc.collect()
+    return {"bytes_per_part": current / count, "ns_per_part": elapsed / count * 1e9, "gc_ms": gc_time * 1e3}
+
+
+KINDS: Dict[str, Callable[[int, float], Any]] = {
+    "object": fill_objects(MaterialObject),
+    "slots": fill_objects(MaterialSlots),
+    "store": fill_store,
+}
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="物料存储内存基准测试")
+    parser.add_argument("--counts", type=int, nargs="+", default=[100000, 1000000], help="物料数量")
+    parser.add_argument("--properties", type=float, default=0.01, help="带逐件属性的物料比例")
+    parser.add_argument("--json", help="结果另存为JSON文件")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"带属性物料比例 {args.properties:.0%}")
+    print(f"{'数量':>10}{'表示':>8}{'字节/件':>12}{'ns/件':>10}{'GC(ms)':>10}")
+    for count in args.counts:
+        for kind, fill in KINDS.items():
+            row = measure(fill, count, args.properties)
+            results.append({"count": count, "kind": kind, **row})
+            print(f"{count:>10}{kind:>8}{row['bytes_per_part']:>12.1f}{row['ns_per_part']:>10.0f}{row['gc_ms']:>10.1f}")
+        churn = churn_store(count)
+        results.append({"count": count, "kind": "store_churn", "ns_per_op": churn})
+        print(f"{count:>10}{'复用':>8}{'':>12}{churn:>10.0f}  (释放+分配)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+合成产线生成器
+
+在 backend 目录下运行:
+    python -m benchmarks.plant_generator --workstations 1000 -o plant_1k.json
+    python -m benchmarks.plant_generator --workstations 100000 --cell-size 20 --format yaml -o plant_100k.yaml
+
+生成 ConfigService.import_config 格式的配置（production_line、routines、value_stream），
+可直接导入，且通过 ConfigValidator 和 ValidationService 的验证。
+
+产线由若干独立的单元组成，每个单元 cell_size 个工作站，有自己的投料缓冲区、成品缓冲区、
+每隔几个工作站一个中间缓冲区，以及一条流转路径：
+    - 加工、装配、质检、包装工作站轮流出现，处理时间在三种分布间轮换
+    - 每个单元有一个两分支的并行步骤（两个工作站同时加工，全部完成后合流，分支上为固定处理时间）
+    - 质检步骤带 quality_check 条件，不合格返回上一步骤返工（单元首个步骤不合格则报废）
+    - 运输路径沿流转顺序连接各位置，返工另有一条回程路径
+单元之间不连通，运输路由表的大小随工作站数线性增长。
+所有实体（含流转步骤）都给出ID，导入时不依赖随机生成的短ID。
+"""
+import argparse
+import json
+import random
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+
+WORKSTATION_TYPES = ("processing", "assembly", "inspection", "packaging")
+# 每隔多少个工作站插入一个中间缓冲区
+BUFFER_EVERY = 4
+# 质检合格率
+PASS_RATE = 0.95
+
+
+def _processing_time(rng: random.Random, index: int) -> Dict[str, Any]:
+    """处理时间在 fixed/uniform/normal 之间轮换，均值 8~16 秒"""
+    mean = round(rng.uniform(8.0, 16.0), 1)
+    kind = index % 3
+    if kind == 0:
+        return {"type": "fixed", "value": mean}
+    if kind == 1:
+        return {"type": "uniform", "min": round(mean * 0.8, 1), "max": round(mean * 1.2, 1)}
+    return {"type": "normal", "mean": mean, "std": round(mean * 0.1, 2)}
+
+
+def generate_plant(
+    workstations: int,
+    cell_size: int = 10,
+    seed: int = 0,
+    line_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    生成指定规模的产线配置
+
+    Args:
+        workstations: 工作站总数
+        cell_size: 每个单元（一条流转路径）的工作站数，至少为1
+        seed: 随机数种子，相同参数生成的配置相同
+        line_id: 产线ID，默认为 line_synth_<工作站数>；工作站等实体的ID都以产线ID为前缀
+
+    Returns:
+        ConfigService.import_config 格式的配置字典
+    """
+    if workstations < 1:
+        raise ValueError("工作站数至少为1")
+    cell_size = max(1, cell_size)
+    rng = random.Random(seed)
+    line_id = line_id or f"line_synth_{workstations}"
+
+    stations: List[Dict[str, Any]] = []
+    buffers: List[Dict[str, Any]] = []
+    paths: List[Dict[str, Any]] = []
+    routines: List[Dict[str, Any]] = []
+    value_points: List[Dict[str, Any]] = []
+    cost_points: List[Dict[str, Any]] = []
+
+    def add_buffer(name: str, capacity: int, location: str) -> str:
+        buf_id = f"{line_id}_buf_{len(buffers) + 1:06d}"
+        buffers.append({"id": buf_id, "name": name, "capacity": capacity, "location": location})
+        return buf_id
+
+    def add_path(from_location: str, to_location: str) -> None:
+        paths.append({
+            "id": f"{line_id}_path_{len(paths) + 1:06d}",
+            "from_location": from_location,
+            "to_location": to_location,
+            "transport_time": round(rng.uniform(0.5, 3.0), 1),
+        })
+
+    for cell, first in enumerate(range(0, workstations, cell_size)):
+        size = min(cell_size, workstations - first)
+        cell_stations = []
+        for offset in range(size):
+            index = first + offset
+            ws_type = WORKSTATION_TYPES[offset % len(WORKSTATION_TYPES)]
+            ws_id = f"{line_id}_ws_{index + 1:06d}"
+            stations.append({
+                "id": ws_id,
+                "name": f"单元{cell + 1}-工作站{offset + 1}",
+                "type": ws_type,
+                "capacity": 1 + (offset % 3 == 0),
+                "processing_time": _processing_time(rng, index),
+            })
+            cell_stations.append((ws_id, ws_type))
+            cost_points.append({
+                "workstation_id": ws_id,
+                "cost_per_unit": round(rng.uniform(5.0, 30.0), 1),
+                "cost_type": "processing" if ws_type != "inspection" else "inspection",
+            })
+            if ws_type in ("processing", "assembly"):
+                value_points.append({"workstation_id": ws_id, "value_added": round(rng.uniform(10.0, 100.0), 1)})
+
+        entry = add_buffer(f"单元{cell + 1}-投料", 100, "entry")
+        exit_ = add_buffer(f"单元{cell + 1}-成品", 100, "exit")
+
+        routine_id = f"{line_id}_routine_{cell + 1:06d}"
+        # 并行步骤：单元内第3、4个工作站（不足4个时不设并行步骤）
+        parallel_at = 2 if size >= 4 else None
+        steps: List[Dict[str, Any]] = []
+        previous = [entry]  # 物料进入本步骤之前所在的位置
+        last_stations: List[str] = []  # 上一步骤的工作站（并行步骤为各分支工作站）
+        offset = 0
+        while offset < size:
+            step_id = len(steps) + 1
+            if offset == parallel_at:
+                branches = cell_stations[offset:offset + 2]
+                steps.append({
+                    "id": f"{routine_id}_step_{step_id}",
+                    "step_id": step_id,
+                    "operation": "assembly",
+                    "parallel": True,
+                    "branches": [
+                        {"workstation_id": ws_id, "processing_time": round(rng.uniform(8.0, 16.0), 1)}
+                        for ws_id, _ in branches
+                    ],
+                    "merge_condition": "all_complete",
+                })
+                targets = [ws_id for ws_id, _ in branches]
+                offset += 2
+            else:
+                ws_id, ws_type = cell_stations[offset]
+                step = {
+                    "id": f"{routine_id}_step_{step_id}",
+                    "step_id": step_id,
+                    "workstation_id": ws_id,
+                    "operation": ws_type,
+                }
+                if ws_type == "inspection":
+                    step["conditions"] = {
+                        "type": "quality_check",
+                        "pass_rate": PASS_RATE,
+                        "pass_route": f"step_{step_id + 1}",
+                    }
+                    if step_id > 1:
+                        step["conditions"]["fail_route"] = f"step_{step_id - 1}"
+                        for station_id in last_stations:
+                            add_path(ws_id, station_id)
+                elif ws_type in ("processing", "assembly"):
+                    step["value_added"] = True
+                    step["value_amount"] = round(rng.uniform(10.0, 100.0), 1)
+                steps.append(step)
+                targets = [ws_id]
+                offset += 1
+
+            last_stations = targets
+            for source in previous:
+                for target in targets:
+                    add_path(source, target)
+            # 每隔 BUFFER_EVERY 个工作站经过一个中间缓冲区
+            if offset < size and offset % BUFFER_EVERY == 0 and len(targets) == 1:
+                middle = add_buffer(f"单元{cell + 1}-中间{offset // BUFFER_EVERY}", 20, f"after_{targets[0]}")
+                add_path(targets[0], middle)
+                targets = [middle]
+            previous = targets
+
+        for source in previous:
+            add_path(source, exit_)
+        routines.append({
+            "id": routine_id,
+            "name": f"单元{cell + 1}流程",
+            "material_type": "raw_material",
+            "start_location": entry,
+            "end_location": exit_,
+            "steps": steps,
+        })
+
+    return {
+        "production_line": {
+            "id": line_id,
+            "name": f"合成产线（{workstations}个工作站）",
+            "description": f"benchmarks.plant_generator 生成，单元大小 {cell_size}，种子 {seed}",
+            "workstations": stations,
+            "buffers": buffers,
+            "transport_paths": paths,
+        },
+        "routines": routines,
+        "value_stream": {
+            "name": "合成价值流",
+            "value_points": value_points,
+            "cost_points": cost_points,
+        },
+    }
+
+
+def plant_size(config: Dict[str, Any]) -> Dict[str, int]:
+    """配置中各类实体的数量"""
+    line = config["production_line"]
+    return {
+        "workstations": len(line["workstations"]),
+        "buffers": len(line["buffers"]),
+        "transport_paths": len(line["transport_paths"]),
+        "routines": len(config["routines"]),
+        "steps": sum(len(routine["steps"]) for routine in config["routines"]),
+    }
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="合成产线生成器")
+    parser.add_argument("--workstations", type=int, default=1000, help="工作站数")
+    parser.add_argument("--cell-size", type=int, default=10, help="每条流转路径的工作站数")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    parser.add_argument("--line-id", help="产线ID")
+    parser.add_argument("--format", choices=("json", "yaml"), default="json", help="输出格式")
+    parser.add_argument("-o", "--output", required=True, help="输出文件")
+    args = parser.parse_args(argv)
+
+    config = generate_plant(args.workstations, args.cell_size, args.seed, args.line_id)
+    with open(args.output, "w", encoding="utf-8") as f:
+        if args.format == "yaml":
+            yaml.dump(config, f, allow_unicode=True, default_flow_style=False)
+        else:
+            json.dump(config, f, ensure_ascii=False, indent=2)
+    print(", ".join(f"{name} {count}" for name, count in plant_size(config).items()))
+
+
+if __name__ == "__main__":
+    main()
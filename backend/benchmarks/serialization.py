@@ -0,0 +1,150 @@
+"""
+响应序列化基准测试
+
+在 backend 目录下运行:
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --workstations 1000 11112 --json result.json
+
+按 benchmarks.plant_generator 生成合成产线（默认 11112 个工作站，约1万个流转步骤），导入临时SQLite数据库，
+取流转路径和工作站列表接口返回的数据，只计序列化本身的耗时:
+    fastapi           FastAPI按 response_model 校验、jsonable_encoder 转换后 json.dumps（未过滤的列表和单个实体原先的路径）
+    type_adapter      pydantic TypeAdapter 校验后 dump_json（按产线过滤的列表原先的路径）
+    encoder           预编译编码器 + orjson（app/services/serialization.py）
+    encoder_stdlib    预编译编码器 + 标准库json（未安装 orjson 时）
+各方式输出的字节必须相同。
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+from fastapi.routing import serialize_response
+from fastapi.testclient import TestClient
+from fastapi.utils import create_response_field
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, get_db
+from app.main import app
+from app.models.routine import Routine
+from app.models.workstation import Workstation
+from app.services import ConfigService
+from app.services import serialization
+from benchmarks.plant_generator import generate_plant, plant_size
+
+
+ENDPOINTS = {
+    "routines": ("/api/routines/", Routine),
+    "workstations": ("/api/workstations/", Workstation),
+}
+
+
+def best_of(func: Callable[[], Any], repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def load_lists(workstations: int, directory: str) -> Dict[str, list]:
+    """导入合成产线，通过列表接口取回各列表的数据（与路由构造的字典结构相同）"""
+    engine = create_engine(
+        f"sqlite:///{os.path.join(directory, f'serialization_{workstations}.db')}",
+        connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    db = Session()
+    try:
+        line_id = ConfigService.import_config(db, generate_plant(workstations))["production_line_id"]
+    finally:
+        db.close()
+    app.dependency_overrides[get_db] = override_db
+    try:
+        client = TestClient(app)
+        return {
+            name: client.get(path, params={"production_line_id": line_id}).json()
+            for name, (path, _) in ENDPOINTS.items()
+        }
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        engine.dispose()
+
+
+def run_list(model: Any, content: list, repeat: int) -> Dict[str, float]:
+    field = create_response_field(name="response", type_=List[model])
+    adapter = TypeAdapter(List[model])
+
+    def fastapi_path() -> bytes:
+        encoded = asyncio.run(serialize_response(field=field, response_content=content, is_coroutine=False))
+        return json.dumps(encoded, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def stdlib_path() -> bytes:
+        orjson, serialization.orjson = serialization.orjson, None
+        try:
+            return serialization.encode_json(List[model], content)
+        finally:
+            serialization.orjson = orjson
+
+    paths = {
+        "fastapi": fastapi_path,
+        "type_adapter": lambda: adapter.dump_json(adapter.validate_python(content)),
+        "encoder": lambda: serialization.encode_json(List[model], content),
+        "encoder_stdlib": stdlib_path,
+    }
+    expected = paths["fastapi"]()
+    for name, func in paths.items():
+        assert func() == expected, f"{name} 的输出与FastAPI不一致"
+    result = {name: best_of(func, repeat) for name, func in paths.items()}
+    result["bytes"] = len(expected)
+    return result
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="响应序列化基准测试")
+    parser.add_argument("--workstations", type=int, nargs="+", default=[11112], help="工作站数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取最短耗时")
+    parser.add_argument("--json", help="结果另存为JSON文件")
+    args = parser.parse_args(argv)
+
+    if serialization.orjson is None:
+        print("未安装 orjson，encoder 与 encoder_stdlib 相同")
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for workstations in args.workstations:
+            lists = load_lists(workstations, directory)
+            size = plant_size(generate_plant(workstations))
+            print(f"\n{workstations} 个工作站: 流转路径 {size['routines']}，步骤 {size['steps']}")
+            print(f"  {'列表':<14}{'fastapi':>10}{'type_adapter':>14}{'encoder':>10}{'encoder_stdlib':>16}  (ms)")
+            entry = {"workstations": workstations, "size": size, "lists": {}}
+            for name, (_, model) in ENDPOINTS.items():
+                timing = run_list(model, lists[name], args.repeat)
+                entry["lists"][name] = timing
+                print(
+                    f"  {name:<14}{timing['fastapi'] * 1000:>10.1f}{timing['type_adapter'] * 1000:>14.1f}"
+                    f"{timing['encoder'] * 1000:>10.1f}{timing['encoder_stdlib'] * 1000:>16.1f}"
+                )
+            results.append(entry)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+价值流核算基准测试
+
+在 backend 目录下运行:
+    python -m benchmarks.value_stream
+    python -m benchmarks.value_stream --parts 1000000 5000000 --json result.json
+
+按示例产线生成合成的加工/完工明细（槽位复用、约10%返工），只计核算本身的耗时；
+另在示例产线上完整运行一次仿真，对比开启明细记录前后的仿真耗时。
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.models.simulation import SimulationParams
+from app.simulation import LineModel, Simulation
+from app.simulation.value_stream import EXIT_COLUMNS, OPERATION_COLUMNS, value_stream_accounting
+
+
+DEFAULT_CONFIG = "config/default_config.json"
+
+
+def synthetic_logs(model: LineModel, names: List[str], parts: int, wip: int = 5000, seed: int = 0):
+    """每件物料依次经过流转路径各步骤，按 rework 比例重复首个步骤；槽位号在 wip 个槽位间复用"""
+    rng = np.random.default_rng(seed)
+    codes = {name: code for code, name in enumerate(names)}
+    routine = model.routines[0]
+    steps = routine.steps
+    created = np.arange(parts, dtype=np.float64) * 10.0
+    slot = (np.arange(parts) % wip).astype(np.int32)
+
+    rework = rng.random(parts) < 0.1
+    # 每件物料的加工行：各步骤一次，返工的物料首个步骤再来一次
+    per_part = len(steps) + rework.astype(np.intp)
+    n_ops = int(per_part.sum())
+    owner = np.repeat(np.arange(parts), per_part)
+    offset = np.arange(n_ops) - np.repeat(np.cumsum(per_part) - per_part, per_part)
+    step = np.minimum(offset, len(steps) - 1) - (rework[owner] & (offset > 0)).astype(np.intp)
+    step = np.clip(step, 0, len(steps) - 1).astype(np.int32)
+    station_codes = np.array([codes[s.station_id] for s in steps], dtype=np.int32)
+
+    operations = {
+        "part": slot[owner],
+        "created": created[owner],
+        "start": created[owner] + offset * 20.0,
+        "duration": rng.uniform(5.0, 15.0, n_ops),
+        "routine": np.zeros(n_ops, dtype=np.int32),
+        "step": step,
+        "station": station_codes[step],
+        "branch": np.zeros(n_ops, dtype=np.int8),
+    }
+    exits = {
+        "part": slot,
+        "created": created,
+        "time": created + per_part * 20.0 + 100.0,
+        "routine": np.zeros(parts, dtype=np.int32),
+        "scrapped": (rng.random(parts) < 0.01).astype(np.int8),
+    }
+    assert set(operations) == set(OPERATION_COLUMNS) and set(exits) == set(EXIT_COLUMNS)
+    return operations, exits
+
+
+def run_line(config: Dict[str, Any], duration: float, record: bool) -> float:
+    simulation = Simulation(LineModel(config), SimulationParams(duration=duration, value_stream=record), 0)
+    start = time.perf_counter()
+    simulation.run()
+    if record:
+        simulation.value_stream()
+    return time.perf_counter() - start
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="价值流核算基准测试")
+    parser.add_argument("--parts", type=int, nargs="+", default=[100000, 1000000, 3000000], help="完工物料数")
+    parser.add_argument("--config", default=DEFAULT_CONFIG, help="产线配置文件")
+    parser.add_argument("--duration", type=float, default=86400, help="完整仿真的仿真时长（秒）")
+    parser.add_argument("--json", help="结果另存为JSON文件")
+    args = parser.parse_args(argv)
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    model = LineModel(config)
+    names = [None] + list(model.stations) + list(model.buffers)
+
+    results: Dict[str, list] = {"accounting": [], "line": []}
+    print(f"{'完工物料数':>12}{'加工行数':>12}{'核算耗时(s)':>14}")
+    for parts in args.parts:
+        operations, exits = synthetic_logs(model, names, parts)
+        start = time.perf_counter()
+        value_stream_accounting(model, names, operations, exits)
+        elapsed = time.perf_counter() - start
+        rows = len(operations["part"])
+        results["accounting"].append({"parts": parts, "operations": rows, "seconds": elapsed})
+        print(f"{parts:>12}{rows:>12}{elapsed:>14.3f}")
+
+    plain = run_line(config, args.duration, False)
+    recorded = run_line(config, args.duration, True)
+    results["line"].append({"duration": args.duration, "plain": plain, "recorded": recorded})
+    print(f"\n完整仿真 {args.duration:.0f}s: 不记录 {plain:.3f}s，记录明细并核算 {recorded:.3f}s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""测试公共设置和夹具
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import json
+import os
+import tempfile
+
+import pytest
+
+# 结果缓存、实验断点写入临时目录（在导入服务模块之前设置，任务的工作进程继承这些环境变量）
+_TMP = tempfile.mkdtemp(prefix="plant-simulator-tests-")
+os.environ.setdefault("RESULT_CACHE_DIR", os.path.join(_TMP, "cache"))
+os.environ.setdefault("EXPERIMENT_DIR", os.path.join(_TMP, "experiments"))
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(__file__), "..", "config", "default_config.json")
+
+
+@pytest.fixture
+def default_config():
+    """示例产线配置（line_demo）"""
+    with open(DEFAULT_CONFIG, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def db_session():
+    """内存数据库会话，接口和服务共用同一连接"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from app.database import database
+    from app.database.schemas import Base
+    from app.services.response_cache import response_cache
+    from app.services.type_cache import type_cache
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    bind = database.SessionLocal.kw["bind"]
+    database.SessionLocal.configure(bind=engine)
+    # 进程级缓存按产线ID和版本号索引，换数据库时清空
+    response_cache.clear()
+    type_cache.invalidate()
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        database.SessionLocal.configure(bind=bind)
+        response_cache.clear()
+        type_cache.invalidate()
+        engine.dispose()
+
+
+@pytest.fixture
+def client(db_session):
+    """内存数据库上的接口测试客户端"""
+    from fastapi.testclient import TestClient
+
+    from app.database import get_db
+    from app.database.database import SessionLocal
+    from app.main import app
+
+    def _get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = _get_db
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture
+def demo_line(db_session, default_config):
+    """导入示例产线，返回产线ID"""
+    from app.services import ConfigService
+
+    ConfigService.import_config(db_session, default_config)
+    return default_config["production_line"]["id"]
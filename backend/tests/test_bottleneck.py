@@ -0,0 +1,93 @@
+"""瓶颈识别测试：活动期法的独占/转移瓶颈时间、活动期延续和预热重置
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import pytest
+
+from app.simulation import BottleneckDetector, run_simulation
+from app.services.job_manager import JobManager
+from tests.test_job_manager import _config, _simulation, _wait
+
+
+def test_shifting_bottleneck_overlap():
+    detector = BottleneckDetector(["a", "b"])
+    detector.activate("a", 0.0)
+    detector.activate("b", 2.0)
+    detector.deactivate("a", 5.0)
+    detector.deactivate("b", 8.0)
+    report = detector.report(10.0)
+
+    a, b = report["workstations"]["a"], report["workstations"]["b"]
+    assert (a["sole"], a["shifting"]) == (pytest.approx(0.2), pytest.approx(0.3))
+    assert (b["sole"], b["shifting"]) == (pytest.approx(0.3), pytest.approx(0.3))
+    assert report["momentary"] is None
+    assert report["average"] == "b" and report["ranking"] == ["b", "a"]
+    assert [(i["start"], i["end"], i["workstation_ids"], i["shifting"]) for i in report["intervals"]] == [
+        (0.0, 2.0, ["a"], False),
+        (2.0, 5.0, ["a", "b"], True),
+        (5.0, 8.0, ["b"], False),
+    ]
+    assert a["active_periods"] == b["active_periods"] == 1
+    assert a["max_active_duration"] == 5.0
+
+
+def test_period_continues_when_reactivated_at_same_time():
+    detector = BottleneckDetector(["a", "b"])
+    detector.activate("a", 0.0)
+    detector.activate("b", 1.0)
+    detector.deactivate("a", 3.0)
+    detector.activate("a", 3.0)
+    report = detector.report(4.0)
+    assert report["momentary"] == "a"
+    assert report["workstations"]["a"]["active_periods"] == 0
+    assert report["workstations"]["a"]["active_for"] == 4.0
+    assert report["workstations"]["a"]["sole"] == pytest.approx(1.0)
+    assert report["intervals"] == []
+
+
+def test_reset_keeps_running_periods():
+    detector = BottleneckDetector(["a"])
+    detector.activate("a", 0.0)
+    detector.reset(10.0)
+    report = detector.report(20.0)
+    assert report["momentary"] == "a"
+    assert report["workstations"]["a"]["sole"] == pytest.approx(1.0)
+    assert report["workstations"]["a"]["active_for"] == 20.0
+    detector.deactivate("a", 25.0)
+    report = detector.report(30.0)
+    assert report["workstations"]["a"]["sole"] == pytest.approx(0.75)
+    # 活动期跨越重置时刻，整段计入时长
+    assert report["workstations"]["a"]["max_active_duration"] == 25.0
+
+
+def _serial(first, second):
+    config = _config()
+    config["production_line"]["workstations"] = [
+        {"id": "ws_1", "name": "1", "type": "processing", "capacity": 1, "processing_time": first},
+        {"id": "ws_2", "name": "2", "type": "processing", "capacity": 1, "processing_time": second},
+    ]
+    config["routines"][0]["steps"] = [
+        {"step_id": 1, "workstation_id": "ws_1", "operation": "processing"},
+        {"step_id": 2, "workstation_id": "ws_2", "operation": "processing"},
+    ]
+    return config
+
+
+@pytest.mark.parametrize("first, second, expected", [(10, 5, "ws_1"), (5, 10, "ws_2")])
+def test_slowest_station_is_the_bottleneck(first, second, expected):
+    report = run_simulation(_serial(first, second), {"duration": 10000})["bottlenecks"]
+    assert report["average"] == expected
+    assert report["workstations"][expected]["bottleneck"] > 0.95
+
+
+def test_job_bottleneck_report():
+    manager = JobManager(workers=1)
+    try:
+        job = manager.submit(_simulation(), _serial(10, 5), "fingerprint")
+        assert _wait(manager, job["id"])["status"] == "completed"
+        report = manager.bottlenecks(job["id"])
+        assert report["status"] == "completed"
+        assert report["bottlenecks"]["average"] == "ws_1"
+    finally:
+        manager.shutdown()
@@ -0,0 +1,90 @@
+"""缓冲区容量分配优化测试：OCBA追加重复分配、候选方案生成和约束检查
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import random
+
+import pytest
+
+from app.models.experiment import BufferAllocationCreate
+from app.services.buffer_allocation_service import BufferAllocationService
+
+
+def test_ocba_spends_exactly_the_batch():
+    extra = BufferAllocationService.ocba([10.0, 9.0, 5.0, 9.5], [1.0, 1.0, 1.0, 2.0], [5, 5, 5, 5], 37)
+    assert sum(extra) == 37
+    assert all(k >= 0 for k in extra)
+
+
+def test_ocba_favours_close_and_noisy_competitors():
+    means = [10.0, 9.8, 6.0]
+    extra = BufferAllocationService.ocba(means, [1.0, 1.0, 1.0], [5, 5, 5], 40)
+    # 与最优方案接近的方案比明显较差的方案得到更多重复
+    assert extra[1] > extra[2]
+    assert extra[0] > extra[2]
+
+    noisy = BufferAllocationService.ocba([10.0, 9.0, 9.0], [1.0, 0.5, 2.0], [5, 5, 5], 40)
+    assert noisy[2] > noisy[1]
+
+
+def test_ocba_skips_candidates_that_already_have_enough_replications():
+    # 方案1已有的重复远超其目标比例，本轮不再追加
+    extra = BufferAllocationService.ocba([10.0, 5.0, 9.5], [1.0, 1.0, 1.0], [5, 200, 5], 20)
+    assert extra[1] == 0
+    assert sum(extra) == 20
+
+
+def test_ocba_single_candidate_takes_everything():
+    assert BufferAllocationService.ocba([3.0], [1.0], [5], 12) == [12]
+
+
+def test_ocba_with_zero_variance_does_not_divide_by_zero():
+    extra = BufferAllocationService.ocba([10.0, 10.0, 8.0], [0.0, 0.0, 0.0], [5, 5, 5], 9)
+    assert sum(extra) == 9
+
+
+def test_random_allocation_respects_budget_and_bounds():
+    rng = random.Random(1)
+    for _ in range(200):
+        allocation = BufferAllocationService._random_allocation(rng, 4, 40, 2, 15)
+        assert sum(allocation) == 40
+        assert all(2 <= value <= 15 for value in allocation)
+
+
+def test_neighbours_move_capacity_between_two_buffers():
+    neighbours = BufferAllocationService._neighbours((5, 5, 1), 2, 1, 10)
+    assert all(sum(n) == 11 for n in neighbours)
+    assert (3, 7, 1) in neighbours and (5, 3, 3) in neighbours
+    # 第3个缓冲区在下限上，不能移出
+    assert not any(n[2] < 1 for n in neighbours)
+
+
+def test_check_rejects_unknown_buffers_and_infeasible_budget(default_config):
+    request = BufferAllocationCreate(production_line_id="line_demo", buffer_ids=["buf_missing"], total_capacity=10)
+    with pytest.raises(ValueError, match="buf_missing"):
+        BufferAllocationService.check(default_config, request)
+    request = BufferAllocationCreate(production_line_id="line_demo", total_capacity=2, min_capacity=1)
+    with pytest.raises(ValueError, match="上下限"):
+        BufferAllocationService.check(default_config, request)
+
+
+def test_optimize_stays_within_replication_budget(default_config):
+    request = BufferAllocationCreate(
+        production_line_id="line_demo",
+        buffer_ids=["buf_001", "buf_002"],
+        total_capacity=10,
+        candidates=3,
+        max_candidates=5,
+        initial_replications=2,
+        replication_budget=20,
+        batch_size=4,
+        params={"duration": 1800},
+        workers=1,
+    )
+    result = BufferAllocationService.optimize(default_config, request)
+    assert result["statistics"]["replications"] <= 20
+    assert sum(c["replications"] for c in result["candidates"]) == result["statistics"]["replications"]
+    assert sum(result["best"]["allocation"].values()) == 10
+    means = [c["throughput_mean"] for c in result["candidates"]]
+    assert means == sorted(means, reverse=True)
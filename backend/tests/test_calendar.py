@@ -0,0 +1,94 @@
+"""事件日历测试：日历队列与二叉堆的出队顺序和仿真结果一致
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import copy
+import random
+
+import pytest
+
+from app.simulation import run_simulation
+from app.simulation.calendar import CalendarQueue, HeapCalendar, make_calendar
+from benchmarks.plant_generator import generate_plant
+
+
+def _drain(calendar, end=float("inf")):
+    out = []
+    while True:
+        event = calendar.pop_until(end)
+        if event is None:
+            return out
+        out.append(event)
+
+
+@pytest.mark.parametrize("distribution", ["exponential", "uniform", "bimodal"])
+def test_hold_model_pops_in_the_same_order(distribution):
+    rng = random.Random(7)
+    draw = {
+        "exponential": lambda: rng.expovariate(1.0),
+        "uniform": lambda: rng.uniform(0, 2),
+        "bimodal": lambda: rng.choice((0.0, 0.001, 500.0)) + rng.random() * 0.01,
+    }[distribution]
+    heap, queue = HeapCalendar(), CalendarQueue()
+    seq = 0
+    for _ in range(2000):
+        seq += 1
+        event = (draw(), 0, seq, None, None)
+        heap.push(event)
+        queue.push(event)
+    # hold 操作：出队一个事件，在其后安排一个新事件；期间事件数有增有减，触发桶数调整
+    for step in range(15500):
+        first = heap.pop_until(float("inf"))
+        assert queue.pop_until(float("inf")) == first
+        for _ in range(2 if step % 3 == 0 and step < 10000 else (0 if step % 3 == 1 else 1)):
+            seq += 1
+            event = (first[0] + draw(), step % 2, seq, None, None)
+            heap.push(event)
+            queue.push(event)
+        assert len(heap) == len(queue)
+    assert _drain(queue) == _drain(heap)
+
+
+def test_pop_until_stops_at_end_and_accepts_earlier_events():
+    queue = CalendarQueue()
+    queue.push((10.0, 0, 1, None, None))
+    assert queue.pop_until(5.0) is None
+    # 停在 end 之前不推进当前天，之后仍可加入更早的事件
+    queue.push((6.0, 0, 2, None, None))
+    assert queue.pop_until(8.0)[2] == 2
+    assert queue.pop_until(8.0) is None
+    assert queue.peek_time() == 10.0
+
+
+def test_rebuild_drops_filtered_events():
+    heap, queue = HeapCalendar(), CalendarQueue()
+    for seq in range(1, 500):
+        event = (seq * 0.5, 0, seq, None, None)
+        heap.push(event)
+        queue.push(event)
+    keep = lambda event: event[2] % 3 != 0  # noqa: E731
+    heap.rebuild(keep)
+    queue.rebuild(keep)
+    assert len(queue) == len(heap)
+    assert _drain(queue) == _drain(heap)
+
+
+def test_unknown_calendar_is_rejected():
+    with pytest.raises(ValueError, match="不支持的事件日历"):
+        make_calendar("splay")
+
+
+def test_simulation_results_do_not_depend_on_calendar(default_config):
+    failing = copy.deepcopy(default_config)
+    for station in failing["production_line"]["workstations"]:
+        station["properties"] = {"mtbf": 500, "mttr": {"type": "uniform", "min": 10, "max": 90}}
+    cases = [
+        (default_config, {"duration": 28800}),
+        (failing, {"duration": 28800, "warmup": 3600, "record_interval": 300}),
+        (generate_plant(60, seed=3), {"duration": 3600}),
+    ]
+    for config, params in cases:
+        heap = run_simulation(config, {**params, "calendar": "heap"}, seed=5)
+        queue = run_simulation(config, {**params, "calendar": "calendar_queue"}, seed=5)
+        assert heap == queue
@@ -0,0 +1,165 @@
+"""变更日志测试：序号分配、增量读取和撤销/重做的顺序
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.schemas import Base, ChangeLogDB, ChangeLogHeadDB, ProductionLineDB
+from app.services.change_log import ChangeLogService
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    """文件数据库的会话工厂，各线程使用各自的连接"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'log.db'}", connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    with factory() as db:
+        db.add(ProductionLineDB(id="line_1", name="line_1"))
+        db.commit()
+    yield factory
+    engine.dispose()
+
+
+def _seqs(factory):
+    with factory() as db:
+        return [seq for seq, in db.query(ChangeLogDB.seq).filter(ChangeLogDB.production_line_id == "line_1").order_by(ChangeLogDB.seq)]
+
+
+def test_concurrent_appends_get_distinct_seqs(sessions):
+    """第一个事务追加后未提交时第二个事务开始追加：等第一个提交后取下一个序号，而不是违反唯一索引"""
+    appended = threading.Event()
+    errors = []
+
+    def first():
+        with sessions() as db:
+            ChangeLogService.append(db, "line_1", "edit", [])
+            appended.set()
+            time.sleep(0.3)
+            db.commit()
+
+    def second():
+        appended.wait()
+        try:
+            with sessions() as db:
+                ChangeLogService.append(db, "line_1", "edit", [])
+                db.commit()
+        except Exception as e:  # noqa: BLE001 - 在主线程中断言
+            errors.append(e)
+
+    threads = [threading.Thread(target=first), threading.Thread(target=second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert _seqs(sessions) == [1, 2]
+
+
+def test_many_concurrent_writers(sessions):
+    def write():
+        for _ in range(10):
+            with sessions() as db:
+                ChangeLogService.append(db, "line_1", "edit", [])
+                db.commit()
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert _seqs(sessions) == list(range(1, 41))
+
+
+def test_head_row_continues_existing_log(sessions):
+    """在增加序号表之前已有日志的产线，从已有的最大序号继续"""
+    with sessions() as db:
+        db.add(ChangeLogDB(production_line_id="line_1", seq=7, kind="edit", status="applied", changes="[]"))
+        db.commit()
+        assert ChangeLogService.append(db, "line_1", "edit", []).seq == 8
+        assert ChangeLogService.append(db, "line_1", "edit", []).seq == 9
+        db.commit()
+        assert db.get(ChangeLogHeadDB, "line_1").seq == 9
+
+        # 删除产线时连同序号行删除
+        db.delete(db.get(ProductionLineDB, "line_1"))
+        db.commit()
+        assert db.get(ChangeLogHeadDB, "line_1") is None
+
+
+def _capacity(client, ws_id):
+    return client.get(f"/api/workstations/{ws_id}").json()["capacity"]
+
+
+def test_undo_and_redo_follow_stack_order(client, demo_line):
+    base = f"/api/production-lines/{demo_line}"
+    assert client.post(f"{base}/undo").status_code == 409
+    for capacity in (2, 3, 4):
+        assert client.put("/api/workstations/ws_001", json={"capacity": capacity}).status_code == 200
+    # 没有实际变化的更新不记录
+    client.put("/api/workstations/ws_001", json={"capacity": 4})
+    assert client.get(f"{base}/changes").json()["head"] == 3
+
+    undo = client.post(f"{base}/undo").json()
+    assert (undo["seq"], undo["kind"], undo["target_seq"]) == (4, "undo", 3)
+    assert undo["changes"][0]["after"]["capacity"] == 3
+    assert client.post(f"{base}/undo").json()["target_seq"] == 2
+    assert _capacity(client, "ws_001") == 2
+
+    # 最后撤销的最先重做
+    assert client.post(f"{base}/redo").json()["target_seq"] == 2
+    assert _capacity(client, "ws_001") == 3
+    assert client.post(f"{base}/redo").json()["target_seq"] == 3
+    assert client.post(f"{base}/redo").status_code == 409
+    assert _capacity(client, "ws_001") == 4
+
+    # 撤销后有新的编辑时，已撤销的编辑不能再重做
+    client.post(f"{base}/undo")
+    client.put("/api/workstations/ws_002", json={"capacity": 5})
+    assert client.post(f"{base}/redo").status_code == 409
+    log = client.get(f"{base}/changes").json()["changes"]
+    assert [entry["seq"] for entry in log] == list(range(1, 10))
+    assert [entry["status"] for entry in log if entry["kind"] == "edit"] == ["applied", "applied", "discarded", "applied"]
+    assert client.post(f"{base}/undo").json()["target_seq"] == 9
+    assert client.post(f"{base}/undo").json()["target_seq"] == 2
+
+
+def test_undo_restores_cascaded_delete(client, demo_line):
+    base = f"/api/production-lines/{demo_line}"
+    before = client.get("/api/routines/routine_001").json()
+    assert before["steps"]
+    assert client.delete("/api/routines/routine_001").status_code == 204
+    change = client.get(f"{base}/changes").json()["changes"][-1]
+    types = [item["entity_type"] for item in change["changes"]]
+    # 子实体先于父实体删除
+    assert types[-1] == "routine" and "routine_step" in types
+    assert client.get("/api/routines/routine_001").status_code == 404
+
+    undo = client.post(f"{base}/undo").json()
+    assert [item["action"] for item in undo["changes"]] == ["create"] * len(types)
+    assert undo["changes"][0]["entity_type"] == "routine"
+    assert client.get("/api/routines/routine_001").json() == before
+    client.post(f"{base}/redo")
+    assert client.get("/api/routines/routine_001").status_code == 404
+
+
+def test_changes_are_paged_by_seq(client, demo_line):
+    base = f"/api/production-lines/{demo_line}"
+    for capacity in range(2, 7):
+        client.put("/api/buffers/buf_001", json={"capacity": capacity})
+    page = client.get(f"{base}/changes", params={"since": 1, "limit": 2}).json()
+    assert [entry["seq"] for entry in page["changes"]] == [2, 3]
+    assert page["has_more"] and page["head"] == 5
+    page = client.get(f"{base}/changes", params={"since": 3, "limit": 2}).json()
+    assert [entry["seq"] for entry in page["changes"]] == [4, 5]
+    assert not page["has_more"] and page["head"] == 5
+    # since 超过最新序号时返回空列表和当前的 head，客户端据此重新读取
+    assert client.get(f"{base}/changes", params={"since": 99}).json() == {
+        "production_line_id": demo_line, "head": 5, "changes": [], "has_more": False
+    }
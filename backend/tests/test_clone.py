@@ -0,0 +1,89 @@
+"""产线复制测试：实体ID和引用（含JSON列中的引用）的换算、悬空引用保持原值、重复复制ID不增长
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+from app.database.schemas import ChangeLogDB, WorkstationDB
+from app.services import ConfigService
+from app.services.clone_service import CloneService
+from app.simulation import run_simulation
+from benchmarks.plant_generator import generate_plant
+
+
+def test_clone_id_strips_the_source_suffix():
+    assert CloneService.clone_id("ws_1", "line_a", "line_b") == "ws_1@line_b"
+    assert CloneService.clone_id("ws_1@line_a", "line_a", "line_b") == "ws_1@line_b"
+    # 其他产线的后缀不是源产线复制出来的，保留
+    assert CloneService.clone_id("ws_1@line_x", "line_a", "line_b") == "ws_1@line_x@line_b"
+
+
+def _source(db_session):
+    config = generate_plant(16, cell_size=8, seed=1, line_id="line_src")
+    # 质检不合格时跳转到以步骤ID（而不是序号）指定的步骤
+    routine = config["routines"][0]
+    inspection = next(step for step in routine["steps"] if step.get("conditions", {}).get("fail_route"))
+    inspection["conditions"]["fail_route"] = routine["steps"][0]["id"]
+    ConfigService.import_config(db_session, config)
+    # 指向产线外实体的悬空引用
+    db_session.query(WorkstationDB).filter(WorkstationDB.id == "line_src_ws_000001").update(
+        {"input_buffer_id": "buf_elsewhere"}
+    )
+    db_session.commit()
+    return ConfigService.build_config(db_session, "line_src")
+
+
+def _entity_ids(config):
+    line = config["production_line"]
+    ids = {entity["id"] for key in ("workstations", "buffers", "transport_paths") for entity in line[key]}
+    for routine in config["routines"]:
+        ids.add(routine["id"])
+        ids.update(step["id"] for step in routine["steps"])
+        ids.update(link["id"] for link in routine.get("step_links") or [])
+    if config.get("value_stream"):
+        ids.add(config["value_stream"]["id"])
+    return ids
+
+
+def _remap(value, mapping):
+    if isinstance(value, dict):
+        return {key: _remap(item, mapping) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_remap(item, mapping) for item in value]
+    return mapping.get(value, value) if isinstance(value, str) else value
+
+
+def test_clone_remaps_every_reference(client, db_session):
+    source = _source(db_session)
+    response = client.post("/api/production-lines/line_src/clone", json={"name": "方案B"})
+    assert response.status_code == 201
+    line_id = response.json()["id"]
+    clone = ConfigService.build_config(db_session, line_id)
+
+    mapping = {entity_id: CloneService.clone_id(entity_id, "line_src", line_id) for entity_id in _entity_ids(source)}
+    expected = _remap(source, mapping)
+    expected["production_line"].update(id=line_id, name="方案B")
+    assert clone == expected
+    assert clone["production_line"]["workstations"][0]["input_buffer_id"] == "buf_elsewhere"
+    assert clone["routines"][0]["steps"][0]["id"].endswith(f"@{line_id}")
+
+    # 换算后的配置可以直接仿真
+    assert run_simulation(clone, {"duration": 3000})["kpis"]["completed"] > 0
+
+
+def test_clone_of_clone_keeps_ids_short(client, db_session):
+    _source(db_session)
+    first = client.post("/api/production-lines/line_src/clone").json()
+    second = client.post(f"/api/production-lines/{first['id']}/clone").json()
+    assert second["name"] == f"{first['name']} (副本)"
+    ids = _entity_ids(ConfigService.build_config(db_session, second["id"]))
+    assert all(entity_id.count("@") == 1 and entity_id.endswith(f"@{second['id']}") for entity_id in ids)
+    assert "line_src_ws_000001@" + second["id"] in ids
+
+
+def test_clone_does_not_copy_the_change_log(client, db_session):
+    _source(db_session)
+    client.put("/api/workstations/line_src_ws_000002", json={"capacity": 3})
+    line_id = client.post("/api/production-lines/line_src/clone").json()["id"]
+    assert db_session.query(ChangeLogDB).filter(ChangeLogDB.production_line_id == line_id).count() == 0
+    assert client.get(f"/api/production-lines/{line_id}/changes").json()["head"] == 0
+    assert client.post("/api/production-lines/missing/clone").status_code == 404
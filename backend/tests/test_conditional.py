@@ -0,0 +1,68 @@
+"""条件请求测试：产线资源的ETag、If-None-Match 返回304且不查询数据库、写操作后ETag变化
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import pytest
+
+from app.services.line_version import line_versions
+from app.services.request_metrics import request_metrics
+
+
+def _queries(route):
+    return request_metrics.summary()["routes"][route]["max_queries"]
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/api/workstations/", {"production_line_id": "line_demo"}),
+    ("/api/routines/", {"production_line_id": "line_demo"}),
+    ("/api/production-lines/line_demo", {}),
+    ("/api/production-lines/", {}),
+])
+def test_unchanged_line_answers_304(client, demo_line, path, params):
+    first = client.get(path, params=params)
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "no-cache"
+
+    request_metrics.reset()
+    response = client.get(path, params=params, headers={"If-None-Match": f'"other", W/{etag}'})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+    assert request_metrics.summary()["routes"]
+    assert all(route["max_queries"] == 0 for route in request_metrics.summary()["routes"].values())
+
+
+def test_write_changes_list_etag(client, demo_line):
+    params = {"production_line_id": demo_line}
+    etag = client.get("/api/buffers/", params=params).headers["etag"]
+    assert client.put("/api/buffers/buf_001", json={"capacity": 7}).status_code == 200
+    response = client.get("/api/buffers/", params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert client.get("/api/buffers/", params=params, headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+
+def test_entity_etag_tracks_its_line(client, demo_line):
+    response = client.get("/api/workstations/ws_001")
+    etag = response.headers["etag"]
+    assert etag == f'"{line_versions.epoch}-{line_versions.get(demo_line)}-{demo_line}"'
+
+    request_metrics.reset()
+    assert client.get("/api/workstations/ws_002", headers={"If-None-Match": etag}).status_code == 304
+    assert _queries("GET /api/workstations/{ws_id}") == 0
+
+    # 其他产线的变更不影响，本产线的变更使ETag失效
+    line_versions.bump("line_other")
+    assert client.get("/api/workstations/ws_001", headers={"If-None-Match": etag}).status_code == 304
+    client.put("/api/workstations/ws_003", json={"name": "renamed"})
+    response = client.get("/api/workstations/ws_001", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_foreign_and_malformed_tags_are_ignored(client, demo_line):
+    version = line_versions.get(demo_line)
+    for tag in (f'"0000-{version}-{demo_line}"', f'"{line_versions.epoch}-x-{demo_line}"', "*", '""'):
+        assert client.get("/api/workstations/ws_001", headers={"If-None-Match": tag}).status_code == 200
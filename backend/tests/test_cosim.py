@@ -0,0 +1,101 @@
+"""多产线协同仿真测试
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import time
+
+import pytest
+
+from app.simulation.cosim import check_links, run_cosimulation
+
+
+def _line(line_id):
+    return {
+        "production_line": {
+            "id": line_id,
+            "name": line_id,
+            "workstations": [{"id": "ws", "name": "ws", "type": "processing", "capacity": 1, "processing_time": 5}],
+            "buffers": [],
+            "transport_paths": [],
+        },
+        "routines": [{
+            "id": "routine",
+            "name": "routine",
+            "material_type": "raw",
+            "steps": [{"step_id": 1, "workstation_id": "ws", "operation": "processing"}],
+        }],
+    }
+
+
+def _link(from_line, to_line):
+    return {"from_line_id": from_line, "to_line_id": to_line, "transport_time": 10}
+
+
+def test_link_cycle_without_release_is_rejected():
+    configs = {"line_a": _line("line_a"), "line_b": _line("line_b")}
+    links = [_link("line_a", "line_b"), _link("line_b", "line_a")]
+    with pytest.raises(ValueError, match="line_a/routine, line_b/routine"):
+        run_cosimulation(configs, links, {"duration": 1000}, workers=1)
+
+
+def test_chain_from_released_line():
+    configs = {"line_a": _line("line_a"), "line_b": _line("line_b")}
+    result = run_cosimulation(configs, [_link("line_a", "line_b")], {"duration": 1000}, workers=1)
+    assert result["lines"]["line_b"]["kpis"]["completed"] > 0
+
+
+def _chain():
+    configs = {line_id: _line(line_id) for line_id in ("line_a", "line_b", "line_c")}
+    links = [_link("line_a", "line_b"), _link("line_b", "line_c")]
+    return configs, links
+
+
+def test_results_do_not_depend_on_workers_or_window():
+    configs, links = _chain()
+    local = run_cosimulation(configs, links, {"duration": 2000}, seed=3, workers=1)
+    parallel = run_cosimulation(configs, links, {"duration": 2000}, seed=3, workers=2)
+    coarse = run_cosimulation(configs, links, {"duration": 2000}, seed=3, window=500, workers=1)
+    assert parallel["workers"] == 2
+    assert local["lines"] == parallel["lines"] == coarse["lines"]
+    assert local["kpis"] == parallel["kpis"] == coarse["kpis"]
+
+
+def test_transfers_are_conserved():
+    configs, links = _chain()
+    result = run_cosimulation(configs, links, {"duration": 2000}, workers=1)
+    lines = result["lines"]
+    assert [link["transferred"] for link in result["links"]] == [lines["line_a"]["shipped"], lines["line_b"]["shipped"]]
+    # 全厂产出只计末端产线，运输时间为前瞻量
+    assert result["kpis"]["completed"] == lines["line_c"]["kpis"]["completed"]
+    assert result["lookahead"] == 10
+    # 下游产线的首件物料不早于上游首件完工加运输时间
+    assert lines["line_b"]["kpis"]["completed"] < lines["line_a"]["kpis"]["completed"]
+
+
+def test_link_to_unknown_line_or_routine_is_rejected():
+    configs = {"line_a": _line("line_a")}
+    with pytest.raises(ValueError, match="line_x 未参与"):
+        check_links(configs, [_link("line_a", "line_x")])
+    configs["line_b"] = _line("line_b")
+    with pytest.raises(ValueError, match="没有流转路径 missing"):
+        check_links(configs, [{**_link("line_a", "line_b"), "to_routine_id": "missing"}])
+
+
+def test_cosim_endpoint_runs_as_a_job(client, demo_line):
+    response = client.post("/api/simulations/cosim", json={
+        "production_line_ids": [demo_line], "params": {"duration": 1000}, "workers": 1
+    })
+    assert response.status_code == 202
+    job = response.json()
+    assert job["kind"] == "cosim" and job["slots"] == 1
+    deadline = time.time() + 60
+    while job["status"] not in ("completed", "failed") and time.time() < deadline:
+        time.sleep(0.05)
+        job = client.get(f"/api/jobs/{job['id']}").json()
+    assert job["status"] == "completed", job["error"]
+    result = client.get(f"/api/jobs/{job['id']}/result").json()["result"]
+    assert demo_line in result["lines"]
+
+    response = client.post("/api/simulations/cosim", json={"links": [_link(demo_line, "line_missing")]})
+    assert response.status_code in (400, 404)
@@ -0,0 +1,111 @@
+"""产线对比测试：按ID、内容和名称对齐实体，引用换算后比较，以及已保存仿真运行的KPI变化
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import pytest
+
+from app.database.schemas import WorkstationDB
+from app.services import ConfigService
+from app.services.diff_service import DiffService
+from benchmarks.plant_generator import generate_plant
+
+
+def _unchanged(diff):
+    return all(
+        (counts["added"], counts["removed"], counts["changed"]) == (0, 0, 0)
+        for counts in diff["summary"].values()
+    )
+
+
+def _clone(client, line_id):
+    return client.post(f"/api/production-lines/{line_id}/clone").json()["id"]
+
+
+def test_clone_is_aligned_by_id(client, demo_line):
+    clone = _clone(client, demo_line)
+    diff = client.get(f"/api/production-lines/{demo_line}/diff/{clone}").json()
+    assert _unchanged(diff)
+    assert diff["summary"]["workstations"]["unchanged"] == 3
+    assert diff["kpis"] is None
+
+
+def _set_processing_time(db_session, ws_id, value):
+    db_session.query(WorkstationDB).filter(WorkstationDB.id == ws_id).update({"processing_time": value})
+    db_session.commit()
+
+
+def test_parameter_changes_with_deltas(client, demo_line, db_session):
+    clone = _clone(client, demo_line)
+    client.put(f"/api/workstations/ws_001@{clone}", json={"capacity": 3})
+    _set_processing_time(db_session, f"ws_001@{clone}", '{"type": "fixed", "value": 12}')
+    client.put(f"/api/workstations/ws_002@{clone}", json={"position": {"x": 999, "y": 999}})
+    diff = client.get(f"/api/production-lines/{demo_line}/diff/{clone}").json()
+
+    assert diff["summary"]["workstations"] == {"added": 0, "removed": 0, "changed": 1, "unchanged": 2}
+    entry = diff["workstations"]["changed"][0]
+    assert (entry["base_id"], entry["target_id"], entry["name"]) == ("ws_001", f"ws_001@{clone}", "加工站A")
+    assert entry["changes"]["capacity"] == {"base": 1, "target": 3, "delta": 2}
+    assert entry["changes"]["processing_time"]["delta"] == {"value": 2}
+
+
+def test_independent_lines_are_aligned_by_content(db_session):
+    """ID全部不同、内容相同的两条产线：引用先换算为对齐后的ID，整体没有差异"""
+    for line_id in ("line_a", "line_b"):
+        ConfigService.import_config(db_session, generate_plant(16, cell_size=8, seed=5, line_id=line_id))
+    diff = DiffService.diff_lines(db_session, "line_a", "line_b")
+    assert _unchanged(diff)
+    assert diff["summary"]["steps"]["unchanged"] == sum(
+        len(routine["steps"]) for routine in ConfigService.build_config(db_session, "line_a")["routines"]
+    )
+
+    # 内容有变化时按名称对齐，报告为修改而不是一增一删
+    db_session.query(WorkstationDB).filter(WorkstationDB.id == "line_b_ws_000002").update({"capacity": 9})
+    db_session.commit()
+    diff = DiffService.diff_lines(db_session, "line_a", "line_b")
+    assert diff["summary"]["workstations"]["changed"] == 1
+    assert diff["workstations"]["changed"][0]["target_id"] == "line_b_ws_000002"
+    assert diff["summary"]["workstations"]["added"] == diff["summary"]["workstations"]["removed"] == 0
+    # 引用该工作站的步骤随之对齐，没有差异
+    assert diff["summary"]["steps"]["changed"] == 0
+
+
+def test_added_removed_and_json_format(client, demo_line, db_session):
+    clone = _clone(client, demo_line)
+    assert client.delete(f"/api/workstations/ws_003@{clone}").status_code == 204
+    client.post("/api/workstations/", json={
+        "production_line_id": clone, "name": "新工作站", "type": "processing", "capacity": 1,
+        "processing_time": {"type": "fixed", "value": 5}
+    })
+    # JSON列的键顺序和 10/10.0 的差别不算变化
+    _set_processing_time(db_session, f"ws_001@{clone}", '{"value": 10.0, "type": "fixed"}')
+
+    diff = client.get(f"/api/production-lines/{demo_line}/diff/{clone}").json()
+    assert [entry["name"] for entry in diff["workstations"]["removed"]] == ["包装站"]
+    assert [entry["name"] for entry in diff["workstations"]["added"]] == ["新工作站"]
+    assert diff["summary"]["workstations"]["changed"] == 0
+
+
+def test_kpis_of_matching_saved_runs(client, demo_line, db_session):
+    clone = _clone(client, demo_line)
+    _set_processing_time(db_session, f"ws_001@{clone}", '{"type": "fixed", "value": 8}')
+    for line_id in (demo_line, clone):
+        response = client.post("/api/simulations/run", json={
+            "production_line_id": line_id, "seed": 1, "params": {"duration": 5000}, "use_cache": False, "save": True,
+        })
+        assert response.status_code == 200
+
+    kpis = client.get(f"/api/production-lines/{demo_line}/diff/{clone}").json()["kpis"]
+    assert not kpis["base_run"]["stale"] and not kpis["target_run"]["stale"]
+    completed = kpis["line"]["completed"]
+    assert completed["delta"] == completed["target"] - completed["base"]
+    changed = client.get(f"/api/production-lines/{demo_line}/diff/{clone}").json()["workstations"]["changed"][0]
+    assert "utilization" in changed["kpis"]
+
+    # 运行之后又有编辑时标记为过期
+    client.put(f"/api/workstations/ws_002@{clone}", json={"capacity": 2})
+    assert client.get(f"/api/production-lines/{demo_line}/diff/{clone}").json()["kpis"]["target_run"]["stale"]
+
+
+def test_missing_line(client, demo_line):
+    assert client.get(f"/api/production-lines/{demo_line}/diff/missing").status_code == 404
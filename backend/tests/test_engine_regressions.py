@@ -0,0 +1,107 @@
+"""仿真引擎回归测试
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import threading
+
+from app.simulation import run_simulation
+
+
+def _run_with_timeout(config, params, timeout: float = 30.0):
+    """在守护线程中运行仿真，超时视为卡死（返回None）"""
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(run_simulation(config, params)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return result or None
+
+
+def test_parallel_first_step_with_saturated_release():
+    """首道工序为并行步骤、未配置投料间隔（连续投料）时，投料受首个分支的加工位约束，不会在0时刻无限投料"""
+    config = {
+        "production_line": {
+            "id": "line_parallel",
+            "name": "并行首工序",
+            "workstations": [
+                {"id": "ws_a", "name": "A", "type": "processing", "capacity": 1,
+                 "processing_time": {"type": "fixed", "value": 5}},
+                {"id": "ws_b", "name": "B", "type": "processing", "capacity": 1,
+                 "processing_time": {"type": "fixed", "value": 7}},
+            ],
+            "buffers": [],
+            "transport_paths": [],
+        },
+        "routines": [{
+            "id": "routine_parallel",
+            "name": "并行",
+            "material_type": "raw",
+            "steps": [{
+                "id": "step_1",
+                "step_id": 1,
+                "operation": "processing",
+                "parallel": True,
+                "merge_condition": "all_complete",
+                "branches": [
+                    {"workstation_id": "ws_a", "processing_time": 5},
+                    {"workstation_id": "ws_b", "processing_time": 7},
+                ],
+            }],
+        }],
+    }
+    result = _run_with_timeout(config, {"duration": 100})
+    assert result is not None, "仿真未在限定时间内结束"
+    assert result["kpis"]["completed"] > 0
+    # 分支A每5秒加工一件，100秒内最多投料约20件
+    assert result["workstations"]["ws_a"]["processed"] <= 21
+
+
+def test_full_downstream_buffer_blocks_stations_feeding_parallel_step():
+    """并行步骤下游的输入缓冲区满时，阻塞经并行步骤传回上游：上游工作站阻塞，分支前不堆积物料"""
+    config = {
+        "production_line": {
+            "id": "line_parallel_blocking",
+            "name": "并行步骤阻塞",
+            "workstations": [
+                {"id": "ws_up", "name": "上游", "type": "processing", "capacity": 1,
+                 "processing_time": {"type": "fixed", "value": 1}},
+                {"id": "ws_a", "name": "A", "type": "processing", "capacity": 1,
+                 "processing_time": {"type": "fixed", "value": 2}},
+                {"id": "ws_b", "name": "B", "type": "processing", "capacity": 1,
+                 "processing_time": {"type": "fixed", "value": 3}},
+                {"id": "ws_down", "name": "下游", "type": "processing", "capacity": 1,
+                 "processing_time": {"type": "fixed", "value": 50}, "input_buffer_id": "buf_down"},
+            ],
+            "buffers": [{"id": "buf_down", "name": "下游缓冲区", "capacity": 2}],
+            "transport_paths": [],
+        },
+        "routines": [{
+            "id": "routine_parallel",
+            "name": "并行",
+            "material_type": "raw",
+            "steps": [
+                {"step_id": 1, "workstation_id": "ws_up", "operation": "processing"},
+                {
+                    "step_id": 2,
+                    "operation": "processing",
+                    "parallel": True,
+                    "merge_condition": "all_complete",
+                    "branches": [
+                        {"workstation_id": "ws_a", "processing_time": 2},
+                        {"workstation_id": "ws_b", "processing_time": 3},
+                    ],
+                },
+                {"step_id": 3, "workstation_id": "ws_down", "operation": "processing"},
+            ],
+        }],
+    }
+    result = _run_with_timeout(config, {"duration": 5000})
+    assert result is not None, "仿真未在限定时间内结束"
+    stations = result["workstations"]
+    # 下游每50秒加工一件，上游只能比下游多加工在缓冲区、各分支和上游工作站中的几件
+    assert stations["ws_down"]["processed"] >= 95
+    assert stations["ws_up"]["processed"] <= stations["ws_down"]["processed"] + 6
+    assert stations["ws_up"]["blocked"] > 0.9
+    assert stations["ws_a"]["blocked"] > 0.9
+    # 在制品不超过上游、两个分支、缓冲区和下游工作站的容量
+    assert result["kpis"]["avg_wip"] <= 6
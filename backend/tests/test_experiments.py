@@ -0,0 +1,104 @@
+"""参数扫描实验测试：设计矩阵、场景构建和断点续跑
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import itertools
+
+import pytest
+
+from app.models.experiment import ExperimentCreate, Factor
+from app.services.experiment_service import ExperimentService
+
+
+def _factor(name, low=1, high=3, **kwargs):
+    return Factor(name=name, target="workstation", id="ws_001", field="capacity", low=low, high=high, **kwargs)
+
+
+def test_full_factorial_enumerates_all_level_combinations():
+    factors = [_factor("a"), _factor("b", levels=[1, 2, 3])]
+    design = ExperimentService.generate_design(factors, "full_factorial")
+    assert len(design) == 6
+    assert {(row["a"], row["b"]) for row in design} == set(itertools.product([1, 3], [1, 2, 3]))
+
+
+def test_latin_hypercube_samples_each_stratum_once():
+    factors = [
+        Factor(name=name, target="workstation", id="ws_001", field="processing_time.value", low=0, high=10)
+        for name in ("a", "b")
+    ]
+    design = ExperimentService.generate_design(factors, "latin_hypercube", samples=5, seed=3)
+    assert len(design) == 5
+    for name in ("a", "b"):
+        assert sorted(int(row[name] // 2) for row in design) == [0, 1, 2, 3, 4]
+    assert design == ExperimentService.generate_design(factors, "latin_hypercube", samples=5, seed=3)
+
+
+def test_fractional_factorial_is_balanced_and_orthogonal():
+    factors = [_factor(name, low=0, high=1) for name in "abcd"]
+    design = ExperimentService.generate_design(factors, "fractional_factorial", runs=8)
+    assert len(design) == 8
+    coded = [[2 * row[name] - 1 for name in "abcd"] for row in design]
+    for i, j in itertools.combinations(range(4), 2):
+        assert sum(row[i] for row in coded) == 0
+        assert sum(row[i] * row[j] for row in coded) == 0
+
+
+def test_fractional_factorial_rejects_invalid_runs():
+    factors = [_factor(name, low=0, high=1) for name in "abc"]
+    with pytest.raises(ValueError, match="2的幂"):
+        ExperimentService.generate_design(factors, "fractional_factorial", runs=6)
+    with pytest.raises(ValueError, match="不能超过"):
+        ExperimentService.generate_design(factors, "fractional_factorial", runs=16)
+
+
+def test_apply_factors_sets_nested_fields_on_a_copy(default_config):
+    factors = [
+        Factor(name="cap", target="buffer", id="buf_002", field="capacity", levels=[5]),
+        Factor(name="mean", target="workstation", id="ws_003", field="processing_time.mean", levels=[9.5]),
+    ]
+    config = ExperimentService.apply_factors(default_config, factors, {"cap": 5, "mean": 9.5})
+    buffers = {b["id"]: b for b in config["production_line"]["buffers"]}
+    stations = {w["id"]: w for w in config["production_line"]["workstations"]}
+    assert buffers["buf_002"]["capacity"] == 5
+    assert stations["ws_003"]["processing_time"]["mean"] == 9.5
+    original = {b["id"]: b for b in default_config["production_line"]["buffers"]}
+    assert original["buf_002"]["capacity"] == 50
+
+
+def test_unknown_entity_is_rejected_before_running(default_config):
+    request = ExperimentCreate(
+        production_line_id="line_demo",
+        factors=[Factor(target="workstation", id="ws_missing", field="capacity", low=1, high=2)],
+    )
+    with pytest.raises(ValueError, match="ws_missing"):
+        ExperimentService.check(default_config, request)
+
+
+def test_experiment_resumes_from_checkpoint(default_config):
+    request = ExperimentCreate(
+        production_line_id="line_demo",
+        factors=[Factor(target="workstation", id="ws_003", field="capacity", levels=[1, 2])],
+        replications=2,
+        params={"duration": 3600},
+        workers=1,
+        study_id="resume_test",
+    )
+    first = ExperimentService.run_experiment(default_config, request)
+    assert first["statistics"] == {"scenarios": 2, "replications": 2, "runs": 4, "simulated": 4, "skipped": 0}
+    # 公共随机数：同一重复在各场景中使用同一种子
+    assert [row["seed"] for row in first["runs"]] == [0, 1, 0, 1]
+
+    second = ExperimentService.run_experiment(default_config, request)
+    assert second["statistics"]["simulated"] == 0
+    assert second["statistics"]["skipped"] == 4
+    assert second["runs"] == first["runs"]
+
+
+def test_doe_endpoint_validates_before_queueing(client, demo_line):
+    response = client.post("/api/experiments/doe", json={
+        "production_line_id": demo_line,
+        "factors": [{"target": "workstation", "id": "ws_missing", "field": "capacity", "low": 1, "high": 2}],
+    })
+    assert response.status_code == 400
+    assert "ws_missing" in response.json()["detail"]
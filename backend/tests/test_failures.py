@@ -0,0 +1,64 @@
+"""设备故障测试：故障/修复周期、中断加工的续作和已取消事件的压缩
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import pytest
+
+from app.models.simulation import SimulationParams
+from app.simulation import LineModel, Simulation, run_simulation
+from app.simulation.engine import COMPACT_THRESHOLD
+
+
+def _line(properties=None, processing_time=10, capacity=1):
+    return {
+        "production_line": {
+            "id": "line_failures",
+            "name": "故障",
+            "workstations": [{
+                "id": "ws", "name": "ws", "type": "processing", "capacity": capacity,
+                "processing_time": {"type": "fixed", "value": processing_time},
+                "properties": properties or {},
+            }],
+            "buffers": [],
+            "transport_paths": [],
+        },
+        "routines": [{
+            "id": "routine",
+            "name": "routine",
+            "material_type": "raw",
+            "steps": [{"step_id": 1, "workstation_id": "ws", "operation": "processing"}],
+        }],
+    }
+
+
+def test_interrupted_part_resumes_remaining_time():
+    # 每95秒故障一次、修复20秒：1150秒内10次故障，运行时间950秒，按10秒一件加工95件
+    properties = {"mtbf": {"type": "fixed", "value": 95}, "mttr": {"type": "fixed", "value": 20}}
+    result = run_simulation(_line(properties), {"duration": 1150})
+    station = result["workstations"]["ws"]
+    assert station["failures"] == 10
+    assert station["availability"] == pytest.approx(950 / 1150)
+    assert station["processed"] == 95
+
+
+def test_line_without_failure_model_never_fails():
+    result = run_simulation(_line(), {"duration": 1000})
+    assert result["workstations"]["ws"]["failures"] == 0
+    assert result["workstations"]["ws"]["availability"] == 1.0
+
+
+def test_mtbf_requires_mttr():
+    with pytest.raises(ValueError, match="mtbf 和 mttr"):
+        LineModel(_line({"mtbf": 100}))
+
+
+def test_cancelled_events_do_not_accumulate():
+    # 频繁故障，每次故障都取消加工结束事件
+    properties = {"mtbf": 3, "mttr": 1}
+    simulation = Simulation(LineModel(_line(properties, capacity=50)), SimulationParams(duration=20000), seed=1)
+    simulation.run()
+    result = simulation.result()
+    assert result["workstations"]["ws"]["failures"] > 1000
+    cancelled = len(simulation._cancelled)
+    assert cancelled <= COMPACT_THRESHOLD or cancelled * 2 <= len(simulation._calendar)
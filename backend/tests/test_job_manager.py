@@ -0,0 +1,159 @@
+"""仿真任务管理器测试：运行名额、暂停/继续和取消
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import time
+
+import pytest
+
+from app.models.simulation import OeeReportCreate, SimulationRunCreate
+from app.services.job_manager import FINISHED_STATES, OEE, JobManager
+from app.services.result_cache import result_cache
+from benchmarks.plant_generator import generate_plant
+
+
+def _config():
+    return {
+        "production_line": {
+            "id": "line_jobs",
+            "name": "line_jobs",
+            "workstations": [{"id": "ws", "name": "ws", "type": "processing", "capacity": 1, "processing_time": 5}],
+            "buffers": [],
+            "transport_paths": [],
+        },
+        "routines": [{
+            "id": "routine",
+            "name": "routine",
+            "material_type": "raw",
+            "steps": [{"step_id": 1, "workstation_id": "ws", "operation": "processing"}],
+        }],
+    }
+
+
+def _simulation(duration=2000, seed=0):
+    return SimulationRunCreate(
+        production_line_id="line_jobs", seed=seed, params={"duration": duration}, use_cache=False
+    )
+
+
+def _wait_until(predicate, timeout=60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return
+        time.sleep(0.02)
+    raise AssertionError("等待超时")
+
+
+def _wait(manager, job_id, timeout=120.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in FINISHED_STATES:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"任务 {job_id} 未在 {timeout} 秒内结束")
+
+
+def test_task_slots_are_capped():
+    manager = JobManager(workers=4)
+    request = OeeReportCreate(production_line_id="line_jobs", replications=3)
+    assert manager._task_slots(OEE, request, _config()) == 3
+    request = OeeReportCreate(production_line_id="line_jobs", replications=10, workers=8)
+    assert manager._task_slots(OEE, request, _config()) == 4
+    request = OeeReportCreate(production_line_id="line_jobs", replications=10, workers=2)
+    assert manager._task_slots(OEE, request, _config()) == 2
+
+
+def test_study_task_borrows_slots():
+    """研究任务占用其进程池进程数的名额，名额用满时后提交的仿真任务排队，研究任务结束后才启动"""
+    manager = JobManager(workers=2)
+    try:
+        request = OeeReportCreate(
+            production_line_id="line_jobs", replications=4, params={"duration": 20000}, use_cache=False
+        )
+        oee = manager.submit_task(OEE, request, _config(), None)
+        simulation = manager.submit(_simulation(), _config(), "fingerprint")
+        assert oee["slots"] == 2
+        assert simulation["status"] == "queued"
+        stats = manager.stats()
+        assert stats["busy_slots"] == 2
+        assert stats["queued"] == 1
+
+        oee = _wait(manager, oee["id"])
+        simulation = _wait(manager, simulation["id"])
+        assert oee["status"] == simulation["status"] == "completed"
+        assert len(manager.result(oee["id"])["result"]["replications"]) == 4
+        assert simulation["started_at"] >= oee["finished_at"]
+        assert manager.stats()["busy_slots"] == 0
+    finally:
+        manager.shutdown()
+
+
+def test_pause_resume_and_cancel():
+    manager = JobManager(workers=1)
+    config = generate_plant(50)
+    try:
+        long_request = SimulationRunCreate(
+            production_line_id="line_jobs", params={"duration": 60000}, use_cache=False
+        )
+        first = manager.submit(long_request, config, "fingerprint_long")
+        _wait_until(lambda: manager.get(first["id"])["sim_time"] > 0)
+
+        paused = manager.pause(first["id"])
+        assert paused["status"] == "paused"
+        # 当前分段结束后不再推进
+        time.sleep(0.5)
+        frozen = manager.get(first["id"])["sim_time"]
+        time.sleep(0.3)
+        assert manager.get(first["id"])["sim_time"] == frozen < 60000
+        live = manager.bottlenecks(first["id"])
+        assert live["status"] == "paused" and live["bottlenecks"] is not None
+
+        # 已暂停的任务保留运行名额，后提交的任务排队
+        second = manager.submit(_simulation(seed=1), _config(), "fingerprint")
+        assert second["status"] == "queued"
+        assert manager.cancel(second["id"])["status"] == "cancelled"
+        assert manager.stats()["queued"] == 0
+        with pytest.raises(ValueError):
+            manager.cancel(second["id"])
+
+        assert manager.resume(first["id"])["status"] == "running"
+        finished = _wait(manager, first["id"])
+        assert finished["status"] == "completed"
+        assert finished["progress"] == 1.0
+        assert manager.bottlenecks(first["id"])["bottlenecks"]["average"] is not None
+
+        third = manager.submit(long_request, config, "fingerprint_other")
+        _wait_until(lambda: manager.get(third["id"])["status"] == "running")
+        assert manager.cancel(third["id"])["status"] == "cancelled"
+        _wait_until(lambda: manager.stats()["busy_slots"] == 0)
+        with pytest.raises(ValueError, match="未完成"):
+            manager.result(third["id"])
+    finally:
+        manager.shutdown()
+
+
+def test_cached_result_completes_without_a_worker():
+    manager = JobManager(workers=1)
+    request = SimulationRunCreate(production_line_id="line_jobs", seed=37, params={"duration": 500})
+    result_cache.put(result_cache.key("fingerprint_cached", 37, request.params), {"time": 500, "kpis": {}})
+    job = manager.submit(request, _config(), "fingerprint_cached")
+    assert job["status"] == "completed" and job["cached"] is True
+    assert manager.stats()["busy_slots"] == 0
+    assert manager.result(job["id"])["result"] == {"time": 500, "kpis": {}}
+
+
+def test_study_tasks_cannot_be_paused():
+    manager = JobManager(workers=1)
+    try:
+        request = OeeReportCreate(production_line_id="line_jobs", replications=1, params={"duration": 500})
+        job = manager.submit_task(OEE, request, _config(), None)
+        with pytest.raises(ValueError, match="只有仿真任务"):
+            manager.pause(job["id"])
+        with pytest.raises(ValueError, match="只有仿真任务"):
+            manager.bottlenecks(job["id"])
+        _wait(manager, job["id"])
+    finally:
+        manager.shutdown()
@@ -0,0 +1,67 @@
+"""仿真产线模型测试：步骤连线和跳转引用的解析
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import pytest
+
+from app.simulation.model import END, SCRAP, LineModel
+
+
+def _config(steps, step_links=None):
+    return {
+        "production_line": {
+            "id": "line_model",
+            "name": "模型",
+            "workstations": [
+                {"id": ws_id, "name": ws_id, "type": "processing", "capacity": 1, "processing_time": 5}
+                for ws_id in ("ws_1", "ws_2", "ws_3")
+            ],
+            "buffers": [],
+            "transport_paths": [],
+        },
+        "routines": [{
+            "id": "routine_model",
+            "name": "模型",
+            "material_type": "raw",
+            "steps": steps,
+            "step_links": step_links or [],
+        }],
+    }
+
+
+def _step(step_uuid, step_id, workstation_id, **extra):
+    return {"id": step_uuid, "step_id": step_id, "workstation_id": workstation_id, "operation": "processing", **extra}
+
+
+def test_quality_routes_resolve_step_uuids():
+    steps = [
+        _step("a1f0", 1, "ws_1"),
+        _step("b2e1", 2, "ws_2", conditions={
+            "type": "quality_check", "pass_rate": 0.9, "pass_route": "c3d2", "fail_route": "a1f0"
+        }),
+        _step("c3d2", 3, "ws_3"),
+    ]
+    check = LineModel(_config(steps)).routines[0].steps[1]
+    assert (check.pass_next, check.fail_next) == (2, 0)
+
+
+def test_unresolved_route_is_rejected():
+    steps = [
+        _step("a1f0", 1, "ws_1", conditions={"type": "quality_check", "pass_rate": 0.9, "fail_route": "missing"}),
+        _step("b2e1", 2, "ws_2"),
+    ]
+    with pytest.raises(ValueError, match="fail_route"):
+        LineModel(_config(steps))
+
+
+def test_step_links_define_order():
+    steps = [_step("a1f0", 1, "ws_1"), _step("b2e1", 2, "ws_2"), _step("c3d2", 3, "ws_3")]
+    links = [
+        {"id": "link_1", "from_step_id": "c3d2", "to_step_id": "a1f0"},
+        {"id": "link_2", "from_step_id": "a1f0", "to_step_id": "b2e1"},
+    ]
+    routine = LineModel(_config(steps, links)).routines[0]
+    assert [step.station_id for step in routine.steps] == ["ws_3", "ws_1", "ws_2"]
+    assert [step.pass_next for step in routine.steps] == [1, 2, END]
+    assert routine.steps[0].fail_next == SCRAP
@@ -0,0 +1,70 @@
+"""物料存储测试
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+from app.simulation import run_simulation
+from app.simulation.materials import FREE, PROCESSING, WAITING, MaterialStore
+from benchmarks.plant_generator import generate_plant
+
+
+def test_released_slots_are_reused_most_recent_first():
+    store = MaterialStore(capacity=4)
+    ids = [store.allocate(0, 0.0) for _ in range(4)]
+    assert ids == [0, 1, 2, 3]
+    store.release(1)
+    store.release(3)
+    assert store.size == 2
+    assert store.state[3] == FREE
+    assert store.allocate(0, 1.0) == 3
+    assert store.allocate(0, 1.0) == 1
+    assert store.capacity == 4
+
+
+def test_allocate_resets_reused_slot():
+    store = MaterialStore(capacity=2)
+    mid = store.allocate(5, 2.0, location=3, material_type=1, state=PROCESSING)
+    store.step[mid] = 7
+    store.branch[mid] = 1
+    store.set_property(mid, "quality", "A")
+    store.release(mid)
+    assert store.allocate(0, 9.0) == mid
+    assert (store.routine[mid], store.step[mid], store.branch[mid], store.join[mid]) == (0, 0, -1, -1)
+    assert store.created[mid] == 9.0
+    assert store.state[mid] == WAITING
+    assert store.get_properties(mid) == {}
+
+
+def test_growth_doubles_capacity_and_keeps_values():
+    store = MaterialStore(capacity=3)
+    for i in range(3):
+        store.allocate(i, float(i))
+    # 扩容替换列对象，之前的值保留，新槽位按ID顺序分配
+    assert store.allocate(3, 3.0) == 3
+    assert store.capacity == 6
+    assert [store.routine[i] for i in range(4)] == [0, 1, 2, 3]
+    assert [store.allocate(0, 0.0) for _ in range(2)] == [4, 5]
+    assert store.allocate(0, 0.0) == 6
+    assert store.capacity == 12
+
+
+def test_vector_counts():
+    store = MaterialStore(capacity=8, locations=["buf", "ws"])
+    buf, ws = store.location_codes["buf"], store.location_codes["ws"]
+    for _ in range(3):
+        store.allocate(0, 0.0, location=buf)
+    busy = store.allocate(0, 0.0, location=ws, state=PROCESSING)
+    store.release(store.allocate(0, 0.0, location=ws))
+    assert store.count_by_location() == {"buf": 3, "ws": 1}
+    assert store.count_by_state()["waiting"] == 3
+    assert store.count_by_state()["processing"] == 1
+    assert list(store.active()) == [0, 1, 2, busy]
+    assert not store.column("state").flags.writeable
+
+
+def test_plant_with_more_routines_than_int16():
+    """流转路径序号超过 int16 范围（每个工作站一条流转路径）时仍能投料"""
+    config = generate_plant(33000, cell_size=1)
+    assert len(config["routines"]) > 32767
+    result = run_simulation(config, {"duration": 1})
+    assert result["time"] == 1
@@ -0,0 +1,76 @@
+"""运行指标测试：引擎插桩不影响结果、统计汇总和 /metrics 的Prometheus文本格式
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import re
+
+import pytest
+
+from app.models.simulation import SimulationParams
+from app.simulation import EngineProfiler, LineModel, Simulation
+from app.simulation.instrumentation import EngineMetrics
+from app.services.metrics import CONTENT_TYPE
+
+
+SAMPLE_LINE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_]+="[^"]*",?)*\})? \S+$')
+
+
+def _run(config, profiler=None):
+    simulation = Simulation(LineModel(config), SimulationParams(duration=20000), 3, profiler=profiler)
+    simulation.run(10000)
+    simulation.run()
+    return simulation.output()
+
+
+def test_profiled_run_matches_plain_run(default_config):
+    profiler = EngineProfiler(sample_every=8, sample_size=16)
+    assert _run(default_config, profiler) == _run(default_config)
+
+    snapshot = profiler.snapshot()
+    assert snapshot["events"] == sum(handler["count"] for handler in snapshot["handlers"].values()) > 0
+    assert all(len(handler["samples"]) <= 16 for handler in snapshot["handlers"].values())
+    sampled = sum(len(handler["samples"]) for handler in snapshot["handlers"].values())
+    assert 0 < sampled <= snapshot["events"] // 8
+    assert snapshot["calendar_max"] >= snapshot["calendar_size"] > 0
+
+
+def test_engine_metrics_merge_runs(default_config):
+    metrics = EngineMetrics(sample_size=4)
+    snapshots = []
+    for _ in range(2):
+        profiler = EngineProfiler(sample_every=1)
+        _run(default_config, profiler)
+        snapshots.append(profiler.snapshot())
+        metrics.merge(snapshots[-1])
+
+    summary = metrics.summary()
+    assert summary["runs"] == 2
+    assert summary["events"] == sum(snapshot["events"] for snapshot in snapshots)
+    assert summary["last_run"]["events"] == snapshots[-1]["events"]
+    for name, handler in summary["handlers"].items():
+        assert handler["count"] == sum(snapshot["handlers"][name]["count"] for snapshot in snapshots)
+        latency = handler["latency"]
+        assert latency[0.5] <= latency[0.9] <= latency[0.99]
+
+
+def test_metrics_endpoint(client, demo_line):
+    assert client.get("/api/workstations/", params={"production_line_id": demo_line}).status_code == 200
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(CONTENT_TYPE)
+
+    declared = set()
+    for line in response.text.splitlines():
+        if line.startswith("# TYPE "):
+            name, kind = line.split()[2:]
+            assert kind in ("counter", "gauge", "histogram", "summary")
+            declared.add(name)
+        elif not line.startswith("# HELP "):
+            assert SAMPLE_LINE.match(line), line
+            name = re.split(r"[{ ]", line, 1)[0]
+            assert re.sub(r"_(bucket|sum|count)$", "", name) in declared or name in declared
+    for name in ("process_cpu_seconds_total", "simulation_job_workers", "simulation_job_busy_slots",
+                 "result_cache_entries", "http_request_duration_seconds"):
+        assert name in declared
+    assert 'http_request_duration_seconds_count{route="GET /api/workstations/"}' in response.text
@@ -0,0 +1,110 @@
+"""OEE测试：状态时间累加器、可用率/性能率/质量率和多次重复的汇总
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.simulation import aggregate_oee, run_simulation
+from app.simulation.oee import StateTimes
+
+
+def _line(ws_1=None, ws_2=None, steps=None):
+    return {
+        "production_line": {
+            "id": "line_oee",
+            "name": "OEE",
+            "workstations": [
+                {"id": "ws_1", "name": "1", "type": "processing", "capacity": 1,
+                 "processing_time": {"type": "fixed", "value": 10}, **(ws_1 or {})},
+                {"id": "ws_2", "name": "2", "type": "processing", "capacity": 1,
+                 "processing_time": {"type": "fixed", "value": 5}, **(ws_2 or {})},
+            ],
+            "buffers": [],
+            "transport_paths": [],
+        },
+        "routines": [{
+            "id": "routine",
+            "name": "routine",
+            "material_type": "raw",
+            "steps": steps or [
+                {"step_id": 1, "workstation_id": "ws_1", "operation": "processing"},
+                {"step_id": 2, "workstation_id": "ws_2", "operation": "processing"},
+            ],
+        }],
+    }
+
+
+def test_state_times_accumulate_slot_seconds():
+    station = SimpleNamespace(busy=0, blocked=0, reserved=0, down=False)
+    states = StateTimes(capacity=2)
+    station.busy = 2
+    states.update(0.0, station)
+    station.busy, station.blocked = 1, 1
+    states.update(10.0, station)
+    states.update(10.0, station)  # 同一时刻重复调用不重复累加
+    station.down = True
+    states.update(15.0, station)
+    processing, blocked, starved, idle, breakdown = states.totals(20.0)
+    assert (processing, blocked, idle) == (25.0, 5.0, 0.0)
+    assert breakdown == 10.0  # 故障5秒 × 2个加工位
+    assert starved == 0.0
+
+    states.reset(20.0)
+    station.down = False
+    station.busy, station.blocked = 0, 0
+    states.update(20.0, station)
+    assert states.totals(30.0) == [0.0, 0.0, 20.0, 0.0, 0.0]
+
+
+def test_bottleneck_and_starved_station_ratios():
+    oee = run_simulation(_line(), {"duration": 10000})["oee"]
+    ws_1, ws_2 = oee["workstations"]["ws_1"], oee["workstations"]["ws_2"]
+    assert ws_1["performance"] == pytest.approx(1.0, abs=1e-3)
+    # ws_2 每10秒只来一件，一半时间缺料
+    assert ws_2["performance"] == pytest.approx(0.5, abs=1e-3)
+    assert ws_2["states"]["starved"] == pytest.approx(0.5, abs=1e-3)
+    for station in (ws_1, ws_2, oee["line"]):
+        assert sum(station["states"].values()) == pytest.approx(1.0)
+    assert oee["line"]["availability"] == 1.0
+
+
+def test_ideal_cycle_time_sets_performance():
+    oee = run_simulation(_line(ws_1={"properties": {"ideal_cycle_time": 8}}), {"duration": 10000})["oee"]
+    assert oee["workstations"]["ws_1"]["performance"] == pytest.approx(0.8, abs=1e-3)
+
+
+def test_breakdowns_reduce_availability():
+    failures = {"properties": {"mtbf": {"type": "fixed", "value": 95}, "mttr": {"type": "fixed", "value": 20}}}
+    oee = run_simulation(_line(ws_1=failures), {"duration": 1150})["oee"]
+    ws_1 = oee["workstations"]["ws_1"]
+    assert ws_1["availability"] == pytest.approx(950 / 1150)
+    assert ws_1["states"]["breakdown"] == pytest.approx(200 / 1150)
+    assert ws_1["oee"] == pytest.approx(ws_1["availability"] * ws_1["performance"] * ws_1["quality"])
+
+
+def test_rejected_parts_reduce_quality():
+    steps = [
+        {"step_id": 1, "workstation_id": "ws_1", "operation": "processing"},
+        {"step_id": 2, "workstation_id": "ws_2", "operation": "inspection",
+         "conditions": {"type": "quality_check", "pass_rate": 0.8}},
+    ]
+    result = run_simulation(_line(steps=steps), {"duration": 20000}, seed=4)
+    ws_2 = result["oee"]["workstations"]["ws_2"]
+    assert ws_2["rejected"] == result["kpis"]["scrapped"] > 0
+    assert ws_2["quality"] == pytest.approx(1 - ws_2["rejected"] / ws_2["processed"])
+    assert ws_2["quality"] == pytest.approx(0.8, abs=0.05)
+
+
+def test_aggregate_over_replications():
+    failures = {"properties": {"mtbf": 200, "mttr": 30}}
+    reports = [run_simulation(_line(ws_1=failures), {"duration": 5000}, seed)["oee"] for seed in range(3)]
+    summary = aggregate_oee(reports)
+    assert summary["replications"] == 3
+    availability = [report["workstations"]["ws_1"]["availability"] for report in reports]
+    entry = summary["workstations"]["ws_1"]["availability"]
+    assert entry["mean"] == pytest.approx(sum(availability) / 3)
+    assert (entry["min"], entry["max"]) == (min(availability), max(availability))
+    assert entry["std"] > 0
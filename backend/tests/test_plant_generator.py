@@ -0,0 +1,63 @@
+"""合成产线生成器测试：确定性、规模、通过验证、可导入和可仿真
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import json
+
+import pytest
+import yaml
+
+from app.services import ConfigService, ValidationService
+from app.services.config_validator import ConfigValidator
+from app.simulation import run_simulation
+from benchmarks.plant_generator import generate_plant, main, plant_size
+
+
+def test_same_seed_same_plant():
+    assert generate_plant(45, cell_size=7, seed=3) == generate_plant(45, cell_size=7, seed=3)
+    assert generate_plant(45, cell_size=7, seed=3) != generate_plant(45, cell_size=7, seed=4)
+
+
+@pytest.mark.parametrize("workstations, cell_size", [(1, 10), (3, 10), (25, 10), (40, 6)])
+def test_plant_size(workstations, cell_size):
+    config = generate_plant(workstations, cell_size)
+    size = plant_size(config)
+    assert size["workstations"] == workstations
+    assert size["routines"] == -(-workstations // cell_size)
+    ids = [entity["id"] for key in ("workstations", "buffers", "transport_paths") for entity in config["production_line"][key]]
+    assert len(ids) == len(set(ids))
+    assert all(entity_id.startswith(f"line_synth_{workstations}_") for entity_id in ids)
+
+
+def test_rejects_empty_plant():
+    with pytest.raises(ValueError):
+        generate_plant(0)
+
+
+def test_generated_plant_passes_validation(db_session):
+    config = generate_plant(35, cell_size=10, seed=1)
+    for result in (ConfigValidator.validate(config), ValidationService.validate_config(config)):
+        assert result["valid"], result["errors"]
+        assert result["errors"] == []
+
+    ConfigService.import_config(db_session, config)
+    result = ValidationService.validate_production_line(db_session, config["production_line"]["id"])
+    assert result["valid"], result["errors"]
+
+
+def test_generated_plant_simulates():
+    config = generate_plant(20, cell_size=10)
+    result = run_simulation(config, {"duration": 3000})
+    assert result["kpis"]["completed"] > 0
+    # 各单元互不连通，每个工作站都有加工
+    assert all(station["processed"] > 0 for station in result["workstations"].values())
+
+
+@pytest.mark.parametrize("fmt, load", [("json", json.load), ("yaml", yaml.safe_load)])
+def test_command_line_writes_plant(tmp_path, capsys, fmt, load):
+    output = tmp_path / f"plant.{fmt}"
+    main(["--workstations", "12", "--cell-size", "5", "--seed", "2", "--format", fmt, "-o", str(output)])
+    with open(output, encoding="utf-8") as f:
+        assert load(f) == generate_plant(12, 5, 2)
+    assert "workstations 12" in capsys.readouterr().out
@@ -0,0 +1,63 @@
+"""请求统计测试：按路由的SQL语句计数、慢请求记录和耗时分位数估计
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import importlib
+
+import pytest
+
+from app.services.request_metrics import LATENCY_BUCKETS, _bucket_quantile, request_metrics
+
+# app.services 导出的同名单例遮住了模块属性
+request_metrics_module = importlib.import_module("app.services.request_metrics")
+
+
+@pytest.fixture
+def metrics(client):
+    request_metrics.reset()
+    yield client
+    request_metrics.reset()
+
+
+def test_queries_are_counted_per_route(metrics, demo_line):
+    response = metrics.get(f"/api/production-lines/{demo_line}")
+    assert response.status_code == 200
+    metrics.get("/api/production-lines/missing")
+    metrics.get("/no-such-path")
+
+    routes = metrics.get("/api/debug/requests").json()["routes"]
+    entry = routes["GET /api/production-lines/{line_id}"]
+    assert entry["count"] == 2
+    assert entry["errors"] == 0
+    assert 1 <= entry["max_queries"] <= entry["queries_per_request"] * 2
+    assert entry["p50_ms"] <= entry["p99_ms"] <= entry["max_ms"]
+    assert sum(entry["buckets"].values()) == 2
+    assert routes["unmatched"]["count"] == 1
+    # 请求之外执行的语句（如夹具导入产线）不计入
+    assert set(routes) == {"GET /api/production-lines/{line_id}", "unmatched"}
+
+
+def test_slow_requests_keep_the_most_repeated_statement(metrics, demo_line, monkeypatch, caplog):
+    monkeypatch.setattr(request_metrics_module, "SLOW_REQUEST_QUERIES", 0)
+    metrics.get(f"/api/production-lines/{demo_line}")
+
+    summary = metrics.get("/api/debug/requests").json()
+    slow = summary["slow_requests"][0]
+    assert slow["path"] == f"/api/production-lines/{demo_line}"
+    assert slow["queries"] >= 1
+    assert slow["most_repeated_statement"].startswith("SELECT")
+    assert "慢请求" in caplog.text
+
+    assert metrics.delete("/api/debug/requests").status_code == 200
+    assert metrics.get("/api/debug/requests").json()["slow_requests"] == []
+
+
+def test_bucket_quantile_interpolates():
+    buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+    buckets[0] = 5   # <= 5ms
+    buckets[1] = 5   # 5-10ms
+    assert _bucket_quantile(buckets, 10, 0.5, 0.009) == pytest.approx(0.005)
+    assert _bucket_quantile(buckets, 10, 0.7, 0.009) == pytest.approx(0.007)
+    # 不超过实际最大值
+    assert _bucket_quantile(buckets, 10, 0.99, 0.009) == 0.009
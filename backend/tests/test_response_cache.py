@@ -0,0 +1,58 @@
+"""列表响应缓存测试：按产线版本号失效、LRU淘汰和与未缓存响应一致
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+from app.services.response_cache import ResponseCache, response_cache
+
+
+def test_entries_expire_with_line_version():
+    cache = ResponseCache()
+    cache.put("workstations", "line_a", 1, b"[1]")
+    assert cache.get("workstations", "line_a", 1) == b"[1]"
+    assert cache.get("workstations", "line_a", 2) is None
+    assert cache.get("buffers", "line_a", 1) is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 2)
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResponseCache(max_bytes=10)
+    cache.put("r", "a", 0, b"1234")
+    cache.put("r", "b", 0, b"1234")
+    cache.get("r", "a", 0)
+    cache.put("r", "c", 0, b"1234")
+    assert cache.get("r", "b", 0) is None
+    assert cache.get("r", "a", 0) == cache.get("r", "c", 0) == b"1234"
+    # 替换同一键时扣除旧的大小，超过上限的响应体不缓存
+    cache.put("r", "a", 1, b"12")
+    cache.put("r", "d", 0, b"x" * 11)
+    assert cache.stats()["bytes"] == 6
+    assert cache.get("r", "d", 0) is None
+
+
+def test_list_is_served_from_cache_until_the_line_changes(client, demo_line):
+    params = {"production_line_id": demo_line}
+    first = client.get("/api/workstations/", params=params)
+    hits = response_cache.stats()["hits"]
+    second = client.get("/api/workstations/", params=params)
+    assert response_cache.stats()["hits"] == hits + 1
+    assert second.content == first.content
+
+    buffers = client.get("/api/buffers/", params=params).content
+    assert client.put("/api/workstations/ws_001", json={"capacity": 3}).status_code == 200
+    hits = response_cache.stats()["hits"]
+    third = client.get("/api/workstations/", params=params).json()
+    assert response_cache.stats()["hits"] == hits
+    assert {ws["id"]: ws["capacity"] for ws in third}["ws_001"] == 3
+    # 同一产线的其他列表一并失效，重新生成的内容不变
+    assert client.get("/api/buffers/", params=params).content == buffers
+    assert response_cache.stats()["hits"] == hits
+
+
+def test_cached_body_matches_unfiltered_list(client, demo_line):
+    cached = client.get("/api/routines/", params={"production_line_id": demo_line}).json()
+    client.get("/api/routines/", params={"production_line_id": demo_line})
+    # 未按产线过滤时不缓存，单条产线时内容相同
+    entries = response_cache.stats()["entries"]
+    assert client.get("/api/routines/").json() == cached
+    assert response_cache.stats()["entries"] == entries
@@ -0,0 +1,67 @@
+"""仿真结果缓存测试：产线指纹规范化、缓存键和容量淘汰
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import copy
+
+from app.services.result_cache import ResultCache, result_cache
+from app.utils.fingerprint import line_fingerprint
+
+
+def test_fingerprint_ignores_layout_names_and_order(default_config):
+    variant = copy.deepcopy(default_config)
+    line = variant["production_line"]
+    line["name"] = "改名后的产线"
+    line["workstations"].reverse()
+    line["workstations"][0]["position"] = {"x": 999, "y": 1}
+    line["buffers"][0]["capacity"] = float(line["buffers"][0]["capacity"])
+    assert line_fingerprint(variant) == line_fingerprint(default_config)
+
+
+def test_fingerprint_changes_with_simulation_fields(default_config):
+    variant = copy.deepcopy(default_config)
+    variant["production_line"]["buffers"][0]["capacity"] += 1
+    assert line_fingerprint(variant) != line_fingerprint(default_config)
+
+
+def test_cache_key_ignores_calendar_and_fills_defaults():
+    key = ResultCache.key("fp", 1, {"duration": 100})
+    assert key == ResultCache.key("fp", 1, {"duration": 100.0, "warmup": 0, "calendar": "calendar_queue"})
+    assert key != ResultCache.key("fp", 2, {"duration": 100})
+    assert key != ResultCache.key("fp", 1, {"duration": 101})
+
+
+def test_least_recently_used_results_are_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10_000)
+    payload = {"values": list(range(1500))}
+    cache.put("a", payload)
+    size = cache.stats()["bytes"]
+    count = 10_000 // size
+    for i in range(count - 1):
+        cache.put(f"b{i}", payload)
+    assert cache.get("a") == payload
+    cache.put("c", payload)
+    # 刚访问过的 a 保留，最早写入且未再访问的 b0 被淘汰
+    assert cache.get("a") == payload
+    assert cache.get("b0") is None
+    assert cache.stats()["bytes"] <= 10_000
+
+
+def test_layout_change_still_hits_cache(client, demo_line):
+    result_cache.clear()
+    request = {"production_line_id": demo_line, "seed": 32, "params": {"duration": 3600}}
+    first = client.post("/api/simulations/run", json=request).json()
+    assert first["cached"] is False
+
+    response = client.put("/api/workstations/ws_001", json={"position": {"x": 10, "y": 20}})
+    assert response.status_code == 200
+    second = client.post("/api/simulations/run", json=request).json()
+    assert second["cached"] is True
+    assert second["fingerprint"] == first["fingerprint"]
+    assert second["result"] == first["result"]
+
+    client.put("/api/workstations/ws_001", json={"capacity": 2})
+    third = client.post("/api/simulations/run", json=request).json()
+    assert third["cached"] is False
+    assert third["fingerprint"] != first["fingerprint"]
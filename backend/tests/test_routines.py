@@ -0,0 +1,33 @@
+"""流转路径接口测试：列表接口的查询次数与流转路径数无关、内容与逐条读取一致
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+from app.services import ConfigService
+from app.services.request_metrics import request_metrics
+from benchmarks.plant_generator import generate_plant
+
+
+def test_list_queries_do_not_grow_with_routines(client, db_session):
+    queries = {}
+    for routines in (2, 12):
+        config = generate_plant(routines * 5, cell_size=5)
+        line_id = config["production_line"]["id"]
+        ConfigService.import_config(db_session, config)
+
+        request_metrics.reset()
+        listed = client.get("/api/routines/", params={"production_line_id": line_id}).json()
+        queries[routines] = request_metrics.summary()["routes"]["GET /api/routines/"]["max_queries"]
+
+        assert [routine["id"] for routine in listed] == [routine["id"] for routine in config["routines"]]
+        for routine in listed:
+            assert client.get(f"/api/routines/{routine['id']}").json() == routine
+    request_metrics.reset()
+    assert queries[2] == queries[12]
+
+    # 未按产线过滤时同样一次取出全部步骤和连线
+    everything = client.get("/api/routines/").json()
+    assert len(everything) == 14
+    assert sum(len(routine["steps"]) for routine in everything) == sum(
+        len(client.get(f"/api/routines/{routine['id']}").json()["steps"]) for routine in everything
+    )
@@ -0,0 +1,86 @@
+"""运行记录测试：LTTB降采样、序列编码、多分辨率存储和窗口查询
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import math
+
+from app.utils.timeseries import build_levels, decode_series, encode_series, lttb, slice_window
+
+
+def _wave(n):
+    xs = [float(i) for i in range(n)]
+    ys = [math.sin(i / 50.0) * 10 for i in range(n)]
+    return xs, ys
+
+
+def test_lttb_keeps_endpoints_and_target_size():
+    xs, ys = _wave(10_000)
+    down_x, down_y = lttb(xs, ys, 500)
+    assert len(down_x) == len(down_y) == 500
+    assert (down_x[0], down_y[0]) == (xs[0], ys[0])
+    assert (down_x[-1], down_y[-1]) == (xs[-1], ys[-1])
+    assert down_x == sorted(down_x)
+    assert set(zip(down_x, down_y)) <= set(zip(xs, ys))
+
+
+def test_lttb_preserves_spikes():
+    xs = [float(i) for i in range(1000)]
+    ys = [0.0] * 1000
+    ys[137] = 50.0
+    ys[700] = -30.0
+    _, down_y = lttb(xs, ys, 50)
+    assert 50.0 in down_y and -30.0 in down_y
+
+
+def test_lttb_returns_short_series_unchanged():
+    xs, ys = _wave(10)
+    assert lttb(xs, ys, 20) == (xs, ys)
+    assert lttb(xs, ys, 2) == (xs, ys)
+
+
+def test_encode_roundtrip():
+    xs, ys = _wave(1234)
+    times, values = decode_series(encode_series(xs, ys))
+    assert list(times) == xs
+    assert all(abs(a - b) < 1e-5 for a, b in zip(values, ys))
+
+
+def test_build_levels_only_adds_coarser_levels():
+    xs, ys = _wave(5000)
+    levels = build_levels(xs, ys, (20000, 4000, 800))
+    assert [(level, len(level_xs)) for level, level_xs, _ in levels] == [(0, 5000), (1, 4000), (2, 800)]
+
+
+def test_slice_window_is_inclusive():
+    xs, ys = _wave(100)
+    window_x, _ = slice_window(xs, ys, 10, 20)
+    assert window_x[0] == 10 and window_x[-1] == 20 and len(window_x) == 11
+
+
+def test_saved_run_series_by_window(client, demo_line):
+    response = client.post("/api/simulations/run", json={
+        "production_line_id": demo_line,
+        "seed": 33,
+        "params": {"duration": 28800, "record_interval": 1},
+        "use_cache": False,
+        "save": True,
+    })
+    run_id = response.json()["run_id"]
+    run = client.get(f"/api/simulations/runs/{run_id}").json()
+    wip = next(s for s in run["series"] if s["entity_type"] == "line" and s["metric"] == "wip")
+    assert wip["points"] > 20000
+
+    query = {"entity_type": "line", "entity_id": demo_line, "metric": "wip"}
+    whole = client.get(f"/api/simulations/runs/{run_id}/series", params={**query, "max_points": 500}).json()
+    assert len(whole["times"]) == 500
+    # 整段查询使用降采样级别，小窗口查询回到原始级别
+    assert whole["level"] > 0
+    window = client.get(
+        f"/api/simulations/runs/{run_id}/series", params={**query, "start": 100, "end": 300, "max_points": 500}
+    ).json()
+    assert window["level"] == 0
+    assert window["times"][0] >= 100 and window["times"][-1] <= 300
+
+    assert client.delete(f"/api/simulations/runs/{run_id}").status_code == 204
+    assert client.get(f"/api/simulations/runs/{run_id}").status_code == 404
@@ -0,0 +1,82 @@
+"""响应序列化测试：预编译编码器的输出与FastAPI按 response_model 序列化的字节相同
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+import importlib
+import json
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+from app.models.buffer import Buffer
+from app.models.production_line import ProductionLine
+from app.models.routine import Routine
+from app.models.transport_path import TransportPath
+from app.models.workstation import Workstation
+from app.services.serialization import encode_json
+
+serialization = importlib.import_module("app.services.serialization")
+
+
+def _fastapi_bytes(annotation, content):
+    """FastAPI的默认路径：按 response_model 校验、model_dump(mode="json")，再由 JSONResponse 编码"""
+    adapter = TypeAdapter(annotation)
+    value = adapter.dump_python(adapter.validate_python(content, from_attributes=True), mode="json")
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+@pytest.fixture(params=["orjson", "json"])
+def dumps_backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("未安装 orjson")
+    return request.param
+
+
+WORKSTATION = {
+    "id": "ws_1",
+    "production_line_id": "line_1",
+    "name": "车床",
+    "type": "processing",
+    "capacity": 2,
+    "processing_time": {"type": "normal", "mean": 12, "std": 1.5},
+    "status": "idle",
+    "input_buffer_id": None,
+    "output_buffer_id": "buf_1",
+    "position": {"x": 1, "y": 2.5},
+    "properties": {"mtbf": 3600, "note": "引号\"和\\反斜杠"},
+}
+
+
+@pytest.mark.parametrize("content", [
+    WORKSTATION,
+    # 缺少有默认值的字段、带多余的键
+    {key: value for key, value in WORKSTATION.items() if key not in ("status", "properties", "position")},
+    {**WORKSTATION, "extra": 1},
+])
+def test_workstation_matches_fastapi(dumps_backend, content):
+    assert encode_json(Workstation, content) == _fastapi_bytes(Workstation, content)
+    assert encode_json(List[Workstation], [content, content]) == _fastapi_bytes(List[Workstation], [content, content])
+
+
+def test_orm_objects_are_read_by_attribute(dumps_backend):
+    row = SimpleNamespace(**WORKSTATION)
+    assert encode_json(Workstation, row) == _fastapi_bytes(Workstation, row)
+
+
+@pytest.mark.parametrize("path, model", [
+    ("/api/production-lines/", List[ProductionLine]),
+    ("/api/workstations/", List[Workstation]),
+    ("/api/buffers/", List[Buffer]),
+    ("/api/transport-paths/", List[TransportPath]),
+    ("/api/routines/", List[Routine]),
+    ("/api/routines/routine_001", Routine),
+])
+def test_api_responses_match_fastapi(client, demo_line, dumps_backend, path, model):
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.content == _fastapi_bytes(model, response.json())
@@ -0,0 +1,93 @@
+"""价值流核算测试
+
+在 backend 目录下运行:
+    python -m pytest tests
+"""
+from app.simulation import run_simulation
+from benchmarks.plant_generator import generate_plant
+
+
+def test_large_line_value_stream():
+    """位置编码超过 int16 范围（工作站和缓冲区共约5万个）时记录加工明细"""
+    config = generate_plant(40000, cell_size=10)
+    result = run_simulation(config, {"duration": 30, "value_stream": True})
+    workstations = result["value_stream"]["workstations"]
+    # 编码最大的工作站（末尾单元的首个工作站）的加工明细按其ID正确归集
+    last_cell = config["routines"][-1]["steps"][0]["workstation_id"]
+    assert workstations[last_cell]["operations"] > 0
+
+
+def _line(steps, value_stream, buffers=()):
+    return {
+        "production_line": {
+            "id": "line_vs",
+            "name": "价值流",
+            "workstations": [
+                {"id": "ws_1", "name": "1", "type": "processing", "capacity": 1,
+                 "processing_time": {"type": "fixed", "value": 10}, "input_buffer_id": "buf_1"},
+                {"id": "ws_2", "name": "2", "type": "processing", "capacity": 1,
+                 "processing_time": {"type": "fixed", "value": 5}},
+            ],
+            "buffers": [{"id": buf_id, "name": buf_id, "capacity": 5} for buf_id in buffers],
+            "transport_paths": [],
+        },
+        "routines": [{"id": "routine", "name": "routine", "material_type": "raw", "steps": steps}],
+        "value_stream": value_stream,
+    }
+
+
+VALUE_STREAM = {
+    "value_points": [{"workstation_id": "ws_1", "value_added": 3}],
+    "cost_points": [
+        {"workstation_id": "ws_1", "cost_type": "labor", "cost_per_unit": 2},
+        {"workstation_id": "ws_2", "cost_type": "machine", "cost_per_unit": 1},
+    ],
+}
+
+
+def test_value_cost_and_va_ratio_of_a_serial_line():
+    steps = [
+        {"step_id": 1, "workstation_id": "ws_1", "operation": "processing"},
+        {"step_id": 2, "workstation_id": "ws_2", "operation": "processing", "value_added": True, "value_amount": 7},
+    ]
+    result = run_simulation(_line(steps, VALUE_STREAM), {"duration": 1000, "value_stream": True})
+    vs = result["value_stream"]
+    totals = vs["totals"]
+    completed = result["kpis"]["completed"]
+    assert totals["completed"] == completed > 90
+    # 工作站价值增加点3 + 步骤增值额7，两步加工都增值；
+    # 连续投料时下一件在上一件开始加工时投放，先等待一个加工周期，生产周期为 10 + 10 + 5
+    assert totals["value_added"] == 10 * completed
+    assert totals["va_time"] == 15 * completed
+    assert totals["lead_time"] == 25 * completed - 10  # 首件不等待
+    assert totals["va_ratio"] == totals["va_time"] / totals["lead_time"]
+    assert vs["routines"]["routine"]["cost_per_unit"] == 3
+    # 已发生成本按开始的加工计入，含尚未完工的在制品
+    stations = vs["workstations"]
+    assert vs["cost_by_type"] == {"labor": 2 * stations["ws_1"]["operations"], "machine": stations["ws_2"]["operations"]}
+    assert stations["ws_1"]["processing_time"] == 10 * stations["ws_1"]["operations"]
+
+
+def test_rework_adds_cost_but_no_value():
+    steps = [
+        {"step_id": 1, "workstation_id": "ws_1", "operation": "processing"},
+        {"step_id": 2, "workstation_id": "ws_2", "operation": "inspection",
+         "conditions": {"type": "quality_check", "pass_rate": 0.5, "fail_route": "step_1"}},
+    ]
+    # 返工物料回到 ws_1 的输入缓冲区，不与 ws_1 上等待质检的物料互相阻塞
+    config = _line(steps, VALUE_STREAM, buffers=["buf_1"])
+    result = run_simulation(config, {"duration": 5000, "value_stream": True}, seed=2)
+    totals = result["value_stream"]["totals"]
+    assert totals["rework_operations"] > 0
+    assert totals["rework_cost"] > 0
+    # 每件完工物料只在首次经过 ws_1 时增值
+    assert totals["value_added"] == 3 * totals["completed"]
+    assert totals["va_ratio"] < 1.0
+
+
+def test_warmup_excludes_earlier_completions():
+    steps = [{"step_id": 1, "workstation_id": "ws_1", "operation": "processing"}]
+    full = run_simulation(_line(steps, VALUE_STREAM), {"duration": 1000, "value_stream": True})
+    warm = run_simulation(_line(steps, VALUE_STREAM), {"duration": 1000, "warmup": 500, "value_stream": True})
+    assert warm["value_stream"]["totals"]["completed"] == warm["kpis"]["completed"]
+    assert warm["value_stream"]["totals"]["completed"] < full["value_stream"]["totals"]["completed"]